@@ -18,6 +18,12 @@ import uuid
 from typing import Optional
 
 from ccnpy.crypto.AeadKey import AeadKey, AeadGcm, AeadCcm
+from ccnpy.crypto.DirectoryKeystore import DirectoryKeystore
+from ccnpy.crypto.EcKey import EcKey
+from ccnpy.crypto.EcdsaP256 import EcdsaP256Signer, EcdsaP256Verifier
+from ccnpy.crypto.Ed25519 import Ed25519Signer, Ed25519Verifier
+from ccnpy.crypto.HmacKey import HmacKey
+from ccnpy.crypto.HmacSha256 import HmacSha256Signer
 from ccnpy.crypto.HpkeKdfIdentifiers import HpkeKdfIdentifiers
 from ccnpy.crypto.InsecureKeystore import InsecureKeystore
 from ccnpy.crypto.RsaKey import RsaKey
@@ -26,6 +32,7 @@ from ccnpy.flic.RsaOaepCtx.RsaOaepEncryptor import RsaOaepEncryptor
 from ccnpy.flic.aeadctx.AeadDecryptor import AeadDecryptor
 from ccnpy.flic.aeadctx.AeadEncryptor import AeadEncryptor
 from ccnpy.flic.aeadctx.AeadParameters import AeadParameters
+from ccnpy.flic.aeadctx.NonceSource import NonceSource, CounterNonceSource
 from ccnpy.flic.tlvs.KdfAlg import KdfAlg
 from ccnpy.flic.tlvs.KdfData import KdfData
 from ccnpy.flic.tlvs.KdfInfo import KdfInfo
@@ -50,9 +57,18 @@ def _str_to_array(value: str):
 def add_encryption_cli_args(parser):
 
     parser.add_argument('-k', dest="key_file", default=None,
-                        help="RSA key in PEM format to sign the root manifest")
+                        help="RSA, Ed25519, or ECDSA P-256 key in PEM format to sign the root manifest")
     parser.add_argument('-p', dest="key_pass", default=None,
-                        help="RSA key password (otherwise will prompt)")
+                        help="Signing key password (otherwise will prompt)")
+    parser.add_argument('--sign-alg', dest="sign_alg", default=None, choices=['rsa-sha256', 'ed25519', 'ecdsa-p256'],
+                        help="Signature algorithm, must match the -k key (default: from the key)")
+    parser.add_argument('--hmac-key', dest="hmac_key", type=_str_to_array, default=None,
+                        help="HMAC-SHA256 key (hex string) to sign every data object and manifest")
+
+    parser.add_argument('--key-dir', dest="key_dir", default=None,
+                        help="Directory of key files, loaded on first use (see DirectoryKeystore).  Uses -p as the password.")
+    parser.add_argument('--key-preload', dest="key_preload", action='store_true',
+                        help="With --key-dir, load and unlock the keys at startup")
 
     parser.add_argument('--wrap-key', dest="wrap_key", default=None, help="Wrapping key for RSA-OAEP mode.")
     parser.add_argument('--wrap-pass', dest="wrap_pass", default=None, help="Wrapping key key password (otherwise will prompt).")
@@ -68,6 +84,9 @@ def add_encryption_cli_args(parser):
     parser.add_argument('--salt', dest="salt", type=lambda x: int(x,0), default=None,
                         help="Upto a 4-byte salt to include in the IV with the nonce.")
 
+    parser.add_argument('--nonce-state', dest="nonce_state", default=None,
+                        help="Use counter nonces for --enc-key, with the high-water mark kept in this file (one file per key)")
+
     parser.add_argument('--kdf', dest="kdf_alg", type=lambda x: HpkeKdfIdentifiers.parse(x),
                         choices=[HpkeKdfIdentifiers.HKDF_SHA256, HpkeKdfIdentifiers.HKDF_SHA384, HpkeKdfIdentifiers.HKDF_SHA512],
                         default=None,
@@ -114,9 +133,18 @@ def aead_parameters_from_cli(args):
 
     return params
 
+def nonce_source_from_cli_args(args) -> Optional[NonceSource]:
+    """
+    A counter nonce source if `--nonce-state` is given, otherwise None (the encryptor uses random nonces)
+    """
+    nonce_state = getattr(args, 'nonce_state', None)
+    if nonce_state is None:
+        return None
+    return CounterNonceSource(state_path=nonce_state)
+
 def aead_encryptor_from_cli_args(args) -> Optional[AeadEncryptor]:
     if args.enc_key is not None:
-        return AeadEncryptor(aead_parameters_from_cli(args))
+        return AeadEncryptor(aead_parameters_from_cli(args), nonce_source=nonce_source_from_cli_args(args))
     return None
 
 def aead_decryptor_from_cli_args(args) -> Optional[AeadDecryptor]:
@@ -132,7 +160,8 @@ def rsa_oaep_encryptor_from_cli_args(args):
     if args.enc_key is None:
         encryptor = RsaOaepEncryptor.create_with_new_content_key(wrapping_key=wrapping_key, kdf_data=kdf_data_from_cli(args))
     else:
-        encryptor = RsaOaepEncryptor(wrapping_key=wrapping_key, params=aead_parameters_from_cli(args))
+        encryptor = RsaOaepEncryptor(wrapping_key=wrapping_key, params=aead_parameters_from_cli(args),
+                                     nonce_source=nonce_source_from_cli_args(args))
     logger.debug(encryptor)
     return encryptor
 
@@ -142,17 +171,59 @@ def encryptor_from_cli_args(args):
     else:
         return rsa_oaep_encryptor_from_cli_args(args)
 
-def rsa_signer_from_cli_args(args):
-    if args.key_file is not None:
-        signing_key = RsaKey.load_pem_key(args.key_file, args.key_pass)
-        return RsaSha256Signer(signing_key)
-    return None
+def load_signing_key(filename, password=None) -> RsaKey | EcKey:
+    """
+    Load a PEM key that may be RSA, Ed25519, or ECDSA P-256.
+    """
+    with open(filename, "rb") as key_file:
+        pem = key_file.read()
+    if EcKey.is_ec_pem(pem, password):
+        return EcKey(pem, password)
+    return RsaKey(pem, password)
+
+def _signing_key_from_cli_args(args) -> Optional[RsaKey | EcKey]:
+    if args.key_file is None:
+        return None
+    key = load_signing_key(args.key_file, args.key_pass)
+    sign_alg = getattr(args, 'sign_alg', None)
+    if sign_alg is not None:
+        algorithms = {'rsa-sha256': RsaKey, 'ed25519': EcKey.ED25519, 'ecdsa-p256': EcKey.ECDSA_P256}
+        actual = key.algorithm() if isinstance(key, EcKey) else RsaKey
+        if actual != algorithms[sign_alg]:
+            raise ValueError(f'--sign-alg {sign_alg} does not match the key in {args.key_file}')
+    return key
+
+def signer_from_cli_args(args):
+    key = _signing_key_from_cli_args(args)
+    if key is None:
+        return None
+    if isinstance(key, RsaKey):
+        return RsaSha256Signer(key)
+    if key.algorithm() == EcKey.ED25519:
+        return Ed25519Signer(key)
+    return EcdsaP256Signer(key)
+
+def verifier_from_cli_args(args):
+    key = _signing_key_from_cli_args(args)
+    if key is None:
+        return None
+    if isinstance(key, RsaKey):
+        return RsaSha256Verifier(key)
+    if key.algorithm() == EcKey.ED25519:
+        return Ed25519Verifier(key)
+    return EcdsaP256Verifier(key)
+
+def hmac_key_from_cli_args(args) -> Optional[HmacKey]:
+    hmac_key = getattr(args, 'hmac_key', None)
+    if hmac_key is None:
+        return None
+    return HmacKey(hmac_key)
 
-def rsa_verifier_from_cli_args(args):
-    if args.key_file is not None:
-        public_key = RsaKey.load_pem_key(args.key_file, args.key_pass)
-        return RsaSha256Verifier(public_key)
-    return None
+def hmac_signer_from_cli_args(args) -> Optional[HmacSha256Signer]:
+    key = hmac_key_from_cli_args(args)
+    if key is None:
+        return None
+    return HmacSha256Signer(key)
 
 def fixup_key_password(args, ask_for_pass: bool = True):
     if args.key_pass is None:
@@ -168,13 +239,24 @@ def fixup_key_password(args, ask_for_pass: bool = True):
                 args.wrap_pass = None
 
 def create_keystore(args):
-    keystore = InsecureKeystore()
+    key_dir = getattr(args, 'key_dir', None)
+    if key_dir is not None:
+        keystore = DirectoryKeystore(key_dir, password=args.key_pass, preload=getattr(args, 'key_preload', False))
+    else:
+        keystore = InsecureKeystore()
     aead_params = aead_parameters_from_cli(args)
     if aead_params.key is not None:
         keystore.add_aes_key(aead_params)
 
-    if args.key_file is not None:
-        keystore.add_rsa_key(name='default', key=RsaKey.load_pem_key(args.key_file, args.key_pass))
+    signing_key = _signing_key_from_cli_args(args)
+    if isinstance(signing_key, EcKey):
+        keystore.add_ec_key(name='default', key=signing_key)
+    elif signing_key is not None:
+        keystore.add_rsa_key(name='default', key=signing_key)
+
+    hmac_key = hmac_key_from_cli_args(args)
+    if hmac_key is not None:
+        keystore.add_hmac_key(hmac_key)
 
     if args.wrap_key is not None:
         keystore.add_rsa_key(name='wrap', key=RsaKey.load_pem_key(args.wrap_key, args.wrap_pass))
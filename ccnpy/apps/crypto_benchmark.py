@@ -0,0 +1,427 @@
+#  Copyright 2024 Marc Mosko
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+import argparse
+import functools
+import io
+import json
+import os
+import platform
+import sys
+import time
+import timeit
+import tracemalloc
+from array import array
+from typing import Callable, List, Optional, Dict
+
+import cryptography
+from crc32c import crc32c
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import padding, rsa
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM, AESCCM
+
+from ccnpy.core.HashValue import HashValue
+from ccnpy.core.Name import Name
+from ccnpy.crypto.AeadKey import AeadGcm, AeadCcm
+from ccnpy.crypto.Crc32c import Crc32cSigner, Crc32cVerifier
+from ccnpy.crypto.EcKey import EcKey
+from ccnpy.crypto.EcdsaP256 import EcdsaP256Signer, EcdsaP256Verifier
+from ccnpy.crypto.Ed25519 import Ed25519Signer, Ed25519Verifier
+from ccnpy.crypto.HmacKey import HmacKey
+from ccnpy.crypto.HmacSha256 import HmacSha256Signer, HmacSha256Verifier
+from ccnpy.crypto.HpkeKdfIdentifiers import HpkeKdfIdentifiers
+from ccnpy.crypto.KDF import KDF
+from ccnpy.crypto.RsaKey import RsaKey
+from ccnpy.crypto.RsaSha256 import RsaSha256Signer, RsaSha256Verifier
+from ccnpy.flic.ManifestTree import ManifestTree
+from ccnpy.flic.ManifestTreeOptions import ManifestTreeOptions
+from ccnpy.flic.RsaOaepCtx.WrappedKey import WrappedKey
+from ccnpy.flic.aeadctx.AeadData import AeadData
+from ccnpy.flic.aeadctx.AeadImpl import AeadImpl
+from ccnpy.flic.aeadctx.AeadParameters import AeadParameters
+from ccnpy.flic.aeadctx.DerivedKeyCache import DerivedKeyCache
+from ccnpy.flic.name_constructor.SchemaType import SchemaType
+from ccnpy.flic.tlvs.AeadMode import AeadMode
+from ccnpy.flic.tlvs.HashGroup import HashGroup
+from ccnpy.flic.tlvs.KdfData import KdfData
+from ccnpy.flic.tlvs.KdfInfo import KdfInfo
+from ccnpy.flic.tlvs.Node import Node
+from ccnpy.flic.tlvs.Pointers import Pointers
+from ccnpy.flic.tree.TreeIO import TreeIO
+
+
+def _node(pointers: int) -> Node:
+    hashes = [HashValue.create_sha256(array('B', os.urandom(32))) for _ in range(pointers)]
+    return Node(hash_groups=[HashGroup(pointers=Pointers(hashes))])
+
+
+def _per_manifest_usec(params: AeadParameters, key_cache: DerivedKeyCache, node: Node, count: int) -> float:
+    """
+    Encrypt and decrypt `count` manifests.  Each manifest uses its own `AeadImpl`, as a reader does when
+    it creates a decryptor per security context.
+    """
+    start = time.perf_counter()
+    for _ in range(count):
+        impl = AeadImpl(params, key_cache=key_cache)
+        manifest = impl.create_encrypted_manifest(node)
+        impl.decrypt_manifest(manifest)
+    return (time.perf_counter() - start) / count * 1E6
+
+
+def _ops_per_sec(function, count: int) -> float:
+    start = time.perf_counter()
+    for _ in range(count):
+        function()
+    return count / (time.perf_counter() - start)
+
+
+def _root_packet_size(signer) -> int:
+    """The size of a signed root manifest for a small file"""
+    tree_options = ManifestTreeOptions(name=Name.from_uri('ccnx:/crypto_benchmark'), schema_type=SchemaType.HASHED, signer=signer)
+    data_input = io.BytesIO(os.urandom(10000))
+    return len(ManifestTree(data_input=data_input, packet_output=TreeIO.PacketMemoryWriter(), tree_options=tree_options).build())
+
+
+def run_kdf(args):
+    key_class = AeadCcm if args.ccm else AeadGcm
+    params = AeadParameters(key=key_class.generate(args.bits), key_number=1, aead_salt=0x01020304,
+                            kdf_data=KdfData.create_hkdf_sha256(KdfInfo(b'crypto_benchmark')), kdf_salt=0x0a0b0c0d)
+    node = _node(args.pointers)
+
+    uncached = DerivedKeyCache(max_entries=0)
+    cached = DerivedKeyCache()
+    without_cache = _per_manifest_usec(params, uncached, node, args.count)
+    with_cache = _per_manifest_usec(params, cached, node, args.count)
+
+    print(f"{key_class.aead_mode()}-{args.bits} with HKDF-SHA256, {args.count} manifests of {args.pointers} pointers")
+    print(f"  without cache: {without_cache:10.2f} usec/manifest  (KDF {uncached.derive_seconds / args.count * 1E6:.2f} usec/manifest)")
+    print(f"  with cache:    {with_cache:10.2f} usec/manifest  ({cached})")
+    if with_cache > 0:
+        print(f"  speedup:       {without_cache / with_cache:10.2f}x")
+
+
+def _key_pair(key, signer_class, verifier_class):
+    return signer_class(key), verifier_class(key)
+
+
+def run_sign(args):
+    """
+    Sign and verify operations per second, signature size, and root manifest packet size for each signer.
+    """
+    algorithms = [
+        ('CRC32C', lambda: (Crc32cSigner(), Crc32cVerifier())),
+        ('HMAC-SHA256', lambda: _key_pair(HmacKey.generate(), HmacSha256Signer, HmacSha256Verifier)),
+        ('RSA-2048-SHA256', lambda: _key_pair(RsaKey.generate_private_key(2048), RsaSha256Signer, RsaSha256Verifier)),
+        ('RSA-4096-SHA256', lambda: _key_pair(RsaKey.generate_private_key(4096), RsaSha256Signer, RsaSha256Verifier)),
+        ('Ed25519', lambda: _key_pair(EcKey.generate_ed25519(), Ed25519Signer, Ed25519Verifier)),
+        ('ECDSA-P256', lambda: _key_pair(EcKey.generate_p256(), EcdsaP256Signer, EcdsaP256Verifier)),
+    ]
+    buffer = os.urandom(args.sign_bytes)
+    print(f"{'algorithm':16} {'sign/s':>10} {'verify/s':>10} {'sign MB/s':>10} {'sig bytes':>10} {'root bytes':>10}")
+    for label, create in algorithms:
+        signer, verifier = create()
+        signature = signer.sign(buffer)
+        sign_rate = _ops_per_sec(lambda: signer.sign(buffer), args.count)
+        verify_rate = _ops_per_sec(lambda: verifier.verify(buffer, validation_payload=signature), args.count)
+        sign_mbps = sign_rate * len(buffer) / 1E6
+        print(f"{label:16} {sign_rate:10.0f} {verify_rate:10.0f} {sign_mbps:10.1f} {len(signature.payload()):10} "
+              f"{_root_packet_size(signer):10}")
+
+
+class MicroCase:
+    """
+    One microbenchmark: a single crypto operation on `size` bytes.  If `raw` is not None, it names the case
+    that does the same operation directly with the backend, so the difference is the ccnpy wrapper overhead
+    (e.g. array to bytes conversions).
+
+    `make()` returns the function to time.  The setup (e.g. generating an RSA key) happens there, so it
+    only runs for the cases that `--filter` selects.
+    """
+    def __init__(self, name: str, size: Optional[int], make: Callable[[], Callable], raw: Optional[str] = None):
+        self.name = name
+        self.size = size
+        self.make = make
+        self.raw = raw
+
+
+def _seconds_per_op(function: Callable, repeat: int, min_time: float) -> (float, int):
+    """
+    Like `timeit`: find a loop count that takes at least `min_time` seconds, then return the best
+    seconds per call over `repeat` runs and the total number of calls.
+    """
+    timer = timeit.Timer(function)
+    count = 1
+    while True:
+        elapsed = timer.timeit(count)
+        if elapsed >= min_time:
+            break
+        count *= 2 if elapsed <= 0 else max(2, min(10, int(min_time / elapsed) + 1))
+    best = min([elapsed] + timer.repeat(repeat=repeat - 1, number=count)) if repeat > 1 else elapsed
+    return best / count, count * repeat
+
+
+def _peak_bytes_per_op(function: Callable, count: int = 5) -> int:
+    """
+    The peak memory allocated during one call (the least of `count` calls).  Buffer copies that are live
+    at the same time add up here, so it shows copies that the timing may hide in the noise.
+    """
+    tracemalloc.start()
+    try:
+        peaks = []
+        for _ in range(count):
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+            function()
+            peaks.append(tracemalloc.get_traced_memory()[1] - base)
+    finally:
+        tracemalloc.stop()
+    return min(peaks)
+
+
+def _micro_rsa_cases(bits: int, data: bytes, data_array: array) -> List[MicroCase]:
+    @functools.cache
+    def setup():
+        key = RsaKey.generate_private_key(bits)
+        signer, verifier = RsaSha256Signer(key), RsaSha256Verifier(key)
+        signature = signer.sign(data_array)
+        raw_key = rsa.generate_private_key(public_exponent=65537, key_size=bits)
+        raw_signature = raw_key.sign(data, padding.PKCS1v15(), hashes.SHA256())
+        raw_public_key = raw_key.public_key()
+
+        params = AeadParameters(key=AeadGcm.generate(256), key_number=1, aead_salt=0x01020304)
+        wrapped_key = WrappedKey.create(wrapping_key=key, params=params)
+        aead_data = AeadData(key_number=1, nonce=array('B', 8 * [0]), mode=AeadMode.create_aes_gcm_256())
+        return {
+            'sign': lambda: signer.sign(data_array),
+            'sign.raw': lambda: raw_key.sign(data, padding.PKCS1v15(), hashes.SHA256()),
+            'verify': lambda: verifier.verify(data_array, validation_payload=signature),
+            'verify.raw': lambda: raw_public_key.verify(raw_signature, data, padding.PKCS1v15(), hashes.SHA256()),
+            'wrap': lambda: WrappedKey.create(wrapping_key=key, params=params),
+            'unwrap': lambda: wrapped_key.decrypt(wrapping_key=key, aead_data=aead_data),
+        }
+
+    return [
+        MicroCase(f'rsa{bits}.sign', len(data), lambda: setup()['sign'], raw=f'rsa{bits}.sign.raw'),
+        MicroCase(f'rsa{bits}.sign.raw', len(data), lambda: setup()['sign.raw']),
+        MicroCase(f'rsa{bits}.verify', len(data), lambda: setup()['verify'], raw=f'rsa{bits}.verify.raw'),
+        MicroCase(f'rsa{bits}.verify.raw', len(data), lambda: setup()['verify.raw']),
+        MicroCase(f'wrapped_key.create.rsa{bits}', None, lambda: setup()['wrap']),
+        MicroCase(f'wrapped_key.decrypt.rsa{bits}', None, lambda: setup()['unwrap']),
+    ]
+
+
+def _micro_aead_cases(key_class, raw_class, bits: int, data: bytes, data_array: array) -> List[MicroCase]:
+    prefix = f'{key_class.aead_mode().lower()}{bits}'
+
+    @functools.cache
+    def setup():
+        key = key_class.generate(bits)
+        raw = raw_class(key.key())
+        iv = AeadGcm.nonce(96)
+        iv_bytes = iv.tobytes()
+        # about the size of an AeadCtx, which is the associated data of an encrypted manifest
+        aad = array('B', os.urandom(32))
+        aad_bytes = aad.tobytes()
+        ciphertext, auth_tag = key.encrypt(iv, data_array, aad)
+        combined = raw.encrypt(iv_bytes, data, aad_bytes)
+        return {
+            'encrypt': lambda: key.encrypt(iv, data_array, aad),
+            'encrypt.raw': lambda: raw.encrypt(iv_bytes, data, aad_bytes),
+            'decrypt': lambda: key.decrypt(iv, ciphertext, aad, auth_tag),
+            'decrypt.raw': lambda: raw.decrypt(iv_bytes, combined, aad_bytes),
+        }
+
+    return [
+        MicroCase(f'{prefix}.encrypt', len(data), lambda: setup()['encrypt'], raw=f'{prefix}.encrypt.raw'),
+        MicroCase(f'{prefix}.encrypt.raw', len(data), lambda: setup()['encrypt.raw']),
+        MicroCase(f'{prefix}.decrypt', len(data), lambda: setup()['decrypt'], raw=f'{prefix}.decrypt.raw'),
+        MicroCase(f'{prefix}.decrypt.raw', len(data), lambda: setup()['decrypt.raw']),
+    ]
+
+
+def _micro_manifest_cases(pointers: int) -> List[MicroCase]:
+    """Encrypt and decrypt a whole manifest with `AeadImpl`, as the tree builder and reader do"""
+    node = _node(pointers)
+    size = len(node.serialized_value())
+
+    @functools.cache
+    def setup():
+        params = AeadParameters(key=AeadGcm.generate(256), key_number=1, aead_salt=0x01020304)
+        impl = AeadImpl(params)
+        manifest = impl.create_encrypted_manifest(node)
+        return {
+            'encrypt': lambda: impl.create_encrypted_manifest(node),
+            'decrypt': lambda: impl.decrypt_manifest(manifest),
+        }
+
+    return [
+        MicroCase(f'manifest.encrypt.gcm256.p{pointers}', size, lambda: setup()['encrypt']),
+        MicroCase(f'manifest.decrypt.gcm256.p{pointers}', size, lambda: setup()['decrypt']),
+    ]
+
+
+def _micro_cases(size: int, pointers: int) -> List[MicroCase]:
+    data = os.urandom(size)
+    data_array = array('B', data)
+    crc_signer, crc_verifier = Crc32cSigner(), Crc32cVerifier()
+    crc_signature = crc_signer.sign(data_array)
+    kdf_key = os.urandom(32)
+
+    cases = [
+        MicroCase('crc32c.sign', size, lambda: lambda: crc_signer.sign(data_array), raw='crc32c.raw'),
+        MicroCase('crc32c.verify', size, lambda: lambda: crc_verifier.verify(data_array, validation_payload=crc_signature),
+                  raw='crc32c.raw'),
+        MicroCase('crc32c.raw', size, lambda: lambda: crc32c(data)),
+    ]
+    for bits in (2048, 4096):
+        cases.extend(_micro_rsa_cases(bits, data, data_array))
+    for key_class, raw_class in ((AeadGcm, AESGCM), (AeadCcm, AESCCM)):
+        for bits in (128, 256):
+            cases.extend(_micro_aead_cases(key_class, raw_class, bits, data, data_array))
+    cases.append(MicroCase('kdf.hkdf_sha256.derive32', None,
+                           lambda: lambda: KDF.derive(HpkeKdfIdentifiers.HKDF_SHA256, input_key=kdf_key, length=32,
+                                                      info=b'crypto_benchmark', salt=b'\x0a\x0b\x0c\x0d')))
+    cases.extend(_micro_manifest_cases(pointers))
+    return cases
+
+
+def _environment() -> Dict:
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'machine': platform.machine(),
+        'system': platform.system(),
+        'cpus': os.cpu_count(),
+        'cryptography': cryptography.__version__,
+    }
+
+
+def run_micro(args) -> int:
+    """
+    Time each crypto primitive per operation and per byte.  A case with a `.raw` twin calls the backend
+    directly, and the `overhead` column is the extra cost of the ccnpy wrapper.  The `peak` column is the
+    peak bytes allocated by one operation (see `_peak_bytes_per_op`).
+
+    With `--json`, the results are saved for a later `--compare`.  With `--compare`, each case is compared to
+    the saved results and a case slower by more than `--threshold` percent is a regression.
+
+    :return: The process exit code (1 if there are regressions)
+    """
+    results = []
+    for size in args.sizes:
+        cases = _micro_cases(size, args.pointers)
+        if args.filter is not None:
+            cases = [case for case in cases if args.filter in case.name]
+        for case in cases:
+            function = case.make()
+            seconds, count = _seconds_per_op(function, repeat=args.repeat, min_time=args.min_time)
+            result = {'name': case.name, 'size': case.size, 'usec_per_op': seconds * 1E6, 'ops': count,
+                      'peak_bytes': _peak_bytes_per_op(function),
+                      'ns_per_byte': seconds * 1E9 / case.size if case.size else None,
+                      'mb_per_sec': case.size / seconds / 1E6 if case.size else None,
+                      'raw': case.raw}
+            results.append(result)
+
+    by_key = {(r['name'], r['size']): r for r in results}
+    print(f"{'case':34} {'bytes':>6} {'usec/op':>10} {'ns/byte':>8} {'MB/s':>8} {'peak':>7} {'overhead':>9}")
+    for r in results:
+        raw = by_key.get((r['raw'], r['size'])) if r['raw'] is not None else None
+        overhead = f"{r['usec_per_op'] - raw['usec_per_op']:8.2f}u" if raw is not None else ''
+        ns_per_byte = f"{r['ns_per_byte']:8.2f}" if r['ns_per_byte'] is not None else ''
+        mb_per_sec = f"{r['mb_per_sec']:8.1f}" if r['mb_per_sec'] is not None else ''
+        size = r['size'] if r['size'] is not None else ''
+        print(f"{r['name']:34} {size:>6} {r['usec_per_op']:10.2f} {ns_per_byte:>8} {mb_per_sec:>8} {r['peak_bytes']:7} {overhead:>9}")
+
+    if args.json is not None:
+        with open(args.json, 'w') as f:
+            json.dump({'version': 1, 'time': time.time(), 'environment': _environment(), 'results': results}, f, indent=2)
+        print(f"Saved {len(results)} results to {args.json}")
+
+    if args.compare is not None:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+        regressions = compare_results(baseline['results'], results, threshold=args.threshold / 100)
+        if baseline.get('environment') != _environment():
+            print(f"Note: the baseline ran on {baseline.get('environment')}")
+        if len(regressions) > 0:
+            return 1
+    return 0
+
+
+def compare_results(baseline: List[Dict], results: List[Dict], threshold: float) -> List[str]:
+    """
+    Print the per-operation change of each case in both result lists.
+
+    :param threshold: The fractional slowdown (e.g. 0.1) that counts as a regression
+    :return: The names of the cases that regressed
+    """
+    old_by_key = {(r['name'], r['size']): r for r in baseline}
+    regressions = []
+    print()
+    print(f"{'case':34} {'bytes':>6} {'old usec':>10} {'new usec':>10} {'change':>8} {'old peak':>9} {'new peak':>9}")
+    for r in results:
+        old = old_by_key.get((r['name'], r['size']))
+        if old is None:
+            continue
+        change = r['usec_per_op'] / old['usec_per_op'] - 1
+        flag = ''
+        if change > threshold:
+            flag = ' REGRESSION'
+            regressions.append(r['name'])
+        size = r['size'] if r['size'] is not None else ''
+        # baselines saved before peak_bytes was recorded do not have it
+        old_peak = old.get('peak_bytes', '')
+        print(f"{r['name']:34} {size:>6} {old['usec_per_op']:10.2f} {r['usec_per_op']:10.2f} {change * 100:7.1f}% "
+              f"{old_peak:>9} {r.get('peak_bytes', ''):>9}{flag}")
+    print(f"{len(regressions)} regressions (threshold {threshold * 100:.0f}%)")
+    return regressions
+
+
+def _parse_sizes(value: str) -> List[int]:
+    return [int(x) for x in value.split(',')]
+
+
+def run():
+    parser = argparse.ArgumentParser(description='Measure the cost of the crypto operations.  "kdf" measures the '
+                                                 'per-manifest cost of AEAD encryption with a KDF, with and without '
+                                                 'the derived key cache.  "sign" compares the signature algorithms.  '
+                                                 '"micro" times each crypto primitive and can save and compare results.')
+    parser.add_argument('benchmark', nargs='?', choices=['kdf', 'sign', 'micro'], default='kdf', help='which benchmark (default kdf)')
+    parser.add_argument('-n', dest='count', type=int, default=2000, help='number of operations (default 2000)')
+    parser.add_argument('-p', dest='pointers', type=int, default=40, help='kdf: pointers per manifest (default 40)')
+    parser.add_argument('--ccm', dest='ccm', action='store_true', help='kdf: use AES-CCM instead of AES-GCM')
+    parser.add_argument('--bits', dest='bits', type=int, choices=[128, 256], default=256, help='kdf: key length (default 256)')
+    parser.add_argument('--sign-bytes', dest='sign_bytes', type=int, default=1500, help='sign: bytes per signature (default 1500)')
+    parser.add_argument('--sizes', dest='sizes', type=_parse_sizes, default=[1500],
+                        help='micro: comma separated input sizes in bytes (default 1500)')
+    parser.add_argument('--filter', dest='filter', default=None, help='micro: only run the cases whose name contains this')
+    parser.add_argument('--repeat', dest='repeat', type=int, default=3, help='micro: timing runs per case, the best is kept (default 3)')
+    parser.add_argument('--min-time', dest='min_time', type=float, default=0.2,
+                        help='micro: minimum seconds per timing run (default 0.2)')
+    parser.add_argument('--json', dest='json', default=None, help='micro: save the results to this JSON file')
+    parser.add_argument('--compare', dest='compare', default=None,
+                        help='micro: compare to the results in this JSON file, exit 1 on a regression')
+    parser.add_argument('--threshold', dest='threshold', type=float, default=10.0,
+                        help='micro: percent slowdown that is a regression (default 10)')
+    args = parser.parse_args()
+
+    if args.benchmark == 'sign':
+        run_sign(args)
+    elif args.benchmark == 'micro':
+        sys.exit(run_micro(args))
+    else:
+        run_kdf(args)
+
+
+if __name__ == "__main__":
+    run()
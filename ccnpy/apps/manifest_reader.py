@@ -13,13 +13,23 @@
 #  limitations under the License.
 
 import argparse
+import json
 import logging
 import sys
 from abc import ABC, abstractmethod
 
 from ccnpy.core.Name import Name
+from ccnpy.core.PacketValidator import PacketValidator
 from ccnpy.crypto.InsecureKeystore import InsecureKeystore
+from ccnpy.flic.tree.CachingPacketReader import CachingPacketReader
+from ccnpy.flic.tree.AimdWindow import AimdWindow
+from ccnpy.flic.tree.CoalescingPacketReader import CoalescingPacketReader
+from ccnpy.flic.tree.DelayWindow import DelayWindow
+from ccnpy.flic.tree.FixedWindow import FixedWindow
+from ccnpy.flic.tree.MultiEndpointReader import MultiEndpointReader
+from ccnpy.flic.tree.PositionalFileWriter import PositionalFileWriter
 from ccnpy.flic.tree.Traversal import Traversal
+from ccnpy.flic.tree.TraversalState import TraversalState
 from ccnpy.flic.tree.TreeIO import TreeIO
 from .cli_utils import add_encryption_cli_args, fixup_key_password, create_keystore
 
@@ -54,10 +64,6 @@ class StdOutWrapper:
             value = value.tobytes().decode('utf-8', errors='ignore')
         self._out.write(value)
 
-class ManifestNetworkReader(ManifestReader):
-    pass
-
-
 class ManifestDirectoryReader(ManifestReader):
     """
     """
@@ -73,7 +79,19 @@ class ManifestDirectoryReader(ManifestReader):
         self._root_hash = args.hash_restriction
         self._dir = args.in_dir
         self._keystore = keystore
-        self._reader = TreeIO.PacketDirectoryReader(self._dir)
+        self._reader = self._create_packet_reader(args)
+        self._cache = None
+        if args.cache_mb is not None:
+            self._cache = CachingPacketReader(self._reader, max_bytes=args.cache_mb * 1024 * 1024)
+            self._reader = self._cache
+        self._dedup = None
+        if args.dedup_entries > 0:
+            self._dedup = CoalescingPacketReader(self._reader, max_entries=args.dedup_entries)
+            self._reader = self._dedup
+        self._verify_local = getattr(args, 'verify_local', False)
+        if self._verify_local and args.output_file_name is None:
+            raise ValueError("--verify-local requires --output")
+        self._state = self._create_state(args)
         self._writer = self._create_writer(args)
         self.debug = False
 
@@ -87,14 +105,30 @@ class ManifestDirectoryReader(ManifestReader):
         if self._writer is not None:
             self._writer.close()
             self._writer = None
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+
+    def _create_packet_reader(self, args):
+        return TreeIO.PacketDirectoryReader(self._dir, validator=PacketValidator(self._keystore))
 
     @staticmethod
-    def _create_writer(args):
+    def _create_state(args):
+        if not args.resume:
+            return None
+        if args.output_file_name is None:
+            raise ValueError("--resume requires --output")
+        state_file = f'{args.output_file_name}.state'
+        # Only trust the state if the output file it describes is there
+        return TraversalState.load(state_file, output_filename=args.output_file_name)
+
+    def _create_writer(self, args):
         if args.output_file_name is None:
             # dup so we do not close stdout
             return StdOutWrapper()
 
-        return open(args.output_file_name, 'wb')
+        # when resuming or verifying, keep what was already written
+        return PositionalFileWriter(args.output_file_name, truncate=self._state is None and not self._verify_local)
 
     def read(self):
         """
@@ -102,13 +136,100 @@ class ManifestDirectoryReader(ManifestReader):
         with self._writer:
             traverser = Traversal(packet_input=self._reader,
                                   data_writer=self._writer,
-                                  keystore=self._keystore)
+                                  keystore=self._keystore,
+                                  state=self._state,
+                                  verify_local=self._verify_local)
             # this will walk the manifest tree and write the app data to `data_writer`.
-            traverser.traverse(root_name=self._root_name, hash_restriction=self._root_hash)
+            try:
+                traverser.traverse(root_name=self._root_name, hash_restriction=self._root_hash)
+            except BaseException:
+                if self._state is not None:
+                    # keep the progress for the next --resume
+                    self._state.save()
+                raise
+            if hasattr(self._writer, 'truncate'):
+                # a file kept for --resume or --verify-local may be longer than the object
+                self._writer.truncate(traverser.offset())
+
+        if self._state is not None:
+            self._state.remove()
 
         print()
         print()
         print(f'Finished traversal, {traverser.count()} objects procssed')
+        if traverser.skipped_subtrees > 0:
+            print(f'Resumed, skipped {traverser.skipped_subtrees} completed subtrees ({traverser.skipped_bytes} bytes)')
+        if self._verify_local:
+            print(f'Verified {traverser.verified_subtrees} local subtrees by digest ({traverser.verified_bytes} bytes skipped), '
+                  f'{traverser.digest_mismatches} mismatches, {traverser.digest_verify_seconds:.3f} seconds')
+        if self._dedup is not None:
+            print(f'Deduplicated {self._dedup.dedup_ratio():.3f} of requests ({self._dedup.bytes_deduplicated} bytes): {self._dedup}')
+        if self._cache is not None:
+            print(f'Cache hit ratio {self._cache.hit_ratio():.3f}: {self._cache}')
+
+
+class ManifestNetworkReader(ManifestDirectoryReader):
+    """
+    Reads the manifest tree from a ccnxd over TCP (or UDP with `-U`), with pipelined Interests.
+
+    With `--endpoint`, requests are striped across the endpoints of each name constructor's locators
+    (see `MultiEndpointReader`).
+
+    `--window` picks the congestion window controller of each connection.  Its metrics are printed after the
+    traversal, and written as JSON to `--window-metrics`.
+    """
+
+    def _create_packet_reader(self, args):
+        self._window_metrics_file = args.window_metrics
+        self._connections = []
+
+        def connect(host, port):
+            reader_class = TreeIO.PacketDatagramReader if args.use_udp else TreeIO.PacketNetworkReader
+            max_retries = 0 if args.endpoints else (6 if args.use_udp else 3)
+            connection = reader_class(host=host, port=port, timeout=args.timeout, window=_create_window(args),
+                                      max_retries=max_retries)
+            self._connections.append(connection)
+            return connection
+
+        if not args.endpoints:
+            return connect(args.host, args.port)
+        endpoints = {}
+        for locator, address in args.endpoints:
+            endpoints.setdefault(locator, []).append(address)
+        return MultiEndpointReader(endpoints=endpoints, default_endpoints=[(args.host, args.port)], timeout=args.timeout,
+                                   reader_factory=connect)
+
+    def read(self):
+        super().read()
+        metrics = []
+        for connection in self._connections:
+            window = connection.window
+            rtt = window.rtt_histogram
+            print(f'{connection.address()}: {window}, rtt p50 {rtt.percentile(50)} p99 {rtt.percentile(99)}')
+            metrics.append({'address': list(connection.address()), **window.metrics()})
+        if self._window_metrics_file is not None:
+            with open(self._window_metrics_file, 'w') as f:
+                json.dump(metrics, f, indent=2, allow_nan=False)
+
+
+def _create_window(args):
+    if args.window == 'aimd':
+        return AimdWindow(maximum=args.window_size)
+    if args.window == 'delay':
+        return DelayWindow(maximum=args.window_size)
+    return FixedWindow(args.window_size)
+
+
+def _parse_endpoint(value: str):
+    """
+    LOCATOR=HOST:PORT, e.g. `ccnx:/replica1=10.0.0.1:9896`
+    """
+    try:
+        uri, address = value.rsplit('=', 1)
+        host, port = address.rsplit(':', 1)
+        return Name.from_uri(uri), (host, int(port))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Expected LOCATOR=HOST:PORT, got {value!r}")
 
 
 def run():
@@ -123,12 +244,37 @@ def run():
     parser.add_argument('--hash', dest="hash_restriction", default=None, help='CCNx URI for root manifest', required=False)
 
     parser.add_argument('-i', dest="in_dir", default='.', help="input directory (default=%r)" % '.')
+    parser.add_argument('--cache-mb', dest="cache_mb", type=int, default=None,
+                        help="Use a read-ahead packet cache of this many MB (default no cache)")
+    parser.add_argument('--dedup-entries', dest="dedup_entries", type=int, default=256,
+                        help="Fetch repeated data hashes once, remembering this many recent packets (0 disables, default %(default)s)")
     parser.add_argument('-T', dest="use_tcp", default=False, action=argparse.BooleanOptionalAction,
-                        help="Use TCP to 127.0.0.1:9896")
+                        help="Use TCP to --host:--port (default 127.0.0.1:9896)")
+    parser.add_argument('-U', dest="use_udp", default=False, action=argparse.BooleanOptionalAction,
+                        help="Use UDP datagrams to --host:--port, recovering losses by retransmitting Interests")
+    parser.add_argument('--host', dest="host", default='127.0.0.1', help="TCP host (default %(default)s)")
+    parser.add_argument('--port', dest="port", type=int, default=9896, help="TCP port (default %(default)s)")
+    parser.add_argument('--timeout', dest="timeout", type=float, default=1.0,
+                        help="Seconds to wait for a response before retransmitting an Interest (default %(default)s)")
+    parser.add_argument('--window', dest="window", choices=['fixed', 'aimd', 'delay'], default='fixed',
+                        help="Interest window controller (default %(default)s)")
+    parser.add_argument('--window-size', dest="window_size", type=int, default=64,
+                        help="The fixed window, or the maximum adaptive window (default %(default)s)")
+    parser.add_argument('--window-metrics', dest="window_metrics", default=None,
+                        help="Write the window and RTT metrics of each connection to this JSON file")
+    parser.add_argument('--endpoint', dest="endpoints", type=_parse_endpoint, action='append', default=[],
+                        metavar='LOCATOR=HOST:PORT',
+                        help="Serve a locator from HOST:PORT (repeatable).  Fetches are striped across the locators' "
+                             "endpoints and fail over between them.  Unmapped names use --host:--port.")
 
     add_encryption_cli_args(parser)
 
     parser.add_argument('--output', dest="output_file_name", default=None, help='Output filename (default stdout)', required=False)
+    parser.add_argument('--resume', dest="resume", action='store_true',
+                        help='Resume an interrupted download to --output, skipping the subtrees already written')
+    parser.add_argument('--verify-local', dest="verify_local", action='store_true',
+                        help='Keep the existing --output and skip the subtrees whose data there matches the '
+                             'manifest digests (see manifest_writer --digests)')
     parser.add_argument('-v', '--verbose', dest="verbose", action='store_true')
 
     args = parser.parse_args()
@@ -140,7 +286,7 @@ def run():
 
     keystore = create_keystore(args)
 
-    if args.use_tcp:
+    if args.use_tcp or args.use_udp:
         reader = ManifestNetworkReader(args, keystore)
     else:
         reader = ManifestDirectoryReader(args, keystore)
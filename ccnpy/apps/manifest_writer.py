@@ -24,8 +24,10 @@ from ccnpy.flic.ManifestTree import ManifestTree
 from ccnpy.flic.ManifestTreeOptions import ManifestTreeOptions
 from ccnpy.flic.name_constructor.SchemaType import SchemaType
 from ccnpy.flic.tlvs.Locators import Locators
+from ccnpy.flic.tree.LinkIndex import LinkIndex
 from ccnpy.flic.tree.TreeIO import TreeIO
-from .cli_utils import add_encryption_cli_args, rsa_signer_from_cli_args, fixup_key_password, encryptor_from_cli_args
+from .cli_utils import add_encryption_cli_args, signer_from_cli_args, fixup_key_password, encryptor_from_cli_args, \
+    hmac_signer_from_cli_args
 
 
 class ManifestWriter:
@@ -46,9 +48,11 @@ class ManifestWriter:
         self._tree_options = self._create_tree_options(args)
 
     def _create_tree_options(self, args):
+        digests = getattr(args, 'digests', False)
         tree_options = ManifestTreeOptions(name=Name.from_uri(args.name),
                                            schema_type=SchemaType.parse(args.schema),
-                                           signer=rsa_signer_from_cli_args(args),
+                                           signer=signer_from_cli_args(args),
+                                           packet_signer=hmac_signer_from_cli_args(args),
                                            manifest_prefix=Name.from_uri(args.manifest_prefix),
                                            data_prefix=Name.from_uri(args.data_prefix),
 
@@ -62,6 +66,10 @@ class ManifestWriter:
                                            manifest_encryptor=encryptor_from_cli_args(args),
 
                                            add_node_subtree_size=True,
+                                           add_node_subtree_digest=digests,
+                                           add_group_subtree_size=digests,
+                                           add_group_subtree_digest=digests,
+                                           add_group_leaf_digest=digests,
 
                                            max_packet_size=args.max_size,
                                            max_tree_degree=args.tree_degree,
@@ -106,6 +114,13 @@ class ManifestWriter:
             return mt.build()
 
 
+def _parse_link_index_size(value: str) -> int:
+    size = int(value)
+    if size < 0 or size > LinkIndex.MAX_ENTRIES:
+        raise argparse.ArgumentTypeError(f"--link-index must be between 0 and {LinkIndex.MAX_ENTRIES}, got {size}")
+    return size
+
+
 def run():
     logging.basicConfig(level=logging.INFO)
     # logging.getLogger('ccnpy.apps.cli_utils').setLevel(logging.DEBUG)
@@ -130,10 +145,19 @@ def run():
     parser.add_argument('-s', dest="max_size", type=int, default=max_size,
                         help='maximum content object size (default %r)' % max_size)
 
+    parser.add_argument('--digests', dest="digests", action='store_true',
+                        help='Add SubtreeDigest and LeafDigest to the manifests, so a reader can verify and skip local data')
+
     parser.add_argument('-o', dest="out_dir", default='.', help="output directory (default=%r)" % '.')
     parser.add_argument('--link', dest="write_links", action='store_true', help='When writing to a directory, write links for named objects')
+    parser.add_argument('--link-index', dest="link_index_size", type=_parse_link_index_size, default=0,
+                        help='With --link, sign one link index per this many names instead of one link per name (default 0, per name)')
+    parser.add_argument('--link-workers', dest="link_workers", type=int, default=0,
+                        help='With --link, sign the per-name links in this many threads (default 0, inline)')
     parser.add_argument('-T', dest="use_tcp", default=False, action=argparse.BooleanOptionalAction,
                         help="Use TCP to 127.0.0.1:9896")
+    parser.add_argument('-U', dest="use_udp", default=False, action=argparse.BooleanOptionalAction,
+                        help="Use UDP datagrams to 127.0.0.1:9896 (best effort, keep -s at most the path MTU)")
 
     parser.add_argument('--root-expiry', dest="root_expiry",
                         help="Expiry time (ISO format, .e.g 2020-12-31T23:59:59+00:00) to expire root manifest")
@@ -155,10 +179,14 @@ def run():
 
     if args.use_tcp:
         packet_writer = TreeIO.PacketNetworkWriter("127.0.0.1", 9896)
+    elif args.use_udp:
+        packet_writer = TreeIO.PacketDatagramWriter("127.0.0.1", 9896, mtu=args.max_size)
     else:
         packet_writer = TreeIO.PacketDirectoryWriter(directory=args.out_dir,
                                                      link_named_objects=args.write_links,
-                                                     signer=rsa_signer_from_cli_args(args))
+                                                     signer=signer_from_cli_args(args),
+                                                     link_index_size=args.link_index_size,
+                                                     link_workers=args.link_workers)
 
     if args.schema == 'Segmented':
         if args.manifest_prefix is None or args.data_prefix is None:
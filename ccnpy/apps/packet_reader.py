@@ -20,6 +20,7 @@ from ccnpy.apps.packet_utils import validate_packet, decrypt_manifest
 from ccnpy.core.ContentObject import ContentObject
 from ccnpy.core.DisplayFormatter import DisplayFormatter
 from ccnpy.core.Packet import Packet
+from ccnpy.crypto.InsecureKeystore import KeyIdNotFoundError
 from ccnpy.flic.tlvs.Manifest import Manifest
 from .cli_utils import add_encryption_cli_args, aead_decryptor_from_cli_args, fixup_key_password, create_keystore
 
@@ -55,7 +56,7 @@ class PacketReader:
 
         try:
             validate_packet(keystore=self._keystore, packet=packet)
-        except KeyError as e:
+        except (KeyError, KeyIdNotFoundError, ValueError) as e:
             print(f'Could not validate packet: {e}')
             return
 
@@ -0,0 +1,336 @@
+#  Copyright 2024 Marc Mosko
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+import argparse
+import asyncio
+import logging
+import random
+import struct
+import time
+from typing import Optional, Dict, Tuple
+
+from ccnpy.core.ContentStore import ContentStore
+from ccnpy.core.HashValue import HashValue
+from ccnpy.core.LfuEvictionPolicy import LfuEvictionPolicy
+from ccnpy.core.Name import Name
+from ccnpy.core.Packet import Packet, PacketReader
+from ccnpy.core.PacketFrame import PacketFrame
+from ccnpy.core.PacketStreamDecoder import PacketStreamDecoder
+from ccnpy.flic.tree.TreeIO import TreeIO
+
+
+class PacketServer:
+    """
+    A stand-in for a ccnxd, to test and benchmark the `-T` modes of `manifest_writer` and `manifest_reader`
+    on one machine.
+
+    Over TCP, it accepts wire-format packets framed by their fixed header.  A Content Object is stored in a
+    `ContentStore`.  An Interest is answered from the store (or from `packet_input`, such as a
+    `TreeIO.PacketDirectoryReader`), matching on the name and content object hash restriction.  An Interest that
+    matches nothing is not answered.
+
+    With `start_udp()`, it also serves UDP, one packet per datagram (see `TreeIO.PacketDatagramReader` and
+    `TreeIO.PacketDatagramWriter`).  Responses go back to the sender's address.
+
+    Each response may be shaped:
+        * `latency` and `jitter` (seconds): the response is delayed by latency +/- uniform(jitter).
+        * `loss` (0 to 1): the probability an Interest is dropped.
+        * `bandwidth` (bits/sec): each connection's responses are serialized at this rate.
+    """
+    logger = logging.getLogger(__name__)
+
+    def __init__(self, packet_input: Optional[PacketReader] = None, latency: float = 0.0, jitter: float = 0.0,
+                 loss: float = 0.0, bandwidth: Optional[float] = None, seed: Optional[int] = None,
+                 store: Optional[ContentStore] = None):
+        """
+        :param packet_input: Where to look for packets not stored by a client (may be None)
+        :param latency: Seconds to delay each response
+        :param jitter: Maximum seconds to add or subtract from `latency`
+        :param loss: Probability of dropping an Interest
+        :param bandwidth: Bits per second per connection (None is unlimited)
+        :param seed: Seed the random loss and jitter, for repeatable runs
+        :param store: Where to keep the packets clients write (default an LRU `ContentStore` of 64 MB)
+        """
+        if not 0 <= loss <= 1:
+            raise ValueError(f"loss must be between 0 and 1, got {loss}")
+        self._store = store if store is not None else ContentStore()
+        self._packet_input = packet_input
+        self._latency = latency
+        self._jitter = jitter
+        self._loss = loss
+        self._bandwidth = bandwidth
+        self._random = random.Random(seed)
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._udp_transport: Optional[asyncio.DatagramTransport] = None
+        self._udp_protocol: Optional[PacketServer._DatagramProtocol] = None
+        # the running _handle_client tasks
+        self._clients = set()
+        # per UDP peer shaping state
+        self._udp_links: Dict[Tuple[str, int], Dict] = {}
+
+        self.connections = 0
+        self.packets_received = 0
+        self.bytes_received = 0
+        self.objects_stored = 0
+        self.interests = 0
+        self.responses = 0
+        self.bytes_sent = 0
+        self.misses = 0
+        self.dropped = 0
+        self.errors = 0
+
+    def __repr__(self):
+        return (f"PacketServer(connections={self.connections}, received={self.packets_received}, "
+                f"stored={self.objects_stored}, interests={self.interests}, responses={self.responses}, "
+                f"misses={self.misses}, dropped={self.dropped}, bytes_in={self.bytes_received}, bytes_out={self.bytes_sent})")
+
+    def store(self) -> ContentStore:
+        """The packets clients have written to us"""
+        return self._store
+
+    async def start(self, host: str = '127.0.0.1', port: int = 9896) -> int:
+        """
+        Start listening.
+
+        :return: The port (useful with port 0)
+        """
+        self._server = await asyncio.start_server(self._handle_client, host, port)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def start_udp(self, host: str = '127.0.0.1', port: int = 9896) -> int:
+        """
+        Also listen for datagrams.
+
+        :return: The UDP port (useful with port 0)
+        """
+        loop = asyncio.get_running_loop()
+        self._udp_transport, self._udp_protocol = await loop.create_datagram_endpoint(lambda: PacketServer._DatagramProtocol(self),
+                                                                     local_addr=(host, port))
+        return self._udp_transport.get_extra_info('sockname')[1]
+
+    async def serve_forever(self):
+        async with self._server:
+            await self._server.serve_forever()
+
+    def close(self):
+        if self._server is not None:
+            self._server.close()
+        if self._udp_transport is not None:
+            self._udp_transport.close()
+            self._udp_transport = None
+
+    async def stop(self):
+        """
+        Close the server and cancel the tasks still serving clients, so none is left pending
+        when the event loop closes.
+        """
+        self.close()
+        tasks = set(self._clients)
+        if self._udp_protocol is not None:
+            tasks.update(self._udp_protocol._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def lookup(self, name: Optional[Name], hash_restriction: Optional[HashValue]) -> Optional[Packet]:
+        """Find a packet to answer an Interest, or None"""
+        packet = self._store.lookup(name, hash_restriction)
+        if packet is not None:
+            return packet
+        return self._input_lookup(name, hash_restriction)
+
+    def _input_lookup(self, name: Optional[Name], hash_restriction: Optional[HashValue]) -> Optional[Packet]:
+        if self._packet_input is None:
+            return None
+        try:
+            return self._packet_input.get(name, hash_restriction)
+        except (OSError, KeyError, ValueError, NotImplementedError):
+            return None
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        peer = writer.get_extra_info('peername')
+        self.logger.info('Connection from %s', peer)
+        # per-connection time at which the link is free to send the next response
+        link = {'next_free': time.monotonic()}
+        tasks = set()
+        client = asyncio.current_task()
+        self._clients.add(client)
+        decoder = PacketStreamDecoder()
+        try:
+            while True:
+                data = await reader.read(65536)
+                if not data:
+                    break
+                decoder.feed(data)
+                for frame in decoder.frames():
+                    self.packets_received += 1
+                    self.bytes_received += len(frame)
+                    if frame.is_content_object():
+                        self._put(frame.packet())
+                    elif frame.is_interest():
+                        task = asyncio.create_task(self._answer(frame.packet(), writer, link))
+                        tasks.add(task)
+                        task.add_done_callback(tasks.discard)
+        except (ValueError, RuntimeError, ConnectionError) as e:
+            self.errors += 1
+            self.logger.warning('Closing %s: %s', peer, e)
+        finally:
+            for task in tasks:
+                task.cancel()
+            writer.close()
+            self._clients.discard(client)
+
+    def _put(self, packet: Packet):
+        self._store.put(packet)
+        self.objects_stored += 1
+
+    async def _answer(self, interest: Packet, writer: asyncio.StreamWriter, link: Dict):
+        packet = await self._respond(interest, link)
+        if packet is None or writer.is_closing():
+            return
+        writer.write(memoryview(packet.serialize()))
+        await writer.drain()
+        self.responses += 1
+        self.bytes_sent += len(packet)
+
+    async def _answer_datagram(self, interest: Packet, address: Tuple[str, int]):
+        link = self._udp_links.setdefault(address, {'next_free': time.monotonic()})
+        packet = await self._respond(interest, link)
+        if packet is None or self._udp_transport is None:
+            return
+        self._udp_transport.sendto(memoryview(packet.serialize()), address)
+        self.responses += 1
+        self.bytes_sent += len(packet)
+
+    async def _respond(self, interest: Packet, link: Dict) -> Optional[Packet]:
+        """
+        Find the response to an Interest and wait out its shaping delay.
+
+        :return: The packet to send, or None if the Interest is dropped or unanswered
+        """
+        self.interests += 1
+        if self._loss > 0 and self._random.random() < self._loss:
+            self.dropped += 1
+            return None
+
+        name, hash_restriction = interest.body().name(), interest.body().con_obj_hash_restriction()
+        packet = self._store.lookup(name, hash_restriction)
+        if packet is None and self._packet_input is not None:
+            # packet_input.get() blocks (file or network I/O), so run it off the event loop
+            packet = await asyncio.get_running_loop().run_in_executor(None, self._input_lookup, name, hash_restriction)
+        if packet is None:
+            self.misses += 1
+            return None
+
+        delay = self._latency
+        if self._jitter > 0:
+            delay += self._random.uniform(-self._jitter, self._jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        if self._bandwidth is not None:
+            now = time.monotonic()
+            departure = max(now, link['next_free']) + len(packet) * 8 / self._bandwidth
+            link['next_free'] = departure
+            await asyncio.sleep(departure - now)
+        return packet
+
+    class _DatagramProtocol(asyncio.DatagramProtocol):
+        """Each datagram is one packet"""
+
+        def __init__(self, server: 'PacketServer'):
+            self._server = server
+            self._tasks = set()
+
+        def datagram_received(self, data: bytes, address: Tuple[str, int]):
+            server = self._server
+            server.packets_received += 1
+            server.bytes_received += len(data)
+            if len(data) < 8 or data[0] != 1 or struct.unpack_from('!H', data, 2)[0] != len(data):
+                server.errors += 1
+                server.logger.debug('Dropping datagram from %s: not one packet', address)
+                return
+            frame = PacketFrame(memoryview(data))
+            try:
+                if frame.is_content_object():
+                    server._put(frame.packet())
+                elif frame.is_interest():
+                    task = asyncio.create_task(server._answer_datagram(frame.packet(), address))
+                    self._tasks.add(task)
+                    task.add_done_callback(self._tasks.discard)
+            except (ValueError, RuntimeError) as e:
+                server.errors += 1
+                server.logger.debug('Dropping datagram from %s: %s', address, e)
+
+
+async def _serve(server: PacketServer, host: str, port: int, stats_interval: float, udp: bool):
+    port = await server.start(host, port)
+    print(f'Listening on {host}:{port}')
+    if udp:
+        await server.start_udp(host, port)
+        print(f'Listening on UDP {host}:{port}')
+
+    async def report():
+        while True:
+            await asyncio.sleep(stats_interval)
+            print(server)
+            print(server.store())
+
+    if stats_interval > 0:
+        asyncio.create_task(report())
+    await server.serve_forever()
+
+
+def run():
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(description='A local CCNx packet server for testing the -T network modes')
+    parser.add_argument('--host', dest="host", default='127.0.0.1', help="Listen address (default %(default)s)")
+    parser.add_argument('--port', dest="port", type=int, default=9896, help="Listen port (default %(default)s)")
+    parser.add_argument('--udp', dest="udp", action='store_true', help="Also serve UDP datagrams on --port")
+    parser.add_argument('-i', dest="in_dir", default=None, help="Also answer Interests from this packet directory")
+    parser.add_argument('--latency', dest="latency", type=float, default=0.0, help="Response delay in milliseconds")
+    parser.add_argument('--jitter', dest="jitter", type=float, default=0.0, help="Response delay jitter (+/-) in milliseconds")
+    parser.add_argument('--loss', dest="loss", type=float, default=0.0, help="Interest loss probability (0 to 1)")
+    parser.add_argument('--bandwidth', dest="bandwidth", type=float, default=None, help="Per-connection Mbps (default unlimited)")
+    parser.add_argument('--seed', dest="seed", type=int, default=None, help="Random seed for loss and jitter")
+    parser.add_argument('--store-mb', dest="store_mb", type=int, default=64,
+                        help="Content store size in MB (default %(default)s)")
+    parser.add_argument('--lfu', dest="lfu", action='store_true', help="Evict the least frequently used objects (default LRU)")
+    parser.add_argument('--pin-manifests', dest="pin_manifests", action='store_true', help="Never evict manifests")
+    parser.add_argument('--stats', dest="stats_interval", type=float, default=5.0,
+                        help="Seconds between counter reports (0 disables, default %(default)s)")
+
+    args = parser.parse_args()
+
+    packet_input = TreeIO.PacketDirectoryReader(args.in_dir) if args.in_dir is not None else None
+    bandwidth = args.bandwidth * 1e6 if args.bandwidth is not None else None
+    store = ContentStore(max_bytes=args.store_mb * 1024 * 1024,
+                         policy=LfuEvictionPolicy() if args.lfu else None,
+                         pin_manifests=args.pin_manifests)
+    server = PacketServer(packet_input=packet_input,
+                          latency=args.latency / 1000,
+                          jitter=args.jitter / 1000,
+                          loss=args.loss,
+                          bandwidth=bandwidth,
+                          seed=args.seed,
+                          store=store)
+    try:
+        asyncio.run(_serve(server, args.host, args.port, args.stats_interval, args.udp))
+    except KeyboardInterrupt:
+        print(server)
+
+
+if __name__ == "__main__":
+    run()
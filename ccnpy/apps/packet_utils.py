@@ -11,10 +11,14 @@
 #  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
-from ccnpy.core.ValidationAlg import ValidationAlg_Crc32c, ValidationAlg_RsaSha256
+from ccnpy.core.ValidationAlg import ValidationAlg_Crc32c, ValidationAlg_RsaSha256, ValidationAlg_Ed25519, ValidationAlg_EcdsaP256, \
+    ValidationAlg_HmacSha256
 from ccnpy.crypto.Crc32c import Crc32cVerifier
 from ccnpy.crypto.DecryptionError import DecryptionError
-from ccnpy.crypto.InsecureKeystore import InsecureKeystore, KeyIdNotFoundError, KeyNumberNotFoundError
+from ccnpy.crypto.EcdsaP256 import EcdsaP256Verifier
+from ccnpy.crypto.Ed25519 import Ed25519Verifier
+from ccnpy.crypto.HmacSha256 import HmacSha256Verifier
+from ccnpy.crypto.InsecureKeystore import InsecureKeystore, KeyNumberNotFoundError
 from ccnpy.crypto.RsaSha256 import RsaSha256Verifier
 from ccnpy.flic.RsaOaepCtx.RsaOaepDecryptor import RsaOaepDecryptor
 from ccnpy.flic.aeadctx.AeadDecryptor import AeadDecryptor
@@ -33,15 +37,28 @@ def validate_packet(keystore: InsecureKeystore, packet):
         # use a pre-allocated one, no need to allocate every packet
         verifier = __static_crc32c_verifier
 
+    elif keystore is None:
+        raise ValueError(f'Packet fails validation, no keystore to verify {type(alg).__name__}')
+
+    elif isinstance(alg, ValidationAlg_HmacSha256):
+        # raises KeyIdNotFoundError if we do not have the key
+        hmac_key = keystore.get_hmac(alg.keyid())
+
+        verifier = HmacSha256Verifier(key=hmac_key)
+
     elif isinstance(alg, ValidationAlg_RsaSha256):
-        try:
-            rsa_pub_key = keystore.get_rsa(alg.keyid())
-        except KeyIdNotFoundError:
-            print(f'Signature not validated, could not find RSA key in keystore with keyid {alg.keyid()}')
-            return
+        rsa_pub_key = keystore.get_rsa(alg.keyid())
 
         # TODO: we should cache these
         verifier = RsaSha256Verifier(key=rsa_pub_key)
+
+    elif isinstance(alg, (ValidationAlg_Ed25519, ValidationAlg_EcdsaP256)):
+        ec_pub_key = keystore.get_ec(alg.keyid())
+
+        if isinstance(alg, ValidationAlg_Ed25519):
+            verifier = Ed25519Verifier(key=ec_pub_key)
+        else:
+            verifier = EcdsaP256Verifier(key=ec_pub_key)
     else:
         raise ValueError(f'Validation alg {alg} not supported.')
 
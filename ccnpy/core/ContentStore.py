@@ -0,0 +1,245 @@
+#  Copyright 2024 Marc Mosko
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+import logging
+import threading
+import time
+from typing import Optional, Dict, Callable, Set
+
+from .ContentObject import ContentObject
+from .EvictionPolicy import EvictionPolicy
+from .HashValue import HashValue
+from .LruEvictionPolicy import LruEvictionPolicy
+from .Name import Name
+from .Packet import Packet, PacketReader, PacketWriter
+from ..flic.tlvs.Locators import Locators
+
+
+class ContentStore(PacketReader, PacketWriter):
+    """
+    A bounded, indexed in-memory store of Content Objects, e.g. for a producer answering Interests.
+
+    * Packets are indexed by content object hash and by exact name (the most recent `put()` of a name wins).
+      `longest_prefix_match()` finds the stored object with the longest name that is a prefix of a name.
+    * The store is bounded by the total wire-format bytes of its packets.  Over the limit, the `EvictionPolicy`
+      (by default `LruEvictionPolicy`) picks the victims.
+    * An object past its `ExpiryTime` is never returned, and is removed when found.
+    * Pinned objects are never evicted.  With `pin_manifests`, every manifest is pinned when stored, so a
+      producer can always serve the tree structure.
+
+    `get()` follows the other `PacketReader`s: a miss raises `KeyError`.  `lookup()` returns None instead.
+
+    The store is thread-safe.
+    """
+    logger = logging.getLogger(__name__)
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, policy: Optional[EvictionPolicy] = None,
+                 pin_manifests: bool = False, clock: Callable[[], float] = time.time):
+        """
+        :param max_bytes: The maximum packet bytes of unpinned objects (pinned objects may exceed it)
+        :param policy: The eviction policy (default LRU)
+        :param pin_manifests: If True, never evict manifests
+        :param clock: The time source for expiry, in seconds since the epoch
+        """
+        if max_bytes < 0:
+            raise ValueError(f"max_bytes must be non-negative, got {max_bytes}")
+        self._max_bytes = max_bytes
+        self._policy = policy if policy is not None else LruEvictionPolicy()
+        self._pin_manifests = pin_manifests
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._by_hash: Dict[HashValue, Packet] = {}
+        self._by_name: Dict[Name, HashValue] = {}
+        self._pinned: Set[HashValue] = set()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expired = 0
+        self.rejected = 0
+        self.bytes_resident = 0
+        self.bytes_pinned = 0
+
+    def __repr__(self):
+        return (f"ContentStore(entries={len(self._by_hash)}, bytes={self.bytes_resident}, pinned={len(self._pinned)}, "
+                f"hits={self.hits}, misses={self.misses}, evictions={self.evictions}, expired={self.expired})")
+
+    def __len__(self):
+        return len(self._by_hash)
+
+    def __contains__(self, hash_value: HashValue):
+        with self._lock:
+            return hash_value in self._by_hash
+
+    def hit_ratio(self) -> float:
+        """
+        :return: hits / (hits + misses), or 0 if there have been no lookups
+        """
+        total = self.hits + self.misses
+        if total == 0:
+            return 0.0
+        return self.hits / total
+
+    def put(self, packet: Packet):
+        body = packet.body()
+        if not isinstance(body, ContentObject):
+            raise TypeError("Only Content Objects can be stored")
+        packet_len = len(packet)
+        pin = self._pin_manifests and body.payload_type() is not None and body.payload_type().is_manifest()
+        if packet_len > self._max_bytes and not pin:
+            self.rejected += 1
+            return
+        if self._is_expired(packet):
+            self.rejected += 1
+            return
+
+        key = packet.content_object_hash()
+        with self._lock:
+            if key in self._by_hash:
+                if not pin:
+                    self._policy.access(key)
+            else:
+                self._by_hash[key] = packet
+                self.bytes_resident += packet_len
+                if pin:
+                    self._pinned.add(key)
+                    self.bytes_pinned += packet_len
+                else:
+                    self._policy.insert(key)
+            if body.name() is not None:
+                self._by_name[body.name()] = key
+            self._evict()
+
+    def get(self, name: Optional[Name], hash_restriction: Optional[HashValue], locators: Optional[Locators] = None) -> Packet:
+        packet = self.lookup(name, hash_restriction)
+        if packet is None:
+            raise KeyError(f'No packet for name {name} hash {hash_restriction}')
+        return packet
+
+    def lookup(self, name: Optional[Name], hash_restriction: Optional[HashValue]) -> Optional[Packet]:
+        """
+        Find the object matching an Interest.  With a hash restriction, the object must have that hash and,
+        if it is named, the name must match.  Otherwise, match the name exactly.
+
+        :return: The packet or None
+        """
+        if name is None and hash_restriction is None:
+            raise ValueError("Must give at least one of name or hash_restriction")
+        with self._lock:
+            key = hash_restriction if hash_restriction is not None else self._by_name.get(name)
+            packet = self._fresh(key)
+            if packet is not None and hash_restriction is not None:
+                packet_name = packet.body().name()
+                if packet_name is not None and (name is None or name != packet_name):
+                    packet = None
+            self._count(key, packet)
+            return packet
+
+    def longest_prefix_match(self, name: Name) -> Optional[Packet]:
+        """
+        The object with the longest name that is a prefix of `name` (including `name` itself), or None.
+        """
+        components = [name.component(i) for i in range(name.count())]
+        with self._lock:
+            for length in range(len(components), 0, -1):
+                key = self._by_name.get(Name(components[:length]))
+                packet = self._fresh(key)
+                if packet is not None:
+                    self._count(key, packet)
+                    return packet
+            self.misses += 1
+            return None
+
+    def pin(self, hash_value: HashValue):
+        """Never evict this object (it must be in the store)"""
+        with self._lock:
+            packet = self._by_hash[hash_value]
+            if hash_value not in self._pinned:
+                self._pinned.add(hash_value)
+                self._policy.remove(hash_value)
+                self.bytes_pinned += len(packet)
+
+    def unpin(self, hash_value: HashValue):
+        with self._lock:
+            if hash_value in self._pinned:
+                self._pinned.discard(hash_value)
+                self.bytes_pinned -= len(self._by_hash[hash_value])
+                self._policy.insert(hash_value)
+                self._evict()
+
+    def is_pinned(self, hash_value: HashValue) -> bool:
+        with self._lock:
+            return hash_value in self._pinned
+
+    def remove(self, hash_value: HashValue) -> Optional[Packet]:
+        with self._lock:
+            return self._remove(hash_value)
+
+    def purge_expired(self) -> int:
+        """
+        Remove every expired object.
+
+        :return: The number removed
+        """
+        with self._lock:
+            stale = [key for key, packet in self._by_hash.items() if self._is_expired(packet)]
+            for key in stale:
+                self._remove(key)
+            self.expired += len(stale)
+            return len(stale)
+
+    def _is_expired(self, packet: Packet) -> bool:
+        expiry_time = packet.body().expiry_time()
+        return expiry_time is not None and expiry_time.timestamp() <= self._clock()
+
+    def _fresh(self, key: Optional[HashValue]) -> Optional[Packet]:
+        """The packet for `key` if it is present and not expired (call with the lock held)"""
+        if key is None:
+            return None
+        packet = self._by_hash.get(key)
+        if packet is not None and self._is_expired(packet):
+            self._remove(key)
+            self.expired += 1
+            return None
+        return packet
+
+    def _count(self, key: Optional[HashValue], packet: Optional[Packet]):
+        if packet is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            if key not in self._pinned:
+                self._policy.access(key)
+
+    def _remove(self, key: HashValue) -> Optional[Packet]:
+        packet = self._by_hash.pop(key, None)
+        if packet is None:
+            return None
+        self.bytes_resident -= len(packet)
+        if key in self._pinned:
+            self._pinned.discard(key)
+            self.bytes_pinned -= len(packet)
+        else:
+            self._policy.remove(key)
+        name = packet.body().name()
+        if name is not None and self._by_name.get(name) == key:
+            del self._by_name[name]
+        return packet
+
+    def _evict(self):
+        while self.bytes_resident - self.bytes_pinned > self._max_bytes:
+            victim = self._policy.victim()
+            if victim is None:
+                return
+            self._remove(victim)
+            self.evictions += 1
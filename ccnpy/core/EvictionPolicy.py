@@ -0,0 +1,45 @@
+#  Copyright 2024 Marc Mosko
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+from abc import ABC, abstractmethod
+from typing import Optional
+
+from .HashValue import HashValue
+
+
+class EvictionPolicy(ABC):
+    """
+    Chooses which entry a `ContentStore` evicts when it is over its byte limit.  The store tells the policy
+    about every evictable entry it inserts, reads, and removes (pinned entries are never given to the policy).
+    """
+
+    @abstractmethod
+    def insert(self, key: HashValue):
+        pass
+
+    @abstractmethod
+    def access(self, key: HashValue):
+        pass
+
+    @abstractmethod
+    def remove(self, key: HashValue):
+        pass
+
+    @abstractmethod
+    def victim(self) -> Optional[HashValue]:
+        """The entry to evict next (it is not removed from the policy), or None if there are none"""
+        pass
+
+    @abstractmethod
+    def __len__(self):
+        pass
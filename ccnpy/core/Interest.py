@@ -11,18 +11,31 @@
 #  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
+from typing import Optional
+
+from .ContentObjectHashRestriction import ContentObjectHashRestriction
+from .HashValue import HashValue
+from .KeyIdRestriction import KeyIdRestriction
+from .Name import Name
 from .Tlv import Tlv
 from .TlvType import TlvType
 
 
 class Interest(TlvType):
+    """
+        Interest = T_INTEREST LENGTH Name [KeyIdRestr] [ContentObjectHashRestr]
+
+    The restrictions may be given as a `HashValue` or as their TLV type.
+    """
     __T_INTEREST = 0x0001
 
     @classmethod
     def class_type(cls):
         return cls.__T_INTEREST
 
-    def __init__(self, name=None, key_id_restr=None, con_obj_hash_restr=None):
+    def __init__(self, name: Optional[Name] = None,
+                 key_id_restr: Optional[KeyIdRestriction | HashValue] = None,
+                 con_obj_hash_restr: Optional[ContentObjectHashRestriction | HashValue] = None):
         """
 
         :param name:
@@ -31,6 +44,17 @@ class Interest(TlvType):
         """
         TlvType.__init__(self)
 
+        if name is not None and not isinstance(name, Name):
+            raise TypeError("name must be Name")
+        if isinstance(key_id_restr, HashValue):
+            key_id_restr = KeyIdRestriction(key_id_restr)
+        if key_id_restr is not None and not isinstance(key_id_restr, KeyIdRestriction):
+            raise TypeError("key_id_restr must be KeyIdRestriction or HashValue")
+        if isinstance(con_obj_hash_restr, HashValue):
+            con_obj_hash_restr = ContentObjectHashRestriction(con_obj_hash_restr)
+        if con_obj_hash_restr is not None and not isinstance(con_obj_hash_restr, ContentObjectHashRestriction):
+            raise TypeError("con_obj_hash_restr must be ContentObjectHashRestriction or HashValue")
+
         self._name = name
         self._keyidrestr = key_id_restr
         self._conobjhashrestr = con_obj_hash_restr
@@ -43,12 +67,54 @@ class Interest(TlvType):
         """
         return len(self._tlv)
 
+    def __eq__(self, other):
+        if not isinstance(other, Interest):
+            return False
+        return self._tlv == other._tlv
+
+    def __repr__(self):
+        return "I: {%r, %r, %r}" % (self._name, self._keyidrestr, self._conobjhashrestr)
+
+    def name(self) -> Optional[Name]:
+        return self._name
+
+    def key_id_restriction(self) -> Optional[HashValue]:
+        if self._keyidrestr is None:
+            return None
+        return self._keyidrestr.digest()
+
+    def con_obj_hash_restriction(self) -> Optional[HashValue]:
+        if self._conobjhashrestr is None:
+            return None
+        return self._conobjhashrestr.digest()
+
     @classmethod
     def parse(cls, tlv):
-        pass
+        if tlv.type() != cls.class_type():
+            raise RuntimeError("Incorrect TLV type %r must be T_INTEREST" % tlv.type())
+
+        name = key_id_restr = con_obj_hash_restr = None
+        offset = 0
+        while offset < tlv.length():
+            inner_tlv = Tlv.deserialize(tlv.value()[offset:])
+            offset += len(inner_tlv)
+
+            if inner_tlv.type() == Name.class_type():
+                assert name is None
+                name = Name.parse(inner_tlv)
+            elif inner_tlv.type() == KeyIdRestriction.class_type():
+                assert key_id_restr is None
+                key_id_restr = KeyIdRestriction.parse(inner_tlv)
+            elif inner_tlv.type() == ContentObjectHashRestriction.class_type():
+                assert con_obj_hash_restr is None
+                con_obj_hash_restr = ContentObjectHashRestriction.parse(inner_tlv)
+            else:
+                raise ValueError("Unsupported Interest TLV %r" % inner_tlv.type())
+
+        return cls(name=name, key_id_restr=key_id_restr, con_obj_hash_restr=con_obj_hash_restr)
 
     def serialize(self):
-        pass
+        return self._tlv.serialize()
 
     @staticmethod
     def is_content_object():
@@ -0,0 +1,179 @@
+#  Copyright 2024 Marc Mosko
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+import struct
+from typing import Optional, Iterable, Tuple, List
+
+from .ContentObjectHashRestriction import ContentObjectHashRestriction
+from .FixedHeader import FixedHeader
+from .HashValue import HashValue
+from .Interest import Interest
+from .Name import Name
+from ..flic.tlvs.HashGroup import HashGroup
+
+
+class InterestTemplate:
+    """
+    A precompiled encoder for the Interests of one name constructor.  The fixed header, the name prefix
+    TLVs, and the hash restriction TLV headers are encoded once.  Each Interest then only writes the lengths,
+    the segment number (if any), and the digest:
+
+        FixedHeader | T_INTEREST len | [T_NAME len | prefix components | [suffix_type len segment]]
+                    | [T_OBJHASH len | T_hashalg len | digest]
+
+    The output is byte-for-byte the same as `Packet.create_interest(Interest(...), hop_limit).serialize()`,
+    without creating any `Tlv` objects.
+
+    Use `encode()` for one Interest, or `encode_into()`, `encode_batch()` or `encode_hash_group()` to write
+    many Interests into one buffer (e.g. for a single `sendall()`).
+    """
+    _T_NAME = Name.class_type()
+    _T_INTEREST = Interest.class_type()
+    _T_OBJHASH = ContentObjectHashRestriction.class_type()
+    _FIXED_HEADER_LEN = 8
+
+    def __init__(self, prefix: Optional[Name | bytes] = None, suffix_type: Optional[int] = None, hop_limit: int = 32):
+        """
+        :param prefix: The name of every Interest (before the segment), or None for nameless Interests.
+                       It may also be the encoded name components, as returned by `split_name()`.
+        :param suffix_type: The name component type of the segment number (e.g. `NameComponent.chunk_id_type()`),
+                            or None if the name has no segment
+        :param hop_limit: The fixed header hop limit
+        """
+        if suffix_type is not None and prefix is None:
+            raise ValueError("A suffix_type requires a prefix")
+        if not 0 <= hop_limit <= 255:
+            raise ValueError(f"hop_limit must be 0 to 255, got {hop_limit}")
+        # the name TLV's value (without its T and L)
+        if isinstance(prefix, Name):
+            prefix = bytes(prefix.serialize())[4:]
+        self._prefix_value = prefix
+        self._suffix_type = suffix_type
+        self._header_fields = bytes([hop_limit, 0, 0, self._FIXED_HEADER_LEN])
+
+    def __repr__(self):
+        prefix_len = len(self._prefix_value) if self._prefix_value is not None else None
+        return f"InterestTemplate(prefix_bytes={prefix_len}, suffix_type={self._suffix_type})"
+
+    def encode(self, hash_value: Optional[HashValue], segment_id: Optional[int] = None) -> bytearray:
+        """
+        :param hash_value: The content object hash restriction (may be None)
+        :param segment_id: The segment number, required if the template has a `suffix_type`
+        :return: The wire format Interest packet
+        """
+        buffer = bytearray()
+        self.encode_into(buffer, hash_value, segment_id)
+        return buffer
+
+    def encode_into(self, buffer: bytearray, hash_value: Optional[HashValue], segment_id: Optional[int] = None) -> int:
+        """
+        Append one Interest to `buffer`.
+
+        :return: The number of bytes appended
+        """
+        if self._suffix_type is not None:
+            if segment_id is None:
+                raise ValueError("This template needs a segment_id")
+            segment = self._number_bytes(segment_id)
+        elif segment_id is not None:
+            raise ValueError("This template has no segment suffix")
+
+        if self._prefix_value is None and hash_value is None:
+            raise ValueError("A nameless Interest needs a hash restriction")
+
+        body_length = 0
+        if self._prefix_value is not None:
+            name_length = len(self._prefix_value)
+            if self._suffix_type is not None:
+                name_length += 4 + len(segment)
+            body_length += 4 + name_length
+        if hash_value is not None:
+            digest = hash_value.value()
+            body_length += 8 + len(digest)
+        packet_length = self._FIXED_HEADER_LEN + 4 + body_length
+        if packet_length > 0xFFFF:
+            raise ValueError(f"Interest length {packet_length} too long")
+
+        start = len(buffer)
+        buffer += struct.pack('!BBH', 1, FixedHeader.PT_INTEREST, packet_length)
+        buffer += self._header_fields
+        buffer += struct.pack('!HH', self._T_INTEREST, body_length)
+        if self._prefix_value is not None:
+            buffer += struct.pack('!HH', self._T_NAME, name_length)
+            buffer += self._prefix_value
+            if self._suffix_type is not None:
+                buffer += struct.pack('!HH', self._suffix_type, len(segment))
+                buffer += segment
+        if hash_value is not None:
+            buffer += struct.pack('!HHHH', self._T_OBJHASH, 4 + len(digest), hash_value.hash_algorithm(), len(digest))
+            buffer += digest
+        return len(buffer) - start
+
+    def encode_batch(self, requests: Iterable[Tuple[Optional[int], Optional[HashValue]]],
+                     buffer: Optional[bytearray] = None) -> Tuple[bytearray, List[int]]:
+        """
+        Encode many Interests back to back.
+
+        :param requests: (segment_id, hash_value) pairs
+        :param buffer: If not None, append to it (e.g. after the Interests of another template)
+        :return: The buffer and the offset of each Interest in it
+        """
+        if buffer is None:
+            buffer = bytearray()
+        offsets = []
+        for segment_id, hash_value in requests:
+            offsets.append(len(buffer))
+            self.encode_into(buffer, hash_value, segment_id)
+        return buffer, offsets
+
+    def encode_hash_group(self, hash_group: HashGroup, buffer: Optional[bytearray] = None) -> Tuple[bytearray, List[int]]:
+        """
+        Encode the Interests for every pointer of a hash group, in order.  If the template has a segment suffix,
+        the segments start at the group's `StartSegmentId`.
+        """
+        start_segment_id = None
+        if self._suffix_type is not None:
+            group_data = hash_group.group_data()
+            if group_data is None or group_data.start_segment_id() is None:
+                raise ValueError("The hash group has no StartSegmentId")
+            start_segment_id = group_data.start_segment_id().value()
+        return self.encode_batch(((start_segment_id + i if start_segment_id is not None else None, hash_value)
+                                  for i, hash_value in enumerate(hash_group.pointers())), buffer)
+
+    @classmethod
+    def split_name(cls, name: Name) -> Tuple[bytes, Optional[int], Optional[int]]:
+        """
+        Split a name whose last component is a chunk or manifest id into (prefix, suffix_type, segment_id),
+        so the Interests for all the segments under a prefix can share one template.  Any other name is
+        returned whole, as (prefix, None, None).  The prefix is the encoded name components.
+        """
+        wire = bytes(name.serialize())
+        count = name.count()
+        if count > 0:
+            last = name.component(count - 1)
+            if last.is_chunk_id_segment() or last.is_manifest_id_segment():
+                value = bytes(last.value())
+                segment_id = int.from_bytes(value, 'big')
+                # only if re-encoding the number gives the same bytes
+                if cls._number_bytes(segment_id) == value:
+                    return wire[4:len(wire) - 4 - len(value)], last.type(), segment_id
+        return wire[4:], None, None
+
+    @staticmethod
+    def _number_bytes(n: int) -> bytes:
+        # the same minimal encoding as `Tlv.number_to_array`
+        if n < 0:
+            raise ValueError(f"segment_id must be non-negative, got {n}")
+        if n < 0x100000000:
+            return n.to_bytes(max(1, (n.bit_length() + 7) // 8), 'big')
+        return n.to_bytes(8, 'big')
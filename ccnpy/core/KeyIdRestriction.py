@@ -0,0 +1,28 @@
+#  Copyright 2024 Marc Mosko
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+from .HashTlvType import HashTlvType
+
+
+class KeyIdRestriction(HashTlvType):
+    """
+    The KeyId restriction of an Interest (the KeyId of the signer).
+    """
+    __T_KEYIDRESTR = 0x0002
+
+    @classmethod
+    def class_type(cls):
+        return cls.__T_KEYIDRESTR
+
+    def __repr__(self):
+        return "KeyIdRestriction(%r)" % self._digest
@@ -0,0 +1,69 @@
+#  Copyright 2024 Marc Mosko
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+import heapq
+import itertools
+from typing import Optional, Dict, List, Tuple
+
+from .EvictionPolicy import EvictionPolicy
+from .HashValue import HashValue
+
+
+class LfuEvictionPolicy(EvictionPolicy):
+    """
+    Evict the least frequently used entry, the least recently used among equals.  Frequently requested
+    objects (e.g. the top manifests of popular trees) survive a scan of many objects used once.
+
+    The heap is updated lazily: each access pushes a new (count, sequence, key) entry and stale entries are
+    skipped when looking for a victim, so every operation is O(log n).
+    """
+
+    def __init__(self):
+        self._counts: Dict[HashValue, Tuple[int, int]] = {}
+        self._heap: List[Tuple[int, int, HashValue]] = []
+        self._sequence = itertools.count()
+
+    def __len__(self):
+        return len(self._counts)
+
+    def insert(self, key: HashValue):
+        self._push(key, 1)
+
+    def access(self, key: HashValue):
+        entry = self._counts.get(key)
+        if entry is not None:
+            self._push(key, entry[0] + 1)
+
+    def remove(self, key: HashValue):
+        self._counts.pop(key, None)
+
+    def count(self, key: HashValue) -> int:
+        entry = self._counts.get(key)
+        return entry[0] if entry is not None else 0
+
+    def victim(self) -> Optional[HashValue]:
+        while len(self._heap) > 0:
+            count, sequence, key = self._heap[0]
+            if self._counts.get(key) == (count, sequence):
+                return key
+            heapq.heappop(self._heap)
+        return None
+
+    def _push(self, key: HashValue, count: int):
+        entry = (count, next(self._sequence))
+        self._counts[key] = entry
+        heapq.heappush(self._heap, (entry[0], entry[1], key))
+        if len(self._heap) > 2 * len(self._counts) + 64:
+            # drop the stale entries
+            self._heap = [(c, s, k) for c, s, k in self._heap if self._counts.get(k) == (c, s)]
+            heapq.heapify(self._heap)
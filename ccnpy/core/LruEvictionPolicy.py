@@ -0,0 +1,44 @@
+#  Copyright 2024 Marc Mosko
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+from collections import OrderedDict
+from typing import Optional
+
+from .EvictionPolicy import EvictionPolicy
+from .HashValue import HashValue
+
+
+class LruEvictionPolicy(EvictionPolicy):
+    """
+    Evict the least recently used entry.
+    """
+
+    def __init__(self):
+        self._order: OrderedDict[HashValue, None] = OrderedDict()
+
+    def __len__(self):
+        return len(self._order)
+
+    def insert(self, key: HashValue):
+        self._order[key] = None
+        self._order.move_to_end(key)
+
+    def access(self, key: HashValue):
+        if key in self._order:
+            self._order.move_to_end(key)
+
+    def remove(self, key: HashValue):
+        self._order.pop(key, None)
+
+    def victim(self) -> Optional[HashValue]:
+        return next(iter(self._order), None)
@@ -14,7 +14,7 @@
 import abc
 import array
 import hashlib
-from typing import Iterable, Optional
+from typing import Iterable, Optional, Tuple
 
 from .ContentObject import ContentObject
 from .FixedHeader import FixedHeader
@@ -171,6 +171,16 @@ class PacketReader(abc.ABC):
     def get(self, name: Name, hash_restriction: HashValue, locators: Optional[Locators] = None) -> Packet:
         pass
 
+    def prefetch(self, requests: Iterable[Tuple[Optional[Name], HashValue]], locators: Optional[Locators] = None):
+        """
+        A hint that the caller will soon `get()` each of the (name, hash_restriction) pairs.  A reader that
+        can fetch ahead (e.g. a cache or a pipelined network reader) may start doing so.  The default does nothing.
+
+        :param requests: An iterable of (name, hash_restriction) pairs, in the order they will be requested
+        :param locators: The locators (forwarding hints) that apply to all of the requests
+        """
+        pass
+
     def close(self):
         pass
 
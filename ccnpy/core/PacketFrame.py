@@ -0,0 +1,66 @@
+#  Copyright 2024 Marc Mosko
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+import array
+from typing import Optional
+
+from .FixedHeader import FixedHeader
+from .Packet import Packet
+
+
+class PacketFrame:
+    """
+    One complete wire-format packet cut from a stream by `PacketStreamDecoder`.
+
+    The frame is a memoryview of the decoder's buffer (not a copy).  The packet is only decoded when
+    `packet()` is called, so a caller that just forwards or stores the bytes never pays for decoding.
+    """
+    __slots__ = ('_view', '_packet')
+
+    def __init__(self, view: memoryview):
+        self._view = view
+        self._packet: Optional[Packet] = None
+
+    def __len__(self):
+        return len(self._view)
+
+    def __repr__(self):
+        return f"PacketFrame(type={self.packet_type()}, len={len(self._view)})"
+
+    def view(self) -> memoryview:
+        """The wire format, as a read-only view of the stream buffer"""
+        return self._view
+
+    def tobytes(self) -> bytes:
+        return self._view.tobytes()
+
+    def packet_type(self) -> int:
+        return self._view[1]
+
+    def is_interest(self) -> bool:
+        return self._view[1] == FixedHeader.PT_INTEREST
+
+    def is_content_object(self) -> bool:
+        return self._view[1] == FixedHeader.PT_CONTENT
+
+    def is_interest_return(self) -> bool:
+        return self._view[1] == FixedHeader.PT_RETURN
+
+    def header(self) -> FixedHeader:
+        return FixedHeader.deserialize(self._view[:8])
+
+    def packet(self) -> Packet:
+        """Decode (once) and return the packet"""
+        if self._packet is None:
+            self._packet = Packet.deserialize(array.array("B", self._view))
+        return self._packet
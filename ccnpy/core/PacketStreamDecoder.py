@@ -0,0 +1,132 @@
+#  Copyright 2024 Marc Mosko
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+import struct
+from typing import Iterator
+
+from .PacketFrame import PacketFrame
+
+
+class PacketStreamDecoder:
+    """
+    Cuts a byte stream (e.g. from a socket or a file of concatenated packets) into wire-format packets.
+
+    Bytes may arrive in chunks of any size.  Each complete packet is returned as a `PacketFrame`, which is a
+    memoryview of the decoder's buffer, so framing does not copy.  The fixed header is checked as soon as its
+    8 bytes arrive, so a malformed stream is rejected before waiting for (possibly bogus) packet lengths.
+
+    Bytes are appended to the buffer and consumed from its front.  When the buffer runs out of room, the
+    unconsumed tail (at most one partial packet) moves to a new buffer.  The old buffer is never written again,
+    so a frame stays valid for as long as the caller holds it.
+
+    Either `feed(data)` (one copy into the buffer), or read directly into the buffer:
+
+        decoder = PacketStreamDecoder()
+        while (n := sock.recv_into(decoder.writable())) > 0:
+            decoder.commit(n)
+            for frame in decoder.frames():
+                packet = frame.packet()
+    """
+    __FIXED_HEADER_LEN = 8
+    __MAX_PACKET_LEN = 0xFFFF
+    __PACKET_TYPES = (0x00, 0x01, 0x02)
+
+    def __init__(self, capacity: int = 256 * 1024, max_packet_length: int = __MAX_PACKET_LEN):
+        """
+        :param capacity: The buffer size.  It must hold at least one maximum-length packet.
+        :param max_packet_length: Reject any packet that claims to be longer
+        """
+        if capacity < max_packet_length:
+            raise ValueError(f"capacity {capacity} must be at least max_packet_length {max_packet_length}")
+        self._capacity = capacity
+        self._max_packet_length = max_packet_length
+        self._buffer = bytearray(capacity)
+        self._start = 0
+        self._end = 0
+        self.frames_decoded = 0
+        self.bytes_decoded = 0
+        self.buffer_swaps = 0
+
+    def __len__(self):
+        """The number of bytes buffered but not yet returned in a frame"""
+        return self._end - self._start
+
+    def __repr__(self):
+        return f"PacketStreamDecoder(buffered={len(self)}, frames={self.frames_decoded}, bytes={self.bytes_decoded})"
+
+    def feed(self, data):
+        """
+        Append bytes to the stream.
+
+        :param data: bytes, bytearray, memoryview or array
+        """
+        view = memoryview(data).cast('B')
+        self._reserve(len(view))
+        self._buffer[self._end:self._end + len(view)] = view
+        self._end += len(view)
+
+    def writable(self, size: int = 65536) -> memoryview:
+        """
+        A writable view of at least `size` free bytes at the end of the stream, e.g. for `socket.recv_into`.
+        Call `commit()` with the number of bytes written.
+        """
+        self._reserve(size)
+        return memoryview(self._buffer)[self._end:]
+
+    def commit(self, count: int):
+        """Add `count` bytes written into `writable()` to the stream"""
+        if count < 0 or self._end + count > len(self._buffer):
+            raise ValueError(f"Invalid commit count {count}")
+        self._end += count
+
+    def frames(self) -> Iterator[PacketFrame]:
+        """
+        Yield each complete packet in the buffer.
+
+        :raises ValueError: If the stream has a malformed fixed header.  The stream cannot be re-framed after that.
+        """
+        while self._end - self._start >= self.__FIXED_HEADER_LEN:
+            version, packet_type, packet_length, _, _, _, header_length = \
+                struct.unpack_from('!BBHBBBB', self._buffer, self._start)
+            self._check_header(version, packet_type, packet_length, header_length)
+            if self._end - self._start < packet_length:
+                return
+            frame = PacketFrame(memoryview(self._buffer)[self._start:self._start + packet_length].toreadonly())
+            self._start += packet_length
+            self.frames_decoded += 1
+            self.bytes_decoded += packet_length
+            yield frame
+
+    def _check_header(self, version: int, packet_type: int, packet_length: int, header_length: int):
+        if version != 1:
+            raise ValueError(f"fixed header version {version} must be 1")
+        if packet_type not in self.__PACKET_TYPES:
+            raise ValueError(f"Unsupported packet type {packet_type}")
+        if header_length < self.__FIXED_HEADER_LEN:
+            raise ValueError(f"header_length {header_length} must be at least 8")
+        if packet_length < header_length:
+            raise ValueError(f"packet_length {packet_length} is less than header_length {header_length}")
+        if packet_length > self._max_packet_length:
+            raise ValueError(f"packet_length {packet_length} exceeds the maximum {self._max_packet_length}")
+
+    def _reserve(self, size: int):
+        if len(self._buffer) - self._end >= size:
+            return
+        # Move the partial packet to a new buffer.  Frames returned so far still reference the old one.
+        pending = self._end - self._start
+        new_buffer = bytearray(max(self._capacity, pending + size))
+        new_buffer[:pending] = memoryview(self._buffer)[self._start:self._end]
+        self._buffer = new_buffer
+        self._start = 0
+        self._end = pending
+        self.buffer_swaps += 1
@@ -11,19 +11,39 @@
 #  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
-from typing import Optional
+import threading
+from typing import Optional, Dict, Tuple
 
-from ccnpy.core.ValidationAlg import ValidationAlg_Crc32c, ValidationAlg_RsaSha256
+from ccnpy.core.HashValue import HashValue
+from ccnpy.core.ValidationAlg import ValidationAlg_Crc32c, ValidationAlg_RsaSha256, ValidationAlg_PublicKey, \
+    ValidationAlg_Ed25519, ValidationAlg_EcdsaP256, ValidationAlg_HmacSha256
 from ccnpy.crypto.Crc32c import Crc32cVerifier
-from ccnpy.crypto.InsecureKeystore import InsecureKeystore
+from ccnpy.crypto.EcdsaP256 import EcdsaP256Verifier
+from ccnpy.crypto.Ed25519 import Ed25519Verifier
+from ccnpy.crypto.HmacSha256 import HmacSha256Verifier
+from ccnpy.crypto.InsecureKeystore import InsecureKeystore, KeyIdNotFoundError
 from ccnpy.crypto.RsaSha256 import RsaSha256Verifier
+from ccnpy.crypto.Verifier import Verifier
 
 
 class PacketValidator:
+    """
+    Verifies the validation payload of a packet (CRC32C, HMAC-SHA256, RSA-SHA256, Ed25519, or ECDSA-P256).
+    Public key and HMAC verifiers are cached by algorithm and KeyId, so
+    one validator may be shared by many traversals (it is thread-safe).
+    """
     __static_crc32c_verifier = Crc32cVerifier()
+    __verifier_classes = {
+        ValidationAlg_RsaSha256: RsaSha256Verifier,
+        ValidationAlg_Ed25519: Ed25519Verifier,
+        ValidationAlg_EcdsaP256: EcdsaP256Verifier,
+    }
 
     def __init__(self, keystore: Optional[InsecureKeystore]):
         self._keystore = keystore
+        self._lock = threading.Lock()
+        self._verifiers: Dict[Tuple[type, HashValue], Verifier] = {}
+        self.validations = 0
 
     def validate_packet(self, packet):
         alg = packet.validation_alg()
@@ -34,18 +54,21 @@ class PacketValidator:
             # use a pre-allocated one, no need to allocate every packet
             verifier = self.__static_crc32c_verifier
 
-        elif isinstance(alg, ValidationAlg_RsaSha256):
+        elif isinstance(alg, ValidationAlg_HmacSha256):
             if self._keystore is None:
-                print(f"Cannot verify packet, no RSA keys.")
-                return
+                raise ValueError(f"Packet fails validation, no keystore to verify {type(alg).__name__}")
 
-            rsa_pub_key = self._keystore.get_rsa(alg.keyid())
-            if rsa_pub_key is None:
-                print(f"Packet requires RsaSha256 verifier, but no key matching keyid {alg.keyid} found.")
-                return
+            verifier = self._hmac_verifier(alg)
+            if verifier is None:
+                raise ValueError(f"Packet fails validation, {type(alg).__name__} has no key matching keyid {alg.keyid()}")
 
-            # TODO: we should cache these
-            verifier = RsaSha256Verifier(key=rsa_pub_key)
+        elif isinstance(alg, ValidationAlg_PublicKey):
+            if self._keystore is None:
+                raise ValueError(f"Packet fails validation, no keystore to verify {type(alg).__name__}")
+
+            verifier = self._public_key_verifier(alg)
+            if verifier is None:
+                raise ValueError(f"Packet fails validation, {type(alg).__name__} has no key matching keyid {alg.keyid()}")
         else:
             raise ValueError(f'Validation alg {alg} not supported.')
 
@@ -53,5 +76,43 @@ class PacketValidator:
                                  validation_payload=packet.validation_payload())
         if not result:
             raise ValueError(f'Packet fails validation')
+        with self._lock:
+            self.validations += 1
         print(f"Packet validation success with {verifier}")
-        return
\ No newline at end of file
+        return
+
+    def _public_key_verifier(self, alg: ValidationAlg_PublicKey) -> Optional[Verifier]:
+        keyid = alg.keyid()
+        cache_key = (type(alg), keyid)
+        with self._lock:
+            verifier = self._verifiers.get(cache_key)
+        if verifier is None:
+            try:
+                if isinstance(alg, ValidationAlg_RsaSha256):
+                    pub_key = self._keystore.get_rsa(keyid)
+                else:
+                    pub_key = self._keystore.get_ec(keyid)
+            except KeyIdNotFoundError:
+                return None
+            try:
+                verifier = self.__verifier_classes[type(alg)](key=pub_key)
+            except TypeError as e:
+                raise ValueError(f"Packet fails validation, the key for keyid {keyid} does not match {type(alg).__name__}: {e}")
+            with self._lock:
+                verifier = self._verifiers.setdefault(cache_key, verifier)
+        return verifier
+
+    def _hmac_verifier(self, alg: ValidationAlg_HmacSha256) -> Optional[Verifier]:
+        keyid = alg.keyid()
+        cache_key = (type(alg), keyid)
+        with self._lock:
+            verifier = self._verifiers.get(cache_key)
+        if verifier is None:
+            try:
+                key = self._keystore.get_hmac(keyid)
+            except KeyIdNotFoundError:
+                return None
+            verifier = HmacSha256Verifier(key=key)
+            with self._lock:
+                verifier = self._verifiers.setdefault(cache_key, verifier)
+        return verifier
@@ -141,9 +141,14 @@ class Tlv(Serializable):
     def _serialize(self):
         byte_list = self._encode_type()
         byte_list.extend(self._encode_length())
-        byte_list.extend(self.value())
-
         wire_format = array.array("B", byte_list)
+
+        value = self.value()
+        if isinstance(value, (bytes, bytearray, memoryview)) or (isinstance(value, array.array) and value.typecode == "B"):
+            # a buffer copy, without going through a list of ints
+            wire_format.frombytes(value)
+        else:
+            wire_format.extend(value)
         return wire_format
 
     def extend(self, other_tlv):
@@ -56,6 +56,15 @@ class ValidationAlg(TlvType):
         if inner_tlv.type() == ValidationAlg_Crc32c.class_type():
             return ValidationAlg_Crc32c.parse(inner_tlv)
 
+        if inner_tlv.type() == ValidationAlg_Ed25519.class_type():
+            return ValidationAlg_Ed25519.parse(inner_tlv)
+
+        if inner_tlv.type() == ValidationAlg_EcdsaP256.class_type():
+            return ValidationAlg_EcdsaP256.parse(inner_tlv)
+
+        if inner_tlv.type() == ValidationAlg_HmacSha256.class_type():
+            return ValidationAlg_HmacSha256.parse(inner_tlv)
+
         raise ValueError("Unsupported ValidationAlg type %r" % tlv.type())
 
     @abstractmethod
@@ -98,21 +107,88 @@ class ValidationAlg_Crc32c(ValidationAlg):
         return self._tlv.serialize()
 
 
-class ValidationAlg_RsaSha256(ValidationAlg):
-    __T_RSA_SHA256 = 0x0004
+class ValidationAlg_HmacSha256(ValidationAlg):
+    """
+    HMAC-SHA256 with a shared key (RFC 8609).  It has a KeyId to identify the shared key and the SignatureTime.
+    """
+    __T_HMAC_SHA256 = 0x0003
 
-    __T_PUBLICKEYLOC = 0x000A
-    __T_PUBLICKEY = 0x000B
+    @classmethod
+    def class_type(cls):
+        return cls.__T_HMAC_SHA256
 
+    def __init__(self, keyid: HashValue, signature_time=None):
+        """
+        :param keyid: The KeyId of the shared key (HashValue)
+        :param signature_time: A datetime when the signature was created (uses now if None) (SignatureTime)
+        """
+        ValidationAlg.__init__(self)
+        if keyid is None:
+            raise ValueError("Must provide a keyid")
+
+        if signature_time is None:
+            signature_time = datetime.now(UTC)
+
+        if isinstance(signature_time, datetime):
+            signature_time = SignatureTime.from_datetime(signature_time)
+        elif not isinstance(signature_time, SignatureTime):
+            raise TypeError("signature_time must be None (for now), a datetime (UTC), or a SignatureTime")
+
+        self._tlv = Tlv(ValidationAlg.class_type(),
+                        Tlv(self.class_type(), [KeyId(keyid), signature_time]))
+        self._keyid = keyid
+        self._signature_time = signature_time
+
+    def __eq__(self, other):
+        if not isinstance(other, ValidationAlg_HmacSha256):
+            return False
+        return self._tlv == other._tlv
+
+    def __len__(self):
+        return len(self._tlv)
+
+    def __repr__(self):
+        return "HmacSha256: {keyid: %r, %r}" % (self._keyid, self._signature_time)
+
+    def keyid(self) -> HashValue:
+        return self._keyid
+
+    def signature_time(self):
+        return self._signature_time
 
     @classmethod
-    def class_type(cls):
-        return cls.__T_RSA_SHA256
+    def parse(cls, tlv):
+        if tlv.type() != cls.class_type():
+            raise ValueError("Incorrect TLV type %r" % tlv.type())
+
+        keyid = signature_time = None
+        offset = 0
+        while offset < tlv.length():
+            inner_tlv = Tlv.deserialize(tlv.value()[offset:])
+            if inner_tlv.type() == KeyId.class_type():
+                keyid = KeyId.parse(inner_tlv).digest()
+            elif inner_tlv.type() == SignatureTime.class_type():
+                signature_time = SignatureTime.parse(inner_tlv)
+            offset += len(inner_tlv)
+        return cls(keyid=keyid, signature_time=signature_time)
+
+    def serialize(self):
+        return self._tlv.serialize()
+
+
+class ValidationAlg_PublicKey(ValidationAlg):
+    """
+    The common format of the public key signature algorithms: a KeyId, an optional public key,
+    an optional KeyLink, and the SignatureTime.  A subclass only provides its `class_type()`.
+    """
+    _T_PUBLICKEYLOC = 0x000A
+    _T_PUBLICKEY = 0x000B
+    _NAME = None
 
     def __init__(self, keyid: HashValue=None, public_key=None, key_link=None, signature_time=None):
         """
         :param keyid: The keyid to include in the ValidationAlg (HashValue)
-        :param public_key: A crypto.RsaKey with a public key to embed in the ValidationAlg (RsaKey)
+        :param public_key: A crypto key (e.g. RsaKey) with a public key to embed in the ValidationAlg
         :param key_link: A Link to include in the ValidationAlg (Link)
         :param signature_time: A datetime when the signature was created (uses now if None) (SignatureTime)
         """
@@ -128,7 +204,7 @@ class ValidationAlg_RsaSha256(ValidationAlg):
         tlvs.append(KeyId(keyid))
 
         if public_key is not None:
-            tlvs.append(Tlv(self.__T_PUBLICKEY, public_key.der()))
+            tlvs.append(Tlv(self._T_PUBLICKEY, public_key.public_key_der()))
 
         if key_link is not None:
             tlvs.append(Tlv(KeyLink.class_type(), key_link))
@@ -150,7 +226,7 @@ class ValidationAlg_RsaSha256(ValidationAlg):
         self._signature_time = signature_time
 
     def __eq__(self, other):
-        if not isinstance(other, ValidationAlg_RsaSha256):
+        if type(other) is not type(self):
             return False
         return self._tlv == other._tlv
 
@@ -158,8 +234,8 @@ class ValidationAlg_RsaSha256(ValidationAlg):
         return len(self._tlv)
 
     def __repr__(self):
-        return "RsaSha256: {keyid: %r, pk: %r, keylink: %r, %r}" % \
-               (self._keyid, self._public_key, self._key_link, self._signature_time)
+        return "%s: {keyid: %r, pk: %r, keylink: %r, %r}" % \
+               (self._NAME, self._keyid, self._public_key, self._key_link, self._signature_time)
 
     def keyid(self) -> HashValue:
         return self._keyid
@@ -175,7 +251,7 @@ class ValidationAlg_RsaSha256(ValidationAlg):
 
     @classmethod
     def parse(cls, tlv):
-        if tlv.type() != ValidationAlg_RsaSha256.class_type():
+        if tlv.type() != cls.class_type():
             raise ValueError("Incorrect TLV type %r" % tlv.type())
 
         # Now parse the body for the inner TLVs
@@ -188,7 +264,7 @@ class ValidationAlg_RsaSha256(ValidationAlg):
                 keyid = keyid_tlv.digest()
             elif inner_tlv.type() == SignatureTime.class_type():
                 signature_time = SignatureTime.parse(inner_tlv)
-            elif inner_tlv.type() == cls.__T_PUBLICKEY:
+            elif inner_tlv.type() == cls._T_PUBLICKEY:
                 der = inner_tlv.value()
                 # TODO: convert from DER to Public Key
                 raise RuntimeError("Not implemented")
@@ -200,3 +276,38 @@ class ValidationAlg_RsaSha256(ValidationAlg):
 
     def serialize(self):
         return self._tlv.serialize()
+
+
+class ValidationAlg_RsaSha256(ValidationAlg_PublicKey):
+    __T_RSA_SHA256 = 0x0004
+    _NAME = "RsaSha256"
+
+    @classmethod
+    def class_type(cls):
+        return cls.__T_RSA_SHA256
+
+
+class ValidationAlg_Ed25519(ValidationAlg_PublicKey):
+    """
+    EdDSA with Ed25519 (RFC 8032).  RFC 8609 does not assign a type, so this uses one from the
+    experimental range.
+    """
+    __T_ED25519 = 0x1001
+    _NAME = "Ed25519"
+
+    @classmethod
+    def class_type(cls):
+        return cls.__T_ED25519
+
+
+class ValidationAlg_EcdsaP256(ValidationAlg_PublicKey):
+    """
+    ECDSA on P-256 (secp256r1) with SHA256.  RFC 8609 only assigns secp256k1 and secp384r1, so this
+    uses a type from the experimental range.
+    """
+    __T_ECDSA_P256 = 0x1002
+    _NAME = "EcdsaP256"
+
+    @classmethod
+    def class_type(cls):
+        return cls.__T_ECDSA_P256
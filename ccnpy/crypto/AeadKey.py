@@ -44,6 +44,8 @@ class AeadKey(ABC):
         self._algo = algo
         self._impl = algo(key)
         self._key = key
+        # newer cryptography releases can write into a caller-provided output buffer
+        self._has_into = hasattr(self._impl, 'encrypt_into')
 
     def __len__(self):
         return self._key_bits
@@ -77,56 +79,60 @@ class AeadKey(ABC):
         nonce = array.array("B", os.urandom(bits // 8))
         return nonce
 
+    @staticmethod
+    def _output_buffer(length: int) -> array.array:
+        # repeating a one-element array does not allocate a temporary bytes object
+        return array.array("B", [0]) * length
+
     def encrypt(self, iv, plaintext, associated_data):
         """
+        The inputs may be any buffer (bytes, bytearray, memoryview, or array) and are passed to the
+        backend without a copy.  If the backend supports it, the ciphertext is written directly into
+        the returned array.
 
         :param iv:
         :param plaintext:
         :param associated_data: (optional)
-        :return: The tuple (ciphertext, authtag)
+        :return: The tuple (ciphertext, authtag), both arrays
         """
-
-        if isinstance(plaintext, array.array):
-            plaintext = plaintext.tobytes()
-
-        if isinstance(associated_data, array.array):
-            associated_data = associated_data.tobytes()
-
-        output = self._impl.encrypt(iv, plaintext, associated_data)
-        ciphertext = array.array("B", output[:-self._tag_len])
-        authtag = array.array("B", output[len(ciphertext):])
+        if self._has_into:
+            ciphertext = self._output_buffer(len(plaintext) + self._tag_len)
+            self._impl.encrypt_into(iv, plaintext, associated_data, ciphertext)
+            authtag = ciphertext[-self._tag_len:]
+            # shrinks in place, the ciphertext is not copied
+            del ciphertext[-self._tag_len:]
+        else:
+            output = memoryview(self._impl.encrypt(iv, plaintext, associated_data))
+            ciphertext = array.array("B", output[:-self._tag_len])
+            authtag = array.array("B", output[-self._tag_len:])
         if self.DEBUG:
             print(f"Encrypt: iv: {iv}, data: {associated_data}, authtag: {authtag}")
         return ciphertext, authtag
 
     def decrypt(self, iv, ciphertext, associated_data, auth_tag):
         """
+        The inputs may be any buffer (bytes, bytearray, memoryview, or array).  The only copy is joining
+        the ciphertext and auth tag, which the backend needs contiguous.
 
         :param iv:
         :param ciphertext: a byte array
         :param associated_data: a byte array
         :param auth_tag: a byte array
-        :return: The plaintext byte array or None (if authentication fails)
+        :return: The plaintext byte array
         :raises DecryptionError: If the decryption fails authentication
         """
-
-        if isinstance(ciphertext, array.array):
-            ciphertext = ciphertext.tobytes()
-
-        if isinstance(auth_tag, array.array):
-            auth_tag = auth_tag.tobytes()
-
-        if isinstance(associated_data, array.array):
-            associated_data = associated_data.tobytes()
-
-        combined = ciphertext + auth_tag
+        combined = bytearray(ciphertext)
+        combined += auth_tag
 
         if self.DEBUG:
             print(f"Decrypt: iv: {iv}, data: {associated_data}, authtag: {auth_tag}")
 
         try:
-            plaintext = self._impl.decrypt(iv, combined, associated_data)
-            return array.array("B", plaintext)
+            if self._has_into:
+                plaintext = self._output_buffer(len(ciphertext))
+                self._impl.decrypt_into(iv, combined, associated_data, plaintext)
+                return plaintext
+            return array.array("B", self._impl.decrypt(iv, combined, associated_data))
         except InvalidTag as e:
             print(f"Decryption failed due to tag mismatch.  Either the key or salt is incorrect for the packet.")
             # translate a Cryptography package exception into our own exception
@@ -0,0 +1,263 @@
+#  Copyright 2024 Marc Mosko
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict
+
+from ccnpy.core.HashValue import HashValue
+from ccnpy.core.KeyId import KeyId
+from ccnpy.crypto.AeadKey import AeadGcm, AeadCcm
+from ccnpy.crypto.EcKey import EcKey
+from ccnpy.crypto.HmacKey import HmacKey
+from ccnpy.crypto.InsecureKeystore import InsecureKeystore, KeyIdNotFoundError, KeyNumberNotFoundError
+from ccnpy.crypto.RsaKey import RsaKey
+from ccnpy.flic.aeadctx.AeadParameters import AeadParameters
+from ccnpy.flic.tlvs.KeyNumber import KeyNumber
+
+
+class DirectoryKeystore(InsecureKeystore):
+    """
+    A keystore over a directory of key files that only loads the keys it is asked for.  Like `InsecureKeystore`,
+    it is not secure, and it is a drop-in replacement for it (e.g. in `PacketValidator` or `DecryptorCache`).
+
+    The directory has an index file, `index.json`, mapping each KeyId digest, key name, and key number to a file.
+    The key files are:
+        * `*.pem`: an RSA, Ed25519, or ECDSA P-256 key.  The name is the file stem.  An encrypted private key
+          is unlocked with `password`.
+        * `*.hmac`: an HMAC-SHA256 key in hex.
+        * `*.aes`: a JSON object `{"key": hex, "key_number": int, "mode": "GCM"|"CCM", "aead_salt": int, "kdf_salt": int}`.
+          The mode and salts are optional.
+
+    If there is no index, it is built by `create_index()`, which reads every key once.
+
+    A key is read and unlocked on first use and kept in an LRU of `max_loaded` keys.  Keys added with the
+    `add_*` methods are kept, as in `InsecureKeystore`, and are searched first.  `preload()` (or `preload=True`)
+    loads keys in parallel for a warm start.
+
+    The keystore is thread-safe.  `hits`, `misses`, and `evictions` count the LRU lookups, and `load_seconds`
+    is the total time spent reading and unlocking keys.
+    """
+    logger = logging.getLogger(__name__)
+
+    INDEX_FILENAME = 'index.json'
+    _VERSION = 1
+
+    def __init__(self, directory: str, password: Optional[str | bytes] = None, max_loaded: int = 64,
+                 preload: bool = False, preload_workers: int = 4):
+        """
+        :param directory: The key directory
+        :param password: The password of the encrypted private keys
+        :param max_loaded: The maximum number of loaded keys to keep
+        :param preload: If True, load up to `max_loaded` keys now
+        :param preload_workers: The number of threads to preload with
+        """
+        super().__init__()
+        if not os.path.isdir(directory):
+            raise RuntimeError("directory does not exist: %r" % directory)
+        if max_loaded <= 0:
+            raise ValueError(f"max_loaded must be positive, got {max_loaded}")
+        self._directory = directory
+        self._password = password.encode() if isinstance(password, str) else password
+        self._max_loaded = max_loaded
+        self._lock = threading.Lock()
+        self._loaded: OrderedDict[str, object] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.load_seconds = 0.0
+
+        index = self._load_index()
+        self._files_by_keyid: Dict[str, str] = index['keyid']
+        self._files_by_name: Dict[str, str] = index['name']
+        self._files_by_keynum: Dict[str, str] = index['key_number']
+        if preload:
+            self.preload(workers=preload_workers)
+
+    def __repr__(self):
+        return (f"DirectoryKeystore({self._directory}, files={len(self.files())}, loaded={len(self._loaded)}, "
+                f"hits={self.hits}, misses={self.misses}, evictions={self.evictions})")
+
+    def files(self):
+        """The key files in the index"""
+        return set(self._files_by_keyid.values()) | set(self._files_by_name.values()) | set(self._files_by_keynum.values())
+
+    @staticmethod
+    def _keyid_key(keyid: HashValue) -> str:
+        return keyid.value().tobytes().hex()
+
+    @classmethod
+    def create_index(cls, directory: str, password: Optional[str | bytes] = None) -> Dict[str, Dict[str, str]]:
+        """
+        Read every key file in `directory` and write the index.  Files that cannot be read are skipped.
+
+        :return: The index
+        """
+        if isinstance(password, str):
+            password = password.encode()
+        index = {'keyid': {}, 'name': {}, 'key_number': {}}
+        for filename in sorted(os.listdir(directory)):
+            path = os.path.join(directory, filename)
+            stem, extension = os.path.splitext(filename)
+            try:
+                if extension == '.pem':
+                    key = cls._read_key(path, password)
+                    index['keyid'][cls._keyid_key(key.keyid())] = filename
+                    index['name'][stem] = filename
+                elif extension == '.hmac':
+                    index['keyid'][cls._keyid_key(cls._read_key(path, password).keyid())] = filename
+                elif extension == '.aes':
+                    params = cls._read_key(path, password)
+                    index['key_number'][str(params.key_number.value())] = filename
+            except (OSError, ValueError, TypeError, KeyError) as e:
+                cls.logger.warning('Skipping key file %s: %s', path, e)
+
+        tmp_path = os.path.join(directory, f'{cls.INDEX_FILENAME}.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump({'version': cls._VERSION, **index}, f, indent=1)
+        os.replace(tmp_path, os.path.join(directory, cls.INDEX_FILENAME))
+        return index
+
+    def _load_index(self) -> Dict[str, Dict[str, str]]:
+        path = os.path.join(self._directory, self.INDEX_FILENAME)
+        if not os.path.exists(path):
+            self.logger.info('No key index in %s, creating one', self._directory)
+            return self.create_index(self._directory, self._password)
+        with open(path, 'r') as f:
+            saved = json.load(f)
+        if saved.get('version') != self._VERSION:
+            raise ValueError(f"Unsupported key index version {saved.get('version')} in {path}")
+        return saved
+
+    @staticmethod
+    def _read_key(path: str, password: Optional[bytes]):
+        """
+        :return: An RsaKey, EcKey, HmacKey, or AeadParameters, depending on the file extension
+        """
+        extension = os.path.splitext(path)[1]
+        if extension == '.pem':
+            with open(path, 'rb') as f:
+                pem = f.read()
+            if EcKey.is_ec_pem(pem, password):
+                return EcKey(pem, password)
+            return RsaKey(pem, password)
+        if extension == '.hmac':
+            with open(path, 'r') as f:
+                return HmacKey(bytes.fromhex(f.read().strip()))
+        if extension == '.aes':
+            with open(path, 'r') as f:
+                saved = json.load(f)
+            key_class = AeadCcm if saved.get('mode', 'GCM').upper() == 'CCM' else AeadGcm
+            return AeadParameters(key=key_class(bytes.fromhex(saved['key'])),
+                                  key_number=KeyNumber(saved['key_number']),
+                                  aead_salt=saved.get('aead_salt'),
+                                  kdf_salt=saved.get('kdf_salt'))
+        raise ValueError(f'Unsupported key file {path}')
+
+    def _get_file(self, filename: str):
+        """Return the key in `filename` from the LRU, loading it on a miss"""
+        with self._lock:
+            key = self._loaded.get(filename)
+            if key is not None:
+                self._loaded.move_to_end(filename)
+                self.hits += 1
+                return key
+            self.misses += 1
+
+        # Read and unlock outside the lock.  If two threads race, the first one in wins.
+        start = time.perf_counter()
+        key = self._read_key(os.path.join(self._directory, filename), self._password)
+        elapsed = time.perf_counter() - start
+        self.logger.debug('Loaded %s in %.6f seconds', filename, elapsed)
+
+        with self._lock:
+            self.load_seconds += elapsed
+            key = self._loaded.setdefault(filename, key)
+            self._loaded.move_to_end(filename)
+            while len(self._loaded) > self._max_loaded:
+                self._loaded.popitem(last=False)
+                self.evictions += 1
+        return key
+
+    def preload(self, workers: int = 4):
+        """
+        Load up to `max_loaded` of the indexed keys in parallel (e.g. to unlock the private keys before serving).
+        """
+        filenames = sorted(self.files())[:self._max_loaded]
+        with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='key-loader') as executor:
+            # list() re-raises any load error
+            list(executor.map(self._get_file, filenames))
+
+    def get_rsa(self, name_or_keyid) -> RsaKey:
+        try:
+            return super().get_rsa(name_or_keyid)
+        except KeyIdNotFoundError:
+            pass
+        return self._get_pem(name_or_keyid, RsaKey, 'RSA')
+
+    def get_ec(self, name_or_keyid) -> EcKey:
+        try:
+            return super().get_ec(name_or_keyid)
+        except KeyIdNotFoundError:
+            pass
+        return self._get_pem(name_or_keyid, EcKey, 'EC')
+
+    def _get_pem(self, name_or_keyid, key_class: type, kind: str):
+        """Load the .pem file for a name or KeyId, which must hold a `key_class` key"""
+        if isinstance(name_or_keyid, KeyId):
+            name_or_keyid = name_or_keyid.digest()
+        if isinstance(name_or_keyid, HashValue):
+            filename = self._files_by_keyid.get(self._keyid_key(name_or_keyid))
+        else:
+            filename = self._files_by_name.get(name_or_keyid)
+        if filename is None or not filename.endswith('.pem'):
+            raise KeyIdNotFoundError(f'Could not find {kind} name or keyid: {name_or_keyid}')
+        key = self._get_file(filename)
+        if not isinstance(key, key_class):
+            raise KeyIdNotFoundError(f'The key for {name_or_keyid} is not an {kind} key')
+        return key
+
+    def get_rsa_pub_key(self, keyid) -> RsaKey:
+        key = self.get_rsa(keyid)
+        if not key.has_public_key():
+            raise KeyIdNotFoundError(f'Key matching keyid {keyid} has no public key')
+        return key
+
+    def get_hmac(self, keyid) -> HmacKey:
+        try:
+            return super().get_hmac(keyid)
+        except KeyIdNotFoundError:
+            pass
+
+        if isinstance(keyid, KeyId):
+            keyid = keyid.digest()
+        filename = self._files_by_keyid.get(self._keyid_key(keyid))
+        if filename is None or not filename.endswith('.hmac'):
+            raise KeyIdNotFoundError(f'Could not find HMAC keyid: {keyid}')
+        return self._get_file(filename)
+
+    def get_aes_key(self, key_num: KeyNumber) -> AeadParameters:
+        try:
+            return super().get_aes_key(key_num)
+        except KeyNumberNotFoundError:
+            pass
+
+        filename = self._files_by_keynum.get(str(key_num.value()))
+        if filename is None:
+            raise KeyNumberNotFoundError(f'Could not find key number: {key_num}')
+        return self._get_file(filename)
@@ -0,0 +1,187 @@
+#  Copyright 2024 Marc Mosko
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+import array
+import hashlib
+import logging
+
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+from cryptography.hazmat.primitives.asymmetric import utils
+
+from ..core.HashValue import HashValue
+
+
+class EcKey:
+    """
+    An elliptic curve signing key, either Ed25519 (EdDSA) or ECDSA on P-256 (secp256r1) with SHA256.
+
+    Like `RsaKey`, pass in a PEM private key (which can sign and verify) or a PEM public key (which
+    can only verify).  The curve is taken from the key.
+
+    Ed25519 signatures are always 64 bytes.  ECDSA signatures are DER encoded, so they are about 70 to 72 bytes.
+    """
+    logger = logging.getLogger(__name__)
+
+    ED25519 = 'Ed25519'
+    ECDSA_P256 = 'ECDSA-P256'
+
+    def __init__(self, pem_key, password=None):
+        """
+        :param pem_key: A PEM private or public key
+        :param password: The password of an encrypted private key
+        """
+        self._private_key = None
+        self._public_key = None
+
+        if pem_key.startswith(b'-----BEGIN PUBLIC KEY-----\n'):
+            self._public_key = serialization.load_pem_public_key(pem_key)
+        else:
+            if password is not None and len(password) == 0:
+                password = None
+            self._private_key = serialization.load_pem_private_key(pem_key, password=password)
+            self._public_key = self._private_key.public_key()
+
+        if isinstance(self._public_key, ed25519.Ed25519PublicKey):
+            self._algorithm = self.ED25519
+        elif isinstance(self._public_key, ec.EllipticCurvePublicKey) and isinstance(self._public_key.curve, ec.SECP256R1):
+            self._algorithm = self.ECDSA_P256
+        else:
+            raise TypeError(f"Unsupported key type, must be Ed25519 or ECDSA P-256: {type(self._public_key)}")
+
+    def __repr__(self):
+        return "EcKey: {%s, private=%r}" % (self._algorithm, self.has_private_key())
+
+    @staticmethod
+    def is_ec_pem(pem_key, password=None) -> bool:
+        """
+        True if the PEM key is an elliptic curve key (Ed25519 or any ECDSA curve), False otherwise (e.g. RSA).
+        An encrypted private key must be unlocked to learn its type, so a wrong or missing password raises
+        the same error as loading the key.
+        """
+        if pem_key.startswith(b'-----BEGIN PUBLIC KEY-----\n'):
+            key = serialization.load_pem_public_key(pem_key)
+        else:
+            if password is not None and len(password) == 0:
+                password = None
+            key = serialization.load_pem_private_key(pem_key, password=password)
+        return isinstance(key, (ed25519.Ed25519PublicKey, ed25519.Ed25519PrivateKey,
+                                ec.EllipticCurvePublicKey, ec.EllipticCurvePrivateKey))
+
+    def algorithm(self) -> str:
+        """`EcKey.ED25519` or `EcKey.ECDSA_P256`"""
+        return self._algorithm
+
+    def has_private_key(self):
+        return self._private_key is not None
+
+    def has_public_key(self):
+        return self._public_key is not None
+
+    def public_key_pem(self):
+        return self._public_key.public_bytes(
+                encoding=serialization.Encoding.PEM,
+                format=serialization.PublicFormat.SubjectPublicKeyInfo)
+
+    def public_key_der(self):
+        return self._public_key.public_bytes(
+                encoding=serialization.Encoding.DER,
+                format=serialization.PublicFormat.SubjectPublicKeyInfo)
+
+    def private_key_pem(self, password=None):
+        """
+        :param password: If not None, encrypt the key (PKCS #8) with the password
+        :return: The PEM encoded private key
+        """
+        if self._private_key is None:
+            raise ValueError("EcKey does not have a private key")
+        if password is None:
+            encryption = serialization.NoEncryption()
+        else:
+            encryption = serialization.BestAvailableEncryption(password)
+        return self._private_key.private_bytes(
+                encoding=serialization.Encoding.PEM,
+                format=serialization.PrivateFormat.PKCS8,
+                encryption_algorithm=encryption)
+
+    def save_private_key(self, filename, password):
+        with open(filename, "wb") as key_file:
+            key_file.write(self.private_key_pem(password))
+
+    def sign(self, *buffers):
+        """
+        :param buffers: One or more buffers to sign
+        :return: A byte array
+        """
+        if self._private_key is None:
+            raise ValueError("EcKey does not have a private key")
+
+        if self._algorithm == self.ED25519:
+            # EdDSA hashes the message itself (twice), so it cannot be pre-hashed
+            signature = self._private_key.sign(b''.join(bytes(b) for b in buffers))
+        else:
+            signature = self._private_key.sign(self._digest(buffers), ec.ECDSA(utils.Prehashed(hashes.SHA256())))
+        return array.array("B", signature)
+
+    def verify(self, *buffers, signature):
+        if isinstance(signature, array.array):
+            signature = signature.tobytes()
+
+        try:
+            if self._algorithm == self.ED25519:
+                self._public_key.verify(signature, b''.join(bytes(b) for b in buffers))
+            else:
+                self._public_key.verify(signature, self._digest(buffers), ec.ECDSA(utils.Prehashed(hashes.SHA256())))
+            return True
+        except InvalidSignature:
+            return False
+
+    @staticmethod
+    def _digest(buffers) -> bytes:
+        hasher = hashes.Hash(hashes.SHA256())
+        for buffer in buffers:
+            hasher.update(buffer)
+        return hasher.finalize()
+
+    def keyid(self) -> HashValue:
+        """
+        sha256 of the public key in DER format returned in a ccnpy.HashValue
+        """
+        return HashValue.create_sha256(hashlib.sha256(self.public_key_der()).digest())
+
+    @classmethod
+    def generate_ed25519(cls):
+        return cls._from_private_key(ed25519.Ed25519PrivateKey.generate())
+
+    @classmethod
+    def generate_p256(cls):
+        return cls._from_private_key(ec.generate_private_key(ec.SECP256R1()))
+
+    @classmethod
+    def _from_private_key(cls, private_key):
+        pem = private_key.private_bytes(
+                encoding=serialization.Encoding.PEM,
+                format=serialization.PrivateFormat.PKCS8,
+                encryption_algorithm=serialization.NoEncryption())
+        return cls(pem_key=pem)
+
+    @classmethod
+    def load_pem_key(cls, filename, password=None):
+        """
+        loads a PEM key from the file system.  It may be either a private key or a public key.
+        A private key may be encrypted, so pass the correct password.
+        """
+        with open(filename, "rb") as key_file:
+            return cls(key_file.read(), password)
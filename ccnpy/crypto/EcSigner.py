@@ -0,0 +1,91 @@
+#  Copyright 2024 Marc Mosko
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+from datetime import datetime
+
+from .EcKey import EcKey
+from .Signer import Signer
+from .Verifier import Verifier
+from ..core.SignatureTime import SignatureTime
+from ..core.ValidationPayload import ValidationPayload
+
+
+class EcSigner(Signer):
+    """
+    The common code of the elliptic curve signers.  Use `Ed25519Signer` or `EcdsaP256Signer`.
+    """
+    _ALGORITHM = None
+    _VALIDATION_ALG = None
+
+    def __init__(self, key):
+        if not isinstance(key, EcKey):
+            raise TypeError("key must be ccnpy.crypto.EcKey")
+        if key.algorithm() != self._ALGORITHM:
+            raise TypeError(f"key must be {self._ALGORITHM}, got {key.algorithm()}")
+        if not key.has_private_key():
+            raise RuntimeError("key does not hold a private key, cannot sign")
+        self._key = key
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self._key.keyid()})"
+
+    def sign(self, *buffers):
+        return ValidationPayload(self._key.sign(*buffers))
+
+    def keyid(self):
+        return self._key.keyid()
+
+    def validation_alg(self, include_public_key=False, key_link=None, signature_time=None):
+        """
+        Generate a ValidationAlg for this key.  See `Signer.validation_alg()`.
+        """
+        if signature_time is None:
+            signature_time = SignatureTime.now()
+        elif isinstance(signature_time, datetime):
+            signature_time = SignatureTime.from_datetime(signature_time)
+
+        public_key = None
+        if include_public_key:
+            public_key = EcKey(self._key.public_key_pem())
+
+        return self._VALIDATION_ALG(keyid=self.keyid(),
+                                    public_key=public_key,
+                                    key_link=key_link,
+                                    signature_time=signature_time)
+
+
+class EcVerifier(Verifier):
+    """
+    The common code of the elliptic curve verifiers.  Use `Ed25519Verifier` or `EcdsaP256Verifier`.
+    """
+    _ALGORITHM = None
+
+    def __init__(self, key):
+        if not isinstance(key, EcKey):
+            raise TypeError("key must be ccnpy.crypto.EcKey")
+        if key.algorithm() != self._ALGORITHM:
+            raise TypeError(f"key must be {self._ALGORITHM}, got {key.algorithm()}")
+        self._key = key
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self._key.keyid()})"
+
+    def verify(self, *buffers, validation_payload):
+        """
+        :param buffers: The signed buffers
+        :param validation_payload: The signature (ValidationPayload TLV)
+        :return: True if the signature verified, False otherwise
+        """
+        if validation_payload is None:
+            raise ValueError("validation_payload must not be None")
+        return self._key.verify(*buffers, signature=validation_payload.payload())
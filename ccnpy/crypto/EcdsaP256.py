@@ -0,0 +1,28 @@
+#  Copyright 2024 Marc Mosko
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+from .EcKey import EcKey
+from .EcSigner import EcSigner, EcVerifier
+from ..core.ValidationAlg import ValidationAlg_EcdsaP256
+
+
+class EcdsaP256Signer(EcSigner):
+    """
+    ECDSA on P-256 with SHA256.  The signature is DER encoded, about 72 bytes.
+    """
+    _ALGORITHM = EcKey.ECDSA_P256
+    _VALIDATION_ALG = ValidationAlg_EcdsaP256
+
+
+class EcdsaP256Verifier(EcVerifier):
+    _ALGORITHM = EcKey.ECDSA_P256
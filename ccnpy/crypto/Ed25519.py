@@ -0,0 +1,28 @@
+#  Copyright 2024 Marc Mosko
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+from .EcKey import EcKey
+from .EcSigner import EcSigner, EcVerifier
+from ..core.ValidationAlg import ValidationAlg_Ed25519
+
+
+class Ed25519Signer(EcSigner):
+    """
+    EdDSA with Ed25519.  The signature is 64 bytes, compared to 512 bytes for RSA-4096.
+    """
+    _ALGORITHM = EcKey.ED25519
+    _VALIDATION_ALG = ValidationAlg_Ed25519
+
+
+class Ed25519Verifier(EcVerifier):
+    _ALGORITHM = EcKey.ED25519
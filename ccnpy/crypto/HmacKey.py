@@ -0,0 +1,91 @@
+#  Copyright 2024 Marc Mosko
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+import hashlib
+import hmac
+import logging
+import os
+from typing import Optional
+
+from ..core.HashValue import HashValue
+
+
+class HmacKey:
+    """
+    A shared secret for HMAC-SHA256 packet authentication (RFC 8609 `T_HMAC_SHA256`).
+
+    Because the key is symmetric, the signer and every verifier hold the same key.  The KeyId is only a
+    label for finding the key in a keystore.  If not given, it is the SHA256 of the key, which for a
+    random key reveals nothing about it.
+
+    HMAC-SHA256 signatures are always 32 bytes.
+    """
+    logger = logging.getLogger(__name__)
+    SIGNATURE_LENGTH = 32
+
+    def __init__(self, key, keyid: Optional[HashValue] = None):
+        """
+        :param key: The secret (bytes, bytearray, or array).  Should be at least 32 bytes.
+        :param keyid: The KeyId to use for this key (default is sha256 of the key)
+        """
+        key = bytes(key)
+        if len(key) == 0:
+            raise ValueError("HMAC key must not be empty")
+        if keyid is None:
+            keyid = HashValue.create_sha256(hashlib.sha256(key).digest())
+        self._key = key
+        self._keyid = keyid
+
+    def __repr__(self):
+        return f"HmacKey(bits={len(self)}, keyid={self._keyid})"
+
+    def __len__(self):
+        """The key length in bits"""
+        return len(self._key) * 8
+
+    @classmethod
+    def generate(cls, bits: int = 256):
+        """
+        Generate a random key.
+
+        :param bits: The key length, a multiple of 8
+        """
+        if bits <= 0 or bits % 8 != 0:
+            raise ValueError(f"bits must be a positive multiple of 8, got {bits}")
+        return cls(os.urandom(bits // 8))
+
+    def key(self) -> bytes:
+        return self._key
+
+    def keyid(self) -> HashValue:
+        return self._keyid
+
+    def sign(self, *buffers) -> bytes:
+        """
+        :param buffers: One or more buffers to authenticate (e.g. sign(body, validation_alg))
+        :return: The 32-byte HMAC-SHA256
+        """
+        h = hmac.new(self._key, digestmod=hashlib.sha256)
+        for buffer in buffers:
+            h.update(buffer)
+        return h.digest()
+
+    def verify(self, *buffers, signature) -> bool:
+        """
+        Compares in constant time.
+
+        :param buffers: The buffers that were signed
+        :param signature: The expected HMAC
+        :return: True if the HMAC matches
+        """
+        return hmac.compare_digest(self.sign(*buffers), bytes(signature))
@@ -0,0 +1,82 @@
+#  Copyright 2024 Marc Mosko
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+from datetime import datetime
+
+from .HmacKey import HmacKey
+from .Signer import Signer
+from .Verifier import Verifier
+from ..core.SignatureTime import SignatureTime
+from ..core.ValidationAlg import ValidationAlg_HmacSha256
+from ..core.ValidationPayload import ValidationPayload
+
+
+class HmacSha256Signer(Signer):
+    """
+    Authenticates packets with a shared `HmacKey`.  It is much faster than a public key signature,
+    so it is suitable for signing every data object and manifest (see `ManifestTreeOptions.packet_signer`).
+    """
+
+    def __init__(self, key):
+        if not isinstance(key, HmacKey):
+            raise TypeError("key must be ccnpy.crypto.HmacKey")
+        self._key = key
+
+    def __repr__(self):
+        return f"HmacSha256Signer({self._key.keyid()})"
+
+    def sign(self, *buffers):
+        return ValidationPayload(self._key.sign(*buffers))
+
+    def keyid(self):
+        return self._key.keyid()
+
+    def validation_alg(self, include_public_key=False, key_link=None, signature_time=None):
+        """
+        Generate a ValidationAlg for this key.  There is no public key, so `include_public_key`
+        and `key_link` must not be used.
+
+        :param signature_time: a datetime or a ccnpy.SignatureTime or None to use current UTC time.
+        :return: A ValidationAlg_HmacSha256
+        """
+        if include_public_key:
+            raise ValueError("HMAC-SHA256 has no public key to include")
+        if key_link is not None:
+            raise ValueError("HMAC-SHA256 does not use a KeyLink")
+
+        if signature_time is None:
+            signature_time = SignatureTime.now()
+        elif isinstance(signature_time, datetime):
+            signature_time = SignatureTime.from_datetime(signature_time)
+
+        return ValidationAlg_HmacSha256(keyid=self.keyid(), signature_time=signature_time)
+
+
+class HmacSha256Verifier(Verifier):
+    def __init__(self, key):
+        if not isinstance(key, HmacKey):
+            raise TypeError("key must be ccnpy.crypto.HmacKey")
+        self._key = key
+
+    def __repr__(self):
+        return f"HmacSha256Verifier({self._key.keyid()})"
+
+    def verify(self, *buffers, validation_payload):
+        """
+        :param buffers: The signed buffers
+        :param validation_payload: The expected HMAC (ValidationPayload TLV)
+        :return: True if the HMAC verified, False otherwise
+        """
+        if validation_payload is None:
+            raise ValueError("validation_payload must not be None")
+        return self._key.verify(*buffers, signature=validation_payload.payload())
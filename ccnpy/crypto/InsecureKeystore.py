@@ -14,8 +14,11 @@
 import logging
 from typing import Optional, Dict
 
+from ccnpy.core.HashValue import HashValue
 from ccnpy.core.KeyId import KeyId
 from ccnpy.crypto.AeadKey import AeadKey
+from ccnpy.crypto.EcKey import EcKey
+from ccnpy.crypto.HmacKey import HmacKey
 from ccnpy.crypto.RsaKey import RsaKey
 from ccnpy.flic.aeadctx.AeadParameters import AeadParameters
 from ccnpy.flic.tlvs.KeyNumber import KeyNumber
@@ -36,14 +39,25 @@ class InsecureKeystore:
     logger = logging.getLogger(__name__)
 
     def __init__(self):
-        self._asymmetric_by_name = {}
-        self._asymmetric_by_keyid = {}
+        self._rsa_by_name = {}
+        self._rsa_by_keyid = {}
+        self._ec_by_name = {}
+        self._ec_by_keyid = {}
         self._symmetric_by_keynum: Dict[int, AeadParameters] = {}
+        self._hmac_by_keyid: Dict[HashValue, HmacKey] = {}
 
     def add_rsa_key(self, name, key: RsaKey):
         assert key is not None
-        self._asymmetric_by_name[name] = key
-        self._asymmetric_by_keyid[key.keyid()] = key
+        self._rsa_by_name[name] = key
+        self._rsa_by_keyid[key.keyid()] = key
+        self.logger.debug("name %s, key %s", name, key.keyid())
+        return self
+
+    def add_ec_key(self, name, key: EcKey):
+        """EC keys have their own name and KeyId index, see `get_ec()`"""
+        assert key is not None
+        self._ec_by_name[name] = key
+        self._ec_by_keyid[key.keyid()] = key
         self.logger.debug("name %s, key %s", name, key.keyid())
         return self
 
@@ -53,6 +67,20 @@ class InsecureKeystore:
         self.logger.debug("params %s", params)
         return self
 
+    def add_hmac_key(self, key: HmacKey):
+        assert key is not None
+        self._hmac_by_keyid[key.keyid()] = key
+        self.logger.debug("hmac key %s", key.keyid())
+        return self
+
+    def get_hmac(self, keyid) -> HmacKey:
+        if isinstance(keyid, KeyId):
+            keyid = keyid.digest()
+        try:
+            return self._hmac_by_keyid[keyid]
+        except KeyError:
+            raise KeyIdNotFoundError(f'Could not find HMAC keyid: {keyid}')
+
     def get_aes_key(self, key_num: KeyNumber) -> AeadParameters:
         try:
             return self._symmetric_by_keynum[key_num.value()]
@@ -60,26 +88,28 @@ class InsecureKeystore:
             raise KeyNumberNotFoundError(e)
 
     def get_rsa(self, name_or_keyid) -> RsaKey:
-        if isinstance(name_or_keyid, KeyId):
-            name_or_keyid = name_or_keyid.digest()
-        if name_or_keyid in self._asymmetric_by_keyid:
-            result = self._asymmetric_by_keyid[name_or_keyid]
-            self.logger.debug("lookup %s returns %s", name_or_keyid, result)
-            return result
-        else:
-            try:
-                result = self._asymmetric_by_name[name_or_keyid]
-                self.logger.debug("lookup %s returns %s", name_or_keyid, result)
-                return result
-            except KeyError as e:
-                raise KeyIdNotFoundError(f'Could not find name or keyid: {name_or_keyid}')
+        return self._get_asymmetric(self._rsa_by_keyid, self._rsa_by_name, name_or_keyid, 'RSA')
+
+    def get_ec(self, name_or_keyid) -> EcKey:
+        return self._get_asymmetric(self._ec_by_keyid, self._ec_by_name, name_or_keyid, 'EC')
 
     def get_rsa_pub_key(self, keyid) -> RsaKey:
         try:
-            k = self._asymmetric_by_keyid[keyid]
+            k = self._rsa_by_keyid[keyid]
             if k.has_public_key():
                 return k
             else:
                 raise KeyIdNotFoundError(f'Key matching keyid {keyid} has no public key')
         except KeyError as e:
             raise KeyIdNotFoundError(e)
+
+    def _get_asymmetric(self, by_keyid: Dict, by_name: Dict, name_or_keyid, kind: str):
+        if isinstance(name_or_keyid, KeyId):
+            name_or_keyid = name_or_keyid.digest()
+        result = by_keyid.get(name_or_keyid)
+        if result is None:
+            result = by_name.get(name_or_keyid)
+        if result is None:
+            raise KeyIdNotFoundError(f'Could not find {kind} name or keyid: {name_or_keyid}')
+        self.logger.debug("lookup %s returns %s", name_or_keyid, result)
+        return result
@@ -23,23 +23,24 @@ from ccnpy.crypto.HpkeKdfIdentifiers import HpkeKdfIdentifiers
 class KDF:
     @classmethod
     def derive(cls,
-               kdf_id: HpkeKdfIdentifiers,
+               kdf_id: HpkeKdfIdentifiers | int,
                input_key: bytes,
                length: int,
                info: Optional[bytes] = None,
                salt: Optional[bytes] = None):
         """
-        :param kdf_id: The RFC 9180 KDF identifier
+        :param kdf_id: The RFC 9180 KDF identifier (or its number, e.g. `KdfAlg.value()`)
         :param input_key: The key derivation key (cryptographic key)
         :param length: The number of bytes of output
         :param info: The optional FixedInfo
         :param salt: An optional salt for the KDF (if used, should be consistent for the key).
         """
-        if kdf_id == HpkeKdfIdentifiers.HKDF_SHA256:
+        number = kdf_id.number if isinstance(kdf_id, HpkeKdfIdentifiers) else kdf_id
+        if number == HpkeKdfIdentifiers.HKDF_SHA256.number:
             hash_alg = hashes.SHA256()
-        elif kdf_id == HpkeKdfIdentifiers.HKDF_SHA384:
+        elif number == HpkeKdfIdentifiers.HKDF_SHA384.number:
             hash_alg = hashes.SHA384()
-        elif kdf_id == HpkeKdfIdentifiers.HKDF_SHA512:
+        elif number == HpkeKdfIdentifiers.HKDF_SHA512.number:
             hash_alg = hashes.SHA512()
         else:
             raise ValueError(f"Unsupported kdf_id: {kdf_id}")
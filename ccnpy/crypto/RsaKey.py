@@ -180,9 +180,6 @@ class RsaKey:
         if self._public_key is None:
             raise ValueError("RsaKey does not have a public key")
 
-        if isinstance(signature, array.array):
-            signature = signature.tobytes()
-
         result = False
 
         try:
@@ -208,12 +205,13 @@ class RsaKey:
         """
         Encrypt the plain text using RSA-OAEP padding with SHA256 and MGF1.
 
-        :param plaintext: Bytes or an array
+        :param plaintext: Bytes or any other buffer
         :param label: Optional label (additional info) for OAEP padding
         :returns: An array
         """
-        if isinstance(plaintext, array.array):
-            plaintext = plaintext.tobytes()
+        # OAEP only accepts bytes, unlike sign/verify which take any buffer
+        if not isinstance(plaintext, bytes):
+            plaintext = bytes(plaintext)
 
         max_encryption_size = math.ceil(self._public_key.key_size / 8) - self._SHA256_OVERHEAD
         if len(plaintext) > max_encryption_size:
@@ -235,11 +233,11 @@ class RsaKey:
         """
         Decrypt the message using RSA-OAEP with SHA256 and MGF1
 
-        :param cyphertext: Bytes or an array
+        :param cyphertext: Bytes or any other buffer
         :returns: An array
         """
-        if isinstance(cyphertext, array.array):
-            cyphertext = cyphertext.tobytes()
+        if not isinstance(cyphertext, bytes):
+            cyphertext = bytes(cyphertext)
 
         output = self._private_key.decrypt(
             cyphertext,
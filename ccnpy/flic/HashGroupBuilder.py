@@ -18,7 +18,9 @@ from typing import Optional
 from ccnpy.flic.tlvs.GroupData import GroupData
 from ccnpy.flic.tlvs.HashGroup import HashGroup
 from ccnpy.flic.tlvs.Pointers import Pointers
+from ccnpy.flic.tlvs.SubtreeDigest import SubtreeDigest
 from ccnpy.flic.tlvs.SubtreeSize import SubtreeSize
+from .tlvs.LeafDigest import LeafDigest
 from .tlvs.LeafSize import LeafSize
 from .tlvs.NcId import NcId
 from .tlvs.StartSegmentId import StartSegmentId
@@ -128,22 +130,30 @@ class HashGroupBuilder:
 
     def hash_group(self, nc_id: Optional[NcId] = None,
                    start_segment_id: Optional[StartSegmentId] = None,
-                   include_leaf_size = False, include_subtree_size = False):
+                   include_leaf_size = False, include_subtree_size = False,
+                   leaf_digest: Optional[HashValue] = None, subtree_digest: Optional[HashValue] = None):
         """
         TODO: leaf_size is not implemented
         :param nc_id: The NCID  to include in the GroupData
         :param start_segment_id: The begining chunk number for the first pointer in this hash group
         :param include_leaf_size:
         :param include_subtree_size:
+        :param leaf_digest: If not None, the LeafDigest of the application data of the direct pointers
+        :param subtree_digest: If not None, the SubtreeDigest of all the application data under the group
         :return:
         """
         gd = None
-        if include_leaf_size or include_subtree_size or nc_id is not None or start_segment_id is not None:
-            subtree_size = subtree_digest = leaf_size = leaf_digest = None
+        if (include_leaf_size or include_subtree_size or nc_id is not None or start_segment_id is not None
+                or leaf_digest is not None or subtree_digest is not None):
+            subtree_size = leaf_size = None
             if include_subtree_size:
                 subtree_size = SubtreeSize(self.indirect_size() + self.direct_size())
             if include_leaf_size:
                 leaf_size = LeafSize(self.direct_size())
+            if leaf_digest is not None:
+                leaf_digest = LeafDigest(leaf_digest)
+            if subtree_digest is not None:
+                subtree_digest = SubtreeDigest(subtree_digest)
             gd = GroupData(nc_id=nc_id,
                            start_segment_id=start_segment_id,
                            subtree_size=subtree_size,
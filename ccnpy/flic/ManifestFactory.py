@@ -11,6 +11,8 @@
 #  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Optional
 from xml.etree.ElementInclude import include
 
@@ -21,6 +23,7 @@ from ccnpy.flic.tlvs.Manifest import Manifest
 from ccnpy.flic.tlvs.Node import Node
 from ccnpy.flic.tlvs.NodeData import NodeData
 from ccnpy.flic.tlvs.Pointers import Pointers
+from ccnpy.flic.tlvs.SubtreeDigest import SubtreeDigest
 from ccnpy.flic.tlvs.SubtreeSize import SubtreeSize
 from .ManifestTreeOptions import ManifestTreeOptions
 from .tlvs.NcDef import NcDef
@@ -29,6 +32,7 @@ from .tlvs.StartSegmentId import StartSegmentId
 from .tree.ManifestGraph import ManifestGraph
 from .tree.TreeBuildReturnValue import TreeBuilderReturnValue
 from ..core.ExpiryTime import ExpiryTime
+from ..core.HashValue import HashValue
 from ..core.Name import Name
 from ..core.Packet import Packet
 from ..crypto.Signer import Signer
@@ -41,6 +45,11 @@ class ManifestFactory:
     encrypted manifests.
 
     This class is used by ManifestTree (and others), which is the top-level interface to FLIC.
+
+    `build_packets()` builds a batch of independent manifests (e.g. siblings in the tree) at once.  With an
+    encryptor and `ManifestTreeOptions.encryption_workers` > 0, the batch is encrypted (and signed) on a thread pool.
+    AES-GCM and AES-CCM in `cryptography` release the GIL, and each encryption has its own random nonce and
+    cipher operation, so the workers share nothing but the key.
     """
 
     def __init__(self, tree_options: ManifestTreeOptions, manifest_graph: Optional[ManifestGraph] = None):
@@ -56,12 +65,25 @@ class ManifestFactory:
         self._encryptor = tree_options.manifest_encryptor
         self._tree_options = tree_options
         self._manifest_graph = manifest_graph
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
         self.cnt_manifests = 0
         self.cnt_manifest_bytes = 0
 
     def tree_options(self) -> ManifestTreeOptions:
         return self._tree_options
 
+    def is_parallel(self) -> bool:
+        """True if `build_packets()` will encrypt on a thread pool"""
+        return self._encryptor is not None and self._tree_options.encryption_workers > 0
+
+    def close(self):
+        """Stop the encryption threads, if any.  The factory may still be used, it will start new ones."""
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
     def build_packet(self, source,
                      nc_defs: Optional[List[NcDef]] = None,
                      node_subtree_size: Optional[int] = None,
@@ -69,6 +91,8 @@ class ManifestFactory:
                      group_leaf_size: Optional[int] = None,
                      nc_id: Optional[NcId] = None,
                      start_segment_id: Optional[StartSegmentId] = None,
+                     node_subtree_digest: Optional[HashValue] = None,
+                     group_subtree_digest: Optional[HashValue] = None,
                      name: Optional[Name] = None,
                      expiry_time: Optional[ExpiryTime] = None,
                      signer: Optional[Signer] = None,
@@ -81,6 +105,8 @@ class ManifestFactory:
         :param node_subtree_size:
         :param group_subtree_size:
         :param group_leaf_size:
+        :param node_subtree_digest:
+        :param group_subtree_digest:
         :param nc_defs: A list of name contructor definitions to include in the NodeData
         :param name: The CCNx name to put in the packet
         :param include_full_security_context: If the encryptor has the option of including a larger security context, do it.
@@ -93,25 +119,74 @@ class ManifestFactory:
                          group_leaf_size=group_leaf_size,
                          nc_id=nc_id,
                          start_segment_id=start_segment_id,
+                         node_subtree_digest=node_subtree_digest,
+                         group_subtree_digest=group_subtree_digest,
                          include_full_security_context=include_full_security_context)
 
+        packet = self._create_packet(rv, name=name, expiry_time=expiry_time, signer=signer)
+        self._add_packet(rv, packet)
+        return packet
+
+    def build_packets(self, nodes: List[Node],
+                      names: Optional[List[Optional[Name]]] = None,
+                      expiry_time: Optional[ExpiryTime] = None,
+                      signer: Optional[Signer] = None,
+                      include_full_security_context: bool = False) -> List[TreeBuilderReturnValue]:
+        """
+        Like `build_packet()` for a list of independent Nodes, e.g. the sibling manifests of one parent.
+        If `is_parallel()`, the Nodes are encrypted concurrently.  The return values are in the same
+        order as `nodes`, and they are added to the manifest graph in that order.
+
+        :param nodes: The plaintext Nodes
+        :param names: If not None, the CCNx name for each Node (same length as `nodes`)
+        :return: A list of TreeBuilderReturnValue (node, manifest, packet)
+        """
+        if names is None:
+            names = [None] * len(nodes)
+        if len(names) != len(nodes):
+            raise ValueError(f"There are {len(nodes)} nodes but {len(names)} names")
+
+        def build_one(node: Node, name: Optional[Name]) -> TreeBuilderReturnValue:
+            rv = self._build(source=node, include_full_security_context=include_full_security_context)
+            rv.packet = self._create_packet(rv, name=name, expiry_time=expiry_time, signer=signer)
+            return rv
+
+        if self.is_parallel() and len(nodes) > 1:
+            return_values = list(self._get_executor().map(build_one, nodes, names))
+        else:
+            return_values = [build_one(node, name) for node, name in zip(nodes, names)]
+
+        for rv in return_values:
+            self._add_packet(rv, rv.packet)
+        return return_values
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self._tree_options.encryption_workers,
+                                                    thread_name_prefix='encrypt')
+            return self._executor
+
+    def _create_packet(self, rv: TreeBuilderReturnValue, name: Optional[Name], expiry_time: Optional[ExpiryTime],
+                       signer: Optional[Signer]) -> Packet:
         body = rv.manifest.content_object(name=name,
                                           expiry_time=expiry_time)
 
+        if signer is None:
+            signer = self._tree_options.packet_signer
         if signer is not None:
-            validation_alg = self._tree_options.signer.validation_alg()
-            validation_payload = self._tree_options.signer.sign(body.serialize(), validation_alg.serialize())
-            packet = Packet.create_signed_content_object(body, validation_alg, validation_payload)
-        else:
-            packet = Packet.create_content_object(body)
+            validation_alg = signer.validation_alg()
+            validation_payload = signer.sign(body.serialize(), validation_alg.serialize())
+            return Packet.create_signed_content_object(body, validation_alg, validation_payload)
+        return Packet.create_content_object(body)
 
+    def _add_packet(self, rv: TreeBuilderReturnValue, packet: Packet):
         if self._manifest_graph is not None:
             self._manifest_graph.add_manifest(hash_value=packet.content_object_hash(),
                                               node=rv.node,
                                               name=packet.body().name())
         self.cnt_manifests += 1
         self.cnt_manifest_bytes += len(packet)
-        return packet
 
     def _build(self, source,
               nc_defs: Optional[List[NcDef]] = None,
@@ -120,6 +195,8 @@ class ManifestFactory:
               group_leaf_size: Optional[int] = None,
               nc_id: Optional[NcId] = None,
               start_segment_id: Optional[StartSegmentId] = None,
+              node_subtree_digest: Optional[HashValue] = None,
+              group_subtree_digest: Optional[HashValue] = None,
               include_full_security_context: bool = False) -> TreeBuilderReturnValue:
         """
         depending on the level of control you wish to have over the manifest creation, you can
@@ -138,6 +215,10 @@ class ManifestFactory:
                                     there is only one HashGroup, add a GroupData with subtree size to the HashGroup.
         :param group_leaf_size: If not None and ManifestTreeOptions.add_group_leaf_size is True and
                                     there is only one HashGroup, add a GroupData with leaf size to the HashGroup.
+        :param node_subtree_digest: If not None and ManifestTreeOptions.add_node_subtree_digest is True,
+                                    add a NodeData with the subtree digest.
+        :param group_subtree_digest: If not None and ManifestTreeOptions.add_group_subtree_digest is True and
+                                    there is only one HashGroup, add a GroupData with the subtree digest.
         :return: A Manifest.ReturnValue
         """
         # If the tree options do not allow adding a type of metadata, we None it out here
@@ -147,6 +228,10 @@ class ManifestFactory:
             group_subtree_size = None
         if not self._tree_options.add_group_leaf_size:
             group_leaf_size = None
+        if not self._tree_options.add_node_subtree_digest:
+            node_subtree_digest = None
+        if not self._tree_options.add_group_subtree_digest:
+            group_subtree_digest = None
 
         # Make sure the sizes are the proper containers if we were just passed Ints
         if node_subtree_size is not None and isinstance(node_subtree_size, int):
@@ -155,6 +240,10 @@ class ManifestFactory:
             group_subtree_size = SubtreeSize(group_subtree_size)
         if group_leaf_size is not None and isinstance(group_leaf_size, int):
             group_leaf_size = LeafSize(group_leaf_size)
+        if node_subtree_digest is not None and isinstance(node_subtree_digest, HashValue):
+            node_subtree_digest = SubtreeDigest(node_subtree_digest)
+        if group_subtree_digest is not None and isinstance(group_subtree_digest, HashValue):
+            group_subtree_digest = SubtreeDigest(group_subtree_digest)
 
         if isinstance(source, Pointers):
             rv = self._build_from_pointers(pointers=source,
@@ -164,17 +253,21 @@ class ManifestFactory:
                                                  group_leaf_size=group_leaf_size,
                                                  nc_id=nc_id,
                                                  start_segment_id=start_segment_id,
+                                                 node_subtree_digest=node_subtree_digest,
+                                                 group_subtree_digest=group_subtree_digest,
                                                  include_full_security_context=include_full_security_context)
         elif isinstance(source, HashGroup):
             rv = self._build_node_from_hashgroups(hash_groups=[source],
                                                   nc_defs=nc_defs,
                                                   node_subtree_size=node_subtree_size,
+                                                  node_subtree_digest=node_subtree_digest,
                                                   include_full_security_context=include_full_security_context)
 
         elif isinstance(source, List):
             rv = self._build_node_from_hashgroups(hash_groups=source,
                                                   nc_defs=nc_defs,
                                                   node_subtree_size=node_subtree_size,
+                                                  node_subtree_digest=node_subtree_digest,
                                                   include_full_security_context=include_full_security_context)
         elif isinstance(source, Node):
             rv = self._build_from_node(source, include_full_security_context)
@@ -192,6 +285,8 @@ class ManifestFactory:
                              group_leaf_size: Optional[LeafSize] = None,
                              nc_id: Optional[NcId] = None,
                              start_segment_id: Optional[StartSegmentId] = None,
+                             node_subtree_digest: Optional[SubtreeDigest] = None,
+                             group_subtree_digest: Optional[SubtreeDigest] = None,
                              include_full_security_context: bool = False) -> TreeBuilderReturnValue:
         """
         From a Pointers object or a list of hash values, build a Manifest.  If the encryptor is
@@ -200,8 +295,10 @@ class ManifestFactory:
         :param nc_id: If specified, will be put in the hash group data.
         """
         group_data = None
-        if group_subtree_size is not None or group_leaf_size is not None or nc_id is not None or start_segment_id is not None:
+        if (group_subtree_size is not None or group_leaf_size is not None or nc_id is not None
+                or start_segment_id is not None or group_subtree_digest is not None):
             group_data = GroupData(subtree_size=group_subtree_size,
+                                   subtree_digest=group_subtree_digest,
                                    leaf_size=group_leaf_size,
                                    nc_id=nc_id,
                                    start_segment_id=start_segment_id)
@@ -211,20 +308,22 @@ class ManifestFactory:
             hash_groups=[hg],
             nc_defs=nc_defs,
             node_subtree_size=node_subtree_size,
+            node_subtree_digest=node_subtree_digest,
             include_full_security_context=include_full_security_context)
 
     def _build_node_from_hashgroups(self,
                                     hash_groups: List[HashGroup],
                                     nc_defs: Optional[List[NcDef]] = None,
                                     node_subtree_size: Optional[SubtreeSize] = None,
+                                    node_subtree_digest: Optional[SubtreeDigest] = None,
                                     include_full_security_context: bool = False) -> TreeBuilderReturnValue:
         """
         A Node may be one or more hash groups.  In practice, we usually have only one or two hash groups, depending
         on the name constrictors or locators.
         """
         node_data = None
-        if node_subtree_size is not None or nc_defs is not None:
-            node_data = NodeData(subtree_size=node_subtree_size, nc_defs=nc_defs)
+        if node_subtree_size is not None or node_subtree_digest is not None or nc_defs is not None:
+            node_data = NodeData(subtree_size=node_subtree_size, subtree_digest=node_subtree_digest, nc_defs=nc_defs)
 
         node = Node(node_data=node_data, hash_groups=hash_groups)
         return self._build_from_node(node, include_full_security_context)
@@ -19,6 +19,7 @@ from .name_constructor.FileMetadata import FileMetadata
 from .name_constructor.NameConstructorContext import NameConstructorContext
 from .tlvs.Pointers import Pointers
 from .tlvs.StartSegmentId import StartSegmentId
+from .tree.DataDigester import DataDigester
 from .tree.ManifestGraph import ManifestGraph
 from .tree.TreeBuilder import TreeBuilder
 from .tree.TreeParameters import TreeParameters
@@ -40,7 +41,8 @@ class ManifestTree:
         If `tree_options.max_tree_degree` is not given, it will pick a degree that minimizes the wasted space
         in the tree.
 
-        :param data_input: Something we can call read() on, or a FileMetadata
+        :param data_input: Something we can call read() on, or a FileMetadata.  If `tree_options.has_digests()`,
+                           it must also support seek(), as the digests re-read the data.
         :param packet_output: Something we can call put(ccnpy.Packet) on to output packets (see .tree.TreeIO)
         :param tree_options:
         :param manifest_graph: If not None, will be filled in as we build the tree
@@ -49,10 +51,16 @@ class ManifestTree:
         self._tree_options = tree_options
         self._name_ctx = name_context if name_context is not None else NameConstructorContext.create(self._tree_options)
         self._manifest_graph = manifest_graph
+        self._data_digester = None
         if isinstance(data_input, FileMetadata):
+            if self._tree_options.has_digests():
+                raise ValueError("Digests require the application data, not a FileMetadata")
             self._file_metadata = data_input
         else:
+            start_offset = data_input.tell() if self._tree_options.has_digests() and hasattr(data_input, 'tell') else 0
             self._file_metadata = self._name_ctx.data_schema_impl.chunk_data(data_input, self._packet_output)
+            if self._tree_options.has_digests():
+                self._data_digester = DataDigester(self._file_metadata, data_input, start_offset=start_offset)
         self._manifest_factory = ManifestFactory(tree_options=self._tree_options, manifest_graph=self._manifest_graph)
         self._optimized_params = self._calculate_optimal_tree(file_metadata=self._file_metadata, manifest_factory=self._manifest_factory)
         # print(f"Optimized parameters: {self._optimized_params}")
@@ -73,8 +81,14 @@ class ManifestTree:
         root_packet = self.build_root(top_manifest_packet=top_manifest_packet)
 
         print(f"Manifest count {self._manifest_factory.cnt_manifests}, bytes {self._manifest_factory.cnt_manifest_bytes}")
+        if self._data_digester is not None:
+            print(f"Digests {self._data_digester.cnt_digests}, bytes {self._data_digester.cnt_bytes}, seconds {self._data_digester.digest_seconds:.3f}")
         return root_packet
 
+    def data_digester(self) -> Optional[DataDigester]:
+        """The digester (and its statistics), if the tree options use digests"""
+        return self._data_digester
+
     def build_top(self) -> Packet:
         top_manifest_packet = self._build_tree(tree_parameters=self._optimized_params,
                                                manifest_factory=self._manifest_factory,
@@ -102,6 +116,11 @@ class ManifestTree:
         """
         ptr = Pointers([top_manifest_packet.content_object_hash()])
 
+        # The root covers all the application data, like the top manifest
+        data_digest = None
+        if self._data_digester is not None and len(self._file_metadata) > 0:
+            data_digest = self._data_digester.digest(0, len(self._file_metadata))
+
         # if the top manifest is SegmentedSchema, we need to include the fact that the chunk_id is 0
         if self._name_ctx.manifest_schema_impl.uses_name_id():
             start_segment_id=StartSegmentId(0)
@@ -115,6 +134,8 @@ class ManifestTree:
             group_subtree_size=total_file_bytes,
             nc_id=self._name_ctx.manifest_schema_impl.nc_id(),
             start_segment_id=start_segment_id,
+            node_subtree_digest=data_digest,
+            group_subtree_digest=data_digest,
             name=self._tree_options.name,
             expiry_time=self._tree_options.root_expiry_time,
             signer=self._tree_options.signer,
@@ -136,8 +157,12 @@ class ManifestTree:
                                    packet_output=self._packet_output,
                                    tree_options=self._tree_options,
                                    name_ctx=self._name_ctx,
-                                   manifest_graph=self._manifest_graph)
-        return tree_builder.build()
+                                   manifest_graph=self._manifest_graph,
+                                   data_digester=self._data_digester)
+        try:
+            return tree_builder.build()
+        finally:
+            manifest_factory.close()
 
     def _calculate_optimal_tree(self, file_metadata: FileMetadata, manifest_factory: ManifestFactory) -> TreeParameters:
         if self._manifest_graph is not None:
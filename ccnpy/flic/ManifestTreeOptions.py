@@ -32,15 +32,22 @@ class ManifestTreeOptions:
         name: The root manifest name.
         schema_type: The type of name constructor to use.
         signer: The root manifest signer.
+        packet_signer: If not None, signs every data object and every other manifest (e.g. a HmacSha256Signer).
+                       It also signs the root manifest if `signer` is None.
 
         root_expiry_time: The ContentObject expiry time for the root manifest
         manifest_expiry_time: The ContentObject expiry time for non-root manifests
         data_expiry_time: The ContentObject expiry time for the data content objects
         manifest_encryptor: The ccnpy.flic.ManifestEncryptor to encrypt manifests
+        encryption_workers: The number of threads that encrypt sibling manifests (0 to encrypt serially)
 
         add_group_subtree_size: If True, add a GroupData with SubtreeSize to each manifest
         add_group_leaf_size: If True, add a GroupData with LeafSize to each manifest
         add_node_subtree_size: If True, add a NodeData with SubtreeSize to each manifest
+        add_node_subtree_digest: If True, add a NodeData with SubtreeDigest (SHA-256 of the application data
+                                 under the manifest) to each manifest.  The data_input must be seekable.
+        add_group_subtree_digest: If True, add a GroupData with SubtreeDigest to each manifest
+        add_group_leaf_digest: If True, add a GroupData with LeafDigest to each hash group with direct pointers
         max_tree_degree: The maximum tree degree, limited by the packet size.  None for unlimited.
         debug: Print debugging messages
     """
@@ -48,6 +55,7 @@ class ManifestTreeOptions:
     name: Name
     schema_type: SchemaType
     signer: Signer
+    packet_signer: Optional[Signer] = None
     manifest_prefix: Optional[Name] = None
     data_prefix: Optional[Name] = None
 
@@ -58,6 +66,7 @@ class ManifestTreeOptions:
     manifest_expiry_time: Optional[ExpiryTime] = None
     data_expiry_time: Optional[ExpiryTime] = None
     manifest_encryptor: Optional[ManifestEncryptor] = None
+    encryption_workers: int = 4
 
     add_node_subtree_size: bool = False
     add_node_subtree_digest: bool = False
@@ -69,3 +78,7 @@ class ManifestTreeOptions:
     max_tree_degree: Optional[int] = None
     max_packet_size: int = 1500
     debug: bool = False
+
+    def has_digests(self) -> bool:
+        """True if any SubtreeDigest or LeafDigest is requested"""
+        return self.add_node_subtree_digest or self.add_group_subtree_digest or self.add_group_leaf_digest
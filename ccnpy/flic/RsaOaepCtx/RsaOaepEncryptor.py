@@ -20,6 +20,7 @@ from .RsaOaepWrapper import RsaOaepWrapper
 from .WrappedKey import WrappedKey
 from ..ManifestEncryptor import ManifestEncryptor
 from ..aeadctx.AeadParameters import AeadParameters
+from ..aeadctx.NonceSource import NonceSource
 from ..tlvs.KdfAlg import KdfAlg
 from ..tlvs.KdfData import KdfData
 from ..tlvs.KdfInfo import KdfInfo
@@ -35,11 +36,13 @@ class RsaOaepEncryptor(ManifestEncryptor):
     """
 
     @classmethod
-    def create_with_new_content_key(cls, wrapping_key: RsaKey, kdf_data: Optional[KdfData]):
+    def create_with_new_content_key(cls, wrapping_key: RsaKey, kdf_data: Optional[KdfData],
+                                    nonce_source: Optional[NonceSource] = None):
         """
         Creates with a random content encryption key and salt.
 
         :param wrapping_key: The key encryption key
+        :param nonce_source: Creates the encryption nonces (default random)
         """
         key = AeadGcm.generate(256)
         salt = int.from_bytes(os.urandom(4))
@@ -51,12 +54,13 @@ class RsaOaepEncryptor(ManifestEncryptor):
                 key=key,
                 aead_salt=salt,
                 key_number=key_number,
-                kdf_data=kdf_data))
+                kdf_data=kdf_data),
+            nonce_source=nonce_source)
 
-    def __init__(self, wrapping_key: RsaKey, params: AeadParameters):
+    def __init__(self, wrapping_key: RsaKey, params: AeadParameters, nonce_source: Optional[NonceSource] = None):
         self._wrapped_key = WrappedKey.create(wrapping_key=wrapping_key, params=params)
         self._wrapper = RsaOaepWrapper.create_sha256(key_id=KeyId(wrapping_key.keyid()), wrapped_key=self._wrapped_key)
-        self._impl = RsaOaepImpl(wrapper=self._wrapper, aead_params=params)
+        self._impl = RsaOaepImpl(wrapper=self._wrapper, aead_params=params, nonce_source=nonce_source)
 
     def encrypt(self, node, **kwargs):
         return self._impl.encrypt(node, **kwargs)
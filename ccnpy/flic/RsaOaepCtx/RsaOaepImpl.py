@@ -21,7 +21,9 @@ from ccnpy.flic.tlvs.Node import Node
 from .RsaOaepWrapper import RsaOaepWrapper
 from ..aeadctx.AeadData import AeadData
 from ..aeadctx.AeadImpl import AeadImpl
+from ..aeadctx.NonceSource import NonceSource
 from ..aeadctx.AeadParameters import AeadParameters
+from ..aeadctx.DerivedKeyCache import DerivedKeyCache
 from ..tlvs.RsaOaepCtx import RsaOaepCtx
 from ...crypto.AeadKey import AeadKey, AeadGcm, AeadCcm
 from ...crypto.DecryptionError import DecryptionError
@@ -105,11 +107,12 @@ class RsaOaepImpl(AeadImpl):
             print(f"Could not find keyid in kestore: {rsa_oaep_ctx.key_id()}")
             raise e
 
-    def __init__(self, wrapper: Optional[RsaOaepWrapper], aead_params: AeadParameters):
+    def __init__(self, wrapper: Optional[RsaOaepWrapper], aead_params: AeadParameters, key_cache: Optional[DerivedKeyCache] = None,
+                 nonce_source: Optional[NonceSource] = None):
         if not isinstance(aead_params, AeadParameters):
             raise TypeError("aead_params must be AeadParameters")
         self._wrapper = wrapper
-        super().__init__(params=aead_params)
+        super().__init__(params=aead_params, key_cache=key_cache, nonce_source=nonce_source)
 
     def __repr__(self):
         return f'RsaOaepImpl: ({self._params}, {self._wrapper})'
@@ -178,10 +181,10 @@ class RsaOaepImpl(AeadImpl):
             if not (mode.is_aes_ccm_128() or mode.is_aes_ccm_256()):
                 raise DecryptionError(f'The AES key is for CCM but the manifest is not encrypted with CCM (security ctx type {security_ctx.class_type()})')
 
-        plaintext = self._params.key.decrypt(iv=self._iv_from_nonce(security_ctx.aead_data().nonce().value()),
-                                      ciphertext=encrypted_node.value(),
-                                      associated_data=security_ctx.serialize(),
-                                      auth_tag=auth_tag.value())
+        plaintext = self._decrypt_with_cipher_key(iv=self._iv_from_nonce(security_ctx.aead_data().nonce().value()),
+                                                  ciphertext=encrypted_node.value(),
+                                                  associated_data=security_ctx.serialize(),
+                                                  auth_tag=auth_tag.value())
 
         node_tlv = Node.create_tlv(plaintext)
         node = Node.parse(node_tlv)
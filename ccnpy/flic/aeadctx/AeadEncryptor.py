@@ -15,6 +15,7 @@ from typing import Optional
 
 from .AeadImpl import AeadImpl
 from .AeadParameters import AeadParameters
+from .NonceSource import NonceSource
 from ..ManifestEncryptor import ManifestEncryptor
 from ..tlvs.KdfData import KdfData
 from ..tlvs.KeyNumber import KeyNumber
@@ -22,8 +23,12 @@ from ...crypto.AeadKey import AeadKey
 
 
 class AeadEncryptor(ManifestEncryptor):
-    def __init__(self, params: AeadParameters):
-        self._psk = AeadImpl(params)
+    def __init__(self, params: AeadParameters, nonce_source: Optional[NonceSource] = None):
+        """
+        :param params: The key and its parameters
+        :param nonce_source: Creates the encryption nonces (default random)
+        """
+        self._psk = AeadImpl(params, nonce_source=nonce_source)
 
     def encrypt(self, node, **kwargs):
         return self._psk.encrypt(node)
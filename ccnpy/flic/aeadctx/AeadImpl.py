@@ -13,10 +13,15 @@
 #  limitations under the License.
 import logging
 import math
+import threading
+import weakref
 from array import array
+from typing import Optional, Tuple
 
 from .AeadData import AeadData
 from .AeadParameters import AeadParameters
+from .DerivedKeyCache import DerivedKeyCache
+from .NonceSource import NonceSource, RandomNonceSource
 from ..tlvs.AeadCtx import AeadCtx
 from ..tlvs.AeadMode import AeadMode
 from ..tlvs.AuthTag import AuthTag
@@ -35,32 +40,110 @@ class AeadImpl:
 
     Typically, you will use `AeadImpl.create_manifest(...)` to create a Manifest TLV out of
     a Node.
+
+    With `KdfData`, the Node is encrypted with a key derived from the pre-shared key (HKDF over
+    'FLIC' || KeyNumber || AeadMode || KdfInfo).  Compatibility: earlier versions carried the `KdfData` but
+    encrypted with the pre-shared key itself.  To keep reading those manifests, a decryption that fails
+    with the derived key is retried with the pre-shared key (counted in `legacy_decryptions`).
     """
     logger = logging.getLogger(__name__)
 
-    def __init__(self, params: AeadParameters):
+    # Shared by all instances that do not pass their own cache
+    default_key_cache = DerivedKeyCache()
+    # The random nonce sources of the instances that do not pass their own, one per key, so the
+    # nonce budget is per key and not per instance.  An entry lives as long as an instance uses it.
+    _default_nonce_sources: 'weakref.WeakValueDictionary[Tuple[int, str], NonceSource]' = weakref.WeakValueDictionary()
+    _default_nonce_lock = threading.Lock()
+
+    def __init__(self, params: AeadParameters, key_cache: Optional[DerivedKeyCache] = None,
+                 nonce_source: Optional[NonceSource] = None):
         """
-        If using a KDF and `KdfInfo` is not present, you must set the `KdfInfo` with the CCNx name before
-        creating the `AeadImpl`.
+        If `params` has `KdfData` without a `KdfInfo`, the KDF fixed info has no KdfInfo part (it is
+        still 'FLIC' || KeyNumber || AeadMode).
+
+        :param params: The key and its parameters
+        :param key_cache: Where to keep KDF-derived keys (default `AeadImpl.default_key_cache`)
+        :param nonce_source: Creates the encryption nonces (default a `RandomNonceSource` shared by every
+                             instance with the same key, created by the first encryption, so a decrypt-only
+                             instance never has one).  It is bound to this key, see `NonceSource.bind()`.
         """
         self._params = params
+        self._key_cache = key_cache if key_cache is not None else AeadImpl.default_key_cache
+        if nonce_source is not None and params.key is not None:
+            nonce_source.bind(params.key_number.value(), params.key.key())
+        self._nonce_source = nonce_source
+        self._kdf_fields: Optional[Tuple[bytes, bytes, bytes, bytes]] = None
+        self.legacy_decryptions = 0
         self.logger.debug(self)
 
-    def  _derive_key(self, key: AeadKey) -> AeadKey:
+    @classmethod
+    def _default_nonce_source(cls, params: AeadParameters) -> NonceSource:
+        if params.key is None:
+            return RandomNonceSource()
+        identity = (params.key_number.value(), NonceSource.key_fingerprint(params.key.key()))
+        with cls._default_nonce_lock:
+            source = cls._default_nonce_sources.get(identity)
+            if source is None:
+                source = RandomNonceSource()
+                source.bind(params.key_number.value(), params.key.key())
+                cls._default_nonce_sources[identity] = source
+            return source
+
+    def key_cache(self) -> DerivedKeyCache:
+        return self._key_cache
+
+    def nonce_source(self) -> NonceSource:
+        if self._nonce_source is None:
+            self._nonce_source = self._default_nonce_source(self._params)
+        return self._nonce_source
+
+    def _cipher_key(self) -> AeadKey:
+        """
+        The key that encrypts and decrypts the Node: the pre-shared key, or the key derived from it if
+        using a KDF.
+        """
+        return self._derive_key(self._params.key)
+
+    def _decrypt_with_cipher_key(self, iv, ciphertext, associated_data, auth_tag):
+        """
+        Decrypt with `_cipher_key()`.  If that fails and there is `KdfData`, the manifest may be from before
+        the KDF was applied, so retry with the pre-shared key (see the class comment).
+        """
+        try:
+            return self._cipher_key().decrypt(iv=iv, ciphertext=ciphertext, associated_data=associated_data, auth_tag=auth_tag)
+        except DecryptionError:
+            if self._params.kdf_data is None:
+                raise
+        plaintext = self._params.key.decrypt(iv=iv, ciphertext=ciphertext, associated_data=associated_data, auth_tag=auth_tag)
+        self.legacy_decryptions += 1
+        self.logger.debug('Decrypted a manifest encrypted without its KdfData key derivation')
+        return plaintext
+
+    def _kdf_cache_fields(self) -> Tuple[bytes, bytes, bytes, bytes]:
+        # (key_number, kdf_alg, kdf_info, salt) do not change, so only serialize them once
+        if self._kdf_fields is None:
+            kdf_info = self._params.kdf_data.kdf_info()
+            self._kdf_fields = (self._params.key_number.serialize().tobytes(),
+                                self._params.kdf_data.kdf_alg().serialize().tobytes(),
+                                kdf_info.serialize().tobytes() if kdf_info is not None else b'',
+                                self._params.kdf_salt_bytes if self._params.kdf_salt_bytes is not None else b'')
+        return self._kdf_fields
+
+    def _derive_key(self, key: AeadKey) -> AeadKey:
         if self._params.kdf_data is None:
             return key
-        assert self._params.kdf_data.kdf_info() is not None
 
-        mode = AeadMode.from_key(key)
-        fixed_info = (b'FLIC'
-                      + self._params.key_number.serialize().tobytes()
-                      + mode.serialize().tobytes()
-                      + self._params.kdf_data.kdf_info().serialize().tobytes())
+        key_number, kdf_alg, kdf_info, salt = self._kdf_cache_fields()
+        mode = AeadMode.from_key(key).serialize().tobytes()
+        cache_key = (key_number, mode, kdf_alg, kdf_info, salt, bytes(key.key()))
+        return self._key_cache.get_or_derive(cache_key, lambda: self._kdf(key, fixed_info=b'FLIC' + key_number + mode + kdf_info))
+
+    def _kdf(self, key: AeadKey, fixed_info: bytes) -> AeadKey:
         derived_bytes = KDF.derive(kdf_id=self._params.kdf_data.kdf_alg().value(),
                                      input_key=key.key(),
                                      length=math.ceil(len(key) / 8),
                                      info=fixed_info,
-                                     salt=self._params.kdf_salt
+                                     salt=self._params.kdf_salt_bytes
                                      )
         if isinstance(key, AeadGcm):
             return AeadGcm(derived_bytes)
@@ -73,10 +156,10 @@ class AeadImpl:
 
     def _generate_nonce(self):
         if self._params.aead_salt_bytes is None:
-            return self._params.key.nonce(96)
+            return self.nonce_source().next(96)
 
         salt_len = len(self._params.aead_salt_bytes) * 8
-        return self._params.key.nonce(96 - salt_len)
+        return self.nonce_source().next(96 - salt_len)
 
     def _iv_from_nonce(self, nonce: array):
         if self._params.aead_salt_bytes is None:
@@ -141,7 +224,7 @@ class AeadImpl:
         iv = self._iv_from_nonce(security_ctx.nonce().value())
 
         plaintext = node.serialized_value()
-        ciphertext, a = self._params.key.encrypt(iv=iv,
+        ciphertext, a = self._cipher_key().encrypt(iv=iv,
                                           plaintext=plaintext,
                                           associated_data=security_ctx.serialize())
 
@@ -194,10 +277,10 @@ class AeadImpl:
             if not (security_ctx.aead_data().mode().is_aes_ccm_128() or security_ctx.aead_data().mode().is_aes_ccm_256()):
                 raise DecryptionError(f'The AES key is for CCM but the manifest is not encrypted with CCM (security ctx type {security_ctx.class_type()})')
 
-        plaintext = self._params.key.decrypt(iv=self._iv_from_nonce(security_ctx.nonce().value()),
-                                      ciphertext=encrypted_node.value(),
-                                      associated_data=security_ctx.serialize(),
-                                      auth_tag=auth_tag.value())
+        plaintext = self._decrypt_with_cipher_key(iv=self._iv_from_nonce(security_ctx.nonce().value()),
+                                                  ciphertext=encrypted_node.value(),
+                                                  associated_data=security_ctx.serialize(),
+                                                  auth_tag=auth_tag.value())
 
         node_tlv = Node.create_tlv(plaintext)
         node = Node.parse(node_tlv)
@@ -0,0 +1,103 @@
+#  Copyright 2024 Marc Mosko
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Callable, Tuple, Hashable
+
+from ..tlvs.KeyNumber import KeyNumber
+from ...crypto.AeadKey import AeadKey
+
+
+class DerivedKeyCache:
+    """
+    A bounded LRU of KDF-derived AEAD keys.  Each entry is a ready-to-use `AeadGcm` or `AeadCcm`, so a hit
+    skips both the HKDF and the construction of the `AESGCM`/`AESCCM` cipher context.
+
+    The cache key is `(key_number, mode, kdf_alg, kdf_info, salt, input_key)`, each as its wire format bytes.  The input key
+    is part of the key so that two keystores that reuse a key number never share a derived key.
+
+    `AeadImpl` (and so `RsaOaepImpl`) use a process-wide instance by default.  A cache with `max_entries=0`
+    disables caching, which is useful to measure the cost of the derivation.
+
+    The cache is thread-safe.  `hits`, `misses`, and `evictions` count the lookups, and `derive_seconds`
+    is the total time spent deriving on misses.
+    """
+    logger = logging.getLogger(__name__)
+
+    def __init__(self, max_entries: int = 256):
+        """
+        :param max_entries: The maximum number of derived keys to keep (0 disables the cache)
+        """
+        if max_entries < 0:
+            raise ValueError(f"max_entries must be non-negative, got {max_entries}")
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._cache: OrderedDict[Hashable, AeadKey] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.derive_seconds = 0.0
+
+    def __repr__(self):
+        return (f"DerivedKeyCache(entries={len(self._cache)}, hits={self.hits}, misses={self.misses}, "
+                f"evictions={self.evictions}, derive_seconds={self.derive_seconds:.6f})")
+
+    def __len__(self):
+        return len(self._cache)
+
+    def get_or_derive(self, cache_key: Tuple[bytes, ...], derive: Callable[[], AeadKey]) -> AeadKey:
+        """
+        Return the derived key for `cache_key`, calling `derive()` on a miss.
+
+        :param cache_key: `(key_number, mode, kdf_alg, kdf_info, salt, input_key)` as bytes
+        :param derive: Creates the derived key
+        """
+        with self._lock:
+            key = self._cache.get(cache_key)
+            if key is not None:
+                self._cache.move_to_end(cache_key)
+                self.hits += 1
+                return key
+            self.misses += 1
+
+        # Derive outside the lock.  If two threads race, the first one in wins.
+        start = time.perf_counter()
+        key = derive()
+        elapsed = time.perf_counter() - start
+
+        with self._lock:
+            self.derive_seconds += elapsed
+            if self._max_entries == 0:
+                return key
+            key = self._cache.setdefault(cache_key, key)
+            self._cache.move_to_end(cache_key)
+            while len(self._cache) > self._max_entries:
+                self._cache.popitem(last=False)
+                self.evictions += 1
+        return key
+
+    def invalidate(self, key_number: Optional[KeyNumber] = None):
+        """
+        Remove the derived keys of one key number, or all of them if `key_number` is None (e.g. after a
+        key rotation).  Does not change the statistics.
+        """
+        with self._lock:
+            if key_number is None:
+                self._cache.clear()
+                return
+            key_number_bytes = key_number.serialize().tobytes()
+            for cache_key in [k for k in self._cache if k[0] == key_number_bytes]:
+                del self._cache[cache_key]
@@ -0,0 +1,216 @@
+#  Copyright 2024 Marc Mosko
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+import hashlib
+import json
+import logging
+import os
+import random
+import threading
+from abc import ABC, abstractmethod
+from array import array
+from typing import Optional, Tuple
+
+
+class NonceSource(ABC):
+    """
+    Creates the per-manifest AEAD nonces for `AeadImpl`.  A nonce must never repeat under the same key, so each
+    source enforces a budget of `max_nonces`.  After that, `next()` raises `RuntimeError` and the caller must
+    use a new key.  Use one source per key: `AeadImpl` calls `bind()` with its key, and a source refuses to be
+    bound to a second key.
+
+    The derived classes are:
+        * `RandomNonceSource`: random nonces (the default), read from `os.urandom` in batches.
+        * `CounterNonceSource`: a 64-bit counter, optionally persisted so it never repeats across runs.
+        * `DeterministicNonceSource`: a seeded pseudo-random sequence for reproducible tests.  Not secure.
+
+    The sources are thread-safe.
+    """
+    logger = logging.getLogger(__name__)
+
+    def __init__(self, max_nonces: int):
+        """
+        :param max_nonces: The number of nonces this source may create
+        """
+        if max_nonces <= 0:
+            raise ValueError(f"max_nonces must be positive, got {max_nonces}")
+        self._max_nonces = max_nonces
+        self._lock = threading.Lock()
+        # (key_number, fingerprint) of the key, see `bind()`
+        self._key: Optional[Tuple[int, str]] = None
+        self.count = 0
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(count={self.count}, max_nonces={self._max_nonces})"
+
+    def remaining(self) -> int:
+        return self._max_nonces - self.count
+
+    @staticmethod
+    def key_fingerprint(key: bytes) -> str:
+        """A short digest that identifies a key without revealing it"""
+        return hashlib.sha256(b'ccnpy nonce source' + bytes(key)).hexdigest()[:32]
+
+    def bind(self, key_number: int, key: bytes):
+        """
+        Tie this source to one key.  Binding it again to the same key is a no-op.
+
+        :param key_number: The key's `KeyNumber` value
+        :param key: The key bytes (only their fingerprint is kept)
+        :raises ValueError: If the source is already bound to a different key
+        """
+        identity = (key_number, self.key_fingerprint(key))
+        with self._lock:
+            if self._key is not None and self._key != identity:
+                raise ValueError(f"{self.__class__.__name__} is bound to key number {self._key[0]}, "
+                                 f"it cannot be used with key number {key_number} (use one source per key)")
+            self._key = identity
+
+    def next(self, bits: int) -> array:
+        """
+        :param bits: The nonce length in bits (a multiple of 8), e.g. 96, or 64 with a 32-bit AEAD salt
+        :return: The next nonce as an array("B")
+        """
+        if bits <= 0 or bits % 8 != 0:
+            raise ValueError(f"bits must be a positive multiple of 8, got {bits}")
+        with self._lock:
+            if self.count >= self._max_nonces:
+                raise RuntimeError(f"Nonce budget of {self._max_nonces} is exhausted, use a new key")
+            self.count += 1
+            return array("B", self._generate(bits // 8))
+
+    @abstractmethod
+    def _generate(self, length: int) -> bytes:
+        """Return `length` bytes of nonce.  Called with the lock held."""
+        pass
+
+
+class RandomNonceSource(NonceSource):
+    """
+    Random nonces.  To avoid one system call per manifest, the random bytes are read `batch_size` nonces at a time.
+
+    The default budget is 2^32 nonces, the NIST SP 800-38D limit for random 96-bit GCM nonces.
+    """
+    DEFAULT_MAX_NONCES = 1 << 32
+
+    def __init__(self, max_nonces: int = DEFAULT_MAX_NONCES, batch_size: int = 64):
+        super().__init__(max_nonces=max_nonces)
+        if batch_size <= 0:
+            raise ValueError(f"batch_size must be positive, got {batch_size}")
+        self._batch_size = batch_size
+        self._buffer = b''
+        self._offset = 0
+
+    def _generate(self, length: int) -> bytes:
+        if self._offset + length > len(self._buffer):
+            self._buffer = os.urandom(length * self._batch_size)
+            self._offset = 0
+        nonce = self._buffer[self._offset:self._offset + length]
+        self._offset += length
+        return nonce
+
+
+class CounterNonceSource(NonceSource):
+    """
+    A 64-bit big-endian counter.  With a 32-bit `aead_salt` in the `AeadParameters`, the AEAD nonce is 64 bits, so
+    the IV is the salt followed by the counter.  A longer nonce is left-padded with zeros.
+
+    If `state_path` is given, the counter's high-water mark is kept in that file, so a later run with the same
+    key continues where this one stopped.  Counter values are reserved `reserve` at a time: the file is
+    updated before any value in a block is used, so a crash may skip values but never repeats one.  The file
+    also records the key number and fingerprint, and `bind()` refuses a different key, so one state file
+    cannot be reused with another key.
+    """
+    _VERSION = 2
+    _COUNTER_BITS = 64
+
+    def __init__(self, state_path: Optional[str] = None, reserve: int = 4096, start: int = 0,
+                 max_nonces: int = 1 << _COUNTER_BITS):
+        """
+        :param state_path: If not None, the file that persists the high-water mark
+        :param reserve: The number of counter values to reserve per file update
+        :param start: The first counter value, if there is no saved state
+        :param max_nonces: The budget (default the whole 64-bit counter)
+        """
+        super().__init__(max_nonces=max_nonces)
+        if reserve <= 0:
+            raise ValueError(f"reserve must be positive, got {reserve}")
+        self._state_path = state_path
+        self._reserve = reserve
+        self._next = self._load(start)
+        self._reserved = self._next
+
+    def _load(self, start: int) -> int:
+        if self._state_path is None or not os.path.exists(self._state_path):
+            return start
+        with open(self._state_path, 'r') as f:
+            saved = json.load(f)
+        # version 1 did not record the key, the first bind() adopts it
+        if saved.get('version') not in (1, self._VERSION):
+            raise ValueError(f"Unsupported nonce state version {saved.get('version')} in {self._state_path}")
+        if saved.get('key_number') is not None:
+            self._key = (int(saved['key_number']), saved['key_fingerprint'])
+        # Unlike a traversal state, we cannot start over, as that would repeat nonces
+        return max(start, int(saved['next']))
+
+    def bind(self, key_number: int, key: bytes):
+        try:
+            super().bind(key_number, key)
+        except ValueError:
+            if self._state_path is not None:
+                raise ValueError(f"Nonce state {self._state_path} belongs to key number {self._key[0]} "
+                                 f"(fingerprint {self._key[1]}), not key number {key_number}")
+            raise
+
+    def _save(self, high_water_mark: int):
+        if self._state_path is None:
+            return
+        state = {'version': self._VERSION, 'next': high_water_mark}
+        if self._key is not None:
+            state['key_number'], state['key_fingerprint'] = self._key
+        tmp_path = f'{self._state_path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._state_path)
+
+    def high_water_mark(self) -> int:
+        """The first counter value not yet reserved"""
+        return self._reserved
+
+    def _generate(self, length: int) -> bytes:
+        if length * 8 < self._COUNTER_BITS:
+            raise ValueError(f"A counter nonce needs at least {self._COUNTER_BITS} bits, got {length * 8}")
+        if self._next >= 1 << self._COUNTER_BITS:
+            raise RuntimeError("The nonce counter is exhausted, use a new key")
+        if self._next >= self._reserved:
+            self._reserved = min(self._next + self._reserve, 1 << self._COUNTER_BITS)
+            self._save(self._reserved)
+        value = self._next
+        self._next += 1
+        return value.to_bytes(length, byteorder='big')
+
+
+class DeterministicNonceSource(NonceSource):
+    """
+    A pseudo-random sequence from `seed`, so a test creates the same encrypted manifests every run.
+    It is predictable, so do not use it with a real key.
+    """
+
+    def __init__(self, seed: int | bytes, max_nonces: int = RandomNonceSource.DEFAULT_MAX_NONCES):
+        super().__init__(max_nonces=max_nonces)
+        self._random = random.Random(seed)
+
+    def _generate(self, length: int) -> bytes:
+        return self._random.randbytes(length)
@@ -141,7 +141,7 @@ class SchemaImpl(ABC):
                                           payload=Payload([]),
                                           final_chunk_id=fcid)
 
-        packet = Packet.create_content_object(body=named)
+        packet = self._create_packet(body=named)
         if len(packet) >= self._tree_options.max_packet_size:
             raise ValueError("An empty named ContentObject is %r bytes, but max_size is only %r" %
                              (len(packet), self._tree_options.max_packet_size))
@@ -155,7 +155,18 @@ class SchemaImpl(ABC):
                                              payload=payload_tlv,
                                              expiry_time=self._tree_options.data_expiry_time,
                                              final_chunk_id=fcid)
-        packet = Packet.create_content_object(nameless)
+        packet = self._create_packet(body=nameless)
         if len(packet) > self._tree_options.max_packet_size:
             raise ValueError(f'The final packet length {len(packet)} > max packet size {self._tree_options.max_packet_size}')
         return packet
+
+    def _create_packet(self, body: ContentObject) -> Packet:
+        """
+        Signs the data object with `tree_options.packet_signer`, if there is one.
+        """
+        signer = self._tree_options.packet_signer
+        if signer is None:
+            return Packet.create_content_object(body)
+        validation_alg = signer.validation_alg()
+        validation_payload = signer.sign(body.serialize(), validation_alg.serialize())
+        return Packet.create_signed_content_object(body, validation_alg, validation_payload)
@@ -77,9 +77,12 @@ class Pointers(TlvType):
             raise ValueError("Incorrect TLV type %r" % tlv.type())
 
         hash_values = []
+        value = tlv.value()
         offset = 0
         while offset < tlv.length():
-            hv = HashValue.deserialize(tlv.value()[offset:])
+            # slice just this hash value, not the rest of the buffer
+            end = offset + 4 + Tlv.array_to_number(value[offset + 2:offset + 4])
+            hv = HashValue.deserialize(value[offset:end])
             offset += len(hv)
             hash_values.append(hv)
         return cls(hash_values)
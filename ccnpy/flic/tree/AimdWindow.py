@@ -0,0 +1,69 @@
+#  Copyright 2024 Marc Mosko
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+import time
+
+from .WindowController import WindowController
+
+
+class AimdWindow(WindowController):
+    """
+    TCP-style additive-increase, multiplicative-decrease.
+
+    * Slow start: below `ssthresh`, each response grows the window by one (doubling every RTT).
+    * Congestion avoidance: above it, each response grows the window by `1/window` (one per RTT).
+    * A timeout sets `ssthresh` to `window * decrease` and the window to `ssthresh`.
+
+    A burst of timeouts from one window of Interests is one loss event, so the window is reduced at most
+    once per smoothed RTT.
+    """
+
+    def __init__(self, initial: int = 4, minimum: int = 1, maximum: int = 256, decrease: float = 0.5,
+                 history: int = 4096):
+        """
+        :param initial: The starting window
+        :param minimum: The smallest window
+        :param maximum: The largest window (also the initial slow start threshold)
+        :param decrease: The multiplicative decrease factor (0 < decrease < 1)
+        """
+        if not 1 <= minimum <= initial <= maximum:
+            raise ValueError(f"Need 1 <= minimum <= initial <= maximum, got {minimum}, {initial}, {maximum}")
+        if not 0 < decrease < 1:
+            raise ValueError(f"decrease must be in (0, 1), got {decrease}")
+        super().__init__(history=history)
+        self._minimum = minimum
+        self._maximum = maximum
+        self._decrease = decrease
+        self._cwnd = float(initial)
+        self.ssthresh = float(maximum)
+        self._last_decrease = None
+        self._record()
+
+    def window(self) -> int:
+        return int(self._cwnd)
+
+    def _on_response(self, rtt):
+        if self._cwnd < self.ssthresh:
+            self._cwnd += 1
+        else:
+            self._cwnd += 1 / self._cwnd
+        self._cwnd = min(self._cwnd, self._maximum)
+
+    def _on_timeout(self):
+        now = time.monotonic()
+        if self._last_decrease is not None and self.srtt is not None and now - self._last_decrease < self.srtt:
+            return
+        self._last_decrease = now
+        self.decreases += 1
+        self.ssthresh = max(self._minimum, self._cwnd * self._decrease)
+        self._cwnd = self.ssthresh
@@ -0,0 +1,97 @@
+#  Copyright 2024 Marc Mosko
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+import bisect
+from typing import List, Tuple, Iterable
+
+
+class ByteRanges:
+    """
+    A set of half-open byte ranges `[start, end)`.  Adjacent or overlapping ranges are merged, so the
+    set is always a sorted list of disjoint ranges.
+
+    Used to track which parts of an output file have been written.
+    """
+
+    def __init__(self, ranges: Iterable[Tuple[int, int]] = None):
+        self._starts: List[int] = []
+        self._ends: List[int] = []
+        if ranges is not None:
+            for start, end in ranges:
+                self.add(start, end)
+
+    def __repr__(self):
+        return "ByteRanges(%r)" % self.to_list()
+
+    def __eq__(self, other):
+        if not isinstance(other, ByteRanges):
+            return False
+        return self._starts == other._starts and self._ends == other._ends
+
+    def __len__(self):
+        """The number of disjoint ranges"""
+        return len(self._starts)
+
+    def __iter__(self):
+        return iter(zip(self._starts, self._ends))
+
+    def add(self, start: int, end: int):
+        """
+        Add `[start, end)` to the set.  An empty range is ignored.
+        """
+        if start < 0 or end < start:
+            raise ValueError(f"Invalid range [{start}, {end})")
+        if start == end:
+            return
+
+        # first range whose end is >= start (it may touch or overlap us)
+        i = bisect.bisect_left(self._ends, start)
+        # first range whose start is > end (it cannot touch us)
+        j = bisect.bisect_right(self._starts, end)
+        if i < j:
+            start = min(start, self._starts[i])
+            end = max(end, self._ends[j - 1])
+        self._starts[i:j] = [start]
+        self._ends[i:j] = [end]
+
+    def contains(self, start: int, end: int) -> bool:
+        """
+        True if all of `[start, end)` is in the set.
+        """
+        if start == end:
+            return True
+        i = bisect.bisect_right(self._starts, start) - 1
+        return i >= 0 and self._ends[i] >= end
+
+    def total(self) -> int:
+        """The number of bytes covered by the set"""
+        return sum(e - s for s, e in zip(self._starts, self._ends))
+
+    def missing(self, size: int) -> List[Tuple[int, int]]:
+        """
+        The ranges of `[0, size)` not in the set.
+        """
+        result = []
+        position = 0
+        for start, end in self:
+            if start >= size:
+                break
+            if start > position:
+                result.append((position, start))
+            position = max(position, end)
+        if position < size:
+            result.append((position, size))
+        return result
+
+    def to_list(self) -> List[Tuple[int, int]]:
+        return list(self)
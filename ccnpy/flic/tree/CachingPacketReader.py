@@ -0,0 +1,216 @@
+#  Copyright 2024 Marc Mosko
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Optional, Dict, Iterable, Tuple
+
+from ..tlvs.Locators import Locators
+from ...core.HashValue import HashValue
+from ...core.Name import Name
+from ...core.Packet import Packet, PacketReader
+
+
+class CachingPacketReader(PacketReader):
+    """
+    A read-through LRU cache in front of any other `PacketReader` (e.g. `TreeIO.PacketDirectoryReader`,
+    `TreeIO.PacketMemoryReader`, or a network reader).  The cache is bounded by the total wire-format bytes
+    of the cached packets, not the number of entries.
+
+    Packets are cached by their content object hash, so only requests with a `hash_restriction` are cached.
+    A request by name only is passed through to the underlying reader.
+
+    `prefetch()` accepts read-ahead hints, such as the remaining pointers of a manifest, and fetches
+    them on background threads.  A `get()` or `fill()` for a packet that is already being fetched (by a
+    prefetch or by another caller's miss) waits for that fetch rather than issuing a second one.
+
+    The cache is thread-safe.
+    """
+    logger = logging.getLogger(__name__)
+
+    def __init__(self, packet_input: PacketReader, max_bytes: int = 64 * 1024 * 1024, prefetch_workers: int = 4):
+        """
+        :param packet_input: The reader to fetch from on a cache miss
+        :param max_bytes: The maximum number of packet bytes to keep in the cache
+        :param prefetch_workers: The number of read-ahead threads (0 disables read-ahead)
+        """
+        if max_bytes < 0:
+            raise ValueError(f"max_bytes must be non-negative, got {max_bytes}")
+        self._packet_input = packet_input
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._cache: OrderedDict[HashValue, Packet] = OrderedDict()
+        self._in_flight: Dict[HashValue, Future] = {}
+        self._executor = ThreadPoolExecutor(max_workers=prefetch_workers, thread_name_prefix='prefetch') if prefetch_workers > 0 else None
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes_resident = 0
+        self.bytes_evicted = 0
+        self.prefetches = 0
+        self.prefetch_errors = 0
+
+    def __repr__(self):
+        return (f"CachingPacketReader(entries={len(self._cache)}, bytes={self.bytes_resident}, hits={self.hits}, "
+                f"misses={self.misses}, evictions={self.evictions}, prefetches={self.prefetches})")
+
+    def __len__(self):
+        return len(self._cache)
+
+    def __contains__(self, hash_value: HashValue):
+        with self._lock:
+            return hash_value in self._cache
+
+    def hit_ratio(self) -> float:
+        """
+        :return: hits / (hits + misses), or 0 if there have been no requests
+        """
+        total = self.hits + self.misses
+        if total == 0:
+            return 0.0
+        return self.hits / total
+
+    def get(self, name: Name, hash_restriction: HashValue, locators: Optional[Locators] = None) -> Packet:
+        return self._get(name, hash_restriction, locators, count=True)
+
+    def fill(self, name: Optional[Name], hash_restriction: HashValue, locators: Optional[Locators] = None) -> Packet:
+        """
+        Like `get()`, but for a read-ahead done by the caller's own threads (e.g. `RetrievalService`).
+        It does not count as a hit or miss, so `hit_ratio()` only reflects the real requests.
+        """
+        return self._get(name, hash_restriction, locators, count=False)
+
+    def _get(self, name: Name, hash_restriction: HashValue, locators: Optional[Locators], count: bool) -> Packet:
+        if hash_restriction is None:
+            return self._packet_input.get(name, hash_restriction, locators)
+
+        with self._lock:
+            packet = self._cache.get(hash_restriction)
+            if packet is not None:
+                self._cache.move_to_end(hash_restriction)
+                if count:
+                    self.hits += 1
+            else:
+                if count:
+                    self.misses += 1
+                future = self._in_flight.get(hash_restriction)
+                fetching = future is None
+                if fetching:
+                    # later requests for the same packet wait on this fetch
+                    future = Future()
+                    self._in_flight[hash_restriction] = future
+
+        if packet is None:
+            if fetching:
+                packet = self._fetch(name, hash_restriction, locators, future)
+            else:
+                # Another thread is already fetching it.  If that failed, retry here so the caller sees the error.
+                try:
+                    packet = future.result()
+                except Exception:
+                    packet = None
+                if packet is None:
+                    packet = self._packet_input.get(name, hash_restriction, locators)
+                    self._insert(hash_restriction, packet)
+
+        self._check_name(name, hash_restriction, packet)
+        return packet
+
+    def prefetch(self, requests: Iterable[Tuple[Optional[Name], HashValue]], locators: Optional[Locators] = None):
+        if self._executor is None:
+            return
+
+        for name, hash_restriction in requests:
+            if hash_restriction is None:
+                continue
+            with self._lock:
+                if hash_restriction in self._cache or hash_restriction in self._in_flight:
+                    continue
+                self.prefetches += 1
+                future = self._executor.submit(self._prefetch_one, name, hash_restriction, locators)
+                self._in_flight[hash_restriction] = future
+
+    def invalidate(self, hash_value: Optional[HashValue] = None):
+        """
+        Remove one packet from the cache, or all packets if `hash_value` is None.  Does not change the statistics.
+        """
+        with self._lock:
+            if hash_value is None:
+                self._cache.clear()
+                self.bytes_resident = 0
+            else:
+                packet = self._cache.pop(hash_value, None)
+                if packet is not None:
+                    self.bytes_resident -= len(packet)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+        self._packet_input.close()
+
+    def _fetch(self, name: Optional[Name], hash_restriction: HashValue, locators: Optional[Locators], future: Future) -> Packet:
+        try:
+            packet = self._packet_input.get(name, hash_restriction, locators)
+            self._insert(hash_restriction, packet)
+            future.set_result(packet)
+            return packet
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(hash_restriction, None)
+
+    def _prefetch_one(self, name: Optional[Name], hash_restriction: HashValue, locators: Optional[Locators]) -> Optional[Packet]:
+        try:
+            packet = self._packet_input.get(name, hash_restriction, locators)
+            self._insert(hash_restriction, packet)
+            return packet
+        except Exception as e:
+            # A read-ahead is only a hint.  The eventual `get()` will retry and surface the error.
+            self.logger.debug('Prefetch %s failed: %s', hash_restriction, e)
+            with self._lock:
+                self.prefetch_errors += 1
+            return None
+        finally:
+            with self._lock:
+                self._in_flight.pop(hash_restriction, None)
+
+    def _insert(self, hash_restriction: HashValue, packet: Packet):
+        packet_len = len(packet)
+        if packet_len > self._max_bytes:
+            # would evict everything and still not fit
+            return
+
+        with self._lock:
+            if hash_restriction in self._cache:
+                self._cache.move_to_end(hash_restriction)
+                return
+            self._cache[hash_restriction] = packet
+            self.bytes_resident += packet_len
+            while self.bytes_resident > self._max_bytes:
+                _, evicted = self._cache.popitem(last=False)
+                self.bytes_resident -= len(evicted)
+                self.bytes_evicted += len(evicted)
+                self.evictions += 1
+
+    @staticmethod
+    def _check_name(name: Optional[Name], hash_restriction: HashValue, packet: Packet):
+        # Same rule as the underlying readers: a named packet must match the requested name
+        packet_name = packet.body().name()
+        if packet_name is not None and name != packet_name:
+            raise ValueError(f'Found packet hash {hash_restriction}, but request name {name} does not match packet {packet_name}')
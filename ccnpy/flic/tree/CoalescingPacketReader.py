@@ -0,0 +1,151 @@
+#  Copyright 2024 Marc Mosko
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Optional, Dict, Iterable, Tuple
+
+from ..tlvs.Locators import Locators
+from ...core.HashValue import HashValue
+from ...core.Name import Name
+from ...core.Packet import Packet, PacketReader
+
+
+class CoalescingPacketReader(PacketReader):
+    """
+    Removes duplicate fetches of the same content object hash.  A manifest tree may point to the same data
+    object many times (e.g. the zero-filled blocks of a sparse image, see `PacketMemoryWriter.total_bytes_by_hash`),
+    but `Traversal` asks for every occurrence.
+
+    * Concurrent `get()` calls for a hash share one fetch from the underlying reader.
+    * The last `max_entries` packets are kept, so a repeated occurrence is served without a fetch.
+    * `prefetch()` drops hints for hashes that are cached, being fetched, or repeated in the same batch.
+
+    Unlike `CachingPacketReader`, the cache is small and counted in packets: it is meant to catch
+    repeats, not to hold the working set.  Requests without a `hash_restriction` are passed through.
+
+    The reader is thread-safe.
+    """
+    logger = logging.getLogger(__name__)
+
+    def __init__(self, packet_input: PacketReader, max_entries: int = 256):
+        """
+        :param packet_input: The reader to fetch from
+        :param max_entries: The number of recently fetched packets to keep (0 only coalesces in-flight requests)
+        """
+        if max_entries < 0:
+            raise ValueError(f"max_entries must be non-negative, got {max_entries}")
+        self._packet_input = packet_input
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._recent: OrderedDict[HashValue, Packet] = OrderedDict()
+        self._in_flight: Dict[HashValue, Future] = {}
+
+        self.requests = 0
+        self.fetches = 0
+        self.coalesced = 0
+        self.hits = 0
+        self.bytes_fetched = 0
+        self.bytes_deduplicated = 0
+        self.prefetches_dropped = 0
+
+    def __repr__(self):
+        return (f"CoalescingPacketReader(requests={self.requests}, fetches={self.fetches}, hits={self.hits}, "
+                f"coalesced={self.coalesced}, bytes_deduplicated={self.bytes_deduplicated})")
+
+    def dedup_ratio(self) -> float:
+        """
+        :return: The fraction of hash requests served without a fetch of their own (0 if no requests)
+        """
+        if self.requests == 0:
+            return 0.0
+        return (self.hits + self.coalesced) / self.requests
+
+    def get(self, name: Name, hash_restriction: HashValue, locators: Optional[Locators] = None) -> Packet:
+        if hash_restriction is None:
+            return self._packet_input.get(name, hash_restriction, locators)
+
+        owner = False
+        with self._lock:
+            self.requests += 1
+            packet = self._recent.get(hash_restriction)
+            if packet is not None:
+                self._recent.move_to_end(hash_restriction)
+                self.hits += 1
+                self.bytes_deduplicated += len(packet)
+            else:
+                future = self._in_flight.get(hash_restriction)
+                if future is None:
+                    future = Future()
+                    self._in_flight[hash_restriction] = future
+                    owner = True
+                else:
+                    self.coalesced += 1
+
+        if packet is None:
+            if owner:
+                packet = self._fetch(name, hash_restriction, locators, future)
+            else:
+                packet = future.result()
+                with self._lock:
+                    self.bytes_deduplicated += len(packet)
+
+        self._check_name(name, hash_restriction, packet)
+        return packet
+
+    def prefetch(self, requests: Iterable[Tuple[Optional[Name], HashValue]], locators: Optional[Locators] = None):
+        hints = []
+        seen = set()
+        with self._lock:
+            for name, hash_restriction in requests:
+                if hash_restriction is not None:
+                    if hash_restriction in seen or hash_restriction in self._recent or hash_restriction in self._in_flight:
+                        self.prefetches_dropped += 1
+                        continue
+                    seen.add(hash_restriction)
+                hints.append((name, hash_restriction))
+        if len(hints) > 0:
+            self._packet_input.prefetch(hints, locators)
+
+    def close(self):
+        self._packet_input.close()
+
+    def _fetch(self, name: Optional[Name], hash_restriction: HashValue, locators: Optional[Locators], future: Future) -> Packet:
+        try:
+            packet = self._packet_input.get(name, hash_restriction, locators)
+        except BaseException as e:
+            # waiters see the same error; the next request tries again
+            with self._lock:
+                self._in_flight.pop(hash_restriction, None)
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            self._in_flight.pop(hash_restriction, None)
+            self.fetches += 1
+            self.bytes_fetched += len(packet)
+            if self._max_entries > 0:
+                self._recent[hash_restriction] = packet
+                if len(self._recent) > self._max_entries:
+                    self._recent.popitem(last=False)
+        future.set_result(packet)
+        return packet
+
+    @staticmethod
+    def _check_name(name: Optional[Name], hash_restriction: HashValue, packet: Packet):
+        # A nameless request may share a named packet's fetch, but a named request must match it
+        packet_name = packet.body().name()
+        if packet_name is not None and name is not None and name != packet_name:
+            raise ValueError(f'Found packet hash {hash_restriction}, but request name {name} does not match packet {packet_name}')
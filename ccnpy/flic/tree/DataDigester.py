@@ -0,0 +1,101 @@
+#  Copyright 2024 Marc Mosko
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+import hashlib
+import logging
+import time
+from typing import Optional, Dict, Tuple
+
+from ..name_constructor.FileMetadata import FileMetadata
+from ...core.HashValue import HashValue
+
+
+class DataDigester:
+    """
+    Computes the values of SubtreeDigest and LeafDigest: the SHA-256 of the application data under a manifest
+    or hash group, in traversal order.  A manifest subtree always covers a consecutive run of chunks, so its
+    digest is the SHA-256 of one contiguous byte range of the application data.  A reader can check a local
+    copy of that byte range against the one digest.
+
+    The chunk payloads are not cached (see `FileMetadata`), so the digester re-reads each byte range from the
+    seekable `data_input`.  A byte is hashed once for each digest that covers it, which is about once per
+    tree level.
+    """
+    logger = logging.getLogger(__name__)
+
+    _READ_SIZE = 1024 * 1024
+    _MAX_MEMO = 16
+
+    def __init__(self, file_metadata: FileMetadata, data_input, start_offset: int = 0):
+        """
+        :param file_metadata: The chunks of `data_input`
+        :param data_input: The application data that was chunked.  It must support `seek()` and `read()`.
+        :param start_offset: The position in `data_input` of the first byte of chunk 0
+        """
+        if not hasattr(data_input, 'seek') or (hasattr(data_input, 'seekable') and not data_input.seekable()):
+            raise ValueError("Computing digests requires a seekable data_input")
+        self._data_input = data_input
+        self._start_offset = start_offset
+        # self._offsets[i] is the application data offset of chunk i
+        self._offsets = [0]
+        for chunk_metadata in file_metadata.chunk_metadata:
+            self._offsets.append(self._offsets[-1] + chunk_metadata.payload_bytes)
+        self._memo: Dict[Tuple[int, int], HashValue] = {}
+
+        self.cnt_digests = 0
+        self.cnt_bytes = 0
+        self.digest_seconds = 0.0
+
+    def __repr__(self):
+        return f"DataDigester(digests={self.cnt_digests}, bytes={self.cnt_bytes}, seconds={self.digest_seconds:.3f})"
+
+    def byte_range(self, head: int, tail: int) -> Tuple[int, int]:
+        """
+        :return: The application data byte range `[start, end)` of chunks `[head, tail)`
+        """
+        return self._offsets[head], self._offsets[tail]
+
+    def digest(self, head: int, tail: int) -> Optional[HashValue]:
+        """
+        The SHA-256 of the application data of chunks `[head, tail)`.  The last few results are remembered, as
+        a node and its hash groups often cover the same chunks.
+
+        :return: The digest, or None if the range is empty
+        """
+        if head >= tail:
+            return None
+        key = (head, tail)
+        result = self._memo.get(key)
+        if result is not None:
+            return result
+
+        start = time.perf_counter()
+        begin, end = self.byte_range(head, tail)
+        h = hashlib.sha256()
+        self._data_input.seek(self._start_offset + begin)
+        remaining = end - begin
+        while remaining > 0:
+            buffer = self._data_input.read(min(remaining, self._READ_SIZE))
+            if len(buffer) == 0:
+                raise ValueError(f"data_input ended {remaining} bytes before the end of chunk {tail - 1}")
+            h.update(buffer)
+            remaining -= len(buffer)
+        result = HashValue.create_sha256(h.digest())
+
+        if len(self._memo) >= self._MAX_MEMO:
+            self._memo.clear()
+        self._memo[key] = result
+        self.cnt_digests += 1
+        self.cnt_bytes += end - begin
+        self.digest_seconds += time.perf_counter() - start
+        return result
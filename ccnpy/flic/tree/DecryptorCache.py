@@ -11,11 +11,16 @@
 #  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
+import dataclasses
+import logging
+import threading
+from collections import OrderedDict
+from typing import Tuple, Hashable
+
 from ccnpy.crypto.InsecureKeystore import InsecureKeystore
 from ccnpy.flic.ManifestDecryptor import ManifestDecryptor
-from ccnpy.flic.RsaOaepCtx.RsaOaepDecryptor import RsaOaepDecryptor
+from ccnpy.flic.RsaOaepCtx.RsaOaepImpl import RsaOaepImpl
 from ccnpy.flic.aeadctx.AeadDecryptor import AeadDecryptor
-from ccnpy.flic.aeadctx.AeadParameters import AeadParameters
 from ccnpy.flic.tlvs.AeadCtx import AeadCtx
 from ccnpy.flic.tlvs.RsaOaepCtx import RsaOaepCtx
 from ccnpy.flic.tlvs.SecurityCtx import AeadSecurityCtx
@@ -23,32 +28,83 @@ from ccnpy.flic.tlvs.SecurityCtx import AeadSecurityCtx
 
 class DecryptorCache:
     """
-    cache or create an AES decryptor.
+    cache or create a manifest decryptor.
+
+    The cache is a bounded LRU keyed by (security context type, KeyId, key number, KDF data), so a tree that
+    alternates keys, or several trees read concurrently, reuse their decryptors.  Each decryptor holds its
+    AEAD key and cipher context, and for RSA-OAEP the unwrapped key, so none of those are rebuilt on a hit.
 
-    This implementation currently only remembers the last-used decryptor.  This is sufficient for the
-    prototype demonstration.
+    The cache is thread-safe.  `hits` and `misses` count the lookups.
     """
+    logger = logging.getLogger(__name__)
 
-    def __init__(self, keystore: InsecureKeystore):
+    def __init__(self, keystore: InsecureKeystore, max_entries: int = 64):
+        """
+        :param keystore: Where to find the AES and RSA keys
+        :param max_entries: The maximum number of decryptors to keep
+        """
+        if max_entries < 1:
+            raise ValueError(f"max_entries must be positive, got {max_entries}")
         self._keystore = keystore
-        self._last_key_num = None
-        self._last_decryptor = None
-        self._oaep_decryptor = RsaOaepDecryptor(keystore=self._keystore)
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._cache: OrderedDict[Hashable, ManifestDecryptor] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __repr__(self):
+        return f"DecryptorCache(entries={len(self._cache)}, hits={self.hits}, misses={self.misses}, evictions={self.evictions})"
+
+    def __len__(self):
+        return len(self._cache)
 
     def get_or_create(self, security_ctx: AeadSecurityCtx):
-        # TODO: This is not correct for RsaOaep, as it uses (keyid, keynum) pair as index
-        key_num = security_ctx.key_number()
-        if key_num == self._last_key_num:
-            return self._last_decryptor
-        self._last_key_num = key_num
-        self._last_decryptor = self._create(security_ctx)
-        return self._last_decryptor
+        key = self._cache_key(security_ctx)
+        with self._lock:
+            decryptor = self._cache.get(key)
+            if decryptor is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return decryptor
+            self.misses += 1
+
+        # Create outside the lock, it may do an RSA decryption.  If two threads race, the first one in wins.
+        decryptor = self._create(security_ctx)
+        with self._lock:
+            decryptor = self._cache.setdefault(key, decryptor)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self._max_entries:
+                self._cache.popitem(last=False)
+                self.evictions += 1
+        return decryptor
+
+    def invalidate(self):
+        """Remove all decryptors (e.g. after a keystore change).  Does not change the statistics."""
+        with self._lock:
+            self._cache.clear()
+
+    @staticmethod
+    def _cache_key(security_ctx: AeadSecurityCtx) -> Tuple:
+        kdf_data = security_ctx.aead_data().kdf_data()
+        kdf_bytes = kdf_data.serialize().tobytes() if kdf_data is not None else None
+        key_id = None
+        if isinstance(security_ctx, RsaOaepCtx) and security_ctx.key_id() is not None:
+            key_id = security_ctx.key_id().serialize().tobytes()
+        return security_ctx.class_type(), key_id, security_ctx.key_number().value(), kdf_bytes
 
     def _create(self, security_ctx: AeadSecurityCtx) -> ManifestDecryptor:
-        # TODO: implement for RsaOaep too
+        if isinstance(security_ctx, RsaOaepCtx):
+            self.logger.debug('Create RsaOaep decryptor for %s', security_ctx.key_number())
+            return RsaOaepImpl.create(keystore=self._keystore, rsa_oaep_ctx=security_ctx)
+
         if isinstance(security_ctx, AeadCtx):
-            key_num = security_ctx.key_number()
-            return AeadDecryptor(self._keystore.get_aes_key(key_num))
+            params = self._keystore.get_aes_key(security_ctx.key_number())
+            kdf_data = security_ctx.aead_data().kdf_data()
+            if kdf_data is not None and kdf_data != params.kdf_data:
+                # the manifest's KDF info (e.g. its name) specializes the keystore entry
+                params = dataclasses.replace(params, kdf_data=kdf_data)
+            self.logger.debug('Create Aead decryptor for %s', security_ctx.key_number())
+            return AeadDecryptor(params)
 
-        if isinstance(security_ctx, RsaOaepCtx):
-            return self._oaep_decryptor
+        raise ValueError(f"Unsupported security context: {security_ctx}")
@@ -0,0 +1,78 @@
+#  Copyright 2024 Marc Mosko
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+import time
+
+from .WindowController import WindowController
+
+
+class DelayWindow(WindowController):
+    """
+    A delay-based (TCP Vegas style) controller.  It compares the throughput the window should give at the
+    minimum RTT with the throughput it gives at the current RTT.  The difference, in packets, estimates
+    how many of our Interests are queued in the network:
+
+        queued = window * (1 - min_rtt / srtt)
+
+    Once per RTT, the window grows by one if `queued < alpha` and shrinks by one if `queued > beta`, so it
+    settles with a few packets queued instead of filling the bottleneck buffer until loss.  A timeout still
+    halves the window.
+    """
+
+    def __init__(self, initial: int = 4, minimum: int = 1, maximum: int = 256, alpha: float = 2.0, beta: float = 4.0,
+                 history: int = 4096):
+        """
+        :param initial: The starting window
+        :param minimum: The smallest window
+        :param maximum: The largest window
+        :param alpha: Grow the window when fewer than this many packets are queued
+        :param beta: Shrink the window when more than this many packets are queued
+        """
+        if not 1 <= minimum <= initial <= maximum:
+            raise ValueError(f"Need 1 <= minimum <= initial <= maximum, got {minimum}, {initial}, {maximum}")
+        if not 0 <= alpha <= beta:
+            raise ValueError(f"Need 0 <= alpha <= beta, got {alpha}, {beta}")
+        super().__init__(history=history)
+        self._minimum = minimum
+        self._maximum = maximum
+        self._alpha = alpha
+        self._beta = beta
+        self._cwnd = initial
+        self._last_adjust = None
+        self._last_decrease = None
+        self.queued = 0.0
+        self._record()
+
+    def window(self) -> int:
+        return self._cwnd
+
+    def _on_response(self, rtt):
+        if rtt is None or self.min_rtt is None or rtt <= 0:
+            return
+        now = time.monotonic()
+        if self._last_adjust is not None and now - self._last_adjust < self.srtt:
+            return
+        self._last_adjust = now
+        self.queued = self._cwnd * (1 - self.min_rtt / self.srtt)
+        if self.queued < self._alpha:
+            self._cwnd = min(self._maximum, self._cwnd + 1)
+        elif self.queued > self._beta:
+            self._cwnd = max(self._minimum, self._cwnd - 1)
+
+    def _on_timeout(self):
+        now = time.monotonic()
+        if self._last_decrease is not None and self.srtt is not None and now - self._last_decrease < self.srtt:
+            return
+        self._last_decrease = now
+        self.decreases += 1
+        self._cwnd = max(self._minimum, self._cwnd // 2)
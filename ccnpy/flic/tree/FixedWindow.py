@@ -0,0 +1,30 @@
+#  Copyright 2024 Marc Mosko
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+from .WindowController import WindowController
+
+
+class FixedWindow(WindowController):
+    """
+    A constant window, e.g. to compare against the adaptive controllers.
+    """
+
+    def __init__(self, size: int = 64, history: int = 4096):
+        if size < 1:
+            raise ValueError(f"Window size must be positive, got {size}")
+        super().__init__(history=history)
+        self._size = size
+        self._record()
+
+    def window(self) -> int:
+        return self._size
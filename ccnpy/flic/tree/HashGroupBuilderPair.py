@@ -50,6 +50,12 @@ class HashGroupBuilderPair:
     def is_indirect_full(self):
         return self.indirect_builder.is_indirect_full()
 
+    def direct_count(self):
+        return self.direct_builder.direct_count()
+
+    def indirect_count(self):
+        return self.indirect_builder.indirect_count()
+
     def prepend_indirect(self, hash_value: HashValue, subtree_size: Optional[int] = None):
         self.indirect_builder.prepend_indirect(hash_value=hash_value, subtree_size=subtree_size)
 
@@ -61,7 +67,21 @@ class HashGroupBuilderPair:
 
     def hash_groups(self, include_leaf_size: bool, include_subtree_size: bool,
                     direct_start_segment_id: Optional[StartSegmentId]=None,
-                    indirect_start_segment_id: Optional[StartSegmentId]=None) -> List[HashGroup]:
+                    indirect_start_segment_id: Optional[StartSegmentId]=None,
+                    leaf_digest: Optional[HashValue] = None,
+                    subtree_digest: Optional[HashValue] = None,
+                    direct_subtree_digest: Optional[HashValue] = None,
+                    indirect_subtree_digest: Optional[HashValue] = None) -> List[HashGroup]:
+        """
+        The digests are optional GroupData values.  With one hash group, it gets `leaf_digest` and `subtree_digest`.
+        With two hash groups, the direct group gets `leaf_digest` and `direct_subtree_digest` and the indirect
+        group gets `indirect_subtree_digest`.
+
+        :param leaf_digest: The digest of the application data of the direct pointers
+        :param subtree_digest: The digest of all the application data (direct then indirect)
+        :param direct_subtree_digest: The digest of the application data of the direct pointers
+        :param indirect_subtree_digest: The digest of the application data under the indirect pointers
+        """
         if self.DEBUG:
             print(f"build hash group (direct_seg_id={direct_start_segment_id}, ind_seg_id={indirect_start_segment_id})")
         if self._name_ctx.hash_group_count() == 1:
@@ -70,7 +90,9 @@ class HashGroupBuilderPair:
             assert indirect_start_segment_id is None
             return [self.direct_builder.hash_group(include_leaf_size=include_leaf_size,
                                                    include_subtree_size=include_subtree_size,
-                                                   nc_id=self._name_ctx.manifest_schema_impl.nc_id())]
+                                                   nc_id=self._name_ctx.manifest_schema_impl.nc_id(),
+                                                   leaf_digest=leaf_digest,
+                                                   subtree_digest=subtree_digest)]
         else:
             assert direct_start_segment_id is None or isinstance(direct_start_segment_id, StartSegmentId)
             assert indirect_start_segment_id is None or isinstance(indirect_start_segment_id, StartSegmentId)
@@ -80,9 +102,12 @@ class HashGroupBuilderPair:
                 self.direct_builder.hash_group(include_leaf_size=include_leaf_size,
                                                include_subtree_size=include_subtree_size,
                                                nc_id=self._name_ctx.data_schema_impl.nc_id(),
-                                               start_segment_id=direct_start_segment_id),
+                                               start_segment_id=direct_start_segment_id,
+                                               leaf_digest=leaf_digest,
+                                               subtree_digest=direct_subtree_digest),
                 self.indirect_builder.hash_group(include_leaf_size=include_leaf_size,
                                                  include_subtree_size=include_subtree_size,
                                                  nc_id=self._name_ctx.manifest_schema_impl.nc_id(),
-                                                 start_segment_id=indirect_start_segment_id)
+                                                 start_segment_id=indirect_start_segment_id,
+                                                 subtree_digest=indirect_subtree_digest)
             ]
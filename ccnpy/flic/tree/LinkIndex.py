@@ -0,0 +1,126 @@
+#  Copyright 2024 Marc Mosko
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+from array import array
+from typing import Optional, List, Dict
+
+from ...core.ContentObject import ContentObject
+from ...core.ExpiryTime import ExpiryTime
+from ...core.HashValue import HashValue
+from ...core.Link import Link
+from ...core.Name import Name
+from ...core.Payload import Payload
+from ...core.PayloadType import PayloadType
+from ...core.Tlv import Tlv
+
+
+class LinkIndex:
+    """
+    A list of links from names to content object hashes, carried in one (signed) content object.  It lets
+    `TreeIO.PacketDirectoryWriter` cover many named objects with one signature, rather than signing one
+    `Link` object per name.
+
+    The index is a nameless content object with PayloadType LINK.  The payload is a list of
+    `T_LINK_ENTRY` TLVs, each holding the wire format of one `Link` (a Name and an object hash restriction).
+    A reader verifies the index signature once, after which it trusts the hashes in it.
+
+    The whole packet must fit the 16-bit TLV length, so the payload is limited to `MAX_PAYLOAD_LENGTH` bytes.
+    A writer uses `fits()` to start a new index before that.
+    """
+    __T_LINK_ENTRY = 0x0001
+    # Leaves room in a 16-bit packet length for the fixed header, the content object TLVs, and the
+    # validation algorithm and payload (e.g. an RSA public key and signature)
+    MAX_PAYLOAD_LENGTH = 0xFFFF - 2048
+    # The shortest entry: the TLV header and a Link with an empty name and a SHA-256 digest
+    __MIN_ENTRY_LENGTH = 48
+    # No index can hold more entries than this
+    MAX_ENTRIES = MAX_PAYLOAD_LENGTH // __MIN_ENTRY_LENGTH
+
+    def __init__(self, links: Optional[List[Link]] = None):
+        self._links: List[Link] = []
+        self._by_name: Dict[bytes, HashValue] = {}
+        self._payload_length = 0
+        if links is not None:
+            for link in links:
+                self.append(name=link.name(), digest=link.digest())
+
+    def __len__(self):
+        return len(self._links)
+
+    def __iter__(self):
+        return iter(self._links)
+
+    def __repr__(self):
+        return f"LinkIndex(len={len(self)}, bytes={self._payload_length})"
+
+    @staticmethod
+    def _key(name: Name) -> bytes:
+        # A parsed Name does not compare equal to a constructed one, so index by wire format
+        return name.serialize().tobytes()
+
+    @staticmethod
+    def _entry_length(link: Link) -> int:
+        # the T_LINK_ENTRY type and length, then the Link
+        return 4 + len(link.serialize())
+
+    def payload_length(self) -> int:
+        """The length of the `content_object()` payload"""
+        return self._payload_length
+
+    def fits(self, name: Name, digest: HashValue) -> bool:
+        """
+        True if appending the link keeps the payload within `MAX_PAYLOAD_LENGTH`.
+        """
+        return self._payload_length + self._entry_length(Link(name=name, digest=digest)) <= self.MAX_PAYLOAD_LENGTH
+
+    def append(self, name: Name, digest: HashValue):
+        if name is None or digest is None:
+            raise ValueError("A link index entry must have a name and a digest")
+        link = Link(name=name, digest=digest)
+        self._links.append(link)
+        self._by_name[self._key(name)] = digest
+        self._payload_length += self._entry_length(link)
+
+    def clear(self):
+        self._links = []
+        self._by_name = {}
+        self._payload_length = 0
+
+    def get(self, name: Name) -> Optional[HashValue]:
+        """
+        :return: The content object hash of `name`, or None if it is not in the index
+        """
+        return self._by_name.get(self._key(name))
+
+    def content_object(self, expiry_time: Optional[ExpiryTime] = None) -> ContentObject:
+        wire_format = array("B", [])
+        for link in self._links:
+            wire_format.extend(Tlv(self.__T_LINK_ENTRY, link.serialize()).serialize())
+        return ContentObject(payload_type=PayloadType.create_link_type(), payload=Payload(wire_format),
+                             expiry_time=expiry_time)
+
+    @classmethod
+    def from_content_object(cls, content_object: ContentObject):
+        if not content_object.is_link():
+            raise ValueError(f"A link index must have PayloadType LINK: {content_object}")
+        index = cls()
+        buffer = content_object.payload().value()
+        offset = 0
+        while offset < len(buffer):
+            tlv = Tlv.deserialize(buffer[offset:])
+            offset += len(tlv)
+            if tlv.type() != cls.__T_LINK_ENTRY:
+                raise ValueError(f"Unsupported link index TLV {tlv}")
+            link = Link.deserialize(tlv.value())
+            index.append(name=link.name(), digest=link.digest())
+        return index
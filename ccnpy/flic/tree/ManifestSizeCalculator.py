@@ -97,14 +97,24 @@ class ManifestSizeCalculator:
         else:
             direct_start_segment_id = None
 
+        # Digests are only reserved if the tree options use them, as they are 36 bytes each.
+        tree_options = self._manifest_factory.tree_options()
+        leaf_digest = hv if tree_options.add_group_leaf_digest else None
+        subtree_digest = hv if tree_options.add_group_subtree_digest else None
+
         # include_leaf_size and include_subtree_size might reserve too much space if we do not use those.
         hash_groups = hgb.hash_groups(include_leaf_size=True,
                                       include_subtree_size=True,
                                       indirect_start_segment_id=indirect_start_segment_id,
-                                      direct_start_segment_id=direct_start_segment_id)
+                                      direct_start_segment_id=direct_start_segment_id,
+                                      leaf_digest=leaf_digest,
+                                      subtree_digest=subtree_digest,
+                                      direct_subtree_digest=subtree_digest,
+                                      indirect_subtree_digest=subtree_digest)
 
         packet = self._manifest_factory.build_packet(source=hash_groups,
-                                               node_subtree_size=self._total_bytes)
+                                               node_subtree_size=self._total_bytes,
+                                               node_subtree_digest=hv)
 
         return packet
 
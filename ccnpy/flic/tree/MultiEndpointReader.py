@@ -0,0 +1,247 @@
+#  Copyright 2024 Marc Mosko
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, List, Tuple, Callable, Iterable
+
+from .TreeIO import TreeIO
+from ..tlvs.Locators import Locators
+from ...core.HashValue import HashValue
+from ...core.Name import Name
+from ...core.Packet import Packet, PacketReader
+
+
+class MultiEndpointReader(PacketReader):
+    """
+    A network `PacketReader` that spreads fetches across every replica endpoint of a name constructor's
+    `Locators`.
+
+    Locators are CCNx names, so `endpoints` maps each locator name to the TCP endpoints (host, port) that
+    serve it.  A request without locators (or whose locators are not mapped) uses `default_endpoints`.
+    A connection (a `TreeIO.PacketNetworkReader`) is opened to each endpoint the first time it is needed.
+
+    Each request goes to the candidate endpoint with the lowest expected completion time:
+
+        srtt * (1 + outstanding requests) / (1 - loss)
+
+    so read-ahead is striped over the replicas in proportion to how fast they answer.  `srtt` comes from the
+    connection's RTT estimator; `loss` is a moving average of timeouts.
+
+    If an endpoint times out (or the connection fails), the request fails over to the next best endpoint.
+    After `demote_after` consecutive failures, an endpoint is demoted (not used while any other candidate is
+    available) for `demotion_period` seconds, doubling each time it is demoted again.  An endpoint whose srtt is
+    more than `slow_factor` times the best candidate's is also skipped while faster ones are available.
+    """
+    logger = logging.getLogger(__name__)
+    # RTT used for cost before any endpoint has a sample
+    _INITIAL_RTT = 0.05
+
+    class Endpoint:
+        """Per-endpoint connection and statistics"""
+
+        def __init__(self, address: Tuple[str, int]):
+            self.address = address
+            self.reader: Optional[PacketReader] = None
+            self.loss = 0.0
+            self.consecutive_failures = 0
+            self.demotions = 0
+            self.demoted_until = 0.0
+            self.requests = 0
+            self.successes = 0
+            self.failures = 0
+
+        def __repr__(self):
+            return (f"Endpoint({self.address[0]}:{self.address[1]}, srtt={self.srtt()}, loss={self.loss:.3f}, "
+                    f"requests={self.requests}, failures={self.failures}, demoted={self.is_demoted(time.monotonic())})")
+
+        def srtt(self) -> Optional[float]:
+            """The connection's smoothed RTT, or None before the first sample"""
+            return getattr(self.reader, 'srtt', None)
+
+        def outstanding(self) -> int:
+            if self.reader is None or not hasattr(self.reader, 'outstanding'):
+                return 0
+            return self.reader.outstanding()
+
+        def is_demoted(self, now: float) -> bool:
+            return now < self.demoted_until
+
+        def cost(self, srtt: float) -> float:
+            return srtt * (1 + self.outstanding()) / max(0.05, 1.0 - self.loss)
+
+    def __init__(self, endpoints: Optional[Dict[Name, List[Tuple[str, int]]]] = None,
+                 default_endpoints: Optional[List[Tuple[str, int]]] = None,
+                 timeout: float = 1.0, max_attempts: Optional[int] = None,
+                 demote_after: int = 2, demotion_period: float = 5.0, slow_factor: float = 4.0,
+                 reader_factory: Optional[Callable[[str, int], PacketReader]] = None, max_assigned: int = 4096):
+        """
+        :param endpoints: Locator name -> list of (host, port)
+        :param default_endpoints: The endpoints for requests without (mapped) locators
+        :param timeout: Seconds to wait on one endpoint before failing over
+        :param max_attempts: Total tries per request across endpoints (default: twice the number of candidates)
+        :param demote_after: Consecutive failures before an endpoint is demoted
+        :param demotion_period: Seconds of the first demotion
+        :param slow_factor: Skip endpoints whose srtt is this many times the best one's
+        :param reader_factory: Creates the connection to (host, port).  Default is a `TreeIO.PacketNetworkReader`
+                               that does not retransmit on its own (we fail over instead).
+        :param max_assigned: How many read-ahead assignments to remember.  A hash prefetched but never
+                             requested is forgotten, least recently assigned first.
+        """
+        if max_assigned < 0:
+            raise ValueError(f"max_assigned must be non-negative, got {max_assigned}")
+        self._locator_map: Dict[Name, List[Tuple[str, int]]] = dict(endpoints) if endpoints is not None else {}
+        self._default_endpoints = list(default_endpoints) if default_endpoints is not None else []
+        if len(self._locator_map) == 0 and len(self._default_endpoints) == 0:
+            raise ValueError("Must give at least one endpoint")
+        self._timeout = timeout
+        self._max_attempts = max_attempts
+        self._demote_after = demote_after
+        self._demotion_period = demotion_period
+        self._slow_factor = slow_factor
+        if reader_factory is None:
+            reader_factory = lambda host, port: TreeIO.PacketNetworkReader(host=host, port=port, timeout=timeout, max_retries=0)
+        self._reader_factory = reader_factory
+        self._lock = threading.Lock()
+        self._endpoints: Dict[Tuple[str, int], MultiEndpointReader.Endpoint] = {}
+        # where each read-ahead went, so get() asks the same endpoint first (an LRU of max_assigned entries)
+        self._assigned: OrderedDict[HashValue, MultiEndpointReader.Endpoint] = OrderedDict()
+        self._max_assigned = max_assigned
+
+        self.failovers = 0
+
+    def __repr__(self):
+        return f"MultiEndpointReader(failovers={self.failovers}, endpoints={list(self._endpoints.values())})"
+
+    def endpoints(self) -> List[Endpoint]:
+        """The endpoints used so far"""
+        with self._lock:
+            return list(self._endpoints.values())
+
+    def get(self, name: Name, hash_restriction: HashValue, locators: Optional[Locators] = None) -> Packet:
+        candidates = self._candidates(locators)
+        with self._lock:
+            first = self._assigned.pop(hash_restriction, None) if hash_restriction is not None else None
+        max_attempts = self._max_attempts if self._max_attempts is not None else 2 * len(candidates)
+
+        tried = []
+        last_error: Optional[Exception] = None
+        for attempt in range(max_attempts):
+            endpoint = first if first is not None and attempt == 0 else self._select(candidates, exclude=tried)
+            try:
+                reader = self._connect(endpoint)
+                endpoint.requests += 1
+                packet = reader.get(name, hash_restriction, locators)
+                self._success(endpoint)
+                return packet
+            except OSError as e:
+                last_error = e
+                self._failure(endpoint, e)
+                tried.append(endpoint)
+                if len(tried) >= len(candidates):
+                    # every candidate failed once, start another round
+                    tried = []
+                self.failovers += 1
+        raise TimeoutError(f'No endpoint answered {name} {hash_restriction} after {max_attempts} attempts: {last_error}')
+
+    def prefetch(self, requests: Iterable[Tuple[Optional[Name], HashValue]], locators: Optional[Locators] = None):
+        candidates = self._candidates(locators)
+        for name, hash_restriction in requests:
+            if hash_restriction is None:
+                continue
+            endpoint = self._select(candidates, exclude=[])
+            try:
+                reader = self._connect(endpoint)
+                reader.prefetch([(name, hash_restriction)], locators)
+            except OSError as e:
+                self._failure(endpoint, e)
+                continue
+            with self._lock:
+                self._assigned[hash_restriction] = endpoint
+                self._assigned.move_to_end(hash_restriction)
+                while len(self._assigned) > self._max_assigned:
+                    self._assigned.popitem(last=False)
+
+    def close(self):
+        with self._lock:
+            endpoints = list(self._endpoints.values())
+        for endpoint in endpoints:
+            if endpoint.reader is not None:
+                endpoint.reader.close()
+                endpoint.reader = None
+
+    def _candidates(self, locators: Optional[Locators]) -> List[Endpoint]:
+        addresses = []
+        if locators is not None:
+            for locator in locators:
+                for address in self._locator_map.get(locator.name(), []):
+                    if address not in addresses:
+                        addresses.append(address)
+        if len(addresses) == 0:
+            addresses = self._default_endpoints
+        if len(addresses) == 0:
+            raise ValueError(f"No endpoint for locators {locators}")
+        with self._lock:
+            return [self._endpoints.setdefault(a, MultiEndpointReader.Endpoint(a)) for a in addresses]
+
+    def _select(self, candidates: List[Endpoint], exclude: List[Endpoint]) -> Endpoint:
+        now = time.monotonic()
+        available = [e for e in candidates if e not in exclude]
+        if len(available) == 0:
+            available = candidates
+        healthy = [e for e in available if not e.is_demoted(now)]
+        if len(healthy) > 0:
+            # an endpoint without RTT samples is assumed to be as good as the best one, so it gets tried
+            samples = [e.srtt() for e in healthy if e.srtt() is not None]
+            best_srtt = min(samples) if len(samples) > 0 else self._INITIAL_RTT
+            srtts = {e.address: e.srtt() if e.srtt() is not None else best_srtt for e in healthy}
+            fast = [e for e in healthy if srtts[e.address] <= self._slow_factor * best_srtt]
+            return min(fast, key=lambda e: e.cost(srtts[e.address]))
+        # everything is demoted, use the one that comes back soonest
+        return min(available, key=lambda e: e.demoted_until)
+
+    def _connect(self, endpoint: Endpoint) -> PacketReader:
+        if endpoint.reader is None:
+            with self._lock:
+                if endpoint.reader is None:
+                    self.logger.info('Connecting to %s:%d', *endpoint.address)
+                    endpoint.reader = self._reader_factory(*endpoint.address)
+        return endpoint.reader
+
+    def _success(self, endpoint: Endpoint):
+        with self._lock:
+            endpoint.successes += 1
+            endpoint.consecutive_failures = 0
+            endpoint.loss *= 0.9
+
+    def _failure(self, endpoint: Endpoint, error: Exception):
+        self.logger.debug('Endpoint %s failed: %s', endpoint, error)
+        with self._lock:
+            endpoint.failures += 1
+            endpoint.consecutive_failures += 1
+            endpoint.loss = 0.9 * endpoint.loss + 0.1
+            if not isinstance(error, TimeoutError) and endpoint.reader is not None:
+                # the connection is gone, reconnect when next used
+                reader, endpoint.reader = endpoint.reader, None
+                try:
+                    reader.close()
+                except OSError:
+                    pass
+            if endpoint.consecutive_failures >= self._demote_after:
+                period = self._demotion_period * (2 ** endpoint.demotions)
+                endpoint.demoted_until = time.monotonic() + period
+                endpoint.demotions += 1
+                endpoint.consecutive_failures = 0
+                self.logger.info('Demoting %s for %.1f seconds', endpoint, period)
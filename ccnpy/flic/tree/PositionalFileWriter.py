@@ -0,0 +1,179 @@
+#  Copyright 2024 Marc Mosko
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+import logging
+import os
+import threading
+from typing import Optional, List, Tuple
+
+from .ByteRanges import ByteRanges
+
+
+class PositionalFileWriter:
+    """
+    An output sink for `Traversal` that writes application data at explicit file offsets with `os.pwrite`.
+    Because every write carries its own offset, data may arrive in any order (e.g. from concurrent fetches)
+    without a reorder buffer.
+
+    The writer tracks the byte ranges that have been written, so a caller can tell when the file is complete
+    or which ranges are still missing.
+
+    It also supports the sequential `write(data)` interface, which appends at the current position.
+
+    `write_at()` is safe to call from multiple threads.
+    """
+    logger = logging.getLogger(__name__)
+
+    def __init__(self, filename, size: Optional[int] = None, fallocate: bool = False, truncate: bool = True):
+        """
+        :param filename: The output file
+        :param size: If known, the final file size.  The file is extended to this size up front.
+        :param fallocate: If True (and `size` is given), reserve the disk blocks with `posix_fallocate`
+                          instead of creating a sparse file.  Ignored if the platform does not support it.
+        :param truncate: If True, discard any existing contents.  If False, keep them (e.g. to resume).
+        """
+        flags = os.O_RDWR | os.O_CREAT
+        if truncate:
+            flags |= os.O_TRUNC
+        self._filename = filename
+        self._fd = os.open(filename, flags, 0o644)
+        self._fallocate = fallocate
+        self._lock = threading.Lock()
+        self._ranges = ByteRanges()
+        self._position = 0
+        self._size = None
+        self.bytes_written = 0
+        self.write_count = 0
+        if size is not None:
+            self.preallocate(size)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __repr__(self):
+        return f"PositionalFileWriter({self._filename}, size={self._size}, written={self.bytes_written}, ranges={len(self._ranges)})"
+
+    def preallocate(self, size: int):
+        """
+        Extend the file to `size` bytes.  If `fallocate` was requested and is available, the blocks are reserved,
+        otherwise the file is sparse.  Never shrinks the file or the expected size.
+        """
+        if size < 0:
+            raise ValueError(f"size must be non-negative, got {size}")
+        self._size = max(self._size or 0, size)
+        if size <= os.fstat(self._fd).st_size:
+            return
+        if self._fallocate and hasattr(os, 'posix_fallocate'):
+            try:
+                os.posix_fallocate(self._fd, 0, size)
+                return
+            except OSError as e:
+                # e.g. the filesystem does not support it
+                self.logger.debug('posix_fallocate failed, using ftruncate: %s', e)
+        os.ftruncate(self._fd, size)
+
+    def truncate(self, size: int):
+        """
+        Cut the file to `size` bytes, which becomes the expected size.  Use it when the traversal is done, so a
+        longer file from before (e.g. kept to resume) does not keep a stale tail.
+        """
+        if size < 0:
+            raise ValueError(f"size must be non-negative, got {size}")
+        os.ftruncate(self._fd, size)
+        with self._lock:
+            self._size = size
+
+    def size(self) -> Optional[int]:
+        """The expected file size, if known"""
+        return self._size
+
+    def write_at(self, offset: int, data):
+        """
+        Write `data` at `offset`.
+
+        :param offset: The file offset of the first byte
+        :param data: bytes, bytearray, memoryview, or array
+        """
+        view = memoryview(data).cast('B')
+        length = len(view)
+        written = 0
+        while written < length:
+            written += os.pwrite(self._fd, view[written:], offset + written)
+
+        with self._lock:
+            self._ranges.add(offset, offset + length)
+            self.bytes_written += length
+            self.write_count += 1
+
+    def read_at(self, offset: int, length: int) -> bytes:
+        """
+        Read back up to `length` bytes at `offset`, e.g. to verify data already in the file.  Returns fewer
+        bytes at the end of the file.
+        """
+        chunks = []
+        remaining = length
+        while remaining > 0:
+            chunk = os.pread(self._fd, remaining, offset + length - remaining)
+            if len(chunk) == 0:
+                break
+            chunks.append(chunk)
+            remaining -= len(chunk)
+        return b''.join(chunks)
+
+    def mark_written(self, offset: int, length: int):
+        """
+        Record that `[offset, offset + length)` already holds the right data (e.g. it was verified by
+        `read_at()`), without writing it.
+        """
+        with self._lock:
+            self._ranges.add(offset, offset + length)
+
+    def write(self, data):
+        """
+        Sequential write at the current position (the end of the previous `write()`).
+        """
+        with self._lock:
+            offset = self._position
+            self._position += len(data)
+        self.write_at(offset, data)
+
+    def ranges(self) -> ByteRanges:
+        """The byte ranges written so far (a live reference, do not modify)"""
+        return self._ranges
+
+    def missing_ranges(self) -> List[Tuple[int, int]]:
+        """
+        The ranges not yet written.  Requires the size to be known.
+        """
+        if self._size is None:
+            raise ValueError("The file size is not known")
+        with self._lock:
+            return self._ranges.missing(self._size)
+
+    def is_complete(self) -> bool:
+        if self._size is None:
+            return False
+        with self._lock:
+            return self._ranges.contains(0, self._size)
+
+    def flush(self):
+        if self._fd is not None:
+            os.fsync(self._fd)
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
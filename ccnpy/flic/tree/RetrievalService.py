@@ -0,0 +1,324 @@
+#  Copyright 2024 Marc Mosko
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Optional, Iterable, Tuple, Dict, Deque
+
+from .CachingPacketReader import CachingPacketReader
+from .DecryptorCache import DecryptorCache
+from .Traversal import Traversal
+from ..tlvs.Locators import Locators
+from ...core.HashValue import HashValue
+from ...core.Name import Name
+from ...core.Packet import Packet, PacketReader
+from ...core.PacketValidator import PacketValidator
+from ...crypto.InsecureKeystore import InsecureKeystore
+
+
+class RetrievalService:
+    """
+    A long-lived service that retrieves many manifest trees concurrently from one packet source.
+
+    All retrievals share one `CachingPacketReader`, one `PacketValidator` (with its verifier cache), and one
+    `DecryptorCache`.  Each retrieval runs its own `Traversal` and streams the application data to its own
+    sink (anything `Traversal` accepts as a `data_writer`).
+
+    Packet fetches are scheduled fairly: each tree has its own fetch queue, and the fetch workers take one
+    request from each tree with pending requests in turn (round-robin).  A large tree cannot starve a small one.
+    Within a tree, a fetch the traversal is waiting on goes ahead of read-ahead hints.
+
+    Example:
+        service = RetrievalService(TreeIO.PacketDirectoryReader(path), keystore=keystore)
+        r1 = service.submit(root_name=name1, data_writer=PositionalFileWriter('out1'))
+        r2 = service.submit(root_name=name2, hash_restriction=hash2, data_writer=TreeIO.DataBuffer())
+        r1.result()
+        r2.result()
+        print(service.metrics())
+        service.close()
+    """
+    logger = logging.getLogger(__name__)
+
+    class Retrieval:
+        """
+        The handle for one submitted tree.  The counters are updated while the retrieval runs.
+        Once it finishes, the service drops its `Traversal` (and so the `data_writer`) and its own reference
+        to the handle, keeping only the totals in `metrics()`.
+        """
+
+        def __init__(self, tree_id: int, root_name: Optional[Name], hash_restriction: Optional[HashValue]):
+            self.tree_id = tree_id
+            self.root_name = root_name
+            self.hash_restriction = hash_restriction
+            self.future = Future()
+            self.packets = 0
+            self.wire_bytes = 0
+            self.data_bytes = 0
+            self.start_time: Optional[float] = None
+            self.end_time: Optional[float] = None
+            self._traversal: Optional[Traversal] = None
+
+        def __repr__(self):
+            return (f"Retrieval(id={self.tree_id}, name={self.root_name}, packets={self.packets}, "
+                    f"data_bytes={self.data_bytes}, elapsed={self.elapsed():.3f}, done={self.done()})")
+
+        def result(self, timeout: Optional[float] = None) -> 'RetrievalService.Retrieval':
+            """Wait for the retrieval to finish.  Raises the traversal's exception if it failed."""
+            self.future.result(timeout)
+            return self
+
+        def done(self) -> bool:
+            return self.future.done()
+
+        def elapsed(self) -> float:
+            if self.start_time is None:
+                return 0.0
+            end = self.end_time if self.end_time is not None else time.monotonic()
+            return end - self.start_time
+
+        def throughput(self) -> float:
+            """Application data bytes per second"""
+            elapsed = self.elapsed()
+            return self.data_bytes / elapsed if elapsed > 0 else 0.0
+
+    class _FairQueue:
+        """
+        Per-tree FIFOs served round-robin.  An item is (name, hash_restriction, locators, future).
+        A `None` future marks a read-ahead hint.
+        """
+
+        def __init__(self):
+            self._queues: OrderedDict[int, Deque] = OrderedDict()
+            self._cv = threading.Condition()
+            self._closed = False
+
+        def put(self, tree_id: int, item: Tuple, urgent: bool = False):
+            with self._cv:
+                queue = self._queues.get(tree_id)
+                if queue is None:
+                    queue = deque()
+                    self._queues[tree_id] = queue
+                if urgent:
+                    queue.appendleft(item)
+                else:
+                    queue.append(item)
+                self._cv.notify()
+
+        def get(self) -> Optional[Tuple]:
+            """Blocks until an item is available.  Returns None once closed."""
+            with self._cv:
+                while not self._queues and not self._closed:
+                    self._cv.wait()
+                if self._closed:
+                    return None
+                tree_id, queue = next(iter(self._queues.items()))
+                item = queue.popleft()
+                if queue:
+                    # the tree goes to the back of the line
+                    self._queues.move_to_end(tree_id)
+                else:
+                    del self._queues[tree_id]
+                return item
+
+        def discard(self, tree_id: int):
+            """Drop any hints left over from a finished tree"""
+            with self._cv:
+                self._queues.pop(tree_id, None)
+
+        def close(self):
+            with self._cv:
+                self._closed = True
+                self._cv.notify_all()
+
+    class _TreeReader(PacketReader):
+        """The `PacketReader` a tree's `Traversal` sees.  It routes every fetch through the fair queue."""
+
+        def __init__(self, service: 'RetrievalService', retrieval: 'RetrievalService.Retrieval'):
+            self._service = service
+            self._retrieval = retrieval
+
+        def get(self, name: Name, hash_restriction: HashValue, locators: Optional[Locators] = None) -> Packet:
+            future = Future()
+            self._service._queue.put(self._retrieval.tree_id, (name, hash_restriction, locators, future), urgent=True)
+            packet = future.result()
+            self._retrieval.packets += 1
+            self._retrieval.wire_bytes += len(packet)
+            traversal = self._retrieval._traversal
+            if traversal is not None:
+                self._retrieval.data_bytes = traversal.offset()
+            return packet
+
+        def prefetch(self, requests: Iterable[Tuple[Optional[Name], HashValue]], locators: Optional[Locators] = None):
+            for name, hash_restriction in requests:
+                if hash_restriction is not None and hash_restriction not in self._service._cache:
+                    self._service._queue.put(self._retrieval.tree_id, (name, hash_restriction, locators, None))
+
+    def __init__(self, packet_input: PacketReader, keystore: Optional[InsecureKeystore] = None,
+                 max_trees: int = 8, fetch_workers: int = 4, cache_bytes: int = 64 * 1024 * 1024):
+        """
+        :param packet_input: The shared packet source (e.g. a directory or network reader)
+        :param keystore: Used to verify packets and decrypt manifests
+        :param max_trees: The maximum number of trees traversed at once (others wait their turn)
+        :param fetch_workers: The number of threads fetching packets from `packet_input`
+        :param cache_bytes: The size of the shared packet cache
+        """
+        if fetch_workers < 1:
+            raise ValueError(f"fetch_workers must be positive, got {fetch_workers}")
+        # read-ahead goes through our fair queue, not the cache's own threads
+        self._cache = CachingPacketReader(packet_input, max_bytes=cache_bytes, prefetch_workers=0)
+        self._validator = PacketValidator(keystore=keystore)
+        self._decryptor_cache = DecryptorCache(keystore)
+        self._keystore = keystore
+        self._queue = RetrievalService._FairQueue()
+        self._lock = threading.Lock()
+        self._next_id = 0
+        # the retrievals not yet finished; finished ones only add to the totals below
+        self._retrievals: Dict[int, RetrievalService.Retrieval] = {}
+        self._finished_packets = 0
+        self._finished_wire_bytes = 0
+        self._finished_data_bytes = 0
+        self._start_time = time.monotonic()
+        self._tree_executor = ThreadPoolExecutor(max_workers=max_trees, thread_name_prefix='retrieval')
+        self._fetchers = [threading.Thread(target=self._fetch_loop, name=f'fetch-{i}', daemon=True)
+                          for i in range(fetch_workers)]
+        for fetcher in self._fetchers:
+            fetcher.start()
+
+        self.trees_completed = 0
+        self.trees_failed = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __repr__(self):
+        return f"RetrievalService({self.metrics()})"
+
+    def submit(self, root_name: Optional[Name], data_writer, hash_restriction: Optional[HashValue] = None) -> Retrieval:
+        """
+        Start retrieving a tree.  Returns immediately.
+
+        :param root_name: The name of the root manifest (may be None if `hash_restriction` is given)
+        :param data_writer: The sink for this tree's application data
+        :param hash_restriction: The hash of the root manifest, if known
+        :return: A handle to wait on and read per-tree metrics from
+        """
+        if root_name is None and hash_restriction is None:
+            raise ValueError("Must give at least one of root_name or hash_restriction")
+        with self._lock:
+            tree_id = self._next_id
+            self._next_id += 1
+            retrieval = RetrievalService.Retrieval(tree_id, root_name, hash_restriction)
+            self._retrievals[tree_id] = retrieval
+        self._tree_executor.submit(self._run, retrieval, data_writer)
+        return retrieval
+
+    def retrievals(self):
+        """The retrievals that have not finished, in submission order"""
+        with self._lock:
+            return list(self._retrievals.values())
+
+    def metrics(self) -> Dict:
+        """
+        Aggregate metrics over all retrievals since the service started.
+        """
+        with self._lock:
+            retrievals = list(self._retrievals.values())
+            trees_submitted = self._next_id
+            trees_completed = self.trees_completed
+            trees_failed = self.trees_failed
+            packets = self._finished_packets + sum(r.packets for r in retrievals)
+            wire_bytes = self._finished_wire_bytes + sum(r.wire_bytes for r in retrievals)
+            data_bytes = self._finished_data_bytes + sum(r.data_bytes for r in retrievals)
+        uptime = time.monotonic() - self._start_time
+        return {
+            'trees_submitted': trees_submitted,
+            'trees_completed': trees_completed,
+            'trees_failed': trees_failed,
+            'packets': packets,
+            'wire_bytes': wire_bytes,
+            'data_bytes': data_bytes,
+            'uptime': uptime,
+            'throughput': data_bytes / uptime if uptime > 0 else 0.0,
+            'cache_hit_ratio': self._cache.hit_ratio(),
+            'decryptor_hits': self._decryptor_cache.hits,
+            'decryptor_misses': self._decryptor_cache.misses,
+            'validations': self._validator.validations,
+        }
+
+    def close(self):
+        """Wait for the running retrievals, then stop the fetch workers and close the packet source"""
+        self._tree_executor.shutdown(wait=True)
+        self._queue.close()
+        for fetcher in self._fetchers:
+            fetcher.join()
+        self._cache.close()
+
+    def _run(self, retrieval: Retrieval, data_writer):
+        retrieval.start_time = time.monotonic()
+        traversal = Traversal(packet_input=RetrievalService._TreeReader(self, retrieval),
+                              data_writer=data_writer,
+                              keystore=self._keystore,
+                              validator=self._validator,
+                              decryptor_cache=self._decryptor_cache)
+        retrieval._traversal = traversal
+        error = None
+        try:
+            traversal.traverse(root_name=retrieval.root_name, hash_restriction=retrieval.hash_restriction)
+        except BaseException as e:
+            self.logger.error('Retrieval %s failed: %s', retrieval, e)
+            error = e
+        finally:
+            self._queue.discard(retrieval.tree_id)
+            retrieval.data_bytes = traversal.offset()
+            retrieval.end_time = time.monotonic()
+            # the traversal holds the data_writer, so do not keep it past the retrieval
+            retrieval._traversal = None
+            with self._lock:
+                del self._retrievals[retrieval.tree_id]
+                self._finished_packets += retrieval.packets
+                self._finished_wire_bytes += retrieval.wire_bytes
+                self._finished_data_bytes += retrieval.data_bytes
+                if error is None:
+                    self.trees_completed += 1
+                else:
+                    self.trees_failed += 1
+        # only after the totals are updated, so a caller that waited on it sees them
+        if error is None:
+            retrieval.future.set_result(retrieval)
+        else:
+            retrieval.future.set_exception(error)
+
+    def _fetch_loop(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            name, hash_restriction, locators, future = item
+            try:
+                if future is not None:
+                    future.set_result(self._cache.get(name, hash_restriction, locators))
+                else:
+                    # a hint, which should not count in the cache hit ratio.  The cache tracks the fetches in
+                    # flight, so a get() on another worker for the same packet waits for this one.
+                    self._cache.fill(name, hash_restriction, locators)
+            except Exception as e:
+                if future is not None:
+                    future.set_exception(e)
+                else:
+                    self.logger.debug('Read-ahead %s failed: %s', hash_restriction, e)
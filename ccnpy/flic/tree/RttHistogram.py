@@ -0,0 +1,105 @@
+#  Copyright 2024 Marc Mosko
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+import math
+from typing import Optional, List, Dict
+
+
+class RttHistogram:
+    """
+    A histogram of round-trip times with logarithmic buckets.  Bucket `i` counts samples in
+    `[min_rtt * 2**(i-1), min_rtt * 2**i)` (bucket 0 is everything below `min_rtt`, the last bucket is
+    everything above the top bound), so a few dozen buckets cover microseconds to minutes with a constant
+    relative error.
+    """
+
+    def __init__(self, min_rtt: float = 0.0001, buckets: int = 24):
+        """
+        :param min_rtt: The upper bound (seconds) of the first bucket
+        :param buckets: The number of buckets
+        """
+        if min_rtt <= 0 or buckets < 2:
+            raise ValueError(f"Invalid histogram min_rtt={min_rtt} buckets={buckets}")
+        self._min_rtt = min_rtt
+        self._counts = [0] * buckets
+        self.count = 0
+        self.total = 0.0
+        self.minimum: Optional[float] = None
+        self.maximum: Optional[float] = None
+
+    def __repr__(self):
+        return f"RttHistogram(count={self.count}, mean={self.mean()}, p50={self.percentile(50)}, p99={self.percentile(99)})"
+
+    def __len__(self):
+        return self.count
+
+    def add(self, rtt: float):
+        if rtt < 0:
+            raise ValueError(f"RTT must be non-negative, got {rtt}")
+        self._counts[self._bucket(rtt)] += 1
+        self.count += 1
+        self.total += rtt
+        self.minimum = rtt if self.minimum is None else min(self.minimum, rtt)
+        self.maximum = rtt if self.maximum is None else max(self.maximum, rtt)
+
+    def mean(self) -> Optional[float]:
+        if self.count == 0:
+            return None
+        return self.total / self.count
+
+    def upper_bound(self, bucket: int) -> float:
+        """The upper bound (seconds) of a bucket.  The last bucket is unbounded."""
+        if bucket == len(self._counts) - 1:
+            return math.inf
+        return self._min_rtt * (2 ** bucket)
+
+    def percentile(self, p: float) -> Optional[float]:
+        """
+        The upper bound of the bucket holding the p-th percentile sample, clamped to the largest sample.
+
+        :param p: 0 to 100
+        """
+        if self.count == 0:
+            return None
+        rank = max(1, math.ceil(self.count * p / 100))
+        seen = 0
+        for i, n in enumerate(self._counts):
+            seen += n
+            if seen >= rank:
+                return min(self.upper_bound(i), self.maximum)
+        return self.maximum
+
+    def buckets(self) -> List[Dict]:
+        """
+        The non-empty buckets as `{'le': upper_bound, 'count': n}`.  The unbounded last bucket has `'le': None`,
+        so the result is valid JSON.
+        """
+        last = len(self._counts) - 1
+        return [{'le': self.upper_bound(i) if i < last else None, 'count': n} for i, n in enumerate(self._counts) if n > 0]
+
+    def to_dict(self) -> Dict:
+        return {
+            'count': self.count,
+            'mean': self.mean(),
+            'min': self.minimum,
+            'max': self.maximum,
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'p99': self.percentile(99),
+            'buckets': self.buckets(),
+        }
+
+    def _bucket(self, rtt: float) -> int:
+        if rtt < self._min_rtt:
+            return 0
+        return min(len(self._counts) - 1, int(math.log2(rtt / self._min_rtt)) + 1)
@@ -11,20 +11,27 @@
 #  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
+import hashlib
+import itertools
 import logging
-from typing import Optional, Dict, List
+import time
+from typing import Optional, Dict, List, Tuple
 
 from .DecryptorCache import DecryptorCache
 from .ManifestGraph import ManifestGraph
+from .TraversalState import TraversalState
 from ..name_constructor.SchemaImpl import SchemaImpl
 from ..name_constructor.SchemaImplFactory import SchemaImplFactory
 from ..tlvs.AeadCtx import AeadCtx
+from ..tlvs.GroupData import GroupData
+from ..tlvs.Locators import Locators
 from ..tlvs.Manifest import Manifest
 from ..tlvs.NcDef import NcDef
 from ..tlvs.RsaOaepCtx import RsaOaepCtx
 from ...core.ContentObject import ContentObject
 from ...core.DisplayFormatter import DisplayFormatter
-from ...core.HashValue import HashValue
+from ...core.HashTlvType import HashTlvType
+from ...core.HashValue import HashValue, HashFunctionType
 from ...core.Name import Name
 from ...core.Packet import Packet, PacketReader
 from ...core.PacketValidator import PacketValidator
@@ -37,6 +44,43 @@ class Traversal:
     """
     logger = logging.getLogger(__name__)
 
+    _VERIFY_READ_SIZE = 1024 * 1024
+
+    class _SubtreeRecord:
+        """
+        The `(offset, length, SHA-256)` pieces of the application data under a manifest being visited.  Data
+        written under it extends the current piece.  A skipped child contributes its own pieces, so it is
+        not read back.
+        """
+        def __init__(self, offset: int):
+            self._pieces = []
+            self._start = offset
+            self._length = 0
+            self._digest = hashlib.sha256()
+
+        def update(self, buffer):
+            self._digest.update(buffer)
+            self._length += len(buffer)
+
+        def extend(self, pieces: List[Tuple[int, int, bytes]], end: int):
+            """
+            Append the pieces of skipped data, which ends at offset `end`.
+            """
+            self._close()
+            self._pieces.extend(pieces)
+            self._start = end
+
+        def finish(self) -> List[Tuple[int, int, bytes]]:
+            self._close()
+            return self._pieces
+
+        def _close(self):
+            if self._length > 0:
+                self._pieces.append((self._start, self._length, self._digest.digest()))
+            self._start += self._length
+            self._length = 0
+            self._digest = hashlib.sha256()
+
     class NameConstructorCache:
         _next_cache_id = 1
         def __init__(self, copy: Dict[int, SchemaImpl]=None):
@@ -54,20 +98,49 @@ class Traversal:
                 self.cache[nc_def.nc_id().id()] = SchemaImplFactory.from_ncdef(nc_def)
 
     def __init__(self, packet_input: PacketReader, data_writer, keystore: Optional[InsecureKeystore] = None,
-                 build_graph: bool = False):
+                 build_graph: bool = False, state: Optional[TraversalState] = None,
+                 validator: Optional[PacketValidator] = None, decryptor_cache: Optional[DecryptorCache] = None,
+                 verify_local: bool = False):
         """
         :param packet_input: A reader that we can fetch objects from via '.get'
         :param data_writer: A writer we can append application data to for output (needs to support `.write(bytes)`).
+                            If it also supports `.write_at(offset, bytes)` (e.g. `PositionalFileWriter`), each
+                            data object is written at its file offset, so the writer does not depend on call order.
         :param kestore: Used to verify packets and decrypt manifests (if none, no packet verification or decryption)
+        :param state: If not None, record progress in it and skip the subtrees it says are already written
+                      (see `TraversalState`).  Used to resume an interrupted download.
+        :param validator: If not None, a (shared) validator to use instead of creating one from `keystore`
+        :param decryptor_cache: If not None, a (shared) decryptor cache to use instead of creating one from `keystore`
+        :param verify_local: If True, the `data_writer` may already hold some of the data (e.g. a prior partial
+                             download).  Before fetching a manifest's children, check the local bytes against the
+                             manifest's SubtreeDigest or a hash group's SubtreeDigest (or LeafDigest) and skip
+                             the ones that match.  The `data_writer` must support `read_at(offset, length)`.
         """
+        if verify_local and not hasattr(data_writer, 'read_at'):
+            raise ValueError("verify_local requires a data_writer with read_at(), e.g. PositionalFileWriter")
         self._packet_input = packet_input
         self._data_writer = data_writer
         self._keystore = keystore
         self._count = 0
-        self._validator = PacketValidator(keystore=self._keystore)
-        self._decryptor_cache = DecryptorCache(self._keystore)
+        self._offset = 0
+        # set by traverse(), so only the root manifest sizes the output (not a subtree passed to preorder())
+        self._preallocate_root = False
+        self._validator = validator if validator is not None else PacketValidator(keystore=self._keystore)
+        self._decryptor_cache = decryptor_cache if decryptor_cache is not None else DecryptorCache(self._keystore)
         self._build_graph = build_graph
         self._manifest_graph = ManifestGraph()
+        self._state = state
+        self._verify_local = verify_local
+        # (offset, length, digest) checks that did not match, so a group with the same range as its node is not re-read
+        self._mismatches = set()
+        # With a state, the pieces of each manifest subtree being visited
+        self._subtree_records: List[Traversal._SubtreeRecord] = []
+        self.skipped_subtrees = 0
+        self.skipped_bytes = 0
+        self.verified_subtrees = 0
+        self.verified_bytes = 0
+        self.digest_mismatches = 0
+        self.digest_verify_seconds = 0.0
 
     def get_graph(self):
         """Will only be built if `build_graph` is true in construfctor"""
@@ -79,6 +152,10 @@ class Traversal:
     def count(self):
         return self._count
 
+    def offset(self):
+        """The application data offset of the next data object (i.e. the bytes delivered so far)"""
+        return self._offset
+
     def traverse(self, root_name: Name, hash_restriction: Optional[HashValue] = None):
         """
         Traverse the manifest rooted at `name`.
@@ -88,19 +165,29 @@ class Traversal:
         self.logger.debug('Traversal root packet: %s', root_packet)
 
         self._validator.validate_packet(packet=root_packet)
-        self.preorder(packet=root_packet, nc_cache=nc_cache)
-
-    def preorder(self, packet: Packet, nc_cache: Optional[NameConstructorCache] = None):
+        if self._state is not None:
+            self._state.set_root(root_packet.content_object_hash())
+            if self._skip_completed(root_packet.content_object_hash(), offset=0):
+                return
+        self._preallocate_root = True
+        self.preorder(packet=root_packet, nc_cache=nc_cache, offset=0)
+
+    def preorder(self, packet: Packet, nc_cache: Optional[NameConstructorCache] = None, offset: Optional[int] = None):
         """
         Pre-order traversal of a Manifest tree.  The packet may be a Data content object
         or a Manifest content object.  If it is Data, the payload is appended to the data_buffer array.
 
         :param packet: A ccnpy.Packet.
         :param nc_cache: The name constructor cache.  It may be modified as we traverse down branches.
+        :param offset: If not None, the application data offset of the first byte under `packet`.  This lets
+                        a caller traverse subtrees in any order with a positional data writer.
         :return:
         """
         self.logger.debug('Preorder %s => %s', packet.content_object_hash(), packet)
 
+        if offset is not None:
+            self._offset = offset
+
         if nc_cache is None:
             nc_cache = Traversal.NameConstructorCache()
 
@@ -119,12 +206,26 @@ class Traversal:
 
             self.logger.debug("Preorder: %s", manifest)
 
+            self._preallocate(manifest)
+            if self._skip_verified_node(packet, manifest):
+                return
             nc_cache = self._update_nc_cache(nc_cache=nc_cache, manifest=manifest)
+            start_offset = self._offset
+            record = None
+            if self._state is not None:
+                record = Traversal._SubtreeRecord(start_offset)
+                self._subtree_records.append(record)
             try:
                 self._visit_children(parent_packet=packet, manifest=manifest, nc_cache=nc_cache)
             except Exception as e:
                 print(f'Error {e} processing {manifest}')
                 raise
+            finally:
+                if record is not None:
+                    self._subtree_records.pop()
+            if record is not None:
+                self._state.mark_complete(packet.content_object_hash(), offset=start_offset,
+                                          length=self._offset - start_offset, pieces=record.finish())
 
         elif body.payload_type().is_data():
             self.logger.debug("Traversal: %s", body)
@@ -137,10 +238,250 @@ class Traversal:
         else:
             raise ValueError("Unsupported payload type: %r" % body)
 
+    def child_offsets(self, manifest: Manifest, children: List[Packet], offset: int = 0) -> List[int]:
+        """
+        The application data offset of each child of `manifest`, so the child subtrees can be traversed in any
+        order with `preorder(child, offset=...)` and a positional data writer.  A `Traversal` keeps the position
+        of its visit, so it is not thread-safe: to traverse subtrees concurrently, give each thread its own
+        `Traversal` (they may share the packet reader, the validator, and a `PositionalFileWriter`).
+
+        `children` are the packets of the manifest's pointers, in order.  We do not look below them: a data
+        child's size is its payload length and a manifest child's size is its NodeData SubtreeSize.  A group
+        starts at the end of the previous group (its GroupData SubtreeSize, if present), and the children's
+        sizes are checked against the GroupData SubtreeSize and LeafSize.
+
+        :param manifest: The (decrypted) parent manifest
+        :param children: The child packets, one per pointer
+        :param offset: The application data offset of the first byte under `manifest`
+        :raises ValueError: If a size needed for an offset is missing, or the sizes disagree with the
+                            manifest's SubtreeSize or LeafSize
+        """
+        if len(children) != len(list(manifest.hash_values())):
+            raise ValueError(f"The manifest has {len(list(manifest.hash_values()))} pointers, got {len(children)} children")
+
+        offsets = []
+        group_start = offset
+        index = 0
+        for hash_group in manifest.node().hash_groups():
+            count = len(hash_group.pointers())
+            sizes = [self._child_size(child) for child in children[index:index + count]]
+            index += count
+
+            group_size = None
+            leaf_size = None
+            if hash_group.group_data() is not None:
+                if hash_group.group_data().subtree_size() is not None:
+                    group_size = hash_group.group_data().subtree_size().size()
+                if hash_group.group_data().leaf_size() is not None:
+                    leaf_size = hash_group.group_data().leaf_size().size()
+
+            position = group_start
+            for size, _ in sizes:
+                offsets.append(position)
+                position = None if position is None or size is None else position + size
+
+            if position is not None:
+                if group_size is not None and position - group_start != group_size:
+                    raise ValueError(f"The group children have {position - group_start} bytes, but its SubtreeSize is {group_size}")
+                data_size = sum(size for size, is_data in sizes if is_data)
+                if leaf_size is not None and data_size != leaf_size:
+                    raise ValueError(f"The group data children have {data_size} bytes, but its LeafSize is {leaf_size}")
+            group_start = group_start + group_size if group_size is not None else position
+
+        if None in offsets:
+            raise ValueError("A child manifest has no SubtreeSize, so the offsets of the children after it are not known")
+        node = manifest.node()
+        if node.has_node_data() and node.node_data().subtree_size() is not None and group_start is not None:
+            if group_start - offset != node.node_data().subtree_size().size():
+                raise ValueError(f"The children have {group_start - offset} bytes, but the SubtreeSize is {node.node_data().subtree_size().size()}")
+        return offsets
+
+    def _child_size(self, packet: Packet) -> Tuple[Optional[int], bool]:
+        """
+        :return: (the application data size of the child, True if it is a data object)
+        """
+        body = packet.body()
+        if body.payload_type().is_data():
+            return len(body.payload().value()), True
+        node = self._manifest_from_content_object(body).node()
+        if node.has_node_data() and node.node_data().subtree_size() is not None:
+            return node.node_data().subtree_size().size(), False
+        return None, False
+
     def _write_data(self, payload):
+        value = payload.value()
         if self._data_writer is not None:
-            self.logger.debug('Traversal save %d bytes', len(payload.value()))
-            self._data_writer.write(payload.value())
+            self.logger.debug('Traversal save %d bytes at offset %d', len(value), self._offset)
+            if hasattr(self._data_writer, 'write_at'):
+                self._data_writer.write_at(self._offset, value)
+            else:
+                self._data_writer.write(value)
+            if self._state is not None:
+                self._state.add_range(self._offset, len(value))
+        for record in self._subtree_records:
+            record.update(value)
+        self._offset += len(value)
+
+    def _extend_subtree_records(self, pieces: List[Tuple[int, int, bytes]], end: int):
+        for record in self._subtree_records:
+            record.extend(pieces, end)
+
+    def _skip_completed(self, hash_value: HashValue, offset: int) -> bool:
+        """
+        If the state says the subtree at `hash_value` is already written at `offset`, advance past it.
+        A subtree loaded from a saved state is first checked against the output bytes.
+        """
+        length = self._state.completed_length(hash_value, offset)
+        if length is None:
+            return False
+        pieces = self._state.completed_pieces(hash_value)
+        if self._state.is_unchecked(hash_value):
+            if not self._pieces_match(pieces):
+                self.logger.warning('Output bytes [%d, %d) do not match the traversal state, will fetch them again',
+                                    offset, offset + length)
+                self._state.discard(hash_value)
+                self.digest_mismatches += 1
+                return False
+            self._state.mark_checked(hash_value)
+        self.logger.debug('Skipping completed subtree %s (%d bytes at offset %d)', hash_value, length, offset)
+        self._extend_subtree_records(pieces, offset + length)
+        self._offset = offset + length
+        self.skipped_subtrees += 1
+        self.skipped_bytes += length
+        return True
+
+    def _pieces_match(self, pieces: List[Tuple[int, int, bytes]]) -> bool:
+        if not hasattr(self._data_writer, 'read_at'):
+            return False
+        return all(self._local_digest(offset, length) == digest for offset, length, digest in pieces)
+
+    def _skip_verified_node(self, packet: Packet, manifest: Manifest) -> bool:
+        """
+        If the local data under the manifest matches its NodeData SubtreeDigest, advance past it.
+        """
+        if not self._verify_local or not manifest.node().has_node_data():
+            return False
+        node_data = manifest.node().node_data()
+        if node_data.subtree_size() is None or node_data.subtree_digest() is None:
+            return False
+        length = node_data.subtree_size().size()
+        if not self._skip_verified(self._offset, length, node_data.subtree_digest()):
+            return False
+        if self._state is not None:
+            # _local_matches only accepts a SHA-256 SubtreeDigest, which is what the state records
+            offset = self._offset - length
+            self._state.mark_complete(packet.content_object_hash(), offset=offset, length=length,
+                                      pieces=[(offset, length, node_data.subtree_digest().digest().value().tobytes())])
+        return True
+
+    def _verified_groups(self, manifest: Manifest) -> Dict[int, Tuple[int, int, bytes]]:
+        """
+        Check the local data of each hash group against its GroupData digest.  A group's offset is only known if
+        all the groups before it have a SubtreeSize, so we stop at the first one without.
+
+        :return: A map from the index of the first pointer of each matching group to (pointer count, length, SHA-256)
+        """
+        verified = {}
+        if not self._verify_local:
+            return verified
+        offset = self._offset
+        index = 0
+        for hash_group in manifest.node().hash_groups():
+            count = len(hash_group.pointers())
+            length, digest = self._group_digest(hash_group.group_data())
+            if length is None:
+                break
+            if digest is not None and count > 0 and self._local_matches(offset, length, digest):
+                verified[index] = (count, length, digest.digest().value().tobytes())
+            offset += length
+            index += count
+        return verified
+
+    @staticmethod
+    def _group_digest(group_data: Optional[GroupData]) -> Tuple[Optional[int], Optional[HashTlvType]]:
+        """
+        The length and digest of the application data under a hash group.  The LeafDigest only covers the
+        direct pointers, so we only use it if the group has nothing else (its LeafSize is its SubtreeSize).
+        """
+        if group_data is None or group_data.subtree_size() is None:
+            return None, None
+        length = group_data.subtree_size().size()
+        if group_data.subtree_digest() is not None:
+            return length, group_data.subtree_digest()
+        if (group_data.leaf_digest() is not None and group_data.leaf_size() is not None
+                and group_data.leaf_size().size() == length):
+            return length, group_data.leaf_digest()
+        return length, None
+
+    def _skip_verified(self, offset: int, length: int, digest: HashTlvType) -> bool:
+        """
+        If the local data at `[offset, offset + length)` matches `digest`, advance past it.
+        """
+        if length == 0 or not self._local_matches(offset, length, digest):
+            return False
+        self._mark_verified(offset, length, digest.digest().value().tobytes())
+        return True
+
+    def _mark_verified(self, offset: int, length: int, digest: bytes):
+        """
+        The local data at `[offset, offset + length)` matched its SHA-256 `digest`, so advance past it.
+        """
+        self.logger.debug('Skipping verified local data (%d bytes at offset %d)', length, offset)
+        self._extend_subtree_records([(offset, length, digest)], offset + length)
+        self._offset = offset + length
+        self.verified_subtrees += 1
+        self.verified_bytes += length
+        if hasattr(self._data_writer, 'mark_written'):
+            self._data_writer.mark_written(offset, length)
+        if self._state is not None:
+            self._state.add_range(offset, length)
+
+    def _local_matches(self, offset: int, length: int, digest: HashTlvType) -> bool:
+        """
+        True if the SHA-256 of the `data_writer` bytes at `[offset, offset + length)` equals `digest`.
+        """
+        expected = digest.digest()
+        if expected.hash_algorithm() != HashFunctionType.T_SHA_256:
+            return False
+        key = (offset, length, expected.value().tobytes())
+        if key in self._mismatches:
+            return False
+        matches = self._local_digest(offset, length) == expected.value().tobytes()
+        if not matches:
+            self.digest_mismatches += 1
+            self._mismatches.add(key)
+        return matches
+
+    def _local_digest(self, offset: int, length: int) -> Optional[bytes]:
+        """
+        The SHA-256 of the `data_writer` bytes at `[offset, offset + length)`, or None if they are not all there.
+        """
+        start = time.perf_counter()
+        h = hashlib.sha256()
+        position = offset
+        end = offset + length
+        while position < end:
+            buffer = self._data_writer.read_at(position, min(end - position, self._VERIFY_READ_SIZE))
+            if len(buffer) == 0:
+                break
+            h.update(buffer)
+            position += len(buffer)
+        self.digest_verify_seconds += time.perf_counter() - start
+        return h.digest() if position == end else None
+
+    def _preallocate(self, manifest: Manifest):
+        """
+        If this is the root manifest of `traverse()` and it knows the total application data size,
+        let a positional writer size the output up front.
+        """
+        if not self._preallocate_root:
+            return
+        self._preallocate_root = False
+        if not hasattr(self._data_writer, 'preallocate'):
+            return
+        node = manifest.node()
+        if node.has_node_data() and node.node_data().subtree_size() is not None:
+            self._data_writer.preallocate(node.node_data().subtree_size().size())
 
     def _visit_children(self, parent_packet: Packet, manifest: Manifest, nc_cache: NameConstructorCache):
         """
@@ -153,16 +494,39 @@ class Traversal:
         :return:
         """
         children = []
-        for hash_iterator_value in manifest.hash_values():
+        requests = [(self._interest_name(nc_cache=nc_cache,
+                                         nc_id=hash_iterator_value.nc_id,
+                                         segment_id=hash_iterator_value.segment_id),
+                     hash_iterator_value.hash_value,
+                     self._locators(nc_cache=nc_cache, nc_id=hash_iterator_value.nc_id))
+                    for hash_iterator_value in manifest.hash_values()]
+
+        # The hash groups whose local data is already verified, and the pointers in them
+        verified = self._verified_groups(manifest)
+        skipped = set(i for start, (count, _, _) in verified.items() for i in range(start, start + count))
+
+        # Let the reader fetch ahead of the (sequential) pre-order visit, one batch per locator set.
+        # Only the first child starts at the current offset, so filter the completed ones by hash.
+        for locators, group in itertools.groupby((r for i, r in enumerate(requests) if i not in skipped), key=lambda r: r[2]):
+            hints = [(r[0], r[1]) for r in group if self._state is None or not self._state.is_complete(r[1])]
+            self._packet_input.prefetch(hints, locators)
+
+        for index, (interest_name, hash_value, locators) in enumerate(requests):
             if self.logger.isEnabledFor(logging.DEBUG):
-                children.append(DisplayFormatter.hexlify(hash_iterator_value.hash_value.value()))
+                children.append(DisplayFormatter.hexlify(hash_value.value()))
+
+            if index in verified:
+                _, length, digest = verified[index]
+                self._mark_verified(self._offset, length, digest)
+            if index in skipped:
+                continue
 
-            packet = self._fetch_packet(nc_cache=nc_cache,
-                                        nc_id=hash_iterator_value.nc_id,
-                                        hash_value=hash_iterator_value.hash_value,
-                                        segment_id=hash_iterator_value.segment_id)
+            if self._state is not None and self._skip_completed(hash_value, self._offset):
+                continue
+
+            packet = self._fetch_packet(interest_name=interest_name, hash_value=hash_value, locators=locators)
             if packet is None:
-                raise ValueError("Failed to get packet for: %r" % hash_iterator_value)
+                raise ValueError("Failed to get packet for: %r" % hash_value)
 
             self.logger.debug('visit_children: child %s', packet)
 
@@ -208,8 +572,16 @@ class Traversal:
                 return new_cache
         return nc_cache
 
-    def _fetch_packet(self, nc_cache: NameConstructorCache, nc_id: int, hash_value: HashValue, segment_id: Optional[int]):
+    @staticmethod
+    def _interest_name(nc_cache: NameConstructorCache, nc_id: int, segment_id: Optional[int]) -> Optional[Name]:
         schema_impl = nc_cache.cache[nc_id]
-        interest_name = schema_impl.get_name(segment_id)
+        return schema_impl.get_name(segment_id)
+
+    @staticmethod
+    def _locators(nc_cache: NameConstructorCache, nc_id: int) -> Optional[Locators]:
+        return nc_cache.cache[nc_id].locators()
+
+    def _fetch_packet(self, interest_name: Optional[Name], hash_value: HashValue, locators: Optional[Locators] = None):
         self.logger.debug('fetch_packet: %s, %s', interest_name, hash_value)
-        return self._packet_input.get(name=interest_name, hash_restriction=hash_value)
+        # positional, as readers differ in what they call the locators argument
+        return self._packet_input.get(interest_name, hash_value, locators)
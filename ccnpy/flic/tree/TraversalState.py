@@ -0,0 +1,215 @@
+#  Copyright 2024 Marc Mosko
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+import json
+import logging
+import os
+import time
+from typing import Optional, Dict, Tuple, List, Set
+
+from .ByteRanges import ByteRanges
+from ...core.HashValue import HashValue
+
+
+class TraversalState:
+    """
+    Persistent progress of a `Traversal` that writes to an output file, so an interrupted download can be resumed.
+
+    It records:
+        * the manifest subtrees that were completely written, by manifest hash, with the offset and length of
+          their application data, and the pieces `(offset, length, SHA-256)` that make up those bytes.  A
+          subtree's pieces are built from the digests of the data written under it and the pieces of the
+          children it skipped, so a skipped subtree is never read back to record its parent.
+        * the byte ranges of the output file that were written.
+
+    On resume, `Traversal` skips (without fetching) any child manifest whose subtree is complete at the current
+    offset.  Only the incomplete parts of the tree are fetched.  A loaded subtree is checked against the output
+    file the first time it would be skipped (each piece is read once), so bytes that changed (or were never
+    written to a preallocated file) are fetched again.
+
+    The state is saved as JSON.  It is saved at most every `save_interval` seconds as subtrees complete, and
+    when `save()` is called.
+    """
+    logger = logging.getLogger(__name__)
+    _VERSION = 3
+
+    def __init__(self, path: Optional[str] = None, save_interval: float = 1.0):
+        """
+        :param path: Where to persist the state (None for an in-memory state)
+        :param save_interval: Minimum seconds between automatic saves
+        """
+        self._path = path
+        self._save_interval = save_interval
+        self._last_save = time.monotonic()
+        self.root_hash: Optional[str] = None
+        # manifest hash -> (offset, length, [(piece offset, piece length, SHA-256 hex digest)])
+        self.completed: Dict[str, Tuple[int, int, List[Tuple[int, int, str]]]] = {}
+        self.ranges = ByteRanges()
+        # loaded subtrees not yet checked against the output file
+        self._unchecked: Set[str] = set()
+
+    def __repr__(self):
+        return f"TraversalState(root={self.root_hash}, completed={len(self.completed)}, bytes={self.ranges.total()})"
+
+    @staticmethod
+    def _key(hash_value: HashValue) -> str:
+        return hash_value.value().tobytes().hex()
+
+    @classmethod
+    def load(cls, path: str, output_filename: Optional[str] = None, save_interval: float = 1.0, verify: bool = True):
+        """
+        Load the state from `path`.  If the file does not exist, is unreadable, or does not agree with the
+        output file, return an empty state (i.e. start over).
+
+        Every recorded range must lie inside the output file.  The output bytes are not read here: if `verify`
+        is True, each completed subtree is checked against its pieces' digests when `Traversal` would skip it
+        (see `is_unchecked()`).  Without an `output_filename`, nothing can be checked, so no subtree is
+        considered complete.
+
+        :param path: The state file
+        :param output_filename: The partial output the state describes
+        :param verify: If False, trust the completed subtrees without checking the output bytes
+        """
+        state = cls(path=path, save_interval=save_interval)
+        try:
+            with open(path, 'r') as f:
+                saved = json.load(f)
+            if saved.get('version') != cls._VERSION:
+                raise ValueError(f"Unsupported state version {saved.get('version')}")
+            ranges = ByteRanges([(start, end) for start, end in saved['ranges']])
+            completed = {k: cls._parse_entry(entry) for k, entry in saved['completed'].items()}
+            if output_filename is not None:
+                size = os.stat(output_filename).st_size
+                if len(ranges) > 0 and ranges.to_list()[-1][1] > size:
+                    raise ValueError(f"Output {output_filename} is {size} bytes, shorter than the recorded progress")
+            else:
+                cls.logger.warning('No output file to check traversal state %s against, not skipping any subtree', path)
+                completed = {}
+            state.root_hash = saved['root']
+            state.completed = completed
+            state.ranges = ranges
+            if verify:
+                state._unchecked = set(completed)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            cls.logger.warning('Ignoring traversal state %s: %s', path, e)
+        return state
+
+    @staticmethod
+    def _parse_entry(entry) -> Tuple[int, int, List[Tuple[int, int, str]]]:
+        offset, length, pieces = entry
+        offset, length = int(offset), int(length)
+        pieces = [(int(piece_offset), int(piece_length), str(digest)) for piece_offset, piece_length, digest in pieces]
+        position = offset
+        for piece_offset, piece_length, _ in pieces:
+            if piece_offset != position or piece_length <= 0:
+                raise ValueError(f"Pieces of subtree [{offset}, {offset + length}) are not contiguous")
+            position += piece_length
+        if position != offset + length:
+            raise ValueError(f"Pieces of subtree [{offset}, {offset + length}) do not cover it")
+        return offset, length, pieces
+
+    def save(self):
+        if self._path is None:
+            return
+        saved = {
+            'version': self._VERSION,
+            'root': self.root_hash,
+            'completed': self.completed,
+            'ranges': self.ranges.to_list()
+        }
+        # write-then-rename so an interruption never leaves a truncated state file
+        tmp_path = f'{self._path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(saved, f)
+        os.replace(tmp_path, self._path)
+        self._last_save = time.monotonic()
+
+    def remove(self):
+        """Delete the saved state (e.g. after the download finished)"""
+        if self._path is not None and os.path.exists(self._path):
+            os.remove(self._path)
+
+    def set_root(self, root_hash: HashValue):
+        """
+        Bind the state to a root manifest.  If the state was for a different root, it is discarded.
+        """
+        key = self._key(root_hash)
+        if self.root_hash is not None and self.root_hash != key:
+            self.logger.warning('Traversal state is for root %s, not %s, starting over', self.root_hash, key)
+            self.completed = {}
+            self._unchecked = set()
+            self.ranges = ByteRanges()
+        self.root_hash = key
+
+    def add_range(self, offset: int, length: int):
+        self.ranges.add(offset, offset + length)
+
+    def mark_complete(self, hash_value: HashValue, offset: int, length: int, pieces: List[Tuple[int, int, bytes]]):
+        """
+        The subtree rooted at `hash_value` has all `length` bytes of its application data written at `offset`.
+
+        :param pieces: Contiguous `(offset, length, SHA-256)` pieces covering those `length` bytes
+        """
+        key = self._key(hash_value)
+        self.completed[key] = (offset, length, [(piece_offset, piece_length, digest.hex())
+                                                for piece_offset, piece_length, digest in pieces])
+        self._unchecked.discard(key)
+        if time.monotonic() - self._last_save >= self._save_interval:
+            self.save()
+
+    def completed_length(self, hash_value: HashValue, offset: int) -> Optional[int]:
+        """
+        If the subtree rooted at `hash_value` is complete and its data is present at `offset`, return the
+        subtree length.  Otherwise, return None.
+        """
+        entry = self.completed.get(self._key(hash_value))
+        if entry is None:
+            return None
+        completed_offset, length, _ = entry
+        if completed_offset != offset or not self.ranges.contains(offset, offset + length):
+            return None
+        return length
+
+    def is_complete(self, hash_value: HashValue) -> bool:
+        """
+        True if the subtree rooted at `hash_value` is recorded as complete (at any offset).
+        """
+        return self._key(hash_value) in self.completed
+
+    def completed_pieces(self, hash_value: HashValue) -> List[Tuple[int, int, bytes]]:
+        """
+        The `(offset, length, SHA-256)` pieces of a completed subtree (empty if it is not complete).
+        """
+        entry = self.completed.get(self._key(hash_value))
+        if entry is None:
+            return []
+        return [(offset, length, bytes.fromhex(digest)) for offset, length, digest in entry[2]]
+
+    def is_unchecked(self, hash_value: HashValue) -> bool:
+        """
+        True if the subtree was loaded and its output bytes were not yet checked against its pieces.
+        """
+        return self._key(hash_value) in self._unchecked
+
+    def mark_checked(self, hash_value: HashValue):
+        self._unchecked.discard(self._key(hash_value))
+
+    def discard(self, hash_value: HashValue):
+        """
+        Forget a completed subtree (e.g. its output bytes do not match), so it is fetched again.
+        """
+        key = self._key(hash_value)
+        self.completed.pop(key, None)
+        self._unchecked.discard(key)
@@ -24,9 +24,12 @@ class TreeBuilderReturnValue:
     """
     A possibly encrypted manifest, and its plain-text node
 
-    This is used as an intermediate return value in TreeBuilder and ManifestFactory
+    This is used as an intermediate return value in TreeBuilder and ManifestFactory.  TreeBuilder also records
+    the chunks `[head, tail)` under the manifest.
     """
     node: Node
     manifest: Optional[Manifest] = None
     packet: Optional[Packet] = None
+    head: Optional[int] = None
+    tail: Optional[int] = None
 
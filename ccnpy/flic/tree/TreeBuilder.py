@@ -16,6 +16,7 @@ from typing import Optional, List
 
 from ccnpy.flic.tlvs.Node import Node
 from ccnpy.flic.tlvs.NodeData import NodeData
+from .DataDigester import DataDigester
 from .HashGroupBuilderPair import HashGroupBuilderPair
 from .ManifestGraph import ManifestGraph
 from .ManifestIdFactory import ManifestIdFactory
@@ -28,7 +29,9 @@ from ..name_constructor.FileMetadata import FileMetadata, ChunkMetadata
 from ..name_constructor.NameConstructorContext import NameConstructorContext
 from ..tlvs.HashGroup import HashGroup
 from ..tlvs.StartSegmentId import StartSegmentId
+from ..tlvs.SubtreeDigest import SubtreeDigest
 from ..tlvs.SubtreeSize import SubtreeSize
+from ...core.HashValue import HashValue
 from ...core.Name import Name
 from ...core.Packet import Packet, PacketWriter
 
@@ -192,7 +195,8 @@ class TreeBuilder:
 
     def __init__(self, file_metadata: FileMetadata, tree_parameters: TreeParameters,
                 manifest_factory: ManifestFactory, packet_output: PacketWriter, tree_options: ManifestTreeOptions,
-                name_ctx: NameConstructorContext, manifest_graph: Optional[ManifestGraph] = None):
+                name_ctx: NameConstructorContext, manifest_graph: Optional[ManifestGraph] = None,
+                data_digester: Optional[DataDigester] = None):
         """
 
         :param file_metadata: Info about the file chunks
@@ -202,8 +206,12 @@ class TreeBuilder:
         :param tree_options: The user arguments to the program
         :param name_ctx: The name constructors for manifests and data
         :param manifest_graph: If not null, will fill in with data as we build the tree
-
+        :param data_digester: Computes the SubtreeDigest and LeafDigest values.  Required if
+                              `tree_options.has_digests()`.
         """
+        if tree_options.has_digests() and data_digester is None:
+            raise ValueError("The tree options require digests, but there is no data_digester")
+
         self._file_metadata = file_metadata
         self._params = tree_parameters
         self._factory = manifest_factory
@@ -211,6 +219,7 @@ class TreeBuilder:
         self._packet_output = packet_output
         self._name_ctx = name_ctx
         self._manifest_graph = manifest_graph
+        self._data_digester = data_digester
 
         # a counter of the number of manifests created
         self._manifest_count = 0
@@ -317,22 +326,39 @@ class TreeBuilder:
         else:
             return None
 
-    def _build_packet(self, hgs: List[HashGroup], direct_size: int, indirect_size: int, level: int) -> TreeBuilderReturnValue:
+    def _create_node(self, hgs: List[HashGroup], direct_size: int, indirect_size: int,
+                     subtree_digest: Optional[HashValue] = None) -> Node:
+        subtree_size = None
         if self._tree_options.add_node_subtree_size:
-            node_data = NodeData(subtree_size=direct_size + indirect_size)
+            subtree_size = direct_size + indirect_size
+
+        if subtree_size is not None or subtree_digest is not None:
+            node_data = NodeData(subtree_size=subtree_size,
+                                 subtree_digest=SubtreeDigest(subtree_digest) if subtree_digest is not None else None)
         else:
             node_data = None
+        return Node(node_data=node_data, hash_groups=hgs)
 
-        node = Node(node_data=node_data, hash_groups=hgs)
+    def _build_packet(self, hgs: List[HashGroup], direct_size: int, indirect_size: int, level: int,
+                      subtree_digest: Optional[HashValue] = None) -> TreeBuilderReturnValue:
+        node = self._create_node(hgs=hgs, direct_size=direct_size, indirect_size=indirect_size, subtree_digest=subtree_digest)
         packet = self._factory.build_packet(source=node,
                                             name=self._get_next_manifest_name(level),
                                             expiry_time=self._tree_options.manifest_expiry_time)
         return_value = TreeBuilderReturnValue(packet=packet, node=node)
         return return_value
 
-    def _build_leaf_packet(self, head: int, tail: int, level: int):
+    def _digest(self, enabled: bool, head: int, tail: int) -> Optional[HashValue]:
+        """
+        If `enabled`, the digest of the application data in chunks `[head, tail)`.  None if not enabled or empty.
+        """
+        if not enabled or self._data_digester is None:
+            return None
+        return self._data_digester.digest(head, tail)
+
+    def _leaf_node(self, head: int, tail: int) -> Node:
         """
-        A leaf packet is a direct-pointer only manifest.  That is, it has no sub-manifests.
+        A leaf node is a direct-pointer only manifest.  That is, it has no sub-manifests.
         """
         assert tail > head
         count = tail - head
@@ -342,19 +368,34 @@ class TreeBuilder:
             self._add_data_to_graph(chunk_metadata)
             builder.append_direct(hash_value=chunk_metadata.content_object_hash, leaf_size=chunk_metadata.payload_bytes)
 
+        # All the pointers are direct, so the leaf digest, group subtree digest and node subtree digest are the same
         hg = builder.hash_group(include_leaf_size=self._tree_options.add_group_leaf_size,
                                 include_subtree_size=self._tree_options.add_group_subtree_size,
                                 start_segment_id=self._get_start_segment_id(head),
                                 # These are all direct pointers, so they are in the data hash group
-                                nc_id=self._name_ctx.data_schema_impl.nc_id())
+                                nc_id=self._name_ctx.data_schema_impl.nc_id(),
+                                leaf_digest=self._digest(self._tree_options.add_group_leaf_digest, head, tail),
+                                subtree_digest=self._digest(self._tree_options.add_group_subtree_digest, head, tail))
 
         self._leaf_count += 1
-        return self._build_packet(hgs=[hg], direct_size=builder.direct_size(), indirect_size=builder.indirect_size(), level=level)
+        return self._create_node(hgs=[hg], direct_size=builder.direct_size(), indirect_size=builder.indirect_size(),
+                                 subtree_digest=self._digest(self._tree_options.add_node_subtree_digest, head, tail))
+
+    def _build_leaf_packet(self, head: int, tail: int, level: int):
+        node = self._leaf_node(head=head, tail=tail)
+        packet = self._factory.build_packet(source=node,
+                                            name=self._get_next_manifest_name(level),
+                                            expiry_time=self._tree_options.manifest_expiry_time)
+        return TreeBuilderReturnValue(packet=packet, node=node, head=head, tail=tail)
 
     def _interior_packet(self,
                          builders: HashGroupBuilderPair,
                          direct_start_segment_id: Optional[StartSegmentId],
-                         level: int) -> TreeBuilderReturnValue:
+                         level: int, head: int, tail: int) -> TreeBuilderReturnValue:
+        """
+        :param head: The first chunk under the manifest (its direct pointers come first)
+        :param tail: One past the last chunk under the manifest
+        """
 
         if not self._name_ctx.manifest_schema_impl.uses_name_id():
             indirect_start_segment_id = None
@@ -364,18 +405,34 @@ class TreeBuilder:
         if not self._name_ctx.data_schema_impl.uses_name_id():
             direct_start_segment_id = None
 
+        # the direct pointers are chunks [head, split) and the children cover [split, tail)
+        split = head + builders.direct_count()
+        one_group_digest = self._tree_options.add_group_subtree_digest and self._name_ctx.hash_group_count() == 1
+        two_group_digest = self._tree_options.add_group_subtree_digest and self._name_ctx.hash_group_count() == 2
         hgs = builders.hash_groups(include_leaf_size=self._tree_options.add_group_leaf_size,
                                    include_subtree_size=self._tree_options.add_group_subtree_size,
                                    direct_start_segment_id=direct_start_segment_id,
-                                   indirect_start_segment_id=indirect_start_segment_id)
+                                   indirect_start_segment_id=indirect_start_segment_id,
+                                   leaf_digest=self._digest(self._tree_options.add_group_leaf_digest, head, split),
+                                   subtree_digest=self._digest(one_group_digest, head, tail),
+                                   direct_subtree_digest=self._digest(two_group_digest, head, split),
+                                   indirect_subtree_digest=self._digest(two_group_digest, split, tail))
+
+        return_value = self._build_packet(hgs=hgs, direct_size=builders.direct_size(), indirect_size=builders.indirect_size(),
+                                          level=level,
+                                          subtree_digest=self._digest(self._tree_options.add_node_subtree_digest, head, tail))
+        return_value.head = head
+        return_value.tail = tail
+        return return_value
 
-        return self._build_packet(hgs=hgs, direct_size=builders.direct_size(), indirect_size=builders.indirect_size(), level=level)
+    def _leaf_start(self, segment: Segment) -> int:
+        count = self._params.num_pointers_per_node()
+        # At most count items, but never go before the head
+        return max(segment.head(), segment.tail() - count)
 
     def _leaf_manifest(self, segment: Segment, level: int):
         """Builds a manifest that is all direct pointers.  These are manifest tree leaf nodes."""
-        count = self._params.num_pointers_per_node()
-        # At most count items, but never go before the head
-        start = max(segment.head(), segment.tail() - count)
+        start = self._leaf_start(segment)
         return_value = self._build_leaf_packet(head=start, tail=segment.tail(), level=level)
 
         segment.decrement_tail(segment.tail() - start)
@@ -386,19 +443,50 @@ class TreeBuilder:
         self._write_packet(return_value.packet)
         return return_value
 
+    def _leaf_manifests(self, segment: Segment, level: int, max_count: int) -> List[TreeBuilderReturnValue]:
+        """
+        Builds up to `max_count` sibling leaf manifests, right to left, as one batch.  Leaf manifests only
+        point to data, so they do not depend on each other and the manifest factory may encrypt them in parallel.
+        The manifests are named and written in the same order as calling `_leaf_manifest()` repeatedly.
+        """
+        nodes = []
+        names = []
+        ranges = []
+        while len(nodes) < max_count and not segment.empty():
+            start = self._leaf_start(segment)
+            nodes.append(self._leaf_node(head=start, tail=segment.tail()))
+            names.append(self._get_next_manifest_name(level))
+            ranges.append((start, segment.tail()))
+            segment.decrement_tail(segment.tail() - start)
+
+        return_values = self._factory.build_packets(nodes=nodes, names=names,
+                                                    expiry_time=self._tree_options.manifest_expiry_time)
+        for return_value, (head, tail) in zip(return_values, ranges):
+            return_value.head = head
+            return_value.tail = tail
+            if self._tree_options.debug:
+                print(f"leaf_manifest (level={level}): {return_value}")
+            self._add_manifest_to_graph(return_value)
+            self._write_packet(return_value.packet)
+        return return_values
+
     def _interior_manifest(self, segment, level: int, right_most_child: TreeBuilderReturnValue = None) -> TreeBuilderReturnValue:
         """Builds a manifest with direct and indirect pointers.  These are manifest tree interior nodes."""
         builders = HashGroupBuilderPair(name_ctx=self._name_ctx,
                                         max_direct=self._params.internal_direct_per_node(),
                                         max_indirect=self._params.internal_indirect_per_node())
 
+        # The right-most child (if any) was built first, so it holds the end of our chunks
+        tail = right_most_child.tail if right_most_child is not None else segment.tail()
         self._interior_add_right_most_child(builders, right_most_child)
         self._interior_add_indirect(builders, segment, level)
         direct_start_segment_id = self._interior_add_direct(builders, segment)
 
         return_value = self._interior_packet(builders=builders,
                                              direct_start_segment_id=direct_start_segment_id,
-                                             level=level)
+                                             level=level,
+                                             head=segment.tail(),
+                                             tail=tail)
 
         if self._tree_options.debug:
             print(f"node_manifest (level={level}): {return_value}")
@@ -419,10 +507,17 @@ class TreeBuilder:
         reserve_count = min(self._params.internal_direct_per_node(), segment.length())
         segment.increment_head(reserve_count)
 
-        while not builders.is_indirect_full() and not segment.empty():
-            child = self._bottom_up_preorder(segment, level - 1)
-            builders.prepend_indirect(hash_value=child.packet.content_object_hash(),
-                                      subtree_size=self._get_optional_subtree_size(child.node.node_data()))
+        if level == 1 and self._factory.is_parallel():
+            # All the children are leaf manifests, so build them as one batch
+            max_count = self._params.internal_indirect_per_node() - builders.indirect_count()
+            for child in self._leaf_manifests(segment, level - 1, max_count):
+                builders.prepend_indirect(hash_value=child.packet.content_object_hash(),
+                                          subtree_size=self._get_optional_subtree_size(child.node.node_data()))
+        else:
+            while not builders.is_indirect_full() and not segment.empty():
+                child = self._bottom_up_preorder(segment, level - 1)
+                builders.prepend_indirect(hash_value=child.packet.content_object_hash(),
+                                          subtree_size=self._get_optional_subtree_size(child.node.node_data()))
 
         # Pull back our reservation and put those pointers in our direct children
         segment.decrement_head(reserve_count)
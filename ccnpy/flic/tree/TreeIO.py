@@ -12,21 +12,37 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 
+import errno
+import itertools
+import logging
 import os
+import queue
 import socket
+import struct
+import threading
+import time
 from abc import ABC
 from array import array
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, Future
 from pathlib import PurePath, Path
-from typing import Optional, Dict
+from typing import Optional, Dict, Iterable, Tuple, List
 from urllib.parse import urlparse
 
+from .FixedWindow import FixedWindow
+from .LinkIndex import LinkIndex
 from .SizedPointer import SizedPointer
+from .WindowController import WindowController
 from ..tlvs.Locators import Locators
 from ...core.ContentObject import ContentObject
 from ...core.HashValue import HashValue
+from ...core.InterestTemplate import InterestTemplate
 from ...core.Link import Link
 from ...core.Name import Name
 from ...core.Packet import Packet, PacketWriter, PacketReader
+from ...core.PacketFrame import PacketFrame
+from ...core.PacketStreamDecoder import PacketStreamDecoder
+from ...core.PacketValidator import PacketValidator
 from ...crypto.Crc32c import Crc32cSigner
 from ...crypto.Signer import Signer
 
@@ -151,21 +167,46 @@ class TreeIO:
         """
         A file-system based write.  Packets are saved to the directory using their
         hash-based named (in UTF-8 hex).
+
+        With `link_named_objects`, a named packet is also reachable by its name.  By default, each name gets
+        its own signed `Link` object, which costs one signature per data object and manifest.  With `link_workers`,
+        those signatures are done in a thread pool.
+
+        With `link_index_size`, the names are instead collected into a signed `LinkIndex` of up to that
+        many entries.  Each name gets an unsigned link to the index hash, so one signature covers
+        `link_index_size` objects.  The last index is written by `close()`.
         """
-        def __init__(self, directory: str, link_named_objects: bool = False, signer: Optional[Signer] = None, nested: bool = False):
+        logger = logging.getLogger(__name__)
+
+        def __init__(self, directory: str, link_named_objects: bool = False, signer: Optional[Signer] = None, nested: bool = False,
+                     link_index_size: int = 0, link_workers: int = 0):
             """
 
             :param directory: The directory to use for I/O.  Must exist.
             :param link_named_objects: If true, and the content object has a name, create a link from the name to the hash.
             :param signer: Used to sign link objects.  If not provided, use CRC32c.
+            :param link_index_size: If positive, sign a `LinkIndex` of up to this many names instead of one link per name.
+                                    An index is also written early if the next name would not fit in one packet.
+                                    At most `LinkIndex.MAX_ENTRIES`.
+            :param link_workers: If positive, sign the per-name links in a pool of this many threads.
             """
             if not os.path.isdir(directory):
                 raise RuntimeError("directory does not exist: %r" % directory)
+            if link_index_size < 0 or link_workers < 0:
+                raise ValueError(f"link_index_size and link_workers must be non-negative, got {link_index_size} and {link_workers}")
+            if link_index_size > LinkIndex.MAX_ENTRIES:
+                raise ValueError(f"link_index_size must be at most {LinkIndex.MAX_ENTRIES}, got {link_index_size}")
 
             self._directory = directory
             self._link_named_objects = link_named_objects
-            self._signer = signer
+            self._signer = signer if signer is not None else Crc32cSigner()
             self._nested = nested
+            self._link_index_size = link_index_size
+            self._link_index = LinkIndex()
+            self._link_workers = link_workers
+            self._executor = None
+            self._pending: List[Future] = []
+            self._lock = threading.Lock()
 
             self.by_hash = {}
             self.packets = []
@@ -175,6 +216,8 @@ class TreeIO:
             self.cnt_data = 0
             self.bytes_manifest = 0
             self.bytes_data = 0
+            self.cnt_links = 0
+            self.cnt_link_signatures = 0
 
         def put(self, packet: Packet):
             self.total_bytes_by_packet += len(packet)
@@ -195,44 +238,94 @@ class TreeIO:
             link_object = ContentObject.create_link(name=packet.body().name(), link=link)
             return self._create_signed_packet(link_object)
 
+        def _save_link(self, packet: Packet):
+            link_packet = self._create_link(packet=packet)
+            link_packet.save(self.to_path(packet.body().name()))
+
         def _write_link(self, packet: Packet):
             if not self._link_named_objects or not packet.body().is_content_object():
                 return
             if packet.body().name() is None:
                 return
-            link_packet = self._create_link(packet=packet)
-            link_packet.save(self.to_path(packet.body().name()))
+            with self._lock:
+                self.cnt_links += 1
 
-        def _create_signed_packet(self, link_object: ContentObject) -> Packet:
-            if self._signer is None:
-                signer = Crc32cSigner()
+            if self._link_index_size > 0:
+                name, digest = packet.body().name(), packet.content_object_hash()
+                if not self._link_index.fits(name=name, digest=digest):
+                    # the index packet would be too long
+                    self.flush()
+                self._link_index.append(name=name, digest=digest)
+                if len(self._link_index) >= self._link_index_size:
+                    self.flush()
+            elif self._link_workers > 0:
+                self._submit_link(packet)
             else:
-                signer = self._signer
+                self._save_link(packet)
+
+        def _submit_link(self, packet: Packet):
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self._link_workers, thread_name_prefix='link-signer')
+            # Bound the queue, so a slow signer does not hold every packet in memory
+            if len(self._pending) >= 4 * self._link_workers:
+                self._pending.pop(0).result()
+            self._pending.append(self._executor.submit(self._save_link, packet))
+
+        def flush(self):
+            """
+            Write out the current `LinkIndex` (if any) and the per-name links to it.
+            """
+            if len(self._link_index) == 0:
+                return
+            index_packet = self._create_signed_packet(self._link_index.content_object())
+            index_packet.save(self.to_path(input=index_packet, nested=self._nested))
+            pointer = Link(digest=index_packet.content_object_hash())
+            for link in self._link_index:
+                link_packet = Packet.create_content_object(ContentObject.create_link(name=link.name(), link=pointer))
+                link_packet.save(self.to_path(link.name()))
+            self.logger.debug('Wrote link index %s with %d names', index_packet.content_object_hash(), len(self._link_index))
+            self._link_index.clear()
 
-            alg = signer.validation_alg()
-            signature = signer.sign(link_object.serialize(), alg.serialize())
+        def _create_signed_packet(self, link_object: ContentObject) -> Packet:
+            alg = self._signer.validation_alg()
+            signature = self._signer.sign(link_object.serialize(), alg.serialize())
+            with self._lock:
+                self.cnt_link_signatures += 1
             return Packet.create_signed_content_object(body=link_object, validation_alg=alg, validation_payload=signature)
 
         def close(self):
-            pass
+            self.flush()
+            pending, self._pending = self._pending, []
+            for future in pending:
+                # raises any exception from signing or saving a link
+                future.result()
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
 
     class PacketDirectoryReader(PacketReader, DirectoryBase):
         """
         A file-system based packet reader.  Reads packets based on their hash name from a directory
+
+        A request by name only is resolved through the links written by `PacketDirectoryWriter`.  If a
+        `validator` is given, it checks the signed links, or the signature of a `LinkIndex` once per index.
         """
 
         def __iter__(self):
             # TODO: Open the directory and iterate all the files in it
             raise NotImplementedError()
 
-        def __init__(self, directory):
+        def __init__(self, directory, validator: Optional[PacketValidator] = None):
             """
 
             :param directory: The directory to use for I/O.  Must exist.
+            :param validator: If not None, used to validate link objects and link indices
             """
             if not os.path.isdir(directory):
                 raise RuntimeError("directory does not exist: %r" % directory)
             self._directory = directory
+            self._validator = validator
+            self._link_indices: Dict[HashValue, LinkIndex] = {}
 
         def get(self, name: Name, hash_restriction: HashValue, forwarding_hints: Optional[Locators] = None) -> Packet:
             if name is not None and hash_restriction is None:
@@ -263,32 +356,830 @@ class TreeIO:
         def _get_by_link(self, name: Name):
             link_path = self.to_path(name)
             p = Packet.load(link_path)
-            # TODO: we should validate p, but that needs a keystore
-            if p.body().is_link():
-                link = Link.deserialize(p.body().payload().value())
-                hash_path = self.to_path(link.digest())
-                packet = Packet.load(hash_path)
-                print(f"Dereferenced link {filename} to load packet {packet.content_object_hash()}")
-                return packet
-            raise FileNotFoundError(f'Could not find link {filename}')
+            if not p.body().is_link():
+                raise FileNotFoundError(f'Could not find link {link_path}')
+
+            link = Link.deserialize(p.body().payload().value())
+            target = self._load_by_hash(link.digest())
+            if target.body().is_link():
+                # An unsigned pointer to a signed LinkIndex, which has the hash of the named object
+                digest = self._link_index(target).get(name)
+                if digest is None:
+                    raise ValueError(f'Link index {link.digest()} does not contain {name}')
+                packet = self._load_by_hash(digest)
+            else:
+                if self._validator is not None:
+                    self._validator.validate_packet(p)
+                packet = target
+            print(f"Dereferenced link {link_path} to load packet {packet.content_object_hash()}")
+            return packet
+
+        def _load_by_hash(self, digest: HashValue) -> Packet:
+            packet = Packet.load(self.to_path(digest))
+            if packet.content_object_hash() != digest:
+                raise ValueError(f'Packet {self.to_path(digest)} does not match its hash')
+            return packet
+
+        def _link_index(self, packet: Packet) -> LinkIndex:
+            """The parsed LinkIndex in `packet`, validating it the first time it is used"""
+            digest = packet.content_object_hash()
+            index = self._link_indices.get(digest)
+            if index is None:
+                if self._validator is not None:
+                    self._validator.validate_packet(packet)
+                index = LinkIndex.from_content_object(packet.body())
+                self._link_indices[digest] = index
+            return index
 
         def close(self):
             pass
 
+    class PacketDumpWriter(PacketWriter):
+        """
+        Appends the wire format of each packet to one file.  The file is just the concatenated packets
+        (each framed by its fixed header), the same byte stream a network writer would send.
+        """
+        def __init__(self, filename: str, append: bool = False):
+            self._file = open(filename, 'ab' if append else 'wb')
+            self.count = 0
+
+        def put(self, packet: Packet):
+            self._file.write(memoryview(packet.serialize()))
+            self.count += 1
+
+        def close(self):
+            if self._file is not None:
+                self._file.close()
+            self._file = None
+
+    class PacketDumpReader(PacketReader):
+        """
+        Reads a packet dump file (concatenated wire-format packets, e.g. from `PacketDumpWriter` or a capture
+        of a ccnx TCP stream).
+
+        Opening the file makes one pass with a `PacketStreamDecoder` to index the Content Objects by hash and
+        by name (offset and length only, the packets are not kept in memory).  `get()` reads one packet back
+        with `os.pread`.  Iterating yields every packet in file order.
+        """
+        def __init__(self, filename: str, chunk_size: int = 1024 * 1024):
+            self._filename = filename
+            self._chunk_size = chunk_size
+            self._fd = os.open(filename, os.O_RDONLY)
+            self._by_hash: Dict[HashValue, Tuple[int, int]] = {}
+            self._by_name: Dict[Name, Tuple[int, int]] = {}
+            offset = 0
+            for frame in self._frames():
+                if frame.is_content_object():
+                    packet = frame.packet()
+                    self._by_hash[packet.content_object_hash()] = (offset, len(frame))
+                    if packet.body().name() is not None:
+                        self._by_name[packet.body().name()] = (offset, len(frame))
+                offset += len(frame)
+
+        def __len__(self):
+            return len(self._by_hash)
+
+        def __iter__(self):
+            for frame in self._frames():
+                yield frame.packet()
+
+        def _frames(self):
+            decoder = PacketStreamDecoder()
+            with open(self._filename, 'rb', buffering=0) as f:
+                while True:
+                    count = f.readinto(decoder.writable(self._chunk_size)[:self._chunk_size])
+                    if count == 0:
+                        break
+                    decoder.commit(count)
+                    yield from decoder.frames()
+            if len(decoder) > 0:
+                raise ValueError(f'{self._filename} ends with a partial packet ({len(decoder)} bytes)')
+
+        def get(self, name: Name, hash_restriction: HashValue, forwarding_hints: Optional[Locators] = None) -> Packet:
+            if hash_restriction is None:
+                location = self._by_name[name]
+            else:
+                location = self._by_hash[hash_restriction]
+            offset, length = location
+            p = Packet.deserialize(array("B", os.pread(self._fd, length, offset)))
+            if p.body().name() is not None:
+                if name != p.body().name():
+                    raise ValueError(f'Found packet hash {hash_restriction}, but request name {name} does not match packet {p.body().name()}')
+            return p
+
+        def close(self):
+            if self._fd is not None:
+                os.close(self._fd)
+            self._fd = None
+
     class PacketNetworkWriter(PacketWriter):
         """
         Packets are written to a ccnxd via a network socket.
+
+        `put()` only queues the packet.  A sender thread coalesces queued packets into batches and writes each
+        batch with `socket.sendmsg` over a list of memoryviews of the packets' wire format (no copies).
+        A batch is sent when it reaches `batch_bytes` or when its oldest packet has waited `flush_interval`
+        seconds.  Where the platform has `TCP_CORK`, the socket is corked for the duration of a batch, so it
+        goes out as full segments.
+
+        The queue holds at most `max_queued` packets.  When it is full, `put()` blocks, which applies
+        backpressure to the producer.
+
+        If a send fails, the writer reconnects (up to `max_retries` times, with exponential backoff) and
+        resends the batch from the first packet not completely sent.  Packets the old connection had
+        accepted into its socket buffer may be lost.  Once the retries are exhausted, `put()`, `flush()`,
+        and `close()` raise the error.
         """
-        def __init__(self, host="127.0.0.1", port=9896):
+        logger = logging.getLogger(__name__)
+        _FLUSH = object()
+        _CLOSE = object()
+        _IOV_MAX = os.sysconf('SC_IOV_MAX') if hasattr(os, 'sysconf') and 'SC_IOV_MAX' in os.sysconf_names else 1024
+
+        def __init__(self, host="127.0.0.1", port=9896, batch_bytes: int = 64 * 1024, flush_interval: float = 0.005,
+                     max_queued: int = 1024, max_retries: int = 5, retry_delay: float = 0.05):
             """
+            :param host: The ccnxd host
+            :param port: The ccnxd port
+            :param batch_bytes: Send once this many bytes are queued
+            :param flush_interval: Send a partial batch once it is this many seconds old
+            :param max_queued: The number of packets `put()` may queue before it blocks
+            :param max_retries: The number of reconnect attempts before giving up
+            :param retry_delay: The first reconnect backoff (doubles on each attempt)
             """
-            self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self._socket.connect((host, port))
+            self._address = (host, port)
+            self._batch_bytes = batch_bytes
+            self._flush_interval = flush_interval
+            self._max_retries = max_retries
+            self._retry_delay = retry_delay
+            self._queue = queue.Queue(maxsize=max_queued)
+            self._error: Optional[Exception] = None
+
+            self.packets_sent = 0
+            self.bytes_sent = 0
+            self.batches = 0
+            self.send_calls = 0
+            self.reconnects = 0
+            self._start_time = time.monotonic()
+
+            self._socket = None
+            self._connect()
+            self._sender = threading.Thread(target=self._run, name='PacketNetworkWriter', daemon=True)
+            self._sender.start()
+
+        def __repr__(self):
+            return (f"PacketNetworkWriter({self._address}, packets={self.packets_sent}, bytes={self.bytes_sent}, "
+                    f"batches={self.batches}, reconnects={self.reconnects}, rate={self.bytes_per_second():.0f} B/s)")
 
         def close(self):
+            if self._sender is not None:
+                self._queue.put(self._CLOSE)
+                self._sender.join()
+                self._sender = None
             if self._socket is not None:
                 self._socket.close()
             self._socket = None
+            self._raise_error()
 
         def put(self, packet: Packet):
-            self._socket.sendall(packet.serialize().tobytes())
+            self._raise_error()
+            # memoryview of the packet's own wire format array, so it is not copied until the kernel does so
+            self._queue.put(memoryview(packet.serialize()))
+
+        def flush(self):
+            """Block until everything queued so far has been sent"""
+            self._raise_error()
+            self._queue.put(self._FLUSH)
+            self._queue.join()
+            self._raise_error()
+
+        def bytes_per_second(self) -> float:
+            elapsed = time.monotonic() - self._start_time
+            return self.bytes_sent / elapsed if elapsed > 0 else 0.0
+
+        def _raise_error(self):
+            if self._error is not None:
+                raise self._error
+
+        def _connect(self):
+            self._socket = socket.create_connection(self._address)
+            self._socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+        def _reconnect(self, error: OSError):
+            if self._socket is not None:
+                self._socket.close()
+                self._socket = None
+            delay = self._retry_delay
+            for attempt in range(self._max_retries):
+                self.logger.warning('Send to %s failed (%s), reconnect attempt %d', self._address, error, attempt + 1)
+                time.sleep(delay)
+                delay *= 2
+                try:
+                    self._connect()
+                    self.reconnects += 1
+                    return
+                except OSError as e:
+                    error = e
+            raise error
+
+        def _run(self):
+            batch = []
+            batch_len = 0
+            deadline = None
+            while True:
+                timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    # not a queue item, so there is no task_done for it
+                    self._send_batch(batch)
+                    batch, batch_len, deadline = [], 0, None
+                    continue
+
+                if item is self._FLUSH or item is self._CLOSE:
+                    self._send_batch(batch)
+                    batch, batch_len, deadline = [], 0, None
+                    self._queue.task_done()
+                    if item is self._CLOSE:
+                        return
+                    continue
+
+                batch.append(item)
+                batch_len += len(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self._flush_interval
+                if batch_len >= self._batch_bytes:
+                    self._send_batch(batch)
+                    batch, batch_len, deadline = [], 0, None
+
+        def _send_batch(self, batch):
+            if len(batch) == 0:
+                return
+            try:
+                if self._error is None:
+                    self._send_with_retry(batch)
+            except OSError as e:
+                self.logger.error('Giving up on %s: %s', self._address, e)
+                self._error = e
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+        def _send_with_retry(self, batch):
+            # [index of the first packet not completely sent, bytes of it sent]
+            position = [0, 0]
+            while True:
+                try:
+                    self._send(batch, position)
+                    self.batches += 1
+                    return
+                except OSError as e:
+                    self._reconnect(e)
+                    # a new connection must start on a packet boundary, so resend the partial packet
+                    position[1] = 0
+
+        def _send(self, batch, position):
+            self._cork(True)
+            try:
+                while position[0] < len(batch):
+                    index, offset = position
+                    buffers = [batch[index][offset:]] + batch[index + 1:index + self._IOV_MAX]
+                    sent = self._socket.sendmsg(buffers)
+                    self.send_calls += 1
+                    self.bytes_sent += sent
+                    # advance past the fully sent packets
+                    while index < len(batch) and sent >= len(batch[index]) - offset:
+                        sent -= len(batch[index]) - offset
+                        offset = 0
+                        index += 1
+                        self.packets_sent += 1
+                    position[0] = index
+                    position[1] = offset + sent
+            finally:
+                self._cork(False)
+
+        def _cork(self, enable: bool):
+            if hasattr(socket, 'TCP_CORK') and self._socket is not None:
+                try:
+                    self._socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_CORK, 1 if enable else 0)
+                except OSError:
+                    pass
+
+    class PacketNetworkReader(PacketReader):
+        """
+        Fetches packets from a ccnxd (or any packet server) over one persistent TCP connection.
+
+        `get()` sends an Interest with the name and content object hash restriction and waits for the
+        matching Content Object.  Responses are framed by the fixed header's packet length and matched back
+        to their request by content object hash (or by name, for a request without a hash restriction),
+        so many Interests may be outstanding at once and responses may arrive in any order.
+
+        `prefetch()` queues Interests for the given pointers without waiting, which pipelines a manifest's
+        children.  Queued Interests are sent as the window allows: the number outstanding is limited by a
+        `WindowController` (by default a `FixedWindow` of `max_outstanding`), which sees every RTT sample,
+        timeout, and retransmission.  A later `get()` picks up the response, or sends the Interest right away
+        if it is still queued.
+
+        If no response arrives within `timeout` seconds, `get()` retransmits the Interest, up to
+        `max_retries` times, then raises `TimeoutError`.
+
+        A read-ahead that no `get()` claims within `prefetch_lifetime` seconds (e.g. the caller failed over to
+        another reader) is dropped, which gives its window slot back.  If the connection drops, the requests
+        waiting on it fail with `ConnectionError` and the next Interest reconnects.
+        """
+        logger = logging.getLogger(__name__)
+
+        class _Pending:
+            def __init__(self, name: Optional[Name], hash_restriction: Optional[HashValue]):
+                self.name = name
+                self.hash_restriction = hash_restriction
+                self.event = threading.Event()
+                self.packet: Optional[Packet] = None
+                self.error: Optional[Exception] = None
+                self.transmissions = 0
+                self.sent_time = time.monotonic()
+                self.answered = False
+                # a read-ahead is unclaimed until a `get()` waits on it
+                self.claimed = False
+
+        def __init__(self, host="127.0.0.1", port=9896, timeout: float = 1.0, max_retries: int = 3,
+                     max_outstanding: int = 64, hop_limit: int = 32, window: Optional[WindowController] = None,
+                     prefetch_lifetime: Optional[float] = None):
+            """
+            :param host: The ccnxd host
+            :param port: The ccnxd port
+            :param timeout: Seconds to wait for a response before retransmitting
+            :param max_retries: The number of retransmissions before `get()` gives up
+            :param max_outstanding: The read-ahead window if `window` is None
+            :param hop_limit: The Interest hop limit
+            :param window: The congestion window controller (e.g. `AimdWindow`)
+            :param prefetch_lifetime: Seconds to keep an unclaimed read-ahead (default: the time `get()` would
+                                      wait with all its retries)
+            """
+            self._address = (host, port)
+            self._timeout = timeout
+            self._max_retries = max_retries
+            self._hop_limit = hop_limit
+            self._prefetch_lifetime = prefetch_lifetime if prefetch_lifetime is not None else timeout * (max_retries + 1)
+            self._last_expire = time.monotonic()
+            self._closed = False
+            self.window = window if window is not None else FixedWindow(max_outstanding)
+            self._lock = threading.Lock()
+            self._send_lock = threading.Lock()
+            self._pending: Dict[HashValue | Name, TreeIO.PacketNetworkReader._Pending] = {}
+            # read-ahead requests waiting for room in the window, by key
+            self._deferred: OrderedDict[HashValue | Name, Tuple[Optional[Name], Optional[HashValue]]] = OrderedDict()
+            # pending requests not yet answered (an answered read-ahead stays pending until its `get()`)
+            self._in_flight = 0
+            # Interest encoders by (name prefix, suffix type), see `InterestTemplate.split_name()`
+            self._templates: Dict[Tuple[Optional[bytes], Optional[int]], InterestTemplate] = {}
+            self._socket = None
+            self._receiver = None
+
+            self.interests_sent = 0
+            self.retransmissions = 0
+            self.timeouts = 0
+            self.packets_received = 0
+            self.bytes_received = 0
+            self.unsolicited = 0
+            self.prefetches_expired = 0
+            self.reconnects = 0
+            # smoothed RTT and its variation (RFC 6298), None until the first sample
+            self.srtt: Optional[float] = None
+            self.rttvar: Optional[float] = None
+            self.rtt_samples = 0
+
+            self._connect()
+
+        def __repr__(self):
+            return (f"{self.__class__.__name__}({self._address}, sent={self.interests_sent}, received={self.packets_received}, "
+                    f"retransmissions={self.retransmissions}, timeouts={self.timeouts}, unsolicited={self.unsolicited})")
+
+        def close(self):
+            self._closed = True
+            with self._lock:
+                self._deferred.clear()
+            sock = self._socket
+            self._socket = None
+            if sock is not None:
+                try:
+                    sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+                sock.close()
+            if self._receiver is not None:
+                self._receiver.join()
+                self._receiver = None
+
+        def get(self, name: Name, hash_restriction: HashValue, forwarding_hints: Optional[Locators] = None) -> Packet:
+            with self._lock:
+                self._deferred.pop(self._key(name, hash_restriction), None)
+            pending, is_new = self._get_pending(name, hash_restriction, claim=True)
+            try:
+                if is_new:
+                    self._send_interest(pending)
+                for attempt in range(self._max_retries + 1):
+                    if pending.event.wait(self._timeout):
+                        break
+                    self.window.on_timeout()
+                    if attempt < self._max_retries:
+                        self.retransmissions += 1
+                        self.window.on_retransmit()
+                        self._send_interest(pending)
+                else:
+                    self.timeouts += 1
+                    raise TimeoutError(f'No response from {self._address} for {name} {hash_restriction}')
+            finally:
+                with self._lock:
+                    self._pending.pop(self._key(name, hash_restriction), None)
+                    self._answer(pending)
+                self._fill_window()
+
+            if pending.error is not None:
+                raise pending.error
+            packet = pending.packet
+            packet_name = packet.body().name()
+            if packet_name is not None and name is not None and name != packet_name:
+                raise ValueError(f'Found packet hash {hash_restriction}, but request name {name} does not match packet {packet_name}')
+            return packet
+
+        def prefetch(self, requests: Iterable[Tuple[Optional[Name], HashValue]], locators: Optional[Locators] = None):
+            with self._lock:
+                for name, hash_restriction in requests:
+                    key = self._key(name, hash_restriction)
+                    if key is not None and key not in self._pending:
+                        self._deferred[key] = (name, hash_restriction)
+            self._fill_window()
+
+        def address(self) -> Tuple[str, int]:
+            return self._address
+
+        def outstanding(self) -> int:
+            """The number of requests (including read-ahead) waiting for a response"""
+            with self._lock:
+                return self._in_flight
+
+        def _fill_window(self):
+            """
+            Send queued read-ahead Interests while the window has room
+            """
+            pendings = []
+            with self._lock:
+                lost = self._expire_prefetches()
+                while len(self._deferred) > 0 and self._in_flight < self.window.window():
+                    key, (name, hash_restriction) = self._deferred.popitem(last=False)
+                    if key in self._pending:
+                        continue
+                    pending = TreeIO.PacketNetworkReader._Pending(name, hash_restriction)
+                    self._pending[key] = pending
+                    self._in_flight += 1
+                    pendings.append(pending)
+            if lost:
+                self.window.on_timeout()
+            if len(pendings) == 0:
+                return
+            try:
+                # one write for all the Interests the window opened up
+                self._send_interests(pendings)
+            except OSError as e:
+                # read-ahead is only a hint, the receive loop fails the pending requests
+                self.logger.debug('Read-ahead to %s failed: %s', self._address, e)
+
+        def _expire_prefetches(self) -> bool:
+            """
+            Drop the read-ahead requests no `get()` claimed within the prefetch lifetime (call with the lock held).
+            An unanswered one gives its window slot back, an answered one frees its packet.
+
+            :return: True if an unanswered request was dropped (i.e. a loss)
+            """
+            now = time.monotonic()
+            if now - self._last_expire < self._prefetch_lifetime / 2:
+                return False
+            self._last_expire = now
+            lost = False
+            expired = [key for key, pending in self._pending.items()
+                       if not pending.claimed and now - pending.sent_time > self._prefetch_lifetime]
+            for key in expired:
+                pending = self._pending.pop(key)
+                if self._answer(pending):
+                    lost = True
+                self.prefetches_expired += 1
+            if len(expired) > 0:
+                self.logger.debug('Expired %d unclaimed read-ahead requests to %s', len(expired), self._address)
+            return lost
+
+        def _update_rtt(self, sample: float):
+            if self.srtt is None:
+                self.srtt = sample
+                self.rttvar = sample / 2
+            else:
+                self.rttvar = 0.75 * self.rttvar + 0.25 * abs(self.srtt - sample)
+                self.srtt = 0.875 * self.srtt + 0.125 * sample
+            self.rtt_samples += 1
+
+        @staticmethod
+        def _key(name: Optional[Name], hash_restriction: Optional[HashValue]) -> HashValue | Name:
+            return hash_restriction if hash_restriction is not None else name
+
+        def _get_pending(self, name: Optional[Name], hash_restriction: Optional[HashValue], claim: bool = False):
+            if name is None and hash_restriction is None:
+                raise ValueError("Must give at least one of name or hash_restriction")
+            key = self._key(name, hash_restriction)
+            with self._lock:
+                pending = self._pending.get(key)
+                if pending is not None:
+                    pending.claimed = pending.claimed or claim
+                    return pending, False
+                pending = TreeIO.PacketNetworkReader._Pending(name, hash_restriction)
+                pending.claimed = claim
+                self._pending[key] = pending
+                self._in_flight += 1
+                return pending, True
+
+        def _answer(self, pending: _Pending) -> bool:
+            """
+            Take `pending` out of the in-flight count (call with the lock held).
+            :return: False if it was already answered
+            """
+            if pending.answered:
+                return False
+            pending.answered = True
+            self._in_flight -= 1
+            return True
+
+        def _connect(self):
+            self._socket = socket.create_connection(self._address)
+            self._socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self._receiver = threading.Thread(target=self._receive_loop, args=(self._socket,),
+                                              name='PacketNetworkReader', daemon=True)
+            self._receiver.start()
+
+        def _send_interest(self, pending: _Pending):
+            self._send_interests([pending])
+
+        def _send_interests(self, pendings: List[_Pending]):
+            with self._send_lock:
+                if self._socket is None:
+                    if self._closed:
+                        raise ConnectionError(f'Not connected to {self._address}')
+                    # the connection dropped, see `_receive_loop()`
+                    self._connect()
+                    self.reconnects += 1
+                buffer = bytearray()
+                offsets = []
+                # The read-ahead of a hash group shares one template (e.g. a prefix with a chunk suffix),
+                # so each run of Interests with the same template is encoded as one batch
+                for template, run in itertools.groupby(((self._template(pending.name), pending) for pending in pendings),
+                                                       key=lambda item: item[0][0]):
+                    _, run_offsets = template.encode_batch(((segment_id, pending.hash_restriction)
+                                                            for (_, segment_id), pending in run), buffer)
+                    offsets.extend(run_offsets)
+                self._write(buffer, offsets)
+                now = time.monotonic()
+                for pending in pendings:
+                    pending.sent_time = now
+                    pending.transmissions += 1
+                self.interests_sent += len(pendings)
+
+        def _write(self, buffer: bytearray, offsets: List[int]):
+            """
+            Send encoded Interests (called with the send lock held)
+
+            :param buffer: The Interests, back to back
+            :param offsets: Where each Interest starts in `buffer`
+            """
+            self._socket.sendall(buffer)
+
+        def _template(self, name: Optional[Name]) -> Tuple[InterestTemplate, Optional[int]]:
+            """
+            The Interest encoder for `name`, and the name's segment id (called with the send lock held)
+            """
+            if name is None:
+                prefix, suffix_type, segment_id = None, None, None
+            else:
+                prefix, suffix_type, segment_id = InterestTemplate.split_name(name)
+            template = self._templates.get((prefix, suffix_type))
+            if template is None:
+                if len(self._templates) >= 256:
+                    self._templates.clear()
+                template = InterestTemplate(prefix=prefix, suffix_type=suffix_type, hop_limit=self._hop_limit)
+                self._templates[(prefix, suffix_type)] = template
+            return template, segment_id
+
+        def _receive_loop(self, sock):
+            decoder = PacketStreamDecoder()
+            try:
+                while True:
+                    count = sock.recv_into(decoder.writable())
+                    if count == 0:
+                        break
+                    decoder.commit(count)
+                    for frame in decoder.frames():
+                        self._on_frame(frame)
+            except (OSError, ValueError, RuntimeError) as e:
+                # ValueError/RuntimeError are a malformed stream, we cannot re-frame after that
+                self.logger.debug('Receive from %s stopped: %s', self._address, e)
+            self._fail_all(ConnectionError(f'Connection to {self._address} closed'))
+            # let the next Interest reconnect (unless we are closing)
+            with self._send_lock:
+                if self._socket is sock:
+                    self._socket = None
+                    sock.close()
+
+        def _on_frame(self, frame: PacketFrame):
+            self.bytes_received += len(frame)
+            if not frame.is_content_object():
+                # e.g. an Interest Return, let the request time out and retransmit
+                self.logger.debug('Ignoring packet type from %s: %s', self._address, frame)
+                return
+            packet = frame.packet()
+            self.packets_received += 1
+            with self._lock:
+                pending = self._pending.get(packet.content_object_hash())
+                if pending is None and packet.body().name() is not None:
+                    pending = self._pending.get(packet.body().name())
+            if pending is None:
+                self.unsolicited += 1
+                return
+            with self._lock:
+                if not self._answer(pending):
+                    # a duplicate response
+                    return
+            sample = None
+            if pending.transmissions == 1:
+                # Karn's rule: a retransmitted request gives an ambiguous sample
+                sample = time.monotonic() - pending.sent_time
+                self._update_rtt(sample)
+            self.window.on_response(sample)
+            pending.packet = packet
+            pending.event.set()
+            self._fill_window()
+
+        def _fail_all(self, error: Exception):
+            with self._lock:
+                pendings = [pending for pending in self._pending.values() if self._answer(pending)]
+                # An unclaimed read-ahead has no `get()` to report the error to.  Drop it, so a later `get()`
+                # sends a new Interest instead of finding the error.
+                for key in [key for key, pending in self._pending.items() if not pending.claimed]:
+                    del self._pending[key]
+            for pending in pendings:
+                pending.error = error
+                pending.event.set()
+
+    class PacketDatagramWriter(PacketWriter):
+        """
+        Publishes packets over UDP, one packet per datagram, e.g. to `packet_server --udp`.
+
+        Packets are queued and sent `batch_size` at a time (Python has no `sendmmsg`, so a batch is a loop of
+        `send` calls on a connected socket).  A packet larger than `mtu` is still sent, but IP fragments it, so
+        it is counted in `oversized` (build the tree with `max_packet_size` at most the MTU).
+
+        UDP is best-effort: a lost Content Object is not retransmitted.
+        """
+        logger = logging.getLogger(__name__)
+        # IPv4 UDP payload limit
+        MAX_DATAGRAM = 65507
+
+        def __init__(self, host="127.0.0.1", port=9896, batch_size: int = 32, mtu: int = 1500):
+            """
+            :param host: The server host
+            :param port: The server UDP port
+            :param batch_size: The number of packets to queue before sending
+            :param mtu: Count (and warn about) packets larger than this
+            """
+            if batch_size < 1:
+                raise ValueError(f"batch_size must be positive, got {batch_size}")
+            self._address = (host, port)
+            self._batch_size = batch_size
+            self._mtu = mtu
+            self._batch = []
+            self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self._socket.connect(self._address)
+
+            self.packets_sent = 0
+            self.bytes_sent = 0
+            self.batches = 0
+            self.oversized = 0
+
+        def __repr__(self):
+            return (f"PacketDatagramWriter({self._address}, packets={self.packets_sent}, bytes={self.bytes_sent}, "
+                    f"batches={self.batches}, oversized={self.oversized})")
+
+        def put(self, packet: Packet):
+            data = packet.serialize()
+            if len(data) > self.MAX_DATAGRAM:
+                raise ValueError(f"Packet length {len(data)} exceeds the maximum datagram {self.MAX_DATAGRAM}")
+            if len(data) > self._mtu:
+                if self.oversized == 0:
+                    self.logger.warning('Packet length %d exceeds the MTU %d, it will be fragmented', len(data), self._mtu)
+                self.oversized += 1
+            self._batch.append(memoryview(data))
+            if len(self._batch) >= self._batch_size:
+                self.flush()
+
+        def flush(self):
+            if self._socket is None or len(self._batch) == 0:
+                return
+            for view in self._batch:
+                self._send(view)
+                self.packets_sent += 1
+                self.bytes_sent += len(view)
+            self._batch = []
+            self.batches += 1
+
+        def close(self):
+            if self._socket is not None:
+                self.flush()
+                self._socket.close()
+                self._socket = None
+
+        def _send(self, view: memoryview):
+            for _ in range(100):
+                try:
+                    self._socket.send(view)
+                    return
+                except ConnectionRefusedError:
+                    # ICMP port unreachable from an earlier datagram, the datagram is lost like any other
+                    return
+                except OSError as e:
+                    if e.errno not in (errno.ENOBUFS, errno.EAGAIN):
+                        raise
+                    # the socket buffer is full, let it drain
+                    time.sleep(0.001)
+            raise OSError(errno.ENOBUFS, f'Cannot send to {self._address}')
+
+    class PacketDatagramReader(PacketNetworkReader):
+        """
+        A `PacketNetworkReader` over UDP: each Interest and each Content Object is one datagram.
+
+        Pipelining, the window, and read-ahead work the same as over TCP, but there is no head-of-line blocking:
+        a lost datagram only delays its own request, which `get()` recovers by retransmitting the Interest after
+        `timeout` seconds.  Datagrams whose length does not match their fixed header are dropped (`malformed`).
+        """
+        # how often the receive thread checks for close()
+        _POLL_INTERVAL = 0.1
+
+        def __init__(self, host="127.0.0.1", port=9896, timeout: float = 0.5, max_retries: int = 6, **kwargs):
+            """
+            See `PacketNetworkReader`.  Over UDP, loss is expected, so the defaults retransmit sooner and more often.
+            """
+            self.malformed = 0
+            super().__init__(host=host, port=port, timeout=timeout, max_retries=max_retries, **kwargs)
+
+        def close(self):
+            self._closed = True
+            with self._lock:
+                self._deferred.clear()
+            sock = self._socket
+            self._socket = None
+            if self._receiver is not None:
+                self._receiver.join()
+                self._receiver = None
+            if sock is not None:
+                sock.close()
+
+        def _connect(self):
+            self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            try:
+                # room for a full window of responses
+                self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+            except OSError:
+                pass
+            self._socket.connect(self._address)
+            self._socket.settimeout(self._POLL_INTERVAL)
+            self._receiver = threading.Thread(target=self._receive_loop, args=(self._socket,),
+                                              name='PacketDatagramReader', daemon=True)
+            self._receiver.start()
+
+        def _write(self, buffer: bytearray, offsets: List[int]):
+            view = memoryview(buffer)
+            ends = offsets[1:] + [len(buffer)]
+            for start, end in zip(offsets, ends):
+                try:
+                    self._socket.send(view[start:end])
+                except ConnectionRefusedError:
+                    # ICMP port unreachable from an earlier datagram, retransmission will retry
+                    pass
+
+        def _receive_loop(self, sock):
+            buffer = bytearray(65535)
+            while self._socket is sock:
+                try:
+                    count = sock.recv_into(buffer)
+                except socket.timeout:
+                    continue
+                except ConnectionRefusedError:
+                    continue
+                except OSError as e:
+                    self.logger.debug('Receive from %s stopped: %s', self._address, e)
+                    break
+                if count < 8 or buffer[0] != 1 or struct.unpack_from('!H', buffer, 2)[0] != count:
+                    self.malformed += 1
+                    continue
+                # copy, as the buffer is reused for the next datagram
+                frame = PacketFrame(memoryview(bytes(buffer[:count])))
+                try:
+                    self._on_frame(frame)
+                except (ValueError, RuntimeError) as e:
+                    self.logger.debug('Dropping malformed datagram from %s: %s', self._address, e)
+                    self.malformed += 1
+            self._fail_all(ConnectionError(f'Connection to {self._address} closed'))
@@ -0,0 +1,110 @@
+#  Copyright 2024 Marc Mosko
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Optional, Dict
+
+from .RttHistogram import RttHistogram
+
+
+class WindowController(ABC):
+    """
+    Decides how many Interests a network reader may have outstanding.  The reader reports every response
+    (with its RTT sample, or None if the sample is ambiguous because the Interest was retransmitted),
+    every timeout, and every retransmission.  Derived classes (`FixedWindow`, `AimdWindow`, `DelayWindow`)
+    implement the policy in `_on_response()` and `_on_timeout()`.
+
+    The base class keeps the instrumentation common to all controllers: an RTT histogram, a smoothed RTT,
+    the window size over time, and event counters.  `metrics()` returns them as a dictionary.
+
+    The controller is thread-safe.
+    """
+
+    def __init__(self, history: int = 4096):
+        """
+        :param history: The number of (time, window) changes to keep
+        """
+        self._lock = threading.Lock()
+        self._start = time.monotonic()
+        self.rtt_histogram = RttHistogram()
+        self.window_history = deque(maxlen=history)
+        self.srtt: Optional[float] = None
+        self.min_rtt: Optional[float] = None
+        self.responses = 0
+        self.timeouts = 0
+        self.retransmissions = 0
+        self.decreases = 0
+
+    def __repr__(self):
+        return (f"{self.__class__.__name__}(window={self.window()}, srtt={self.srtt}, responses={self.responses}, "
+                f"timeouts={self.timeouts}, retransmissions={self.retransmissions})")
+
+    @abstractmethod
+    def window(self) -> int:
+        """The number of Interests that may be outstanding (at least 1)"""
+        pass
+
+    def on_response(self, rtt: Optional[float]):
+        """
+        :param rtt: The RTT sample in seconds, or None if it is ambiguous
+        """
+        with self._lock:
+            self.responses += 1
+            if rtt is not None:
+                self.rtt_histogram.add(rtt)
+                self.min_rtt = rtt if self.min_rtt is None else min(self.min_rtt, rtt)
+                self.srtt = rtt if self.srtt is None else 0.875 * self.srtt + 0.125 * rtt
+            self._on_response(rtt)
+            self._record()
+
+    def on_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+            self._on_timeout()
+            self._record()
+
+    def on_retransmit(self):
+        with self._lock:
+            self.retransmissions += 1
+
+    def metrics(self) -> Dict:
+        with self._lock:
+            return {
+                'controller': self.__class__.__name__,
+                'window': self.window(),
+                'srtt': self.srtt,
+                'min_rtt': self.min_rtt,
+                'responses': self.responses,
+                'timeouts': self.timeouts,
+                'retransmissions': self.retransmissions,
+                'decreases': self.decreases,
+                'rtt': self.rtt_histogram.to_dict(),
+                'window_history': list(self.window_history),
+            }
+
+    def _on_response(self, rtt: Optional[float]):
+        pass
+
+    def _on_timeout(self):
+        pass
+
+    def _elapsed(self) -> float:
+        return time.monotonic() - self._start
+
+    def _record(self):
+        window = self.window()
+        if len(self.window_history) == 0 or self.window_history[-1][1] != window:
+            self.window_history.append((round(self._elapsed(), 6), window))
@@ -0,0 +1,30 @@
+#  Copyright 2024 Marc Mosko
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+from typing import Optional
+
+from ccnpy.core.HashValue import HashValue
+from ccnpy.core.Name import Name
+from ccnpy.core.Packet import Packet, PacketReader
+from ccnpy.flic.tlvs.Locators import Locators
+
+
+class CountingReader(PacketReader):
+    """Counts the number of `get()` calls that reach the backing reader"""
+    def __init__(self, packet_input: PacketReader):
+        self._packet_input = packet_input
+        self.count = 0
+
+    def get(self, name: Name, hash_restriction: HashValue, locators: Optional[Locators] = None) -> Packet:
+        self.count += 1
+        return self._packet_input.get(name=name, hash_restriction=hash_restriction)
@@ -17,7 +17,9 @@ import tempfile
 
 from array import array
 
-from ccnpy.apps.cli_utils import add_encryption_cli_args
+from ccnpy.apps.cli_utils import add_encryption_cli_args, load_signing_key
+from ccnpy.crypto.EcKey import EcKey
+from ccnpy.crypto.RsaKey import RsaKey
 from ccnpy.flic.tlvs.KdfInfo import KdfInfo
 from ccnpy.flic.tlvs.KeyNumber import KeyNumber
 from tests.MockKeys import private_key_pem
@@ -123,3 +125,21 @@ class CliUtilsTest(CcnpyTestCase):
         ]
         args = self.parser.parse_args(args=a)
         self.assertEqual(KdfInfo('0x010203'), args.kdf_info)
+
+    def test_load_signing_key(self):
+        self.assertIsInstance(load_signing_key(self.test_key_file.name), RsaKey)
+
+        key = EcKey.generate_ed25519()
+        with tempfile.NamedTemporaryFile(delete=False) as f:
+            f.write(key.private_key_pem(password=b'secret'))
+        try:
+            loaded = load_signing_key(f.name, b'secret')
+            self.assertIsInstance(loaded, EcKey)
+            self.assertEqual(key.keyid(), loaded.keyid())
+            # the EC key's password error is reported, not an RSA parse error
+            with self.assertRaises(ValueError):
+                load_signing_key(f.name, b'wrong')
+            with self.assertRaises(TypeError):
+                load_signing_key(f.name)
+        finally:
+            os.unlink(f.name)
@@ -0,0 +1,81 @@
+#  Copyright 2024 Marc Mosko
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+import argparse
+import json
+import os
+import tempfile
+from unittest import mock
+
+from ccnpy.apps import crypto_benchmark
+from tests.ccnpy_testcase import CcnpyTestCase
+
+
+class CryptoBenchmarkTest(CcnpyTestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.baseline_path = os.path.join(self.test_dir.name, 'baseline.json')
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+    @staticmethod
+    def _results():
+        return [{'name': 'crc32c.sign', 'size': 1500, 'usec_per_op': 2.0, 'peak_bytes': 400},
+                {'name': 'crc32c.raw', 'size': 1500, 'usec_per_op': 0.5, 'peak_bytes': 32},
+                {'name': 'kdf.hkdf_sha256.derive32', 'size': None, 'usec_per_op': 8.0}]
+
+    def _args(self, **kwargs):
+        values = dict(sizes=[64], pointers=4, filter='crc32c.raw', repeat=1, min_time=0.001, json=None,
+                      compare=None, threshold=10.0)
+        values.update(kwargs)
+        return argparse.Namespace(**values)
+
+    def _save_baseline(self, usec_per_op: float):
+        results = [{'name': 'crc32c.raw', 'size': 64, 'usec_per_op': usec_per_op}]
+        with open(self.baseline_path, 'w') as f:
+            json.dump({'version': 1, 'results': results}, f)
+
+    def test_compare_unchanged(self):
+        self.assertEqual([], crypto_benchmark.compare_results(self._results(), self._results(), threshold=0.1))
+
+    def test_compare_regression(self):
+        results = self._results()
+        results[0]['usec_per_op'] = 2.5
+        # a faster case is not a regression
+        results[1]['usec_per_op'] = 0.25
+        self.assertEqual(['crc32c.sign'], crypto_benchmark.compare_results(self._results(), results, threshold=0.1))
+        self.assertEqual([], crypto_benchmark.compare_results(self._results(), results, threshold=0.3))
+
+    def test_run_micro_exit_status(self):
+        # a baseline far faster than any real run makes every case a regression
+        self._save_baseline(usec_per_op=1E-6)
+        self.assertEqual(1, crypto_benchmark.run_micro(self._args(compare=self.baseline_path)))
+
+        # and one far slower than any real run makes none
+        self._save_baseline(usec_per_op=1E6)
+        self.assertEqual(0, crypto_benchmark.run_micro(self._args(compare=self.baseline_path)))
+
+    def test_run_micro_json(self):
+        path = os.path.join(self.test_dir.name, 'results.json')
+        self.assertEqual(0, crypto_benchmark.run_micro(self._args(filter='crc32c', json=path)))
+        with open(path, 'r') as f:
+            saved = json.load(f)
+        self.assertEqual(['crc32c.sign', 'crc32c.verify', 'crc32c.raw'], [r['name'] for r in saved['results']])
+
+    def test_filter_skips_setup(self):
+        """The filter is applied before the cases are set up, so no RSA key is generated for crc32c"""
+        with mock.patch.object(crypto_benchmark.RsaKey, 'generate_private_key') as generate:
+            crypto_benchmark.run_micro(self._args(filter='crc32c'))
+        generate.assert_not_called()
@@ -0,0 +1,58 @@
+#  Copyright 2024 Marc Mosko
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+import argparse
+import os
+import tempfile
+from array import array
+
+from ccnpy.apps.manifest_reader import ManifestDirectoryReader
+from ccnpy.core.Name import Name
+from ccnpy.flic.ManifestTree import ManifestTree
+from ccnpy.flic.ManifestTreeOptions import ManifestTreeOptions
+from ccnpy.flic.name_constructor.SchemaType import SchemaType
+from ccnpy.flic.tree.TreeIO import TreeIO
+from tests.MockReader import MockReader
+from tests.ccnpy_testcase import CcnpyTestCase
+
+
+class ManifestReaderTest(CcnpyTestCase):
+    data = array("B", list(range(250)) * 20)
+
+    def setUp(self):
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.output = os.path.join(self.test_dir.name, 'out.bin')
+        tree_options = ManifestTreeOptions(name=Name.from_uri('ccnx:/x'), schema_type=SchemaType.HASHED, signer=None,
+                                           max_packet_size=500, add_node_subtree_size=True)
+        self.root = ManifestTree(data_input=MockReader(self.data.tobytes()),
+                                 packet_output=TreeIO.PacketDirectoryWriter(self.test_dir.name),
+                                 tree_options=tree_options).build()
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+    def _read(self, **kwargs):
+        values = dict(name='ccnx:/x', hash_restriction=self.root.content_object_hash(), in_dir=self.test_dir.name,
+                      cache_mb=None, dedup_entries=0, verify_local=False, resume=False, output_file_name=self.output)
+        values.update(kwargs)
+        with ManifestDirectoryReader(argparse.Namespace(**values), keystore=None) as reader:
+            reader.read()
+
+    def test_longer_output_is_truncated(self):
+        """A longer file kept for --verify-local or --resume does not keep its stale tail"""
+        for kwargs in [dict(verify_local=True), dict(resume=True)]:
+            with open(self.output, 'wb') as f:
+                f.write(b'z' * 8000)
+            self._read(**kwargs)
+            with open(self.output, 'rb') as f:
+                self.assertEqual(self.data.tobytes(), f.read(), kwargs)
@@ -12,12 +12,15 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 
+import argparse
 import os
 import tempfile
 from tests.ccnpy_testcase import CcnpyTestCase
 from array import array
 
+from ccnpy.apps import manifest_writer
 from ccnpy.apps.manifest_writer import ManifestWriter
+from ccnpy.flic.tree.LinkIndex import LinkIndex
 from ccnpy.flic.tree.Traversal import Traversal
 from ccnpy.flic.tree.TreeIO import TreeIO
 
@@ -143,3 +146,10 @@ YHoJ5UwIFj2Ifw/YHKJAgxG3vxApbLqMJEiCg3WajkqUhjhXZU8=
 if __name__ == '__main__':
     runner = unittest.TextTestRunner()
     runner.run(ManifestWriterTest())
+
+    def test_link_index_size_arg(self):
+        self.assertEqual(100, manifest_writer._parse_link_index_size('100'))
+        with self.assertRaises(argparse.ArgumentTypeError):
+            manifest_writer._parse_link_index_size(str(LinkIndex.MAX_ENTRIES + 1))
+        with self.assertRaises(argparse.ArgumentTypeError):
+            manifest_writer._parse_link_index_size('-1')
@@ -0,0 +1,131 @@
+#  Copyright 2024 Marc Mosko
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+import asyncio
+import threading
+import time
+from array import array
+
+from ccnpy.apps.packet_server import PacketServer
+from ccnpy.core.HashValue import HashValue
+from ccnpy.core.Name import Name
+from ccnpy.core.Packet import Packet, PacketReader
+from ccnpy.flic.ManifestTree import ManifestTree
+from ccnpy.flic.ManifestTreeOptions import ManifestTreeOptions
+from ccnpy.flic.name_constructor.SchemaType import SchemaType
+from ccnpy.flic.tree.Traversal import Traversal
+from ccnpy.flic.tree.TreeIO import TreeIO
+from tests.MockReader import MockReader
+from tests.ccnpy_testcase import CcnpyTestCase
+
+
+class PacketServerTest(CcnpyTestCase):
+
+    def _start(self, server: PacketServer) -> int:
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+        return asyncio.run_coroutine_threadsafe(server.start('127.0.0.1', 0), self.loop).result(timeout=5)
+
+    def _stop(self, server: PacketServer):
+        asyncio.run_coroutine_threadsafe(server.stop(), self.loop).result(timeout=5)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout=5)
+        self.loop.close()
+
+    @staticmethod
+    def _build():
+        data = array("B", list(range(256)) * 40)
+        packet_buffer = TreeIO.PacketMemoryWriter()
+        tree_options = ManifestTreeOptions(name=Name.from_uri('ccnx:/x'), schema_type=SchemaType.HASHED, signer=None, max_packet_size=500)
+        root = ManifestTree(data_input=MockReader(data.tobytes()), packet_output=packet_buffer, tree_options=tree_options).build()
+        return data, packet_buffer, root
+
+    def _retrieve(self, port: int, root, timeout: float = 1.0):
+        reader = TreeIO.PacketNetworkReader(port=port, timeout=timeout, max_retries=20)
+        buffer = TreeIO.DataBuffer()
+        Traversal(packet_input=reader, data_writer=buffer).traverse(root_name=root.body().name(), hash_restriction=root.content_object_hash())
+        reader.close()
+        return buffer, reader
+
+    def test_publish_and_retrieve(self):
+        data, packet_buffer, root = self._build()
+        server = PacketServer()
+        port = self._start(server)
+        try:
+            writer = TreeIO.PacketNetworkWriter(port=port)
+            for packet in packet_buffer:
+                writer.put(packet)
+            writer.close()
+
+            deadline = time.monotonic() + 5
+            while server.objects_stored < len(packet_buffer.packets) and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self.assertEqual(len(packet_buffer), len(server.store()))
+
+            buffer, reader = self._retrieve(port, root)
+            self.assertEqual(data, buffer.buffer)
+            self.assertEqual(reader.interests_sent, server.interests)
+            self.assertEqual(0, server.misses)
+        finally:
+            self._stop(server)
+
+    def test_shaping(self):
+        data, packet_buffer, root = self._build()
+        server = PacketServer(packet_input=packet_buffer, latency=0.002, jitter=0.001, loss=0.2, bandwidth=50e6, seed=1)
+        port = self._start(server)
+        try:
+            buffer, reader = self._retrieve(port, root, timeout=0.05)
+            self.assertEqual(data, buffer.buffer)
+            self.assertGreater(server.dropped, 0)
+            self.assertGreater(reader.retransmissions, 0)
+        finally:
+            self._stop(server)
+
+    def test_lookup(self):
+        data, packet_buffer, root = self._build()
+        server = PacketServer(packet_input=packet_buffer)
+        self.assertEqual(root, server.lookup(root.body().name(), root.content_object_hash()))
+        self.assertIsNone(server.lookup(Name.from_uri('ccnx:/other'), root.content_object_hash()))
+
+    def test_blocking_input_does_not_stall(self):
+        """While packet_input blocks on one Interest, an Interest for a stored packet is still answered"""
+        data, packet_buffer, root = self._build()
+        release = threading.Event()
+
+        class BlockingReader(PacketReader):
+            def get(self, name: Name, hash_restriction: HashValue, locators=None) -> Packet:
+                release.wait(timeout=10)
+                return packet_buffer.get(name, hash_restriction)
+
+        server = PacketServer(packet_input=BlockingReader())
+        port = self._start(server)
+        try:
+            writer = TreeIO.PacketNetworkWriter(port=port)
+            writer.put(root)
+            writer.close()
+            deadline = time.monotonic() + 5
+            while server.objects_stored < 1 and time.monotonic() < deadline:
+                time.sleep(0.01)
+
+            reader = TreeIO.PacketNetworkReader(port=port, timeout=2.0, max_retries=0)
+            # a data object only the blocked packet_input has
+            blocked = next(p for p in packet_buffer if p.content_object_hash() != root.content_object_hash())
+            reader.prefetch([(blocked.body().name(), blocked.content_object_hash())])
+            self.assertEqual(root, reader.get(root.body().name(), root.content_object_hash()))
+            release.set()
+            self.assertEqual(blocked, reader.get(blocked.body().name(), blocked.content_object_hash()))
+            reader.close()
+        finally:
+            release.set()
+            self._stop(server)
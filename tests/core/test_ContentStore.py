@@ -0,0 +1,141 @@
+#  Copyright 2024 Marc Mosko
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+from array import array
+from datetime import datetime, UTC
+
+from ccnpy.core.ContentObject import ContentObject
+from ccnpy.core.ContentStore import ContentStore
+from ccnpy.core.Interest import Interest
+from ccnpy.core.LfuEvictionPolicy import LfuEvictionPolicy
+from ccnpy.core.Name import Name
+from ccnpy.core.Packet import Packet
+from ccnpy.core.Payload import Payload
+from tests.ccnpy_testcase import CcnpyTestCase
+
+
+class ContentStoreTest(CcnpyTestCase):
+
+    @staticmethod
+    def _data(i: int, name: str = None, expiry: float = None, size: int = 100) -> Packet:
+        expiry_time = datetime.fromtimestamp(expiry, UTC) if expiry is not None else None
+        return Packet.create_content_object(ContentObject.create_data(name=Name.from_uri(name) if name is not None else None,
+                                                                      payload=array("B", [i % 256] * size),
+                                                                      expiry_time=expiry_time))
+
+    def test_by_hash_and_name(self):
+        store = ContentStore()
+        nameless = self._data(1)
+        named = self._data(2, name='ccnx:/a/b')
+        store.put(nameless)
+        store.put(named)
+
+        self.assertEqual(nameless, store.get(None, nameless.content_object_hash()))
+        self.assertEqual(named, store.get(Name.from_uri('ccnx:/a/b'), named.content_object_hash()))
+        self.assertEqual(named, store.get(Name.from_uri('ccnx:/a/b'), None))
+        # a named object needs the matching name
+        self.assertIsNone(store.lookup(Name.from_uri('ccnx:/a/c'), named.content_object_hash()))
+        with self.assertRaises(KeyError):
+            store.get(Name.from_uri('ccnx:/a'), None)
+        self.assertEqual(3, store.hits)
+        self.assertEqual(2, store.misses)
+        self.assertEqual(len(nameless) + len(named), store.bytes_resident)
+
+    def test_longest_prefix_match(self):
+        store = ContentStore()
+        short = self._data(1, name='ccnx:/a')
+        long = self._data(2, name='ccnx:/a/b/c')
+        store.put(short)
+        store.put(long)
+        self.assertEqual(long, store.longest_prefix_match(Name.from_uri('ccnx:/a/b/c/d')))
+        self.assertEqual(long, store.longest_prefix_match(Name.from_uri('ccnx:/a/b/c')))
+        self.assertEqual(short, store.longest_prefix_match(Name.from_uri('ccnx:/a/b')))
+        self.assertIsNone(store.longest_prefix_match(Name.from_uri('ccnx:/b')))
+
+    def test_lru_eviction(self):
+        packets = [self._data(i) for i in range(4)]
+        store = ContentStore(max_bytes=3 * len(packets[0]))
+        for packet in packets[:3]:
+            store.put(packet)
+        # touch the oldest, so the second is the LRU
+        store.get(None, packets[0].content_object_hash())
+        store.put(packets[3])
+        self.assertEqual(1, store.evictions)
+        self.assertNotIn(packets[1].content_object_hash(), store)
+        self.assertIn(packets[0].content_object_hash(), store)
+        self.assertEqual(3 * len(packets[0]), store.bytes_resident)
+
+    def test_lfu_eviction(self):
+        packets = [self._data(i) for i in range(4)]
+        store = ContentStore(max_bytes=3 * len(packets[0]), policy=LfuEvictionPolicy())
+        for packet in packets[:3]:
+            store.put(packet)
+        for _ in range(3):
+            store.get(None, packets[0].content_object_hash())
+        store.get(None, packets[1].content_object_hash())
+        store.put(packets[3])
+        self.assertNotIn(packets[2].content_object_hash(), store)
+        store.put(packets[2])
+        # packets[3] has the fewest uses
+        self.assertNotIn(packets[3].content_object_hash(), store)
+        self.assertEqual(2, store.evictions)
+
+    def test_expiry(self):
+        now = [1000.0]
+        store = ContentStore(clock=lambda: now[0])
+        packet = self._data(1, name='ccnx:/a', expiry=1010.0)
+        store.put(packet)
+        self.assertEqual(packet, store.get(Name.from_uri('ccnx:/a'), None))
+        now[0] = 1010.0
+        self.assertIsNone(store.lookup(Name.from_uri('ccnx:/a'), None))
+        self.assertEqual(0, len(store))
+        self.assertEqual(1, store.expired)
+        self.assertEqual(0, store.bytes_resident)
+
+        # already expired is not stored
+        store.put(self._data(2, expiry=1000.0))
+        self.assertEqual(1, store.rejected)
+
+        store.put(self._data(3, expiry=2000.0))
+        store.put(self._data(4, expiry=1500.0))
+        now[0] = 1600.0
+        self.assertEqual(1, store.purge_expired())
+        self.assertEqual(1, len(store))
+
+    def test_pinning(self):
+        manifest = Packet.create_content_object(ContentObject.create_manifest(Payload(array("B", [9] * 200))))
+        packets = [self._data(i) for i in range(3)]
+        store = ContentStore(max_bytes=2 * len(packets[0]), pin_manifests=True)
+        store.put(manifest)
+        self.assertTrue(store.is_pinned(manifest.content_object_hash()))
+        for packet in packets:
+            store.put(packet)
+        # the pinned manifest does not count against the limit and is not evicted
+        self.assertIn(manifest.content_object_hash(), store)
+        self.assertEqual(2 * len(packets[0]) + len(manifest), store.bytes_resident)
+        self.assertEqual(len(manifest), store.bytes_pinned)
+
+        store.pin(packets[2].content_object_hash())
+        store.unpin(manifest.content_object_hash())
+        # the unpinned manifest is now evictable, so the store is over its limit and drops the LRU object
+        self.assertFalse(store.is_pinned(manifest.content_object_hash()))
+        self.assertNotIn(packets[1].content_object_hash(), store)
+        self.assertIn(packets[2].content_object_hash(), store)
+
+    def test_rejects(self):
+        store = ContentStore(max_bytes=10)
+        store.put(self._data(1))
+        self.assertEqual(0, len(store))
+        self.assertEqual(1, store.rejected)
+        with self.assertRaises(TypeError):
+            store.put(Packet.create_interest(Interest(name=Name.from_uri('ccnx:/a'))))
@@ -0,0 +1,48 @@
+#  Copyright 2024 Marc Mosko
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+import array
+from tests.ccnpy_testcase import CcnpyTestCase
+
+from ccnpy.core.HashValue import HashValue
+from ccnpy.core.Interest import Interest
+from ccnpy.core.Name import Name
+from ccnpy.core.Packet import Packet
+from ccnpy.core.Tlv import Tlv
+
+
+class InterestTest(CcnpyTestCase):
+    wire_format = array.array("B", [0, 1, 0, 36,
+                                    0, 0, 0, 10, 0, 1, 0, 1, 97, 0, 1, 0, 1, 98,
+                                    0, 2, 0, 6, 0, 1, 0, 2, 97, 98,
+                                    0, 3, 0, 8, 0, 2, 0, 4, 65, 66, 67, 68])
+
+    def test_serialize(self):
+        interest = Interest(name=Name.from_uri('ccnx:/a/b'),
+                            key_id_restr=HashValue(1, array.array("B", b'ab')),
+                            con_obj_hash_restr=HashValue(2, array.array("B", b'ABCD')))
+        self.assertEqual(self.wire_format, interest.serialize())
+
+    def test_parse(self):
+        interest = Interest.parse(Tlv.deserialize(self.wire_format))
+        self.assertEqual(Name.from_uri('ccnx:/a/b'), interest.name())
+        self.assertEqual(HashValue(1, array.array("B", b'ab')), interest.key_id_restriction())
+        self.assertEqual(HashValue(2, array.array("B", b'ABCD')), interest.con_obj_hash_restriction())
+
+    def test_packet_round_trip(self):
+        interest = Interest(con_obj_hash_restr=HashValue.create_sha256(array.array("B", [7] * 32)))
+        packet = Packet.create_interest(body=interest, hop_limit=10)
+        actual = Packet.deserialize(packet.serialize())
+        self.assertTrue(actual.header().is_interest())
+        self.assertEqual(interest, actual.body())
+        self.assertIsNone(actual.body().name())
@@ -0,0 +1,114 @@
+#  Copyright 2024 Marc Mosko
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+from array import array
+
+from ccnpy.core.HashValue import HashValue
+from ccnpy.core.Interest import Interest
+from ccnpy.core.InterestTemplate import InterestTemplate
+from ccnpy.core.Name import Name, NameComponent
+from ccnpy.core.Packet import Packet
+from ccnpy.flic.tlvs.GroupData import GroupData
+from ccnpy.flic.tlvs.HashGroup import HashGroup
+from ccnpy.flic.tlvs.Pointers import Pointers
+from ccnpy.flic.tlvs.StartSegmentId import StartSegmentId
+from tests.ccnpy_testcase import CcnpyTestCase
+
+
+class InterestTemplateTest(CcnpyTestCase):
+
+    @staticmethod
+    def _hash(i: int) -> HashValue:
+        return HashValue.create_sha256(array("B", [i] * 32))
+
+    @staticmethod
+    def _reference(name, hash_value, hop_limit=32) -> bytes:
+        return Packet.create_interest(Interest(name=name, con_obj_hash_restr=hash_value), hop_limit=hop_limit).serialize().tobytes()
+
+    def test_nameless(self):
+        template = InterestTemplate(hop_limit=7)
+        self.assertEqual(self._reference(None, self._hash(1), hop_limit=7), template.encode(self._hash(1)))
+
+    def test_prefix(self):
+        name = Name.from_uri('ccnx:/apple/pie')
+        template = InterestTemplate(prefix=name)
+        self.assertEqual(self._reference(name, self._hash(1)), template.encode(self._hash(1)))
+        self.assertEqual(self._reference(name, None), template.encode(None))
+
+    def test_segments(self):
+        prefix = Name.from_uri('ccnx:/apple/pie')
+        template = InterestTemplate(prefix=prefix, suffix_type=NameComponent.chunk_id_type())
+        for segment_id in [0, 255, 256, 70000, 2**32]:
+            expected = self._reference(prefix.append_chunk_id(segment_id), self._hash(3))
+            self.assertEqual(expected, template.encode(self._hash(3), segment_id))
+
+    def test_parses(self):
+        prefix = Name.from_uri('ccnx:/a')
+        template = InterestTemplate(prefix=prefix, suffix_type=NameComponent.chunk_id_type())
+        packet = Packet.deserialize(array("B", template.encode(self._hash(4), 9)))
+        self.assertEqual(prefix.append_chunk_id(9).serialize(), packet.body().name().serialize())
+        self.assertEqual(self._hash(4), packet.body().con_obj_hash_restriction())
+
+    def test_encode_into(self):
+        """Interests appended to one buffer are back to back, as the network reader sends them"""
+        prefix = Name.from_uri('ccnx:/a')
+        template = InterestTemplate(prefix=prefix, suffix_type=NameComponent.chunk_id_type())
+        buffer = bytearray()
+        lengths = [template.encode_into(buffer, self._hash(i), 10 + i) for i in range(5)]
+        expected = [self._reference(prefix.append_chunk_id(10 + i), self._hash(i)) for i in range(5)]
+        self.assertEqual(b''.join(expected), buffer)
+        self.assertEqual([len(e) for e in expected], lengths)
+
+    def test_hash_group(self):
+        prefix = Name.from_uri('ccnx:/a')
+        hashes = [self._hash(i) for i in range(5)]
+        hash_group = HashGroup(group_data=GroupData(start_segment_id=StartSegmentId(10)), pointers=Pointers(hashes))
+        template = InterestTemplate(prefix=prefix, suffix_type=NameComponent.chunk_id_type())
+        buffer, offsets = template.encode_hash_group(hash_group)
+        expected = [self._reference(prefix.append_chunk_id(10 + i), h) for i, h in enumerate(hashes)]
+        self.assertEqual(b''.join(expected), buffer)
+        self.assertEqual([sum(len(e) for e in expected[:i]) for i in range(5)], offsets)
+
+        with self.assertRaises(ValueError):
+            template.encode_hash_group(HashGroup(pointers=Pointers(hashes)))
+
+    def test_batch_appends(self):
+        """A batch appended to a buffer reports offsets into the whole buffer"""
+        nameless = InterestTemplate()
+        buffer, first = nameless.encode_batch([(None, self._hash(1))])
+        buffer, second = nameless.encode_batch([(None, self._hash(2)), (None, self._hash(3))], buffer)
+        expected = [self._reference(None, self._hash(i)) for i in range(1, 4)]
+        self.assertEqual(b''.join(expected), buffer)
+        self.assertEqual([0], first)
+        self.assertEqual([len(expected[0]), len(expected[0]) + len(expected[1])], second)
+
+    def test_split_name(self):
+        name = Name.from_uri('ccnx:/a/b').append_chunk_id(1000)
+        prefix, suffix_type, segment_id = InterestTemplate.split_name(name)
+        self.assertEqual(NameComponent.chunk_id_type(), suffix_type)
+        self.assertEqual(1000, segment_id)
+        template = InterestTemplate(prefix=prefix, suffix_type=suffix_type)
+        self.assertEqual(self._reference(name, self._hash(1)), template.encode(self._hash(1), segment_id))
+
+        name = Name.from_uri('ccnx:/a/b')
+        self.assertEqual((bytes(name.serialize())[4:], None, None), InterestTemplate.split_name(name))
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            InterestTemplate().encode(None)
+        with self.assertRaises(ValueError):
+            InterestTemplate(prefix=Name.from_uri('ccnx:/a'), suffix_type=NameComponent.chunk_id_type()).encode(None)
+        with self.assertRaises(ValueError):
+            InterestTemplate(prefix=Name.from_uri('ccnx:/a')).encode(None, 1)
+        with self.assertRaises(ValueError):
+            InterestTemplate(suffix_type=NameComponent.chunk_id_type())
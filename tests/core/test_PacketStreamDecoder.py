@@ -0,0 +1,97 @@
+#  Copyright 2024 Marc Mosko
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+import array
+from tests.ccnpy_testcase import CcnpyTestCase
+
+from ccnpy.core.ContentObject import ContentObject
+from ccnpy.core.Name import Name
+from ccnpy.core.Packet import Packet
+from ccnpy.core.PacketStreamDecoder import PacketStreamDecoder
+
+
+class PacketStreamDecoderTest(CcnpyTestCase):
+
+    @staticmethod
+    def _packets(count: int):
+        return [Packet.create_content_object(ContentObject.create_data(name=Name.from_uri(f'ccnx:/a/{i}'),
+                                                                       payload=array.array("B", [i % 256] * (50 + 37 * i))))
+                for i in range(count)]
+
+    def test_byte_at_a_time(self):
+        packets = self._packets(5)
+        stream = b''.join(p.serialize().tobytes() for p in packets)
+        decoder = PacketStreamDecoder()
+        frames = []
+        for i in range(len(stream)):
+            decoder.feed(stream[i:i + 1])
+            frames.extend(decoder.frames())
+        self.assertEqual(packets, [f.packet() for f in frames])
+        self.assertEqual(0, len(decoder))
+        self.assertEqual(len(stream), decoder.bytes_decoded)
+
+    def test_frames_survive_buffer_swap(self):
+        packets = self._packets(100)
+        stream = b''.join(p.serialize().tobytes() for p in packets)
+        # the smallest legal buffer, so it is swapped many times
+        decoder = PacketStreamDecoder(capacity=0xFFFF)
+        frames = []
+        for i in range(0, len(stream), 1000):
+            decoder.feed(stream[i:i + 1000])
+            frames.extend(decoder.frames())
+        self.assertGreater(decoder.buffer_swaps, 0)
+        # frames are decoded lazily, after all the swaps
+        self.assertEqual(packets, [f.packet() for f in frames])
+        self.assertTrue(all(f.is_content_object() for f in frames))
+
+    def test_recv_into(self):
+        packets = self._packets(3)
+        stream = memoryview(b''.join(p.serialize().tobytes() for p in packets))
+        decoder = PacketStreamDecoder()
+        frames = []
+        while len(stream) > 0:
+            buffer = decoder.writable(100)
+            count = min(100, len(stream))
+            buffer[:count] = stream[:count]
+            stream = stream[count:]
+            decoder.commit(count)
+            frames.extend(decoder.frames())
+        self.assertEqual(packets, [f.packet() for f in frames])
+
+    def test_rejects_bad_header_early(self):
+        decoder = PacketStreamDecoder()
+        # version 2, and the rest of the packet has not arrived
+        decoder.feed(bytes([2, 1, 0, 100, 0, 0, 0, 8]))
+        with self.assertRaises(ValueError):
+            list(decoder.frames())
+
+        decoder = PacketStreamDecoder()
+        # packet length shorter than the header
+        decoder.feed(bytes([1, 1, 0, 4, 0, 0, 0, 8]))
+        with self.assertRaises(ValueError):
+            list(decoder.frames())
+
+        decoder = PacketStreamDecoder(max_packet_length=1000, capacity=1000)
+        decoder.feed(bytes([1, 1, 0x10, 0, 0, 0, 0, 8]))
+        with self.assertRaises(ValueError):
+            list(decoder.frames())
+
+    def test_partial(self):
+        packet = self._packets(1)[0]
+        wire = packet.serialize().tobytes()
+        decoder = PacketStreamDecoder()
+        decoder.feed(wire[:-1])
+        self.assertEqual([], list(decoder.frames()))
+        self.assertEqual(len(wire) - 1, len(decoder))
+        decoder.feed(wire[-1:])
+        self.assertEqual([packet], [f.packet() for f in decoder.frames()])
@@ -31,6 +31,12 @@ class TlvTest(CcnpyTestCase):
 
         self.assertEqual(truth, wire_format, "wire format incorrect")
 
+    def test_serialize_buffer(self):
+        truth = array.array("B", [0x12, 0x34, 0x00, 0x04, 10, 11, 12, 13])
+        for value in (bytes([10, 11, 12, 13]), bytearray([10, 11, 12, 13]), memoryview(bytes([10, 11, 12, 13]))):
+            tlv = Tlv(tlv_type=0x1234, value=value)
+            self.assertEqual(truth, tlv.serialize())
+
     def test_serialize_tlv(self):
         inner_tlv = Tlv(tlv_type=0x0001, value=[10, 11, 12, 13])
         outer_tlv = Tlv(tlv_type=0x0002, value=inner_tlv)
@@ -19,7 +19,8 @@ from tests.ccnpy_testcase import CcnpyTestCase
 from ccnpy.core.HashValue import HashValue
 from ccnpy.core.SignatureTime import SignatureTime
 from ccnpy.core.Tlv import Tlv
-from ccnpy.core.ValidationAlg import ValidationAlg_Crc32c, ValidationAlg, ValidationAlg_RsaSha256
+from ccnpy.core.ValidationAlg import ValidationAlg_Crc32c, ValidationAlg, ValidationAlg_RsaSha256, ValidationAlg_Ed25519, \
+    ValidationAlg_EcdsaP256, ValidationAlg_HmacSha256
 
 
 class ValidationAlgTest(CcnpyTestCase):
@@ -59,3 +60,35 @@ class ValidationAlgTest(CcnpyTestCase):
         tlv = Tlv.deserialize(wire_format)
         actual = ValidationAlg.parse(tlv)
         self.assertEqual(expected, actual)
+
+    def test_ec_serialize_deserialize(self):
+        keyid = HashValue.create_sha256(b'abc')
+        sigtime = SignatureTime.parse(Tlv(SignatureTime.class_type(), array.array("B", [0, 0, 2, 3, 4, 5, 6, 7])))
+        for alg_class, alg_type in [(ValidationAlg_Ed25519, 0x1001), (ValidationAlg_EcdsaP256, 0x1002)]:
+            va = alg_class(keyid=keyid, signature_time=sigtime)
+            wire_format = va.serialize()
+            expected = array.array("B", [0,  3, 0, 27,
+                                         alg_type >> 8, alg_type & 0xFF, 0, 23,
+                                         0,  9, 0,  7, 0, 1, 0, 3, 97, 98, 99,
+                                         0, 15, 0,  8, 0, 0, 2, 3, 4, 5, 6, 7])
+            self.assertEqual(expected, wire_format)
+            actual = ValidationAlg.parse(Tlv.deserialize(wire_format))
+            self.assertIsInstance(actual, alg_class)
+            self.assertEqual(va, actual)
+            # same fields, different algorithm
+            self.assertNotEqual(ValidationAlg_RsaSha256(keyid=keyid, signature_time=sigtime), actual)
+
+    def test_hmacsha256_serialize_deserialize(self):
+        keyid = HashValue.create_sha256(b'abc')
+        sigtime = SignatureTime.parse(Tlv(SignatureTime.class_type(), array.array("B", [0, 0, 2, 3, 4, 5, 6, 7])))
+        va = ValidationAlg_HmacSha256(keyid=keyid, signature_time=sigtime)
+        wire_format = va.serialize()
+        expected = array.array("B", [0,  3, 0, 27,
+                                     0,  3, 0, 23,
+                                     0,  9, 0,  7, 0, 1, 0, 3, 97, 98, 99,
+                                     0, 15, 0,  8, 0, 0, 2, 3, 4, 5, 6, 7])
+        self.assertEqual(expected, wire_format)
+        actual = ValidationAlg.parse(Tlv.deserialize(wire_format))
+        self.assertIsInstance(actual, ValidationAlg_HmacSha256)
+        self.assertEqual(va, actual)
+        self.assertNotEqual(ValidationAlg_RsaSha256(keyid=keyid, signature_time=sigtime), actual)
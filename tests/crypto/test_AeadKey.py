@@ -39,3 +39,26 @@ class AeadKeyTest(CcnpyTestCase):
     def test_ccm_encrypt_decrypt(self):
         key = AeadCcm(aes_key)
         self._aead(key, 12)
+
+    def test_buffer_types(self):
+        key = AeadGcm(aes_key)
+        iv = key.nonce()
+        buffer = b'somewhere over the rainbow'
+        aad = b'way up high'
+        expected = key.encrypt(iv=iv, plaintext=array.array("B", buffer), associated_data=array.array("B", aad))
+        for convert in (bytes, bytearray, memoryview):
+            (c, a) = key.encrypt(iv=convert(iv), plaintext=convert(buffer), associated_data=convert(aad))
+            self.assertIsInstance(c, array.array)
+            self.assertEqual(expected, (c, a))
+            plaintext = key.decrypt(iv=convert(iv), ciphertext=convert(c.tobytes()), associated_data=convert(aad), auth_tag=convert(a.tobytes()))
+            self.assertEqual(array.array("B", buffer), plaintext)
+
+    def test_without_output_buffer(self):
+        # a backend without encrypt_into/decrypt_into gives the same result
+        key = AeadGcm(aes_key)
+        iv = key.nonce()
+        buffer = array.array("B", b'somewhere over the rainbow')
+        (c, a) = key.encrypt(iv=iv, plaintext=buffer, associated_data=None)
+        key._has_into = False
+        self.assertEqual((c, a), key.encrypt(iv=iv, plaintext=buffer, associated_data=None))
+        self.assertEqual(buffer, key.decrypt(iv=iv, ciphertext=c, associated_data=None, auth_tag=a))
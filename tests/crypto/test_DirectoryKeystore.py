@@ -0,0 +1,121 @@
+#  Copyright 2024 Marc Mosko
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+import json
+import os
+import tempfile
+from array import array
+
+from ccnpy.core.ContentObject import ContentObject
+from ccnpy.core.HashValue import HashValue
+from ccnpy.core.Name import Name
+from ccnpy.core.Packet import Packet
+from ccnpy.core.PacketValidator import PacketValidator
+from ccnpy.crypto.AeadKey import AeadGcm
+from ccnpy.crypto.DirectoryKeystore import DirectoryKeystore
+from ccnpy.crypto.EcKey import EcKey
+from ccnpy.crypto.Ed25519 import Ed25519Signer
+from ccnpy.crypto.HmacKey import HmacKey
+from ccnpy.crypto.InsecureKeystore import KeyIdNotFoundError, KeyNumberNotFoundError
+from ccnpy.crypto.RsaKey import RsaKey
+from ccnpy.flic.aeadctx.AeadImpl import AeadImpl
+from ccnpy.flic.aeadctx.AeadParameters import AeadParameters
+from ccnpy.flic.tlvs.HashGroup import HashGroup
+from ccnpy.flic.tlvs.KeyNumber import KeyNumber
+from ccnpy.flic.tlvs.Node import Node
+from ccnpy.flic.tlvs.Pointers import Pointers
+from ccnpy.flic.tree.DecryptorCache import DecryptorCache
+from tests.MockKeys import private_key_pem, aes_key
+from tests.ccnpy_testcase import CcnpyTestCase
+
+
+class DirectoryKeystoreTest(CcnpyTestCase):
+    password = b'secret'
+
+    def setUp(self):
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.rsa_key = RsaKey(private_key_pem)
+        self.rsa_key.save_private_key(self._path('publisher.pem'), self.password)
+        self.ec_key = EcKey.generate_ed25519()
+        self.ec_key.save_private_key(self._path('signer.pem'), self.password)
+        self.hmac_key = HmacKey.generate()
+        with open(self._path('mac.hmac'), 'w') as f:
+            f.write(self.hmac_key.key().hex())
+        with open(self._path('content.aes'), 'w') as f:
+            json.dump({'key': aes_key.tobytes().hex(), 'key_number': 77, 'aead_salt': 0x01020304}, f)
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+    def _path(self, filename):
+        return os.path.join(self.test_dir.name, filename)
+
+    def test_lazy_load(self):
+        keystore = DirectoryKeystore(self.test_dir.name, password=self.password)
+        self.assertTrue(os.path.exists(self._path(DirectoryKeystore.INDEX_FILENAME)))
+        self.assertEqual(4, len(keystore.files()))
+        self.assertEqual(0, keystore.misses)
+
+        self.assertEqual(self.rsa_key.keyid(), keystore.get_rsa('publisher').keyid())
+        self.assertEqual(self.rsa_key.keyid(), keystore.get_rsa(self.rsa_key.keyid()).keyid())
+        self.assertEqual(self.ec_key.keyid(), keystore.get_ec(self.ec_key.keyid()).keyid())
+        self.assertEqual(self.hmac_key.key(), keystore.get_hmac(self.hmac_key.keyid()).key())
+        self.assertEqual(0x01020304, keystore.get_aes_key(KeyNumber(77)).aead_salt)
+        self.assertEqual(4, keystore.misses)
+        self.assertEqual(1, keystore.hits)
+
+        with self.assertRaises(KeyIdNotFoundError):
+            keystore.get_rsa(HashValue.create_sha256(array('B', [1] * 32)))
+        with self.assertRaises(KeyIdNotFoundError):
+            # an HMAC key is not an asymmetric key
+            keystore.get_rsa(self.hmac_key.keyid())
+        with self.assertRaises(KeyIdNotFoundError):
+            # nor is an EC key an RSA key
+            keystore.get_rsa(self.ec_key.keyid())
+        with self.assertRaises(KeyNumberNotFoundError):
+            keystore.get_aes_key(KeyNumber(78))
+
+    def test_lru(self):
+        keystore = DirectoryKeystore(self.test_dir.name, password=self.password, max_loaded=1)
+        keystore.get_rsa('publisher')
+        keystore.get_ec('signer')
+        keystore.get_rsa('publisher')
+        self.assertEqual(3, keystore.misses)
+        self.assertEqual(2, keystore.evictions)
+
+    def test_preload(self):
+        keystore = DirectoryKeystore(self.test_dir.name, password=self.password, preload=True)
+        self.assertEqual(4, keystore.misses)
+        keystore.get_rsa('publisher')
+        keystore.get_aes_key(KeyNumber(77))
+        self.assertEqual(2, keystore.hits)
+
+    def test_packet_validator(self):
+        signer = Ed25519Signer(self.ec_key)
+        body = ContentObject.create_data(name=Name.from_uri('ccnx:/a'), payload=b'hello')
+        validation_alg = signer.validation_alg()
+        payload = signer.sign(body.serialize(), validation_alg.serialize())
+        packet = Packet.deserialize(Packet.create_signed_content_object(body, validation_alg, payload).serialize())
+
+        validator = PacketValidator(DirectoryKeystore(self.test_dir.name, password=self.password))
+        validator.validate_packet(packet)
+        self.assertEqual(1, validator.validations)
+
+    def test_decryptor_cache(self):
+        params = AeadParameters(key=AeadGcm(aes_key), key_number=77, aead_salt=0x01020304)
+        node = Node(hash_groups=[HashGroup(pointers=Pointers([HashValue.create_sha256(array('B', [1, 2]))]))])
+        manifest = AeadImpl(params).create_encrypted_manifest(node)
+
+        cache = DecryptorCache(DirectoryKeystore(self.test_dir.name, password=self.password))
+        decryptor = cache.get_or_create(manifest.security_ctx())
+        self.assertEqual(node, decryptor.decrypt_manifest(manifest).node())
@@ -0,0 +1,127 @@
+#  Copyright 2024 Marc Mosko
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+from ccnpy.core.ContentObject import ContentObject
+from ccnpy.core.Name import Name
+from ccnpy.core.Packet import Packet
+from ccnpy.core.PacketValidator import PacketValidator
+from ccnpy.core.ValidationAlg import ValidationAlg_Ed25519, ValidationAlg_EcdsaP256
+from ccnpy.crypto.EcKey import EcKey
+from ccnpy.crypto.EcdsaP256 import EcdsaP256Signer, EcdsaP256Verifier
+from ccnpy.crypto.Ed25519 import Ed25519Signer, Ed25519Verifier
+from ccnpy.crypto.InsecureKeystore import InsecureKeystore, KeyIdNotFoundError
+from ccnpy.crypto.RsaKey import RsaKey
+from tests.MockKeys import private_key_pem
+from tests.ccnpy_testcase import CcnpyTestCase
+
+
+class EcKeyTest(CcnpyTestCase):
+    vectors = [b'the quick brown fox',
+               b'The quick brown fox jumps over the lazy dog',
+               b'abcdefg']
+
+    def _sign_verify(self, private_key: EcKey, signer_class, verifier_class):
+        public_key = EcKey(private_key.public_key_pem())
+        self.assertFalse(public_key.has_private_key())
+        self.assertEqual(private_key.keyid(), public_key.keyid())
+
+        signer = signer_class(private_key)
+        verifier = verifier_class(public_key)
+        for buffer in self.vectors:
+            # signing several buffers is the same as signing their concatenation
+            signature = signer.sign(buffer[:5], buffer[5:])
+            self.assertTrue(verifier.verify(buffer, validation_payload=signature), buffer)
+            self.assertFalse(verifier.verify(buffer + b'x', validation_payload=signature), buffer)
+
+    def test_ed25519(self):
+        key = EcKey.generate_ed25519()
+        self.assertEqual(EcKey.ED25519, key.algorithm())
+        self._sign_verify(key, Ed25519Signer, Ed25519Verifier)
+        self.assertEqual(64, len(key.sign(b'abc')))
+
+    def test_ecdsa_p256(self):
+        key = EcKey.generate_p256()
+        self.assertEqual(EcKey.ECDSA_P256, key.algorithm())
+        self._sign_verify(key, EcdsaP256Signer, EcdsaP256Verifier)
+
+    def test_wrong_algorithm(self):
+        with self.assertRaises(TypeError):
+            Ed25519Signer(EcKey.generate_p256())
+        with self.assertRaises(TypeError):
+            EcdsaP256Verifier(EcKey.generate_ed25519())
+        with self.assertRaises(TypeError):
+            EcKey(private_key_pem)
+
+    def test_encrypted_pem(self):
+        key = EcKey.generate_ed25519()
+        pem = key.private_key_pem(password=b'secret')
+        loaded = EcKey(pem, password=b'secret')
+        self.assertTrue(loaded.has_private_key())
+        self.assertEqual(key.keyid(), loaded.keyid())
+
+    def test_packet_validator(self):
+        body = ContentObject.create_data(name=Name.from_uri('ccnx:/a'), payload=b'hello')
+        rsa_key = RsaKey(private_key_pem)
+        for key, signer_class, alg_class in [(EcKey.generate_ed25519(), Ed25519Signer, ValidationAlg_Ed25519),
+                                             (EcKey.generate_p256(), EcdsaP256Signer, ValidationAlg_EcdsaP256)]:
+            signer = signer_class(key)
+            validation_alg = signer.validation_alg()
+            self.assertIsInstance(validation_alg, alg_class)
+            payload = signer.sign(body.serialize(), validation_alg.serialize())
+            packet = Packet.deserialize(Packet.create_signed_content_object(body, validation_alg, payload).serialize())
+
+            keystore = InsecureKeystore().add_ec_key('signer', EcKey(key.public_key_pem())).add_rsa_key('rsa', rsa_key)
+            validator = PacketValidator(keystore)
+            validator.validate_packet(packet)
+            self.assertEqual(1, validator.validations)
+
+            bad_payload = signer.sign(b'something else')
+            bad_packet = Packet.create_signed_content_object(body, validation_alg, bad_payload)
+            with self.assertRaises(ValueError):
+                validator.validate_packet(bad_packet)
+
+    def test_keystore_indexes(self):
+        """EC and RSA keys are looked up separately"""
+        ec_key = EcKey.generate_ed25519()
+        rsa_key = RsaKey(private_key_pem)
+        keystore = InsecureKeystore().add_ec_key('ec', ec_key).add_rsa_key('rsa', rsa_key)
+        self.assertIs(ec_key, keystore.get_ec(ec_key.keyid()))
+        self.assertIs(ec_key, keystore.get_ec('ec'))
+        self.assertIs(rsa_key, keystore.get_rsa(rsa_key.keyid()))
+        with self.assertRaises(KeyIdNotFoundError):
+            keystore.get_rsa(ec_key.keyid())
+        with self.assertRaises(KeyIdNotFoundError):
+            keystore.get_rsa('ec')
+        with self.assertRaises(KeyIdNotFoundError):
+            keystore.get_ec(rsa_key.keyid())
+
+    def test_packet_validator_key_mismatch(self):
+        """An ECDSA-P256 packet whose KeyId names an Ed25519 key fails validation"""
+        key = EcKey.generate_ed25519()
+        body = ContentObject.create_data(name=Name.from_uri('ccnx:/a'), payload=b'hello')
+        validation_alg = ValidationAlg_EcdsaP256(keyid=key.keyid())
+        payload = Ed25519Signer(key).sign(body.serialize(), validation_alg.serialize())
+        packet = Packet.create_signed_content_object(body, validation_alg, payload)
+        validator = PacketValidator(InsecureKeystore().add_ec_key('signer', EcKey(key.public_key_pem())))
+        with self.assertRaises(ValueError):
+            validator.validate_packet(packet)
+        self.assertEqual(0, validator.validations)
+
+    def test_is_ec_pem(self):
+        pem = EcKey.generate_p256().private_key_pem(password=b'secret')
+        self.assertTrue(EcKey.is_ec_pem(pem, b'secret'))
+        self.assertTrue(EcKey.is_ec_pem(EcKey.generate_ed25519().public_key_pem()))
+        self.assertFalse(EcKey.is_ec_pem(private_key_pem))
+        # a password error is not mistaken for a non-EC key
+        with self.assertRaises(ValueError):
+            EcKey.is_ec_pem(pem, b'wrong')
@@ -0,0 +1,127 @@
+#  Copyright 2024 Marc Mosko
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+import io
+import os
+from array import array
+
+from ccnpy.core.ContentObject import ContentObject
+from ccnpy.core.Name import Name
+from ccnpy.core.Packet import Packet
+from ccnpy.apps.packet_utils import validate_packet
+from ccnpy.core.PacketValidator import PacketValidator
+from ccnpy.core.ValidationAlg import ValidationAlg_HmacSha256
+from ccnpy.crypto.HmacKey import HmacKey
+from ccnpy.crypto.HmacSha256 import HmacSha256Signer, HmacSha256Verifier
+from ccnpy.crypto.InsecureKeystore import InsecureKeystore, KeyIdNotFoundError
+from ccnpy.flic.ManifestTree import ManifestTree
+from ccnpy.flic.ManifestTreeOptions import ManifestTreeOptions
+from ccnpy.flic.name_constructor.SchemaType import SchemaType
+from ccnpy.flic.tree.Traversal import Traversal
+from ccnpy.flic.tree.TreeIO import TreeIO
+from tests.ccnpy_testcase import CcnpyTestCase
+
+
+class HmacSha256Test(CcnpyTestCase):
+
+    def test_rfc4231_vector(self):
+        # RFC 4231 test case 2
+        key = HmacKey(b'Jefe')
+        expected = bytes.fromhex('5bdcc146bf60754e6a042426089575c75a003f089d2739839dec58b964ec3843')
+        self.assertEqual(expected, key.sign(b'what do ya want ', b'for nothing?'))
+        self.assertTrue(key.verify(b'what do ya want for nothing?', signature=expected))
+        self.assertFalse(key.verify(b'what do ya want for nothing!', signature=expected))
+
+    def test_sign_verify(self):
+        key = HmacKey.generate()
+        self.assertEqual(256, len(key))
+        signer = HmacSha256Signer(key)
+        verifier = HmacSha256Verifier(HmacKey(key.key()))
+        buffer = array('B', b'The quick brown fox jumps over the lazy dog')
+        payload = signer.sign(buffer[:10], buffer[10:])
+        self.assertEqual(HmacKey.SIGNATURE_LENGTH, len(payload.payload()))
+        self.assertTrue(verifier.verify(buffer, validation_payload=payload))
+        self.assertFalse(HmacSha256Verifier(HmacKey.generate()).verify(buffer, validation_payload=payload))
+
+    def test_validation_alg(self):
+        signer = HmacSha256Signer(HmacKey.generate())
+        validation_alg = signer.validation_alg()
+        self.assertIsInstance(validation_alg, ValidationAlg_HmacSha256)
+        self.assertEqual(signer.keyid(), validation_alg.keyid())
+        with self.assertRaises(ValueError):
+            signer.validation_alg(include_public_key=True)
+
+    def test_keystore(self):
+        key = HmacKey.generate()
+        keystore = InsecureKeystore().add_hmac_key(key)
+        self.assertEqual(key, keystore.get_hmac(key.keyid()))
+        with self.assertRaises(KeyIdNotFoundError):
+            keystore.get_hmac(HmacKey.generate().keyid())
+
+    def test_packet_validator(self):
+        key = HmacKey.generate()
+        signer = HmacSha256Signer(key)
+        body = ContentObject.create_data(name=Name.from_uri('ccnx:/a'), payload=b'hello')
+        validation_alg = signer.validation_alg()
+        payload = signer.sign(body.serialize(), validation_alg.serialize())
+        packet = Packet.deserialize(Packet.create_signed_content_object(body, validation_alg, payload).serialize())
+        self.assertIsInstance(packet.validation_alg(), ValidationAlg_HmacSha256)
+
+        validator = PacketValidator(InsecureKeystore().add_hmac_key(key))
+        validator.validate_packet(packet)
+        self.assertEqual(1, validator.validations)
+
+        bad_packet = Packet.create_signed_content_object(body, validation_alg, signer.sign(b'something else'))
+        with self.assertRaises(ValueError):
+            validator.validate_packet(bad_packet)
+
+        # Without the key (or any keystore), the packet fails validation
+        for validator in [PacketValidator(InsecureKeystore().add_hmac_key(HmacKey.generate())), PacketValidator(None)]:
+            with self.assertRaises(ValueError):
+                validator.validate_packet(packet)
+            self.assertEqual(0, validator.validations)
+
+    def test_validate_packet_unknown_keyid(self):
+        """The packet_reader's validate_packet() fails a packet it cannot verify"""
+        key = HmacKey.generate()
+        signer = HmacSha256Signer(key)
+        body = ContentObject.create_data(name=Name.from_uri('ccnx:/a'), payload=b'hello')
+        validation_alg = signer.validation_alg()
+        packet = Packet.create_signed_content_object(body, validation_alg, signer.sign(body.serialize(), validation_alg.serialize()))
+        validate_packet(InsecureKeystore().add_hmac_key(key), packet)
+        with self.assertRaises(KeyIdNotFoundError):
+            validate_packet(InsecureKeystore(), packet)
+        with self.assertRaises(ValueError):
+            validate_packet(None, packet)
+
+    def test_manifest_tree(self):
+        """
+        With a `packet_signer`, every data object and manifest is authenticated and packets still fit `max_packet_size`.
+        """
+        key = HmacKey.generate()
+        data = os.urandom(20000)
+        tree_options = ManifestTreeOptions(name=Name.from_uri('ccnx:/hmac'), schema_type=SchemaType.HASHED,
+                                           signer=None, packet_signer=HmacSha256Signer(key), max_packet_size=500)
+        packet_buffer = TreeIO.PacketMemoryWriter()
+        root_packet = ManifestTree(data_input=io.BytesIO(data), packet_output=packet_buffer, tree_options=tree_options).build()
+
+        for packet in packet_buffer:
+            self.assertIsInstance(packet.validation_alg(), ValidationAlg_HmacSha256)
+            self.assertLessEqual(len(packet), tree_options.max_packet_size)
+
+        buffer = TreeIO.DataBuffer()
+        validator = PacketValidator(InsecureKeystore().add_hmac_key(key))
+        traversal = Traversal(packet_input=packet_buffer, data_writer=buffer, validator=validator)
+        traversal.traverse(root_name=root_packet.body().name(), hash_restriction=root_packet.content_object_hash())
+        self.assertEqual(data, bytes(buffer.buffer))
+        self.assertEqual(len(packet_buffer), validator.validations)
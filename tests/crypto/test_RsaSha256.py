@@ -15,6 +15,11 @@
 
 from tests.ccnpy_testcase import CcnpyTestCase
 
+from ccnpy.core.ContentObject import ContentObject
+from ccnpy.core.Name import Name
+from ccnpy.core.Packet import Packet
+from ccnpy.core.PacketValidator import PacketValidator
+from ccnpy.crypto.InsecureKeystore import InsecureKeystore
 from ccnpy.crypto.RsaKey import RsaKey
 from ccnpy.crypto.RsaSha256 import RsaSha256Signer, RsaSha256Verifier
 from tests.MockKeys import private_key_pem, public_key_pem
@@ -39,3 +44,19 @@ class RsaSha256SignerTest(CcnpyTestCase):
             signature = signer.sign(buffer)
             result = verifier.verify(buffer, validation_payload=signature)
             self.assertTrue(result, buffer)
+
+    def test_packet_validator_unknown_keyid(self):
+        signer = RsaSha256Signer(RsaKey(private_key_pem))
+        body = ContentObject.create_data(name=Name.from_uri('ccnx:/a'), payload=b'hello')
+        validation_alg = signer.validation_alg()
+        packet = Packet.create_signed_content_object(body, validation_alg, signer.sign(body.serialize(), validation_alg.serialize()))
+
+        validator = PacketValidator(InsecureKeystore().add_rsa_key('signer', RsaKey(public_key_pem)))
+        validator.validate_packet(packet)
+        self.assertEqual(1, validator.validations)
+
+        # A key that is not in the keystore is a validation failure, not a skipped check
+        validator = PacketValidator(InsecureKeystore())
+        with self.assertRaises(ValueError):
+            validator.validate_packet(packet)
+        self.assertEqual(0, validator.validations)
@@ -0,0 +1,107 @@
+#  Copyright 2024 Marc Mosko
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+from array import array
+from unittest import mock
+
+from ccnpy.core.HashValue import HashValue
+from ccnpy.crypto.AeadKey import AeadGcm
+from ccnpy.crypto.DecryptionError import DecryptionError
+from ccnpy.flic.aeadctx.AeadImpl import AeadImpl
+from ccnpy.flic.aeadctx.AeadParameters import AeadParameters
+from ccnpy.flic.aeadctx.DerivedKeyCache import DerivedKeyCache
+from ccnpy.flic.tlvs.KdfData import KdfData
+from ccnpy.flic.tlvs.KdfInfo import KdfInfo
+from ccnpy.flic.tlvs.KeyNumber import KeyNumber
+from ccnpy.flic.tlvs.HashGroup import HashGroup
+from ccnpy.flic.tlvs.Node import Node
+from ccnpy.flic.tlvs.Pointers import Pointers
+from tests.MockKeys import aes_key
+from tests.ccnpy_testcase import CcnpyTestCase
+
+
+class DerivedKeyCacheTest(CcnpyTestCase):
+
+    @staticmethod
+    def _params(info: bytes = b'publisher', key_number: int = 55) -> AeadParameters:
+        return AeadParameters(key=AeadGcm(aes_key), key_number=key_number,
+                              kdf_data=KdfData.create_hkdf_sha256(KdfInfo(info)), kdf_salt=0x030609)
+
+    @staticmethod
+    def _node() -> Node:
+        return Node(hash_groups=[HashGroup(pointers=Pointers([HashValue.create_sha256(array('B', [1, 2]))]))])
+
+    @classmethod
+    def _encrypt_decrypt(cls, impl: AeadImpl) -> Node:
+        node = cls._node()
+        security_ctx, encrypted_node, auth_tag = impl.encrypt(node)
+        return impl.decrypt_node(security_ctx=security_ctx, encrypted_node=encrypted_node, auth_tag=auth_tag)
+
+    def test_shared_between_instances(self):
+        cache = DerivedKeyCache()
+        for _ in range(5):
+            self._encrypt_decrypt(AeadImpl(self._params(), key_cache=cache))
+        self.assertEqual(1, cache.misses)
+        self.assertEqual(9, cache.hits)
+        self.assertEqual(1, len(cache))
+
+    def test_kdf_info_is_part_of_key(self):
+        cache = DerivedKeyCache()
+        self._encrypt_decrypt(AeadImpl(self._params(b'a'), key_cache=cache))
+        self._encrypt_decrypt(AeadImpl(self._params(b'b'), key_cache=cache))
+        self.assertEqual(2, len(cache))
+        self.assertEqual(2, cache.misses)
+
+    def test_uses_derived_key(self):
+        impl = AeadImpl(self._params(), key_cache=DerivedKeyCache())
+        security_ctx, encrypted_node, auth_tag = impl.encrypt(self._node())
+        # the pre-shared key alone cannot decrypt it
+        plain = AeadImpl(AeadParameters(key=AeadGcm(aes_key), key_number=55))
+        with self.assertRaises(DecryptionError):
+            plain.decrypt_node(security_ctx=security_ctx, encrypted_node=encrypted_node, auth_tag=auth_tag)
+        self.assertEqual(self._node(), impl.decrypt_node(security_ctx=security_ctx, encrypted_node=encrypted_node, auth_tag=auth_tag))
+        self.assertEqual(0, impl.legacy_decryptions)
+
+    def test_decrypts_legacy_manifest(self):
+        """A manifest from before the KDF was applied has KdfData but is encrypted with the pre-shared key"""
+        impl = AeadImpl(self._params(), key_cache=DerivedKeyCache())
+        with mock.patch.object(AeadImpl, '_cipher_key', autospec=True, side_effect=lambda self: self._params.key):
+            security_ctx, encrypted_node, auth_tag = impl.encrypt(self._node())
+        self.assertEqual(self._node(), impl.decrypt_node(security_ctx=security_ctx, encrypted_node=encrypted_node, auth_tag=auth_tag))
+        self.assertEqual(1, impl.legacy_decryptions)
+
+        # and a wrong key still fails
+        other = AeadImpl(AeadParameters(key=AeadGcm(bytes(16)), key_number=55, kdf_data=KdfData.create_hkdf_sha256(KdfInfo(b'publisher')),
+                                        kdf_salt=0x030609))
+        with self.assertRaises(DecryptionError):
+            other.decrypt_node(security_ctx=security_ctx, encrypted_node=encrypted_node, auth_tag=auth_tag)
+
+    def test_disabled(self):
+        cache = DerivedKeyCache(max_entries=0)
+        self._encrypt_decrypt(AeadImpl(self._params(), key_cache=cache))
+        self.assertEqual(0, len(cache))
+        self.assertEqual(2, cache.misses)
+        self.assertGreater(cache.derive_seconds, 0)
+
+    def test_evicts_and_invalidates(self):
+        cache = DerivedKeyCache(max_entries=2)
+        for info in [b'a', b'b', b'c']:
+            self._encrypt_decrypt(AeadImpl(self._params(info), key_cache=cache))
+        self.assertEqual(2, len(cache))
+        self.assertEqual(1, cache.evictions)
+
+        self._encrypt_decrypt(AeadImpl(self._params(b'd', key_number=7), key_cache=cache))
+        cache.invalidate(KeyNumber(55))
+        self.assertEqual(1, len(cache))
+        cache.invalidate()
+        self.assertEqual(0, len(cache))
@@ -0,0 +1,145 @@
+#  Copyright 2024 Marc Mosko
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+import gc
+import json
+import os
+import tempfile
+from array import array
+
+from ccnpy.core.HashValue import HashValue
+from ccnpy.crypto.AeadKey import AeadGcm
+from ccnpy.flic.aeadctx.AeadImpl import AeadImpl
+from ccnpy.flic.aeadctx.AeadParameters import AeadParameters
+from ccnpy.flic.aeadctx.NonceSource import RandomNonceSource, CounterNonceSource, DeterministicNonceSource
+from ccnpy.flic.tlvs.HashGroup import HashGroup
+from ccnpy.flic.tlvs.Node import Node
+from ccnpy.flic.tlvs.Pointers import Pointers
+from tests.MockKeys import aes_key
+from tests.ccnpy_testcase import CcnpyTestCase
+
+
+class NonceSourceTest(CcnpyTestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.state_path = os.path.join(self.test_dir.name, 'nonce.json')
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+    @staticmethod
+    def _node() -> Node:
+        return Node(hash_groups=[HashGroup(pointers=Pointers([HashValue.create_sha256(array('B', [1, 2]))]))])
+
+    def test_random(self):
+        source = RandomNonceSource(batch_size=4)
+        nonces = [source.next(96).tobytes() for _ in range(10)]
+        self.assertTrue(all(len(n) == 12 for n in nonces))
+        self.assertEqual(10, len(set(nonces)))
+        self.assertEqual(10, source.count)
+
+    def test_budget(self):
+        source = RandomNonceSource(max_nonces=2)
+        source.next(96)
+        source.next(96)
+        self.assertEqual(0, source.remaining())
+        with self.assertRaises(RuntimeError):
+            source.next(96)
+
+    def test_salted_counter(self):
+        params = AeadParameters(key=AeadGcm(aes_key), key_number=1, aead_salt=0x01020304)
+        impl = AeadImpl(params, nonce_source=CounterNonceSource(start=7))
+        for expected in [7, 8]:
+            security_ctx, encrypted_node, auth_tag = impl.encrypt(self._node())
+            self.assertEqual(expected.to_bytes(8, byteorder='big'), security_ctx.nonce().value().tobytes())
+            self.assertEqual(self._node(), impl.decrypt_node(security_ctx, encrypted_node, auth_tag))
+
+        with self.assertRaises(ValueError):
+            # a 32-bit nonce is shorter than the counter
+            CounterNonceSource().next(32)
+
+    def test_counter_persists(self):
+        source = CounterNonceSource(state_path=self.state_path, reserve=10)
+        first = [source.next(64).tobytes() for _ in range(3)]
+        self.assertEqual(10, source.high_water_mark())
+
+        # A new run resumes after the reserved block, even though only 3 were used
+        source = CounterNonceSource(state_path=self.state_path, reserve=10)
+        second = [source.next(64).tobytes() for _ in range(12)]
+        self.assertEqual(10, int.from_bytes(second[0], byteorder='big'))
+        self.assertEqual(30, source.high_water_mark())
+        self.assertEqual(15, len(set(first + second)))
+
+    def test_counter_state_key(self):
+        """A nonce state file is tied to the key that used it"""
+        params = AeadParameters(key=AeadGcm(aes_key), key_number=1, aead_salt=0x01020304)
+        AeadImpl(params, nonce_source=CounterNonceSource(state_path=self.state_path)).encrypt(self._node())
+        with open(self.state_path, 'r') as f:
+            saved = json.load(f)
+        self.assertEqual(1, saved['key_number'])
+        self.assertEqual(CounterNonceSource.key_fingerprint(aes_key), saved['key_fingerprint'])
+
+        # the same key continues
+        AeadImpl(params, nonce_source=CounterNonceSource(state_path=self.state_path))
+        other_key = AeadGcm(bytes(range(16)))
+        for other in [AeadParameters(key=other_key, key_number=1, aead_salt=0x01020304),
+                      AeadParameters(key=AeadGcm(aes_key), key_number=2, aead_salt=0x01020304)]:
+            with self.assertRaises(ValueError):
+                AeadImpl(other, nonce_source=CounterNonceSource(state_path=self.state_path))
+
+    def test_one_key_per_source(self):
+        source = RandomNonceSource()
+        AeadImpl(AeadParameters(key=AeadGcm(aes_key), key_number=1), nonce_source=source)
+        AeadImpl(AeadParameters(key=AeadGcm(aes_key), key_number=1), nonce_source=source)
+        with self.assertRaises(ValueError):
+            AeadImpl(AeadParameters(key=AeadGcm(bytes(range(16))), key_number=1), nonce_source=source)
+
+    def test_default_budget_is_per_key(self):
+        """Instances without their own source share one per key, so the budget is not reset per instance"""
+        params = AeadParameters(key=AeadGcm(aes_key), key_number=1)
+        impl1 = AeadImpl(params)
+        impl1.encrypt(self._node())
+        impl2 = AeadImpl(AeadParameters(key=AeadGcm(aes_key), key_number=1))
+        self.assertIs(impl1.nonce_source(), impl2.nonce_source())
+        count = impl2.nonce_source().count
+        impl2.encrypt(self._node())
+        self.assertEqual(count + 1, impl1.nonce_source().count)
+        self.assertIsNot(impl1.nonce_source(), AeadImpl(AeadParameters(key=AeadGcm(bytes(range(16))), key_number=1)).nonce_source())
+
+    def test_default_source_only_for_encryption(self):
+        """Decrypting does not create a shared nonce source, and an unused one is not kept"""
+        params = AeadParameters(key=AeadGcm(bytes(range(32, 48))), key_number=7)
+        manifest = AeadImpl(params).create_encrypted_manifest(self._node())
+        gc.collect()
+        sources = len(AeadImpl._default_nonce_sources)
+        # e.g. the decryptors a DecryptorCache creates for many keys
+        decryptors = [AeadImpl(AeadParameters(key=AeadGcm(bytes([i] * 16)), key_number=i)) for i in range(10)]
+        decryptors.append(AeadImpl(params))
+        decryptors[-1].decrypt_manifest(manifest)
+        self.assertEqual(sources, len(AeadImpl._default_nonce_sources))
+
+        encryptor = AeadImpl(params)
+        encryptor.encrypt(self._node())
+        self.assertEqual(sources + 1, len(AeadImpl._default_nonce_sources))
+        del encryptor
+        gc.collect()
+        self.assertEqual(sources, len(AeadImpl._default_nonce_sources))
+
+    def test_deterministic(self):
+        params = AeadParameters(key=AeadGcm(aes_key), key_number=1)
+        m1 = AeadImpl(params, nonce_source=DeterministicNonceSource(seed=42)).create_encrypted_manifest(self._node())
+        m2 = AeadImpl(params, nonce_source=DeterministicNonceSource(seed=42)).create_encrypted_manifest(self._node())
+        m3 = AeadImpl(params, nonce_source=DeterministicNonceSource(seed=43)).create_encrypted_manifest(self._node())
+        self.assertEqual(m1.serialize(), m2.serialize())
+        self.assertNotEqual(m1.serialize(), m3.serialize())
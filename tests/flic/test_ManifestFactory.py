@@ -196,3 +196,27 @@ class ManiestFactoryTest(CcnpyTestCase):
 
         self.assertEqual(node, actual_manifest.node())
 
+    def test_build_packets_in_order(self):
+        key = AeadGcm(array("B", 16 * [1]).tobytes())
+        encryptor = AeadEncryptor(AeadParameters(key=key, key_number=99))
+        factory = ManifestFactory(self._create_options(manifest_encryptor=encryptor, encryption_workers=4))
+        self.assertTrue(factory.is_parallel())
+
+        nodes = [Node(hash_groups=[HashGroup(pointers=Pointers([HashValue.create_sha256(array("B", [i]))]))]) for i in range(20)]
+        names = [Name.from_uri(f'ccnx:/a/{i}') for i in range(20)]
+        return_values = factory.build_packets(nodes=nodes, names=names)
+        factory.close()
+
+        self.assertEqual(20, factory.cnt_manifests)
+        decryptor = AeadDecryptor(AeadParameters(key=key, key_number=99))
+        for node, name, rv in zip(nodes, names, return_values):
+            self.assertEqual(node, rv.node)
+            self.assertEqual(name, rv.packet.body().name())
+            self.assertTrue(rv.manifest.is_encrypted())
+            self.assertEqual(node, decryptor.decrypt_manifest(rv.manifest).node())
+
+    def test_build_packets_name_count(self):
+        factory = ManifestFactory(self._create_options())
+        node = Node(hash_groups=[HashGroup(pointers=Pointers([HashValue.create_sha256(array("B", [1]))]))])
+        with self.assertRaises(ValueError):
+            factory.build_packets(nodes=[node, node], names=[None])
@@ -0,0 +1,112 @@
+#  Copyright 2024 Marc Mosko
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+import asyncio
+import threading
+from array import array
+
+from ccnpy.apps.packet_server import PacketServer
+from ccnpy.core.Name import Name
+from ccnpy.flic.ManifestTree import ManifestTree
+from ccnpy.flic.ManifestTreeOptions import ManifestTreeOptions
+from ccnpy.flic.name_constructor.SchemaType import SchemaType
+from ccnpy.flic.tree.AimdWindow import AimdWindow
+from ccnpy.flic.tree.FixedWindow import FixedWindow
+from ccnpy.flic.tree.Traversal import Traversal
+from ccnpy.flic.tree.TreeIO import TreeIO
+from tests.MockReader import MockReader
+from tests.ccnpy_testcase import CcnpyTestCase
+
+
+class AimdWindowTest(CcnpyTestCase):
+
+    def test_slow_start(self):
+        window = AimdWindow(initial=2, maximum=100)
+        for _ in range(6):
+            window.on_response(0.01)
+        self.assertEqual(8, window.window())
+
+    def test_congestion_avoidance(self):
+        window = AimdWindow(initial=4, maximum=100)
+        window.ssthresh = 4
+        for _ in range(5):
+            window.on_response(0.01)
+        # about a window of responses adds one
+        self.assertEqual(5, window.window())
+
+    def test_maximum(self):
+        window = AimdWindow(initial=4, maximum=6)
+        for _ in range(10):
+            window.on_response(None)
+        self.assertEqual(6, window.window())
+        self.assertEqual(0, window.rtt_histogram.count)
+
+    def test_decrease_once_per_rtt(self):
+        window = AimdWindow(initial=16, maximum=100)
+        window.on_response(10.0)
+        window.on_timeout()
+        window.on_timeout()
+        self.assertEqual(8, window.window())
+        self.assertEqual(1, window.decreases)
+        self.assertEqual(2, window.timeouts)
+        self.assertEqual([16, 17, 8], [w for _, w in window.window_history])
+
+    def test_minimum(self):
+        window = AimdWindow(initial=2, minimum=2, maximum=100)
+        window.on_timeout()
+        self.assertEqual(2, window.window())
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            AimdWindow(initial=10, maximum=5)
+        with self.assertRaises(ValueError):
+            AimdWindow(decrease=1.0)
+        with self.assertRaises(ValueError):
+            FixedWindow(0)
+
+    def test_shaped_link(self):
+        """
+        Retrieve from a stand-in server with latency and loss.  The window grows from its initial size
+        and backs off on the losses.
+        """
+        data = array("B", list(range(256)) * 80)
+        packet_buffer = TreeIO.PacketMemoryWriter()
+        tree_options = ManifestTreeOptions(name=Name.from_uri('ccnx:/x'), schema_type=SchemaType.HASHED, signer=None, max_packet_size=500)
+        root = ManifestTree(data_input=MockReader(data.tobytes()), packet_output=packet_buffer, tree_options=tree_options).build()
+
+        loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=loop.run_forever, daemon=True)
+        thread.start()
+        server = PacketServer(packet_input=packet_buffer, latency=0.002, loss=0.05, seed=3)
+        try:
+            port = asyncio.run_coroutine_threadsafe(server.start('127.0.0.1', 0), loop).result(timeout=5)
+            window = AimdWindow(initial=2, maximum=64)
+            reader = TreeIO.PacketNetworkReader(port=port, timeout=0.05, max_retries=20, window=window)
+            buffer = TreeIO.DataBuffer()
+            Traversal(packet_input=reader, data_writer=buffer).traverse(root_name=root.body().name(), hash_restriction=root.content_object_hash())
+            reader.close()
+        finally:
+            asyncio.run_coroutine_threadsafe(server.stop(), loop).result(timeout=5)
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(timeout=5)
+            loop.close()
+
+        self.assertEqual(data, buffer.buffer)
+        metrics = window.metrics()
+        self.assertEqual('AimdWindow', metrics['controller'])
+        self.assertGreater(max(w for _, w in metrics['window_history']), 2)
+        self.assertGreater(metrics['timeouts'], 0)
+        self.assertGreater(metrics['decreases'], 0)
+        self.assertEqual(reader.retransmissions, metrics['retransmissions'])
+        self.assertEqual(reader.rtt_samples, metrics['rtt']['count'])
+        self.assertGreaterEqual(metrics['rtt']['min'], 0.002)
@@ -0,0 +1,52 @@
+#  Copyright 2024 Marc Mosko
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+from ccnpy.flic.tree.ByteRanges import ByteRanges
+from tests.ccnpy_testcase import CcnpyTestCase
+
+
+class ByteRangesTest(CcnpyTestCase):
+
+    def test_merge_adjacent(self):
+        r = ByteRanges()
+        r.add(0, 10)
+        r.add(10, 20)
+        self.assertEqual([(0, 20)], r.to_list())
+
+    def test_merge_overlap_out_of_order(self):
+        r = ByteRanges()
+        r.add(30, 40)
+        r.add(0, 10)
+        r.add(20, 25)
+        self.assertEqual([(0, 10), (20, 25), (30, 40)], r.to_list())
+        r.add(5, 35)
+        self.assertEqual([(0, 40)], r.to_list())
+
+    def test_contains(self):
+        r = ByteRanges([(0, 10), (20, 30)])
+        self.assertTrue(r.contains(0, 10))
+        self.assertTrue(r.contains(22, 25))
+        self.assertFalse(r.contains(5, 25))
+        self.assertFalse(r.contains(30, 31))
+
+    def test_missing(self):
+        r = ByteRanges([(10, 20), (30, 40)])
+        self.assertEqual([(0, 10), (20, 30), (40, 50)], r.missing(50))
+        self.assertEqual([(0, 10), (20, 30)], r.missing(40))
+        self.assertEqual(20, r.total())
+
+    def test_invalid(self):
+        r = ByteRanges()
+        with self.assertRaises(ValueError):
+            r.add(10, 5)
@@ -0,0 +1,165 @@
+#  Copyright 2024 Marc Mosko
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+import threading
+import time
+from array import array
+from typing import Optional
+
+from ccnpy.core.ContentObject import ContentObject
+from ccnpy.core.HashValue import HashValue
+from ccnpy.core.Name import Name
+from ccnpy.core.Packet import Packet, PacketReader
+from ccnpy.flic.ManifestTree import ManifestTree
+from ccnpy.flic.ManifestTreeOptions import ManifestTreeOptions
+from ccnpy.flic.name_constructor.SchemaType import SchemaType
+from ccnpy.flic.tlvs.Locators import Locators
+from ccnpy.flic.tree.CachingPacketReader import CachingPacketReader
+from ccnpy.flic.tree.Traversal import Traversal
+from ccnpy.flic.tree.TreeIO import TreeIO
+from tests.CountingReader import CountingReader
+from tests.MockReader import MockReader
+from tests.ccnpy_testcase import CcnpyTestCase
+
+
+class GatedReader(CountingReader):
+    """A `CountingReader` whose `get()` blocks until `release` is set"""
+    def __init__(self, packet_input: PacketReader):
+        super().__init__(packet_input)
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def get(self, name: Name, hash_restriction: HashValue, locators: Optional[Locators] = None) -> Packet:
+        self.started.set()
+        self.release.wait(timeout=10)
+        return super().get(name=name, hash_restriction=hash_restriction, locators=locators)
+
+
+class CachingPacketReaderTest(CcnpyTestCase):
+
+    @staticmethod
+    def _create_packets(count: int, payload_size: int = 100):
+        writer = TreeIO.PacketMemoryWriter()
+        for i in range(count):
+            payload = array("B", [i % 256] * payload_size)
+            writer.put(Packet.create_content_object(ContentObject.create_data(payload=payload)))
+        return writer
+
+    def test_hit_and_miss(self):
+        writer = self._create_packets(3)
+        backing = CountingReader(TreeIO.PacketMemoryReader(writer))
+        cache = CachingPacketReader(backing, prefetch_workers=0)
+
+        h = writer[0].content_object_hash()
+        self.assertEqual(writer[0], cache.get(name=None, hash_restriction=h))
+        self.assertEqual(writer[0], cache.get(name=None, hash_restriction=h))
+        self.assertEqual(1, backing.count)
+        self.assertEqual(1, cache.hits)
+        self.assertEqual(1, cache.misses)
+        self.assertEqual(0.5, cache.hit_ratio())
+        self.assertEqual(len(writer[0]), cache.bytes_resident)
+
+    def test_evicts_by_bytes(self):
+        writer = self._create_packets(4)
+        packet_len = len(writer[0])
+        backing = CountingReader(TreeIO.PacketMemoryReader(writer))
+        # room for exactly two packets
+        cache = CachingPacketReader(backing, max_bytes=2 * packet_len, prefetch_workers=0)
+        for packet in writer:
+            cache.get(name=None, hash_restriction=packet.content_object_hash())
+
+        self.assertEqual(2, len(cache))
+        self.assertEqual(2, cache.evictions)
+        self.assertEqual(2 * packet_len, cache.bytes_resident)
+        # the least recently used were evicted
+        self.assertNotIn(writer[0].content_object_hash(), cache)
+        self.assertIn(writer[3].content_object_hash(), cache)
+
+    def test_prefetch(self):
+        writer = self._create_packets(10)
+        backing = CountingReader(TreeIO.PacketMemoryReader(writer))
+        cache = CachingPacketReader(backing, prefetch_workers=2)
+        requests = [(None, p.content_object_hash()) for p in writer]
+        cache.prefetch(requests)
+        for _, h in requests:
+            cache.get(name=None, hash_restriction=h)
+        cache.close()
+        # each packet fetched exactly once from the backing store
+        self.assertEqual(10, backing.count)
+        self.assertEqual(10, cache.prefetches)
+
+    def test_fill_is_not_counted(self):
+        writer = self._create_packets(2)
+        backing = CountingReader(TreeIO.PacketMemoryReader(writer))
+        cache = CachingPacketReader(backing, prefetch_workers=0)
+        h = writer[0].content_object_hash()
+        cache.fill(name=None, hash_restriction=h)
+        self.assertIn(h, cache)
+        self.assertEqual(0, cache.hits + cache.misses)
+        cache.get(name=None, hash_restriction=h)
+        self.assertEqual(1, backing.count)
+        self.assertEqual(1.0, cache.hit_ratio())
+
+    def test_get_waits_for_fill(self):
+        """Without prefetch workers, a get() that overlaps a fill() of the same packet does not fetch it again"""
+        writer = self._create_packets(1)
+        backing = GatedReader(TreeIO.PacketMemoryReader(writer))
+        cache = CachingPacketReader(backing, prefetch_workers=0)
+        h = writer[0].content_object_hash()
+        fill = threading.Thread(target=cache.fill, kwargs=dict(name=None, hash_restriction=h))
+        fill.start()
+        self.assertTrue(backing.started.wait(timeout=10))
+
+        result = []
+        get = threading.Thread(target=lambda: result.append(cache.get(name=None, hash_restriction=h)))
+        get.start()
+        # the get() is counted as a miss once it found the fill in flight
+        deadline = time.monotonic() + 10
+        while cache.misses == 0 and time.monotonic() < deadline:
+            time.sleep(0.001)
+        backing.release.set()
+        fill.join(timeout=10)
+        get.join(timeout=10)
+        self.assertEqual([writer[0]], result)
+        self.assertEqual(1, backing.count)
+
+    def test_name_mismatch(self):
+        writer = TreeIO.PacketMemoryWriter()
+        packet = Packet.create_content_object(ContentObject.create_data(name=Name.from_uri('ccnx:/a'), payload=array("B", [1])))
+        writer.put(packet)
+        cache = CachingPacketReader(TreeIO.PacketMemoryReader(writer), prefetch_workers=0)
+        cache.get(name=Name.from_uri('ccnx:/a'), hash_restriction=packet.content_object_hash())
+        with self.assertRaises(ValueError):
+            cache.get(name=Name.from_uri('ccnx:/b'), hash_restriction=packet.content_object_hash())
+
+    def test_traversal(self):
+        data = array("B", list(range(256)) * 40)
+        packet_buffer = TreeIO.PacketMemoryWriter()
+        tree_options = ManifestTreeOptions(name=Name.from_uri('ccnx:/x'), schema_type=SchemaType.HASHED, signer=None, max_packet_size=500)
+        root_packet = ManifestTree(data_input=MockReader(data.tobytes()), packet_output=packet_buffer, tree_options=tree_options).build()
+
+        backing = CountingReader(packet_buffer)
+        cache = CachingPacketReader(backing)
+        buffer = TreeIO.DataBuffer()
+        traversal = Traversal(packet_input=cache, data_writer=buffer)
+        traversal.traverse(root_name=root_packet.body().name(), hash_restriction=root_packet.content_object_hash())
+        self.assertEqual(data, buffer.buffer)
+
+        # A second traversal is served entirely from the cache
+        count = backing.count
+        buffer = TreeIO.DataBuffer()
+        traversal = Traversal(packet_input=cache, data_writer=buffer)
+        traversal.traverse(root_name=root_packet.body().name(), hash_restriction=root_packet.content_object_hash())
+        self.assertEqual(data, buffer.buffer)
+        self.assertEqual(count, backing.count)
+        cache.close()
@@ -0,0 +1,106 @@
+#  Copyright 2024 Marc Mosko
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+import threading
+from array import array
+from typing import Optional
+
+from ccnpy.core.ContentObject import ContentObject
+from ccnpy.core.HashValue import HashValue
+from ccnpy.core.Name import Name
+from ccnpy.core.Packet import Packet, PacketReader
+from ccnpy.flic.ManifestTree import ManifestTree
+from ccnpy.flic.ManifestTreeOptions import ManifestTreeOptions
+from ccnpy.flic.name_constructor.SchemaType import SchemaType
+from ccnpy.flic.tlvs.Locators import Locators
+from ccnpy.flic.tree.CoalescingPacketReader import CoalescingPacketReader
+from ccnpy.flic.tree.Traversal import Traversal
+from ccnpy.flic.tree.TreeIO import TreeIO
+from tests.MockReader import MockReader
+from tests.ccnpy_testcase import CcnpyTestCase
+
+
+class BlockingReader(PacketReader):
+    """Counts `get()` calls and holds each one until `release` is set"""
+    def __init__(self, packet_input: PacketReader):
+        self._packet_input = packet_input
+        self.release = threading.Event()
+        self.count = 0
+        self.prefetched = []
+
+    def get(self, name: Name, hash_restriction: HashValue, locators: Optional[Locators] = None) -> Packet:
+        self.count += 1
+        self.release.wait(5)
+        return self._packet_input.get(name, hash_restriction)
+
+    def prefetch(self, requests, locators: Optional[Locators] = None):
+        self.prefetched.extend(requests)
+
+
+class CoalescingPacketReaderTest(CcnpyTestCase):
+
+    def test_sparse_traversal(self):
+        # mostly zero blocks, so most data objects have the same hash
+        data = array("B", [0] * 20000 + list(range(256)) + [0] * 20000)
+        packet_buffer = TreeIO.PacketMemoryWriter()
+        tree_options = ManifestTreeOptions(name=Name.from_uri('ccnx:/x'), schema_type=SchemaType.HASHED, signer=None, max_packet_size=500)
+        root = ManifestTree(data_input=MockReader(data.tobytes()), packet_output=packet_buffer, tree_options=tree_options).build()
+        self.assertLess(packet_buffer.total_bytes_by_hash, packet_buffer.total_bytes_by_packet)
+
+        backing = BlockingReader(packet_buffer)
+        backing.release.set()
+        reader = CoalescingPacketReader(backing)
+        buffer = TreeIO.DataBuffer()
+        traversal = Traversal(packet_input=reader, data_writer=buffer)
+        traversal.traverse(root_name=root.body().name(), hash_restriction=root.content_object_hash())
+        self.assertEqual(data, buffer.buffer)
+
+        # each distinct object fetched once
+        self.assertEqual(len(packet_buffer.by_hash), backing.count)
+        self.assertEqual(backing.count, reader.fetches)
+        self.assertEqual(traversal.count(), reader.requests)
+        self.assertGreater(reader.dedup_ratio(), 0.5)
+        self.assertEqual(len(set(h for _, h in backing.prefetched)), len(backing.prefetched))
+
+    def test_concurrent_requests_share_fetch(self):
+        packet = Packet.create_content_object(ContentObject.create_data(payload=array("B", [1, 2, 3])))
+        backing = BlockingReader(TreeIO.PacketMemoryReader([packet]))
+        reader = CoalescingPacketReader(backing, max_entries=0)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(reader.get(None, packet.content_object_hash())))
+                   for _ in range(4)]
+        for t in threads:
+            t.start()
+        while reader.coalesced < 3:
+            threading.Event().wait(0.001)
+        backing.release.set()
+        for t in threads:
+            t.join()
+        self.assertEqual([packet] * 4, results)
+        self.assertEqual(1, backing.count)
+        self.assertEqual(3 * len(packet), reader.bytes_deduplicated)
+
+        # nothing is retained with max_entries=0
+        reader.get(None, packet.content_object_hash())
+        self.assertEqual(2, backing.count)
+
+    def test_error_is_not_cached(self):
+        packet = Packet.create_content_object(ContentObject.create_data(payload=array("B", [1, 2, 3])))
+        backing = BlockingReader(TreeIO.PacketMemoryReader([]))
+        backing.release.set()
+        reader = CoalescingPacketReader(backing)
+        with self.assertRaises(KeyError):
+            reader.get(None, packet.content_object_hash())
+        with self.assertRaises(KeyError):
+            reader.get(None, packet.content_object_hash())
+        self.assertEqual(2, backing.count)
@@ -0,0 +1,141 @@
+#  Copyright 2024 Marc Mosko
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+import hashlib
+import io
+import os
+import tempfile
+from array import array
+
+from ccnpy.core.ContentObject import ContentObject
+from ccnpy.core.Name import Name
+from ccnpy.core.Packet import Packet
+from ccnpy.flic.ManifestTree import ManifestTree
+from ccnpy.flic.ManifestTreeOptions import ManifestTreeOptions
+from ccnpy.flic.name_constructor.SchemaType import SchemaType
+from ccnpy.flic.tlvs.Manifest import Manifest
+from ccnpy.flic.tree.PositionalFileWriter import PositionalFileWriter
+from ccnpy.flic.tree.Traversal import Traversal
+from ccnpy.flic.tree.TreeIO import TreeIO
+from tests.CountingReader import CountingReader
+from tests.MockReader import MockReader
+from tests.ccnpy_testcase import CcnpyTestCase
+
+
+class DataDigesterTest(CcnpyTestCase):
+
+    def setUp(self):
+        self.data = array("B", [(i * 7) % 251 for i in range(10000)]).tobytes()
+
+    @staticmethod
+    def _create_options(schema_type: SchemaType) -> ManifestTreeOptions:
+        manifest_prefix = data_prefix = None
+        if schema_type == SchemaType.SEGMENTED:
+            manifest_prefix = Name.from_uri('ccnx:/manifest')
+            data_prefix = Name.from_uri('ccnx:/data')
+        return ManifestTreeOptions(name=Name.from_uri('ccnx:/x'), schema_type=schema_type, signer=None,
+                                   manifest_prefix=manifest_prefix, data_prefix=data_prefix,
+                                   max_packet_size=500, max_tree_degree=4,
+                                   add_node_subtree_size=True, add_node_subtree_digest=True,
+                                   add_group_subtree_size=True, add_group_subtree_digest=True,
+                                   add_group_leaf_size=True, add_group_leaf_digest=True)
+
+    def _build(self, schema_type: SchemaType):
+        packet_buffer = TreeIO.PacketMemoryWriter()
+        tree = ManifestTree(data_input=io.BytesIO(self.data), packet_output=packet_buffer,
+                            tree_options=self._create_options(schema_type))
+        return packet_buffer, tree.build()
+
+    def _traverse(self, filename: str, packet_buffer, root_packet: Packet) -> (Traversal, CountingReader):
+        reader = CountingReader(packet_buffer)
+        with PositionalFileWriter(filename, truncate=False) as writer:
+            traversal = Traversal(packet_input=reader, data_writer=writer, verify_local=True)
+            traversal.traverse(root_name=root_packet.body().name(), hash_restriction=root_packet.content_object_hash())
+        return traversal, reader
+
+    def test_node_digests(self):
+        packet_buffer, root_packet = self._build(SchemaType.HASHED)
+        expected = hashlib.sha256(self.data).digest()
+        manifest = Manifest.from_content_object(root_packet.body())
+        node_data = manifest.node().node_data()
+        self.assertEqual(len(self.data), node_data.subtree_size().size())
+        self.assertEqual(expected, node_data.subtree_digest().digest().value().tobytes())
+
+        # every manifest's digest matches the data under it, so a traversal without a local copy is unchanged
+        buffer = TreeIO.DataBuffer()
+        Traversal(packet_input=packet_buffer, data_writer=buffer).traverse(root_name=root_packet.body().name(),
+                                                                           hash_restriction=root_packet.content_object_hash())
+        self.assertEqual(self.data, buffer.buffer.tobytes())
+        for packet in packet_buffer:
+            if packet.body().payload_type().is_manifest():
+                self.assertLessEqual(len(packet), 500)
+
+    def test_complete_local_copy(self):
+        packet_buffer, root_packet = self._build(SchemaType.HASHED)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            filename = os.path.join(tmp_dir, 'output')
+            with open(filename, 'wb') as f:
+                f.write(self.data)
+            traversal, reader = self._traverse(filename, packet_buffer, root_packet)
+            # only the root manifest is fetched
+            self.assertEqual(1, reader.count)
+            self.assertEqual(len(self.data), traversal.verified_bytes)
+            self.assertEqual(0, traversal.digest_mismatches)
+
+    def _partial(self, schema_type: SchemaType):
+        packet_buffer, root_packet = self._build(schema_type)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            full_name = os.path.join(tmp_dir, 'full')
+            _, full = self._traverse(full_name, packet_buffer, root_packet)
+
+            # a prior partial download: the tail of the data is missing
+            filename = os.path.join(tmp_dir, 'output')
+            with open(filename, 'wb') as f:
+                f.write(self.data[:7000])
+            traversal, reader = self._traverse(filename, packet_buffer, root_packet)
+            with open(filename, 'rb') as f:
+                self.assertEqual(self.data, f.read())
+            self.assertGreater(traversal.verified_bytes, 0)
+            self.assertLessEqual(traversal.verified_bytes, 7000)
+            self.assertGreater(traversal.digest_mismatches, 0)
+            self.assertGreater(traversal.digest_verify_seconds, 0)
+            self.assertLess(reader.count, full.count)
+
+    def test_partial_local_copy_hashed(self):
+        self._partial(SchemaType.HASHED)
+
+    def test_partial_local_copy_segmented(self):
+        # two hash groups per manifest
+        self._partial(SchemaType.SEGMENTED)
+
+    def test_corrupt_local_copy(self):
+        packet_buffer, root_packet = self._build(SchemaType.PREFIX)
+        corrupt = bytearray(self.data)
+        corrupt[5000] ^= 0xFF
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            filename = os.path.join(tmp_dir, 'output')
+            with open(filename, 'wb') as f:
+                f.write(corrupt)
+            traversal, _ = self._traverse(filename, packet_buffer, root_packet)
+            with open(filename, 'rb') as f:
+                self.assertEqual(self.data, f.read())
+            self.assertLess(traversal.verified_bytes, len(self.data))
+
+    def test_requires_seekable_input(self):
+        with self.assertRaises(ValueError):
+            ManifestTree(data_input=MockReader(self.data), packet_output=TreeIO.PacketMemoryWriter(),
+                         tree_options=self._create_options(SchemaType.HASHED))
+
+    def test_verify_local_requires_read_at(self):
+        with self.assertRaises(ValueError):
+            Traversal(packet_input=TreeIO.PacketMemoryWriter(), data_writer=TreeIO.DataBuffer(), verify_local=True)
@@ -0,0 +1,78 @@
+#  Copyright 2024 Marc Mosko
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+import array
+from concurrent.futures import ThreadPoolExecutor
+
+from ccnpy.crypto.AeadKey import AeadGcm
+from ccnpy.crypto.InsecureKeystore import InsecureKeystore
+from ccnpy.flic.aeadctx.AeadData import AeadData
+from ccnpy.flic.aeadctx.AeadParameters import AeadParameters
+from ccnpy.flic.tlvs.AeadCtx import AeadCtx
+from ccnpy.flic.tlvs.AeadMode import AeadMode
+from ccnpy.flic.tlvs.KdfData import KdfData
+from ccnpy.flic.tlvs.KdfInfo import KdfInfo
+from ccnpy.flic.tree.DecryptorCache import DecryptorCache
+from tests.ccnpy_testcase import CcnpyTestCase
+
+
+class DecryptorCacheTest(CcnpyTestCase):
+    nonce = array.array("B", [1, 2, 3])
+
+    def setUp(self):
+        self.keystore = InsecureKeystore()
+        for key_number in range(1, 5):
+            self.keystore.add_aes_key(AeadParameters(key=AeadGcm.generate(128), key_number=key_number))
+
+    def _ctx(self, key_number: int, kdf_data=None) -> AeadCtx:
+        return AeadCtx(AeadData(key_number, self.nonce, AeadMode.create_aes_gcm_128(), kdf_data=kdf_data))
+
+    def test_alternating_keys(self):
+        cache = DecryptorCache(self.keystore)
+        d1 = cache.get_or_create(self._ctx(1))
+        d2 = cache.get_or_create(self._ctx(2))
+        for _ in range(5):
+            self.assertIs(d1, cache.get_or_create(self._ctx(1)))
+            self.assertIs(d2, cache.get_or_create(self._ctx(2)))
+        self.assertEqual(2, cache.misses)
+        self.assertEqual(10, cache.hits)
+
+    def test_kdf_info_is_part_of_key(self):
+        cache = DecryptorCache(self.keystore)
+        d1 = cache.get_or_create(self._ctx(1, KdfData.create_hkdf_sha256(KdfInfo(b'a'))))
+        d2 = cache.get_or_create(self._ctx(1, KdfData.create_hkdf_sha256(KdfInfo(b'b'))))
+        self.assertIsNot(d1, d2)
+        self.assertIs(d1, cache.get_or_create(self._ctx(1, KdfData.create_hkdf_sha256(KdfInfo(b'a')))))
+
+    def test_lru_bound(self):
+        cache = DecryptorCache(self.keystore, max_entries=2)
+        d1 = cache.get_or_create(self._ctx(1))
+        cache.get_or_create(self._ctx(2))
+        cache.get_or_create(self._ctx(1))
+        # evicts 2, the least recently used
+        cache.get_or_create(self._ctx(3))
+        self.assertEqual(2, len(cache))
+        self.assertEqual(1, cache.evictions)
+        self.assertIs(d1, cache.get_or_create(self._ctx(1)))
+        cache.get_or_create(self._ctx(2))
+        self.assertEqual(4, cache.misses)
+
+    def test_concurrent(self):
+        cache = DecryptorCache(self.keystore)
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(lambda i: cache.get_or_create(self._ctx(1 + i % 4)), range(200)))
+        self.assertEqual(4, len(cache))
+        self.assertEqual(200, cache.hits + cache.misses)
+        # every thread got the cached decryptor for its key
+        for i, decryptor in enumerate(results):
+            self.assertIs(cache.get_or_create(self._ctx(1 + i % 4)), decryptor)
@@ -0,0 +1,51 @@
+#  Copyright 2024 Marc Mosko
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+import time
+
+from ccnpy.flic.tree.DelayWindow import DelayWindow
+from tests.ccnpy_testcase import CcnpyTestCase
+
+
+class DelayWindowTest(CcnpyTestCase):
+
+    def test_grows_without_queueing(self):
+        window = DelayWindow(initial=4, maximum=100)
+        for _ in range(5):
+            window.on_response(0.001)
+            time.sleep(0.002)
+        self.assertEqual(9, window.window())
+        self.assertEqual(0, window.queued)
+
+    def test_shrinks_with_queueing(self):
+        window = DelayWindow(initial=20, maximum=100, alpha=2, beta=4)
+        window.on_response(0.001)
+        time.sleep(0.002)
+        # the RTT grows well above the minimum, i.e. our packets are queued
+        for _ in range(20):
+            window.on_response(0.01)
+        time.sleep(0.01)
+        window.on_response(0.01)
+        self.assertGreater(window.queued, 4)
+        self.assertLess(window.window(), 21)
+
+    def test_ambiguous_sample(self):
+        window = DelayWindow(initial=4)
+        window.on_response(None)
+        self.assertEqual(4, window.window())
+        self.assertEqual(1, window.responses)
+
+    def test_timeout(self):
+        window = DelayWindow(initial=8)
+        window.on_timeout()
+        self.assertEqual(4, window.window())
@@ -0,0 +1,130 @@
+#  Copyright 2024 Marc Mosko
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+import tempfile
+from array import array
+
+from ccnpy.core.ContentObject import ContentObject
+from ccnpy.core.HashValue import HashValue
+from ccnpy.core.Link import Link
+from ccnpy.core.Name import Name
+from ccnpy.core.Packet import Packet
+from ccnpy.core.PacketValidator import PacketValidator
+from ccnpy.core.Tlv import Tlv
+from ccnpy.crypto.InsecureKeystore import InsecureKeystore
+from ccnpy.crypto.RsaKey import RsaKey
+from ccnpy.crypto.RsaSha256 import RsaSha256Signer
+from ccnpy.flic.tree.LinkIndex import LinkIndex
+from ccnpy.flic.tree.TreeIO import TreeIO
+from tests.MockKeys import private_key_pem
+from tests.ccnpy_testcase import CcnpyTestCase
+
+
+class LinkIndexTest(CcnpyTestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.key = RsaKey(private_key_pem)
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+    @staticmethod
+    def _packets(count: int):
+        return [Packet.create_content_object(ContentObject.create_data(name=Name.from_uri(f'ccnx:/a/{i}'),
+                                                                       payload=array("B", [i] * 10)))
+                for i in range(count)]
+
+    def _write(self, packets, **kwargs) -> TreeIO.PacketDirectoryWriter:
+        writer = TreeIO.PacketDirectoryWriter(directory=self.test_dir.name, link_named_objects=True,
+                                              signer=RsaSha256Signer(self.key), **kwargs)
+        for packet in packets:
+            writer.put(packet)
+        writer.close()
+        return writer
+
+    def _read_by_name(self, packets):
+        validator = PacketValidator(InsecureKeystore().add_rsa_key('signer', self.key))
+        reader = TreeIO.PacketDirectoryReader(self.test_dir.name, validator=validator)
+        for packet in packets:
+            actual = reader.get(name=packet.body().name(), hash_restriction=None)
+            self.assertEqual(packet.content_object_hash(), actual.content_object_hash())
+        return validator
+
+    def test_serialize(self):
+        index = LinkIndex()
+        for i in range(3):
+            index.append(name=Name.from_uri(f'ccnx:/a/{i}'), digest=HashValue.create_sha256(array("B", [i] * 32)))
+        actual = LinkIndex.from_content_object(ContentObject.parse(Tlv.deserialize(index.content_object().serialize())))
+        self.assertEqual(3, len(actual))
+        self.assertEqual(HashValue.create_sha256(array("B", [1] * 32)), actual.get(Name.from_uri('ccnx:/a/1')))
+        self.assertIsNone(actual.get(Name.from_uri('ccnx:/b')))
+
+    def test_per_name_links(self):
+        packets = self._packets(5)
+        writer = self._write(packets)
+        self.assertEqual(5, writer.cnt_link_signatures)
+        validator = self._read_by_name(packets)
+        self.assertEqual(5, validator.validations)
+
+    def test_link_workers(self):
+        packets = self._packets(20)
+        writer = self._write(packets, link_workers=3)
+        self.assertEqual(20, writer.cnt_links)
+        self.assertEqual(20, writer.cnt_link_signatures)
+        self._read_by_name(packets)
+
+    def test_link_index(self):
+        packets = self._packets(10)
+        writer = self._write(packets, link_index_size=4)
+        # 4 + 4 + 2 (written by close)
+        self.assertEqual(3, writer.cnt_link_signatures)
+        validator = self._read_by_name(packets)
+        # each index is validated once
+        self.assertEqual(3, validator.validations)
+
+    def test_link_index_split_by_bytes(self):
+        """A large index size is split so each index fits in one packet"""
+        packets = [Packet.create_content_object(ContentObject.create_data(name=Name.from_uri(f'ccnx:/{"a" * 200}/{i}'),
+                                                                          payload=array("B", [1])))
+                   for i in range(400)]
+        writer = self._write(packets, link_index_size=LinkIndex.MAX_ENTRIES)
+        self.assertEqual(2, writer.cnt_link_signatures)
+        self._read_by_name(packets)
+
+    def test_link_index_size_limit(self):
+        with self.assertRaises(ValueError):
+            TreeIO.PacketDirectoryWriter(directory=self.test_dir.name, link_index_size=LinkIndex.MAX_ENTRIES + 1)
+        index = LinkIndex()
+        digest = HashValue.create_sha256(array("B", [0] * 32))
+        while index.fits(name=Name.from_uri('ccnx:/'), digest=digest):
+            index.append(name=Name.from_uri('ccnx:/'), digest=digest)
+        # the shortest entries fill exactly MAX_ENTRIES
+        self.assertEqual(LinkIndex.MAX_ENTRIES, len(index))
+        self.assertLessEqual(len(index.content_object().serialize()), 0xFFFF)
+
+    def test_link_index_tampered(self):
+        packets = self._packets(2)
+        self._write(packets, link_index_size=10)
+        # Overwrite the second object's pointer with a link to a different index
+        index = LinkIndex()
+        index.append(name=packets[0].body().name(), digest=packets[0].content_object_hash())
+        index_packet = Packet.create_content_object(index.content_object())
+        writer = TreeIO.PacketDirectoryWriter(directory=self.test_dir.name)
+        index_packet.save(writer.to_path(index_packet))
+        pointer = ContentObject.create_link(name=packets[1].body().name(), link=Link(digest=index_packet.content_object_hash()))
+        Packet.create_content_object(pointer).save(writer.to_path(packets[1].body().name()))
+
+        reader = TreeIO.PacketDirectoryReader(self.test_dir.name)
+        with self.assertRaises(ValueError):
+            reader.get(name=packets[1].body().name(), hash_restriction=None)
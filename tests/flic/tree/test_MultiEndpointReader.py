@@ -0,0 +1,135 @@
+#  Copyright 2024 Marc Mosko
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+import asyncio
+import socket
+import threading
+from array import array
+
+from ccnpy.apps.packet_server import PacketServer
+from ccnpy.core.HashValue import HashValue
+from ccnpy.core.Name import Name
+from ccnpy.core.Packet import PacketReader
+from ccnpy.flic.ManifestTree import ManifestTree
+from ccnpy.flic.ManifestTreeOptions import ManifestTreeOptions
+from ccnpy.flic.name_constructor.SchemaType import SchemaType
+from ccnpy.flic.tlvs.Locators import Locators
+from ccnpy.flic.tree.MultiEndpointReader import MultiEndpointReader
+from ccnpy.flic.tree.Traversal import Traversal
+from ccnpy.flic.tree.TreeIO import TreeIO
+from tests.MockReader import MockReader
+from tests.ccnpy_testcase import CcnpyTestCase
+
+
+class MultiEndpointReaderTest(CcnpyTestCase):
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+        self.servers = []
+
+    def tearDown(self):
+        for server in self.servers:
+            asyncio.run_coroutine_threadsafe(server.stop(), self.loop).result(timeout=5)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout=5)
+        self.loop.close()
+
+    def _start(self, packets, latency: float = 0.0, loss: float = 0.0):
+        server = PacketServer(packet_input=packets, latency=latency, loss=loss, seed=1)
+        self.servers.append(server)
+        port = asyncio.run_coroutine_threadsafe(server.start('127.0.0.1', 0), self.loop).result(timeout=5)
+        return server, ('127.0.0.1', port)
+
+    @staticmethod
+    def _dead_address():
+        # a port with nothing listening on it
+        with socket.socket() as s:
+            s.bind(('127.0.0.1', 0))
+            return s.getsockname()
+
+    @staticmethod
+    def _build(locators=None):
+        data = array("B", list(range(256)) * 40)
+        packet_buffer = TreeIO.PacketMemoryWriter()
+        tree_options = ManifestTreeOptions(name=Name.from_uri('ccnx:/x'), schema_type=SchemaType.HASHED, signer=None,
+                                           max_packet_size=500, manifest_locators=locators, data_locators=locators)
+        root = ManifestTree(data_input=MockReader(data.tobytes()), packet_output=packet_buffer, tree_options=tree_options).build()
+        return data, packet_buffer, root
+
+    @staticmethod
+    def _retrieve(reader, root):
+        buffer = TreeIO.DataBuffer()
+        Traversal(packet_input=reader, data_writer=buffer).traverse(root_name=root.body().name(), hash_restriction=root.content_object_hash())
+        return buffer
+
+    def test_stripes_across_locators(self):
+        data, packet_buffer, root = self._build(Locators.from_uri('ccnx:/replica'))
+        server1, address1 = self._start(packet_buffer)
+        server2, address2 = self._start(packet_buffer)
+        endpoints = {Name.from_uri('ccnx:/replica'): [address1, address2]}
+        # the root manifest has no locators yet, so it comes from the default endpoint
+        reader = MultiEndpointReader(endpoints=endpoints, default_endpoints=[address1], timeout=1.0)
+        buffer = self._retrieve(reader, root)
+        reader.close()
+        self.assertEqual(data, buffer.buffer)
+        self.assertGreater(server1.interests, 0)
+        self.assertGreater(server2.interests, 0)
+        self.assertEqual(0, reader.failovers)
+
+    def test_failover_from_dead_endpoint(self):
+        data, packet_buffer, root = self._build()
+        server, address = self._start(packet_buffer)
+        reader = MultiEndpointReader(default_endpoints=[self._dead_address(), address], timeout=0.2, demotion_period=60)
+        buffer = self._retrieve(reader, root)
+        reader.close()
+        self.assertEqual(data, buffer.buffer)
+        dead = [e for e in reader.endpoints() if e.address != address][0]
+        # demoted after two failures, then never used again
+        self.assertEqual(2, dead.failures)
+        self.assertEqual(1, dead.demotions)
+        self.assertEqual(len(packet_buffer), server.interests)
+
+    def test_failover_from_lossy_endpoint(self):
+        data, packet_buffer, root = self._build()
+        _, lossy = self._start(packet_buffer, loss=0.5)
+        _, good = self._start(packet_buffer)
+        reader = MultiEndpointReader(default_endpoints=[lossy, good], timeout=0.1)
+        buffer = self._retrieve(reader, root)
+        reader.close()
+        self.assertEqual(data, buffer.buffer)
+        self.assertGreater(reader.failovers, 0)
+
+    def test_prefers_fast_endpoint(self):
+        data, packet_buffer, root = self._build()
+        slow_server, slow = self._start(packet_buffer, latency=0.05)
+        fast_server, fast = self._start(packet_buffer)
+        reader = MultiEndpointReader(default_endpoints=[slow, fast], timeout=1.0)
+        buffer = self._retrieve(reader, root)
+        reader.close()
+        self.assertEqual(data, buffer.buffer)
+        self.assertGreater(fast_server.interests, slow_server.interests)
+
+    def test_forgets_unclaimed_assignments(self):
+        """Read-ahead that is never requested does not pile up in the assignments"""
+        class PrefetchOnlyReader(PacketReader):
+            def get(self, name, hash_restriction, locators=None):
+                raise TimeoutError()
+
+        reader = MultiEndpointReader(default_endpoints=[('127.0.0.1', 1)], max_assigned=4,
+                                     reader_factory=lambda host, port: PrefetchOnlyReader())
+        hashes = [HashValue.create_sha256(array("B", [i] * 32)) for i in range(10)]
+        reader.prefetch([(None, h) for h in hashes])
+        self.assertEqual(hashes[-4:], list(reader._assigned))
+        reader.close()
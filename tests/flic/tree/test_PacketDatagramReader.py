@@ -0,0 +1,101 @@
+#  Copyright 2024 Marc Mosko
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+import asyncio
+import threading
+import time
+from array import array
+
+from ccnpy.apps.packet_server import PacketServer
+from ccnpy.core.Name import Name
+from ccnpy.flic.ManifestTree import ManifestTree
+from ccnpy.flic.ManifestTreeOptions import ManifestTreeOptions
+from ccnpy.flic.name_constructor.SchemaType import SchemaType
+from ccnpy.flic.tree.Traversal import Traversal
+from ccnpy.flic.tree.TreeIO import TreeIO
+from tests.MockReader import MockReader
+from tests.ccnpy_testcase import CcnpyTestCase
+
+
+class PacketDatagramReaderTest(CcnpyTestCase):
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+        self.server = None
+
+    def tearDown(self):
+        if self.server is not None:
+            asyncio.run_coroutine_threadsafe(self.server.stop(), self.loop).result(timeout=5)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout=5)
+        self.loop.close()
+
+    def _start(self, **kwargs) -> int:
+        self.server = PacketServer(**kwargs)
+        return asyncio.run_coroutine_threadsafe(self.server.start_udp('127.0.0.1', 0), self.loop).result(timeout=5)
+
+    @staticmethod
+    def _build():
+        data = array("B", list(range(256)) * 40)
+        packet_buffer = TreeIO.PacketMemoryWriter()
+        tree_options = ManifestTreeOptions(name=Name.from_uri('ccnx:/x'), schema_type=SchemaType.HASHED, signer=None,
+                                           max_packet_size=1500)
+        root = ManifestTree(data_input=MockReader(data.tobytes()), packet_output=packet_buffer, tree_options=tree_options).build()
+        return data, packet_buffer, root
+
+    @staticmethod
+    def _retrieve(reader, root):
+        buffer = TreeIO.DataBuffer()
+        Traversal(packet_input=reader, data_writer=buffer).traverse(root_name=root.body().name(), hash_restriction=root.content_object_hash())
+        reader.close()
+        return buffer
+
+    def test_publish_and_retrieve(self):
+        data, packet_buffer, root = self._build()
+        port = self._start()
+        writer = TreeIO.PacketDatagramWriter(port=port, batch_size=8)
+        for packet in packet_buffer:
+            writer.put(packet)
+        writer.close()
+        self.assertEqual(len(packet_buffer), writer.packets_sent)
+        self.assertEqual(0, writer.oversized)
+
+        deadline = time.monotonic() + 5
+        while self.server.objects_stored < len(packet_buffer) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(len(packet_buffer), len(self.server.store()))
+
+        reader = TreeIO.PacketDatagramReader(port=port)
+        buffer = self._retrieve(reader, root)
+        self.assertEqual(data, buffer.buffer)
+        self.assertEqual(len(packet_buffer), reader.packets_received)
+        self.assertEqual(0, reader.malformed)
+
+    def test_loss_recovery(self):
+        data, packet_buffer, root = self._build()
+        port = self._start(packet_input=packet_buffer, loss=0.2, seed=5)
+        reader = TreeIO.PacketDatagramReader(port=port, timeout=0.05, max_retries=30)
+        buffer = self._retrieve(reader, root)
+        self.assertEqual(data, buffer.buffer)
+        self.assertGreater(self.server.dropped, 0)
+        self.assertGreater(reader.retransmissions, 0)
+
+    def test_oversized(self):
+        port = self._start()
+        writer = TreeIO.PacketDatagramWriter(port=port, mtu=100)
+        _, packet_buffer, _ = self._build()
+        writer.put(packet_buffer[0])
+        writer.close()
+        self.assertEqual(1, writer.oversized)
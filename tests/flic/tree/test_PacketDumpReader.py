@@ -0,0 +1,55 @@
+#  Copyright 2024 Marc Mosko
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+import os
+import tempfile
+from array import array
+
+from ccnpy.core.Name import Name
+from ccnpy.flic.ManifestTree import ManifestTree
+from ccnpy.flic.ManifestTreeOptions import ManifestTreeOptions
+from ccnpy.flic.name_constructor.SchemaType import SchemaType
+from ccnpy.flic.tree.Traversal import Traversal
+from ccnpy.flic.tree.TreeIO import TreeIO
+from tests.MockReader import MockReader
+from tests.ccnpy_testcase import CcnpyTestCase
+
+
+class PacketDumpReaderTest(CcnpyTestCase):
+
+    def test_traversal(self):
+        data = array("B", list(range(256)) * 40)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            filename = os.path.join(tmp_dir, 'dump.ccnx')
+            writer = TreeIO.PacketDumpWriter(filename)
+            tree_options = ManifestTreeOptions(name=Name.from_uri('ccnx:/x'), schema_type=SchemaType.HASHED, signer=None, max_packet_size=500)
+            root = ManifestTree(data_input=MockReader(data.tobytes()), packet_output=writer, tree_options=tree_options).build()
+            writer.close()
+
+            # small chunks, so packets straddle reads
+            reader = TreeIO.PacketDumpReader(filename, chunk_size=333)
+            self.assertEqual(writer.count, len(list(reader)))
+            self.assertEqual(root, reader.get(root.body().name(), root.content_object_hash()))
+
+            buffer = TreeIO.DataBuffer()
+            Traversal(packet_input=reader, data_writer=buffer).traverse(root_name=root.body().name(), hash_restriction=root.content_object_hash())
+            reader.close()
+            self.assertEqual(data, buffer.buffer)
+
+    def test_truncated(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            filename = os.path.join(tmp_dir, 'dump.ccnx')
+            with open(filename, 'wb') as f:
+                f.write(bytes([1, 1, 0, 100, 0, 0, 0, 8, 1, 2, 3]))
+            with self.assertRaises(ValueError):
+                TreeIO.PacketDumpReader(filename)
@@ -0,0 +1,208 @@
+#  Copyright 2024 Marc Mosko
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+import socket
+import threading
+import time
+from array import array
+
+from ccnpy.core.ContentObject import ContentObject
+from ccnpy.core.FixedHeader import FixedHeader
+from ccnpy.core.Name import Name
+from ccnpy.core.HashValue import HashValue
+from ccnpy.core.InterestTemplate import InterestTemplate
+from ccnpy.core.Name import NameComponent
+from ccnpy.core.Packet import Packet
+from ccnpy.flic.ManifestTree import ManifestTree
+from ccnpy.flic.ManifestTreeOptions import ManifestTreeOptions
+from ccnpy.flic.name_constructor.SchemaType import SchemaType
+from ccnpy.flic.tlvs.GroupData import GroupData
+from ccnpy.flic.tlvs.HashGroup import HashGroup
+from ccnpy.flic.tlvs.Pointers import Pointers
+from ccnpy.flic.tlvs.StartSegmentId import StartSegmentId
+from ccnpy.flic.tree.Traversal import Traversal
+from ccnpy.flic.tree.TreeIO import TreeIO
+from tests.MockReader import MockReader
+from tests.ccnpy_testcase import CcnpyTestCase
+
+
+class StandInServer:
+    """
+    Answers Interests from a `PacketMemoryReader`.  It ignores the first `drop_first` Interests, so
+    the reader has to retransmit.  `disconnect()` closes the current connection, and the server accepts
+    the next one.
+    """
+    def __init__(self, packets: TreeIO.PacketMemoryReader, drop_first: int = 0):
+        self._packets = packets
+        self._drop = drop_first
+        self._server = socket.create_server(('127.0.0.1', 0))
+        self.port = self._server.getsockname()[1]
+        self.interests = 0
+        self.connections = 0
+        self._conn = None
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self._server.close()
+
+    def disconnect(self):
+        conn = self._conn
+        if conn is not None:
+            conn.shutdown(socket.SHUT_RDWR)
+
+    def _serve(self):
+        while True:
+            try:
+                conn, _ = self._server.accept()
+            except OSError:
+                return
+            self.connections += 1
+            self._conn = conn
+            with conn:
+                try:
+                    self._serve_connection(conn)
+                except OSError:
+                    pass
+
+    def _serve_connection(self, conn):
+        buffer = bytearray()
+        while True:
+            data = conn.recv(65536)
+            if not data:
+                return
+            buffer.extend(data)
+            while len(buffer) >= 8:
+                length = FixedHeader.deserialize(buffer[:8]).packet_length()
+                if len(buffer) < length:
+                    break
+                interest = Packet.deserialize(array("B", buffer[:length]))
+                del buffer[:length]
+                self.interests += 1
+                if self._drop > 0:
+                    self._drop -= 1
+                    continue
+                try:
+                    packet = self._packets.get(interest.body().name(), interest.body().con_obj_hash_restriction())
+                except (ValueError, KeyError):
+                    continue
+                conn.sendall(packet.serialize().tobytes())
+
+
+class PacketNetworkReaderTest(CcnpyTestCase):
+
+    def _build(self):
+        data = array("B", list(range(256)) * 40)
+        packet_buffer = TreeIO.PacketMemoryWriter()
+        tree_options = ManifestTreeOptions(name=Name.from_uri('ccnx:/x'), schema_type=SchemaType.HASHED, signer=None, max_packet_size=500)
+        root = ManifestTree(data_input=MockReader(data.tobytes()), packet_output=packet_buffer, tree_options=tree_options).build()
+        return data, packet_buffer, root
+
+    def test_traversal(self):
+        data, packet_buffer, root = self._build()
+        server = StandInServer(packet_buffer)
+        reader = TreeIO.PacketNetworkReader(port=server.port)
+        buffer = TreeIO.DataBuffer()
+        traversal = Traversal(packet_input=reader, data_writer=buffer)
+        traversal.traverse(root_name=root.body().name(), hash_restriction=root.content_object_hash())
+        reader.close()
+        server.close()
+        self.assertEqual(data, buffer.buffer)
+        self.assertEqual(len(packet_buffer), reader.packets_received)
+        self.assertEqual(0, reader.retransmissions)
+
+    def test_retransmit(self):
+        data, packet_buffer, root = self._build()
+        server = StandInServer(packet_buffer, drop_first=1)
+        reader = TreeIO.PacketNetworkReader(port=server.port, timeout=0.05)
+        packet = reader.get(root.body().name(), root.content_object_hash())
+        reader.close()
+        server.close()
+        self.assertEqual(root, packet)
+        self.assertEqual(1, reader.retransmissions)
+
+    def test_timeout(self):
+        data = Packet.create_content_object(ContentObject.create_data(payload=array("B", [1, 2, 3])))
+        server = StandInServer(TreeIO.PacketMemoryReader([data]))
+        reader = TreeIO.PacketNetworkReader(port=server.port, timeout=0.02, max_retries=2)
+        with self.assertRaises(TimeoutError):
+            reader.get(None, HashValue.create_sha256(array("B", [0] * 32)))
+        self.assertEqual(3, server.interests)
+        self.assertEqual(1, reader.timeouts)
+        self.assertEqual(data, reader.get(None, data.content_object_hash()))
+        reader.close()
+        server.close()
+
+    def test_prefetch_hash_group(self):
+        """The read-ahead of a segmented hash group is one batch, the same as `encode_hash_group()`"""
+        prefix = Name.from_uri('ccnx:/a')
+        # parsed, so the names compare equal to the ones the server parses from the Interests
+        packets = [Packet.deserialize(Packet.create_content_object(ContentObject.create_data(
+                       name=prefix.append_chunk_id(10 + i), payload=array("B", [i] * 10))).serialize())
+                   for i in range(5)]
+        server = StandInServer(TreeIO.PacketMemoryReader(packets))
+        reader = TreeIO.PacketNetworkReader(port=server.port)
+        writes = []
+        write = reader._write
+
+        def recording_write(buffer, offsets):
+            writes.append((bytes(buffer), list(offsets)))
+            write(buffer, offsets)
+
+        reader._write = recording_write
+        reader.prefetch([(p.body().name(), p.content_object_hash()) for p in packets])
+        for packet in packets:
+            self.assertEqual(packet, reader.get(packet.body().name(), packet.content_object_hash()))
+        reader.close()
+        server.close()
+
+        hash_group = HashGroup(group_data=GroupData(start_segment_id=StartSegmentId(10)),
+                               pointers=Pointers([p.content_object_hash() for p in packets]))
+        template = InterestTemplate(prefix=prefix, suffix_type=NameComponent.chunk_id_type(), hop_limit=reader._hop_limit)
+        buffer, offsets = template.encode_hash_group(hash_group)
+        self.assertEqual([(bytes(buffer), offsets)], writes)
+
+    def test_unclaimed_prefetch_expires(self):
+        """A read-ahead that no get() claims gives its window slot back"""
+        data, packet_buffer, root = self._build()
+        # never answers
+        server = StandInServer(packet_buffer, drop_first=1000)
+        reader = TreeIO.PacketNetworkReader(port=server.port, max_outstanding=2, prefetch_lifetime=0.05)
+        hashes = [HashValue.create_sha256(array("B", [i] * 32)) for i in range(4)]
+        reader.prefetch([(None, h) for h in hashes])
+        self.assertEqual(2, reader.outstanding())
+        time.sleep(0.1)
+        # the next read-ahead finds the window full of stale requests and expires them
+        reader.prefetch([(None, HashValue.create_sha256(array("B", [9] * 32)))])
+        self.assertEqual(2, reader.prefetches_expired)
+        self.assertEqual(2, reader.outstanding())
+        reader.close()
+        server.close()
+
+    def test_reconnect(self):
+        data, packet_buffer, root = self._build()
+        server = StandInServer(packet_buffer)
+        reader = TreeIO.PacketNetworkReader(port=server.port, timeout=0.5)
+        self.assertEqual(root, reader.get(root.body().name(), root.content_object_hash()))
+
+        server.disconnect()
+        deadline = time.monotonic() + 2
+        while reader._socket is not None and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        # the next request reconnects instead of failing
+        self.assertEqual(root, reader.get(root.body().name(), root.content_object_hash()))
+        self.assertEqual(1, reader.reconnects)
+        self.assertEqual(2, server.connections)
+        reader.close()
+        server.close()
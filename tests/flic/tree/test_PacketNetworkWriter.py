@@ -0,0 +1,125 @@
+#  Copyright 2024 Marc Mosko
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+import socket
+import threading
+from array import array
+
+from ccnpy.core.ContentObject import ContentObject
+from ccnpy.core.Packet import Packet
+from ccnpy.flic.tree.TreeIO import TreeIO
+from tests.ccnpy_testcase import CcnpyTestCase
+
+
+class LoopbackSink:
+    """Accepts connections on 127.0.0.1 and keeps the bytes received on each one"""
+    def __init__(self):
+        self._server = socket.create_server(('127.0.0.1', 0))
+        self.port = self._server.getsockname()[1]
+        self.connections = []
+        self._threads = []
+        self._acceptor = threading.Thread(target=self._accept, daemon=True)
+        self._acceptor.start()
+
+    def _accept(self):
+        while True:
+            try:
+                conn, _ = self._server.accept()
+            except OSError:
+                return
+            received = bytearray()
+            self.connections.append(received)
+            t = threading.Thread(target=self._read, args=(conn, received), daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    @staticmethod
+    def _read(conn, received):
+        with conn:
+            while True:
+                data = conn.recv(65536)
+                if not data:
+                    return
+                received.extend(data)
+
+    def close(self):
+        self._server.close()
+        for t in self._threads:
+            t.join(timeout=5)
+
+    def received(self) -> bytes:
+        return b''.join(self.connections)
+
+
+class PacketNetworkWriterTest(CcnpyTestCase):
+
+    @staticmethod
+    def _packets(count: int):
+        return [Packet.create_content_object(ContentObject.create_data(payload=array("B", [i % 256] * (100 + i))))
+                for i in range(count)]
+
+    def test_batches(self):
+        sink = LoopbackSink()
+        packets = self._packets(200)
+        writer = TreeIO.PacketNetworkWriter(port=sink.port, batch_bytes=4096, max_queued=16)
+        for packet in packets:
+            writer.put(packet)
+        writer.close()
+        sink.close()
+
+        expected = b''.join(p.serialize().tobytes() for p in packets)
+        self.assertEqual(expected, sink.received())
+        self.assertEqual(200, writer.packets_sent)
+        self.assertEqual(len(expected), writer.bytes_sent)
+        # coalesced into far fewer sends than packets
+        self.assertLess(writer.send_calls, 100)
+        self.assertGreater(writer.bytes_per_second(), 0)
+
+    def test_flush_interval(self):
+        sink = LoopbackSink()
+        packet = self._packets(1)[0]
+        writer = TreeIO.PacketNetworkWriter(port=sink.port, batch_bytes=1 << 20, flush_interval=0.01)
+        writer.put(packet)
+        writer.flush()
+        self.assertEqual(1, writer.packets_sent)
+        writer.close()
+        sink.close()
+        self.assertEqual(packet.serialize().tobytes(), sink.received())
+
+    def test_reconnect(self):
+        sink = LoopbackSink()
+        packets = self._packets(10)
+        writer = TreeIO.PacketNetworkWriter(port=sink.port, retry_delay=0.01)
+        # break the connection underneath the writer
+        writer._socket.close()
+        for packet in packets:
+            writer.put(packet)
+        writer.close()
+        sink.close()
+        self.assertEqual(1, writer.reconnects)
+        self.assertEqual(b''.join(p.serialize().tobytes() for p in packets), sink.connections[-1])
+
+    def test_gives_up(self):
+        sink = LoopbackSink()
+        writer = TreeIO.PacketNetworkWriter(port=sink.port, max_retries=2, retry_delay=0.01)
+        # point the writer at a port nobody listens on, then break the connection
+        with socket.socket() as unused:
+            unused.bind(('127.0.0.1', 0))
+            writer._address = unused.getsockname()
+        writer._socket.close()
+        writer.put(self._packets(1)[0])
+        with self.assertRaises(OSError):
+            writer.flush()
+        with self.assertRaises(OSError):
+            writer.close()
+        sink.close()
@@ -0,0 +1,202 @@
+#  Copyright 2024 Marc Mosko
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+import os
+import tempfile
+import threading
+from array import array
+
+from ccnpy.core.Name import Name
+from ccnpy.core.PacketValidator import PacketValidator
+from ccnpy.flic.ManifestTree import ManifestTree
+from ccnpy.flic.ManifestTreeOptions import ManifestTreeOptions
+from ccnpy.flic.name_constructor.SchemaType import SchemaType
+from ccnpy.flic.tlvs.Manifest import Manifest
+from ccnpy.flic.tree.PositionalFileWriter import PositionalFileWriter
+from ccnpy.flic.tree.Traversal import Traversal
+from ccnpy.flic.tree.TreeIO import TreeIO
+from tests.MockReader import MockReader
+from tests.ccnpy_testcase import CcnpyTestCase
+
+
+class PositionalFileWriterTest(CcnpyTestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.tmp_dir.name, 'out.bin')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _read_back(self):
+        with open(self.filename, 'rb') as f:
+            return f.read()
+
+    def test_out_of_order(self):
+        with PositionalFileWriter(self.filename, size=12, fallocate=True) as writer:
+            writer.write_at(8, b'ijkl')
+            self.assertFalse(writer.is_complete())
+            writer.write_at(0, array("B", b'abcd'))
+            self.assertEqual([(4, 8)], writer.missing_ranges())
+            writer.write_at(4, memoryview(b'efgh'))
+            self.assertTrue(writer.is_complete())
+            self.assertEqual(12, writer.bytes_written)
+        self.assertEqual(b'abcdefghijkl', self._read_back())
+
+    def test_preallocate_never_shrinks(self):
+        with PositionalFileWriter(self.filename, size=12) as writer:
+            writer.preallocate(4)
+            self.assertEqual(12, writer.size())
+            writer.write_at(0, b'abcd')
+            self.assertFalse(writer.is_complete())
+        self.assertEqual(12, os.path.getsize(self.filename))
+
+    def test_truncate(self):
+        with open(self.filename, 'wb') as f:
+            f.write(b'abcdefgh')
+        with PositionalFileWriter(self.filename, truncate=False) as writer:
+            writer.write_at(0, b'ABCD')
+            writer.truncate(4)
+            self.assertEqual(4, writer.size())
+            self.assertTrue(writer.is_complete())
+        self.assertEqual(b'ABCD', self._read_back())
+
+    def test_sequential(self):
+        with PositionalFileWriter(self.filename) as writer:
+            writer.write(b'abc')
+            writer.write(b'def')
+        self.assertEqual(b'abcdef', self._read_back())
+
+    def test_no_truncate(self):
+        with open(self.filename, 'wb') as f:
+            f.write(b'abcdef')
+        with PositionalFileWriter(self.filename, truncate=False) as writer:
+            writer.write_at(3, b'XYZ')
+        self.assertEqual(b'abcXYZ', self._read_back())
+
+    def test_traversal_subtrees_out_of_order(self):
+        """
+        Traverse the children of the top manifest in reverse order, each at the offset computed from the
+        size TLVs, and check the output file is the same as the input.
+        """
+        data = array("B", list(range(256)) * 20)
+        packet_buffer = TreeIO.PacketMemoryWriter()
+        tree_options = ManifestTreeOptions(name=Name.from_uri('ccnx:/x'), schema_type=SchemaType.HASHED, signer=None,
+                                           max_packet_size=300, add_node_subtree_size=True)
+        root_packet = ManifestTree(data_input=MockReader(data.tobytes()), packet_output=packet_buffer,
+                                   tree_options=tree_options).build()
+
+        # root -> top manifest -> children
+        root_manifest = Manifest.from_content_object(root_packet.body())
+        top_hash = list(root_manifest.hash_values())[0].hash_value
+        top_packet = packet_buffer.get(name=None, hash_restriction=top_hash)
+        top_manifest = Manifest.from_content_object(top_packet.body())
+        children = [packet_buffer.get(name=None, hash_restriction=x.hash_value) for x in top_manifest.hash_values()]
+        self.assertGreater(len(children), 1)
+
+        nc_cache = Traversal.NameConstructorCache()
+        nc_cache.update(root_manifest.node().node_data().nc_defs())
+        # the offsets come from the children's sizes alone, without traversing below them
+        traversal = Traversal(packet_input=packet_buffer, data_writer=None)
+        offsets = traversal.child_offsets(top_manifest, children)
+        self.assertEqual(0, offsets[0])
+        self.assertEqual(0, traversal.count())
+
+        with PositionalFileWriter(self.filename, size=len(data)) as writer:
+            traversal = Traversal(packet_input=packet_buffer, data_writer=writer)
+            pairs = list(reversed(list(zip(children, offsets))))
+            for child, offset in pairs[:-1]:
+                traversal.preorder(child, nc_cache=nc_cache, offset=offset)
+                # a subtree's SubtreeSize does not change the expected file size
+                self.assertEqual(len(data), writer.size())
+            self.assertFalse(writer.is_complete())
+            child, offset = pairs[-1]
+            traversal.preorder(child, nc_cache=nc_cache, offset=offset)
+            self.assertTrue(writer.is_complete())
+        self.assertEqual(data.tobytes(), self._read_back())
+
+    def test_traversal_subtrees_concurrently(self):
+        """Each thread has its own Traversal, and they share the reader, validator, and writer"""
+        data = array("B", list(range(256)) * 20)
+        packet_buffer, top_manifest, children, nc_cache = self._top_children(data, add_node_subtree_size=True)
+        offsets = Traversal(packet_input=packet_buffer, data_writer=None).child_offsets(top_manifest, children)
+        validator = PacketValidator(None)
+        errors = []
+
+        def visit(child, offset):
+            try:
+                Traversal(packet_input=packet_buffer, data_writer=writer, validator=validator).preorder(child, nc_cache=nc_cache,
+                                                                                           offset=offset)
+            except Exception as e:
+                errors.append(e)
+
+        with PositionalFileWriter(self.filename, size=len(data)) as writer:
+            threads = [threading.Thread(target=visit, args=(child, offset)) for child, offset in zip(children, offsets)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertEqual([], errors)
+            self.assertTrue(writer.is_complete())
+        self.assertEqual(data.tobytes(), self._read_back())
+
+    def _top_children(self, data: array, **kwargs):
+        packet_buffer = TreeIO.PacketMemoryWriter()
+        tree_options = ManifestTreeOptions(name=Name.from_uri('ccnx:/x'), schema_type=SchemaType.HASHED, signer=None,
+                                           max_packet_size=300, **kwargs)
+        root_packet = ManifestTree(data_input=MockReader(data.tobytes()), packet_output=packet_buffer,
+                                   tree_options=tree_options).build()
+        root_manifest = Manifest.from_content_object(root_packet.body())
+        top_packet = packet_buffer.get(name=None, hash_restriction=list(root_manifest.hash_values())[0].hash_value)
+        top_manifest = Manifest.from_content_object(top_packet.body())
+        children = [packet_buffer.get(name=None, hash_restriction=x.hash_value) for x in top_manifest.hash_values()]
+        nc_cache = Traversal.NameConstructorCache()
+        nc_cache.update(root_manifest.node().node_data().nc_defs())
+        return packet_buffer, top_manifest, children, nc_cache
+
+    def test_child_offsets_data_only(self):
+        """The top manifest only points to data, so no child manifest needs a SubtreeSize"""
+        data = array("B", list(range(256)) * 4)
+        packet_buffer, top_manifest, children, nc_cache = self._top_children(data, add_group_subtree_size=True,
+                                                                   add_group_leaf_size=True)
+        traversal = Traversal(packet_input=packet_buffer, data_writer=None)
+        offsets = traversal.child_offsets(top_manifest, children, offset=100)
+        self.assertEqual([100, 379, 658, 937], offsets)
+
+        with PositionalFileWriter(self.filename, size=len(data)) as writer:
+            traversal = Traversal(packet_input=packet_buffer, data_writer=writer)
+            for child, offset in reversed(list(zip(children, offsets))):
+                traversal.preorder(child, offset=offset - 100)
+            self.assertTrue(writer.is_complete())
+        self.assertEqual(data.tobytes(), self._read_back())
+
+    def test_child_offsets_without_sizes(self):
+        data = array("B", list(range(256)) * 20)
+        packet_buffer, top_manifest, children, nc_cache = self._top_children(data)
+        traversal = Traversal(packet_input=packet_buffer, data_writer=None)
+        with self.assertRaises(ValueError):
+            traversal.child_offsets(top_manifest, children)
+
+    def test_traversal_preallocates(self):
+        data = array("B", list(range(100)) * 10)
+        packet_buffer = TreeIO.PacketMemoryWriter()
+        tree_options = ManifestTreeOptions(name=Name.from_uri('ccnx:/x'), schema_type=SchemaType.HASHED, signer=None,
+                                           max_packet_size=300, add_node_subtree_size=True)
+        root_packet = ManifestTree(data_input=MockReader(data.tobytes()), packet_output=packet_buffer,
+                                   tree_options=tree_options).build()
+        with PositionalFileWriter(self.filename) as writer:
+            traversal = Traversal(packet_input=packet_buffer, data_writer=writer)
+            traversal.traverse(root_name=root_packet.body().name(), hash_restriction=root_packet.content_object_hash())
+            self.assertEqual(len(data), writer.size())
+            self.assertTrue(writer.is_complete())
+        self.assertEqual(data.tobytes(), self._read_back())
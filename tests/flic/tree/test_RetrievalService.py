@@ -0,0 +1,120 @@
+#  Copyright 2024 Marc Mosko
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+import threading
+from array import array
+from typing import Optional
+
+from ccnpy.core.HashValue import HashValue
+from ccnpy.core.Name import Name
+from ccnpy.core.Packet import Packet, PacketReader
+from ccnpy.flic.ManifestTree import ManifestTree
+from ccnpy.flic.ManifestTreeOptions import ManifestTreeOptions
+from ccnpy.flic.name_constructor.SchemaType import SchemaType
+from ccnpy.flic.tlvs.Locators import Locators
+from ccnpy.flic.tree.RetrievalService import RetrievalService
+from ccnpy.flic.tree.TreeIO import TreeIO
+from tests.MockReader import MockReader
+from tests.ccnpy_testcase import CcnpyTestCase
+
+
+class RecordingReader(PacketReader):
+    """Records which hashes reach the backing reader, in order"""
+    def __init__(self, packet_input: PacketReader):
+        self._packet_input = packet_input
+        self._lock = threading.Lock()
+        self.requests = []
+
+    def get(self, name: Name, hash_restriction: HashValue, locators: Optional[Locators] = None) -> Packet:
+        with self._lock:
+            self.requests.append(hash_restriction)
+        return self._packet_input.get(name=name, hash_restriction=hash_restriction)
+
+
+class RetrievalServiceTest(CcnpyTestCase):
+
+    @staticmethod
+    def _build(name: str, data: array, packet_buffer: TreeIO.PacketMemoryWriter) -> Packet:
+        tree_options = ManifestTreeOptions(name=Name.from_uri(name), schema_type=SchemaType.HASHED, signer=None, max_packet_size=500)
+        return ManifestTree(data_input=MockReader(data.tobytes()), packet_output=packet_buffer, tree_options=tree_options).build()
+
+    def test_many_trees(self):
+        packet_buffer = TreeIO.PacketMemoryWriter()
+        trees = []
+        for i in range(5):
+            data = array("B", [(i + j) % 256 for j in range(3000 * (i + 1))])
+            root = self._build(f'ccnx:/tree/{i}', data, packet_buffer)
+            trees.append((data, root))
+
+        backing = RecordingReader(packet_buffer)
+        with RetrievalService(backing, max_trees=5, fetch_workers=2) as service:
+            handles = []
+            for data, root in trees:
+                buffer = TreeIO.DataBuffer()
+                handle = service.submit(root_name=root.body().name(), hash_restriction=root.content_object_hash(), data_writer=buffer)
+                handles.append((data, buffer, handle))
+
+            for data, buffer, handle in handles:
+                handle.result(timeout=10)
+                self.assertEqual(data, buffer.buffer)
+                self.assertEqual(len(data), handle.data_bytes)
+                self.assertGreater(handle.packets, 0)
+                self.assertGreater(handle.throughput(), 0)
+
+            metrics = service.metrics()
+            self.assertEqual(5, metrics['trees_completed'])
+            self.assertEqual(0, metrics['trees_failed'])
+            self.assertEqual(sum(len(data) for data, _ in trees), metrics['data_bytes'])
+            self.assertEqual(sum(h.packets for _, _, h in handles), metrics['packets'])
+
+            # finished retrievals keep their totals, but not their traversal or data_writer
+            self.assertEqual(5, metrics['trees_submitted'])
+            self.assertEqual([], service.retrievals())
+            self.assertTrue(all(h._traversal is None for _, _, h in handles))
+
+    def test_same_tree_twice_uses_cache(self):
+        packet_buffer = TreeIO.PacketMemoryWriter()
+        data = array("B", list(range(256)) * 20)
+        root = self._build('ccnx:/x', data, packet_buffer)
+        backing = RecordingReader(packet_buffer)
+        with RetrievalService(backing) as service:
+            first = service.submit(root_name=root.body().name(), hash_restriction=root.content_object_hash(), data_writer=TreeIO.DataBuffer())
+            first.result(timeout=10)
+            count = len(backing.requests)
+            buffer = TreeIO.DataBuffer()
+            service.submit(root_name=root.body().name(), hash_restriction=root.content_object_hash(), data_writer=buffer).result(timeout=10)
+            self.assertEqual(data, buffer.buffer)
+            self.assertEqual(count, len(backing.requests))
+
+    def test_failure_is_per_tree(self):
+        packet_buffer = TreeIO.PacketMemoryWriter()
+        data = array("B", list(range(256)) * 4)
+        root = self._build('ccnx:/x', data, packet_buffer)
+        with RetrievalService(packet_buffer) as service:
+            bad = service.submit(root_name=Name.from_uri('ccnx:/missing'), hash_restriction=HashValue.create_sha256(array("B", [0] * 32)), data_writer=TreeIO.DataBuffer())
+            good = service.submit(root_name=root.body().name(), hash_restriction=root.content_object_hash(), data_writer=TreeIO.DataBuffer())
+            with self.assertRaises(Exception):
+                bad.result(timeout=10)
+            good.result(timeout=10)
+            self.assertEqual(1, service.trees_failed)
+            self.assertEqual(1, service.trees_completed)
+
+    def test_fair_queue_round_robin(self):
+        queue = RetrievalService._FairQueue()
+        for i in range(3):
+            queue.put(1, ('a', i))
+        queue.put(2, ('b', 0))
+        queue.put(2, ('b', 1))
+        queue.put(1, ('a', 'urgent'), urgent=True)
+        order = [queue.get() for _ in range(6)]
+        self.assertEqual([('a', 'urgent'), ('b', 0), ('a', 0), ('b', 1), ('a', 1), ('a', 2)], order)
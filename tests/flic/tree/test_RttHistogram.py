@@ -0,0 +1,61 @@
+#  Copyright 2024 Marc Mosko
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+import json
+
+from ccnpy.flic.tree.RttHistogram import RttHistogram
+from tests.ccnpy_testcase import CcnpyTestCase
+
+
+class RttHistogramTest(CcnpyTestCase):
+
+    def test_empty(self):
+        histogram = RttHistogram()
+        self.assertEqual(0, len(histogram))
+        self.assertIsNone(histogram.mean())
+        self.assertIsNone(histogram.percentile(50))
+        self.assertEqual([], histogram.buckets())
+
+    def test_buckets(self):
+        histogram = RttHistogram(min_rtt=0.001, buckets=4)
+        for rtt in [0.0005, 0.0015, 0.0015, 0.003, 10.0]:
+            histogram.add(rtt)
+        self.assertEqual([{'le': 0.001, 'count': 1}, {'le': 0.002, 'count': 2}, {'le': 0.004, 'count': 1},
+                          {'le': None, 'count': 1}],
+                         histogram.buckets())
+        self.assertEqual(0.0005, histogram.minimum)
+        self.assertEqual(10.0, histogram.maximum)
+        self.assertEqual(0.002, histogram.percentile(50))
+        # the unbounded bucket reports the largest sample
+        self.assertEqual(10.0, histogram.percentile(99))
+
+    def test_to_dict(self):
+        histogram = RttHistogram()
+        histogram.add(0.01)
+        histogram.add(0.03)
+        d = histogram.to_dict()
+        self.assertEqual(2, d['count'])
+        self.assertAlmostEqual(0.02, d['mean'])
+        self.assertEqual(0.03, d['max'])
+
+    def test_to_dict_is_json(self):
+        """The overflow bucket must not serialize as the non-standard `Infinity`"""
+        histogram = RttHistogram(min_rtt=0.001, buckets=4)
+        histogram.add(0.0015)
+        histogram.add(10.0)
+        d = json.loads(json.dumps(histogram.to_dict(), allow_nan=False))
+        self.assertEqual([{'le': 0.002, 'count': 1}, {'le': None, 'count': 1}], d['buckets'])
+
+    def test_negative(self):
+        with self.assertRaises(ValueError):
+            RttHistogram().add(-1)
@@ -0,0 +1,184 @@
+#  Copyright 2024 Marc Mosko
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+import hashlib
+import os
+import tempfile
+from array import array
+from typing import Optional
+from unittest import mock
+
+from ccnpy.core.HashValue import HashValue
+from ccnpy.core.Name import Name
+from ccnpy.core.Packet import Packet, PacketReader
+from ccnpy.flic.ManifestTree import ManifestTree
+from ccnpy.flic.ManifestTreeOptions import ManifestTreeOptions
+from ccnpy.flic.name_constructor.SchemaType import SchemaType
+from ccnpy.flic.tlvs.Locators import Locators
+from ccnpy.flic.tree.PositionalFileWriter import PositionalFileWriter
+from ccnpy.flic.tree.Traversal import Traversal
+from ccnpy.flic.tree.TraversalState import TraversalState
+from ccnpy.flic.tree.TreeIO import TreeIO
+from tests.MockReader import MockReader
+from tests.ccnpy_testcase import CcnpyTestCase
+
+
+class FailingReader(PacketReader):
+    """Counts the `get()` calls and fails after `limit` of them"""
+    def __init__(self, packet_input: PacketReader, limit: Optional[int] = None):
+        self._packet_input = packet_input
+        self._limit = limit
+        self.count = 0
+        self.prefetched = []
+
+    def prefetch(self, requests, locators: Optional[Locators] = None):
+        self.prefetched.extend(hash_restriction for _, hash_restriction in requests)
+
+    def get(self, name: Name, hash_restriction: HashValue, locators: Optional[Locators] = None) -> Packet:
+        if self._limit is not None and self.count >= self._limit:
+            raise IOError("Connection lost")
+        self.count += 1
+        return self._packet_input.get(name=name, hash_restriction=hash_restriction)
+
+
+class TraversalStateTest(CcnpyTestCase):
+
+    def setUp(self):
+        self.data = array("B", list(range(256)) * 40)
+        self.packet_buffer = TreeIO.PacketMemoryWriter()
+        tree_options = ManifestTreeOptions(name=Name.from_uri('ccnx:/x'), schema_type=SchemaType.HASHED, signer=None, max_packet_size=200)
+        self.root_packet = ManifestTree(data_input=MockReader(self.data.tobytes()), packet_output=self.packet_buffer, tree_options=tree_options).build()
+
+    def _traverse(self, filename: str, reader: PacketReader, state: TraversalState, truncate: bool) -> Traversal:
+        with PositionalFileWriter(filename, truncate=truncate) as writer:
+            traversal = Traversal(packet_input=reader, data_writer=writer, state=state)
+            try:
+                traversal.traverse(root_name=self.root_packet.body().name(), hash_restriction=self.root_packet.content_object_hash())
+            except IOError:
+                state.save()
+                raise
+        return traversal
+
+    def test_resume(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            filename = os.path.join(tmp_dir, 'output')
+            state_file = filename + '.state'
+
+            full = FailingReader(self.packet_buffer)
+            self._traverse(os.path.join(tmp_dir, 'full'), full, TraversalState(), truncate=True)
+
+            # interrupt partway through
+            with self.assertRaises(IOError):
+                self._traverse(filename, FailingReader(self.packet_buffer, limit=full.count // 2), TraversalState(state_file), truncate=True)
+
+            state = TraversalState.load(state_file, output_filename=filename)
+            self.assertGreater(len(state.completed), 0)
+
+            completed = list(state.completed)
+            resumed = FailingReader(self.packet_buffer)
+            traversal = self._traverse(filename, resumed, state, truncate=False)
+            self.assertGreater(traversal.skipped_subtrees, 0)
+            self.assertLess(resumed.count, full.count)
+            # the completed subtrees are not prefetched, whichever child of their parent they are
+            self.assertFalse(any(TraversalState._key(h) in completed for h in resumed.prefetched))
+
+            with open(filename, 'rb') as f:
+                self.assertEqual(self.data.tobytes(), f.read())
+
+            # a second resume skips the whole tree after the root
+            again = FailingReader(self.packet_buffer)
+            traversal = self._traverse(filename, again, state, truncate=False)
+            self.assertEqual(1, again.count)
+            self.assertEqual(len(self.data), traversal.skipped_bytes)
+
+    def test_load_rejects_short_output(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            filename = os.path.join(tmp_dir, 'output')
+            state_file = filename + '.state'
+            state = TraversalState(state_file)
+            state.set_root(self.root_packet.content_object_hash())
+            state.add_range(0, 100)
+            state.mark_complete(self.root_packet.content_object_hash(), offset=0, length=100,
+                                pieces=[(0, 100, hashlib.sha256(bytes(100)).digest())])
+            state.save()
+
+            with open(filename, 'wb') as f:
+                f.write(bytes(100))
+            loaded = TraversalState.load(state_file, output_filename=filename)
+            self.assertEqual(100, loaded.completed_length(self.root_packet.content_object_hash(), 0))
+            self.assertIsNone(loaded.completed_length(self.root_packet.content_object_hash(), 10))
+
+            with open(filename, 'wb') as f:
+                f.write(bytes(50))
+            loaded = TraversalState.load(state_file, output_filename=filename)
+            self.assertEqual(0, len(loaded.completed))
+            self.assertIsNone(loaded.completed_length(self.root_packet.content_object_hash(), 0))
+
+    def test_load_checks_digests(self):
+        """A preallocated output is long enough, but its bytes were changed after the state was saved"""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            filename = os.path.join(tmp_dir, 'output')
+            state_file = filename + '.state'
+            with self.assertRaises(IOError):
+                self._traverse(filename, FailingReader(self.packet_buffer, limit=20), TraversalState(state_file), truncate=True)
+            with PositionalFileWriter(filename, size=len(self.data), truncate=False):
+                pass
+
+            # corrupt the first byte of a completed subtree
+            state = TraversalState.load(state_file, output_filename=filename)
+            self.assertGreater(len(state.completed), 0)
+            offset = min(offset for offset, _, _ in state.completed.values())
+            with open(filename, 'r+b') as f:
+                f.seek(offset)
+                f.write(b'\xff')
+
+            # the resumed download fetches the corrupted subtrees again and is correct
+            traversal = self._traverse(filename, FailingReader(self.packet_buffer), state, truncate=False)
+            self.assertEqual(1, traversal.digest_mismatches)
+            self.assertLess(traversal.skipped_bytes, len(self.data))
+            with open(filename, 'rb') as f:
+                self.assertEqual(self.data.tobytes(), f.read())
+
+            # without the output file there is nothing to check, so nothing is skipped
+            self.assertEqual(0, len(TraversalState.load(state_file).completed))
+
+    def test_resume_reads_skipped_bytes_once(self):
+        """Checking a loaded subtree reads its bytes once, and recording its parents does not read them again"""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            filename = os.path.join(tmp_dir, 'output')
+            state_file = filename + '.state'
+            with self.assertRaises(IOError):
+                self._traverse(filename, FailingReader(self.packet_buffer, limit=40), TraversalState(state_file), truncate=True)
+
+            for verify in (True, False):
+                state = TraversalState.load(state_file, output_filename=filename, verify=verify)
+                with mock.patch.object(PositionalFileWriter, 'read_at', autospec=True,
+                                       side_effect=PositionalFileWriter.read_at) as read_at:
+                    traversal = self._traverse(filename, FailingReader(self.packet_buffer), state, truncate=False)
+                self.assertGreater(traversal.skipped_bytes, 0)
+                read_bytes = sum(call.args[2] for call in read_at.call_args_list)
+                self.assertEqual(traversal.skipped_bytes if verify else 0, read_bytes)
+                with open(filename, 'rb') as f:
+                    self.assertEqual(self.data.tobytes(), f.read())
+                # the root record is built from the skipped children's pieces
+                root = self.root_packet.content_object_hash()
+                self.assertEqual(len(self.data), state.completed_length(root, 0))
+                self.assertEqual(len(self.data), sum(length for _, length, _ in state.completed_pieces(root)))
+                state.save()
+
+    def test_different_root_starts_over(self):
+        state = TraversalState()
+        state.set_root(self.root_packet.content_object_hash())
+        state.add_range(0, 10)
+        state.set_root(HashValue.create_sha256(array("B", [1] * 32)))
+        self.assertEqual(0, state.ranges.total())
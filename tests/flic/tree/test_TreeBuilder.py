@@ -23,10 +23,12 @@ from ccnpy.crypto.InsecureKeystore import InsecureKeystore
 from ccnpy.flic.ManifestEncryptor import ManifestEncryptor
 from ccnpy.flic.ManifestFactory import ManifestFactory
 from ccnpy.flic.ManifestTreeOptions import ManifestTreeOptions
+from ccnpy.flic.aeadctx.AeadDecryptor import AeadDecryptor
 from ccnpy.flic.aeadctx.AeadEncryptor import AeadEncryptor
 from ccnpy.flic.aeadctx.AeadParameters import AeadParameters
 from ccnpy.flic.name_constructor.NameConstructorContext import NameConstructorContext
 from ccnpy.flic.name_constructor.SchemaType import SchemaType
+from ccnpy.flic.tlvs.Manifest import Manifest
 from ccnpy.flic.tree.ManifestGraph import ManifestGraph
 from ccnpy.flic.tree.OptimizerResult import OptimizerResult
 from ccnpy.flic.tree.Traversal import Traversal
@@ -40,16 +42,17 @@ from tests.MockReader import MockReader
 class TreeBuilderTest(CcnpyTestCase):
 
     @staticmethod
-    def _create_options(max_packet_size: int, encryptor: Optional[ManifestEncryptor]):
+    def _create_options(max_packet_size: int, encryptor: Optional[ManifestEncryptor], encryption_workers: int = 4):
         return ManifestTreeOptions(max_packet_size=max_packet_size,
                                    name=Name.from_uri('ccnx:/a'),
                                    schema_type=SchemaType.HASHED,
                                    signer=None,
                                    manifest_encryptor=encryptor,
+                                   encryption_workers=encryption_workers,
                                    debug=False)
 
-    def _create_tree_builder(self, metadata, solution, packet_buffer, encryptor=None, graph=None) -> TreeBuilder:
-        tree_options = self._create_options(max_packet_size=1500, encryptor=encryptor)
+    def _create_tree_builder(self, metadata, solution, packet_buffer, encryptor=None, graph=None, encryption_workers: int = 4) -> TreeBuilder:
+        tree_options = self._create_options(max_packet_size=1500, encryptor=encryptor, encryption_workers=encryption_workers)
         params = TreeParameters(file_metadata=metadata, max_packet_size=tree_options.max_packet_size, solution=solution)
         factory = ManifestFactory(tree_options=tree_options)
 
@@ -372,3 +375,46 @@ class TreeBuilderTest(CcnpyTestCase):
 
         # 15 manifest nodes and 15 data nodes
         self.assertEqual(30, traversal.count())
+
+    def test_encrypted_parallel_matches_serial(self):
+        """
+        The nary (4, 3) tree of 61 data objects, encrypted with and without the encryption thread pool.
+        Both must have the same plaintext manifests written in the same order.
+        """
+        expected = array("B", list(range(0, 61)))
+        key = AeadCcm.generate(bits=256)
+        keystore = InsecureKeystore()
+        keystore.add_aes_key(AeadParameters(key_number=1234, key=key, aead_salt=None))
+
+        manifest_pointers = []
+        for workers in [0, 4]:
+            packet_buffer = TreeIO.PacketMemoryWriter()
+            metadata = create_file_chunks(data=expected, packet_buffer=packet_buffer, max_chunk_size=1)
+            solution = OptimizerResult(num_data_objects=len(metadata), num_pointers=7, direct_per_node=4,
+                                       indirect_per_node=3, num_internal_nodes=3, waste=0)
+            encryptor = AeadEncryptor(AeadParameters(key=key, key_number=1234))
+            tb = self._create_tree_builder(metadata=metadata, solution=solution, packet_buffer=packet_buffer,
+                                           encryptor=encryptor, encryption_workers=workers)
+            top_manifest = tb.build()
+            self.assertEqual(workers > 0, tb._factory.is_parallel())
+            tb._factory.close()
+
+            data_buffer = TreeIO.DataBuffer()
+            traversal = Traversal(data_writer=data_buffer, packet_input=packet_buffer, keystore=keystore)
+            traversal.preorder(top_manifest, Traversal.NameConstructorCache(tb.name_context().export_schemas()))
+            self.assertEqual(expected, data_buffer.buffer)
+            self.assertEqual(71, traversal.count())
+            self.assertEqual(7, tb.leaf_count())
+            # The plaintext pointers in write order.  The ciphertext differs by nonce, so a pointer to a child
+            # manifest is only recorded as 'M'.
+            decryptor = AeadDecryptor(AeadParameters(key=key, key_number=1234))
+            data_hashes = {p.content_object_hash().serialize().tobytes() for p in packet_buffer if not p.body().is_manifest()}
+            pointers = []
+            for packet in packet_buffer:
+                if packet.body().is_manifest():
+                    node = decryptor.decrypt_manifest(Manifest.from_content_object(packet.body())).node()
+                    hash_values = [h.serialize().tobytes() for hg in node.hash_groups() for h in hg.pointers()]
+                    pointers.append([h if h in data_hashes else 'M' for h in hash_values])
+            manifest_pointers.append(pointers)
+
+        self.assertEqual(manifest_pointers[0], manifest_pointers[1])